@@ -1,12 +1,18 @@
 import os
 import subprocess
 import click
+from datetime import date, datetime
 from pathlib import Path
 from flask import Flask, jsonify, request, g
 from sqlalchemy import text, inspect
 from werkzeug.exceptions import HTTPException
 
 from app.extensions import db, migrate, cors
+from app.realtime import events as realtime_events  # noqa: F401  (registers publish-on-commit hooks)
+from app.services import inspector_dispatch  # noqa: F401  (registers dispatch index hooks)
+from app.services import rollups  # noqa: F401  (registers rollup dirty-day hooks)
+from app.services import merchant_stats  # noqa: F401  (registers merchant stat delta hooks)
+from app.services import leaderboards  # noqa: F401  (registers leaderboard update hooks)
 from app.models import User
 from app.segments.segment_09_users_auth_routes import auth_bp
 from app.segments.segment_20_rides_routes import ride_bp
@@ -31,6 +37,7 @@ from app.segments.segment_payout_pdf import payout_pdf_bp
 from app.segments.segment_autopilot import autopilot_bp, payments_settings_bp
 from app.segments.segment_driver_availability import driver_avail_bp
 from app.segments.segment_driver_offers import driver_offer_bp
+from app.segments.segment_delivery_quotes import delivery_quotes_bp
 from app.segments.segment_merchants import merchants_bp
 from app.segments.segment_payment_webhooks import webhooks_bp
 from app.segments.segment_notifications import notifications_bp
@@ -59,6 +66,7 @@ from app.segments.segment_pricing import pricing_bp
 from app.segments.segment_omega_intelligence import omega_bp
 from app.utils.jwt_utils import decode_token, get_bearer_token
 from app.utils.autopilot import get_settings
+from app.utils.env import env_int
 from app.utils.observability import init_sentry, init_otel, install_request_observers
 from app.utils.rate_limit import (
     check_limit,
@@ -99,22 +107,6 @@ def _resolve_git_sha() -> str:
         return "unknown"
 
 
-def _env_int(name: str, default: int, *, minimum: int = 1, maximum: int = 100000) -> int:
-    raw = (os.getenv(name) or "").strip()
-    if not raw:
-        value = int(default)
-    else:
-        try:
-            value = int(raw)
-        except Exception:
-            value = int(default)
-    if value < minimum:
-        value = minimum
-    if value > maximum:
-        value = maximum
-    return value
-
-
 def _ensure_referral_schema_compatibility():
     """
     Keep runtime compatibility for SQLite/dev test databases that may not have
@@ -301,6 +293,287 @@ def _ensure_listings_schema_compatibility():
         pass
 
 
+def _ensure_orders_schema_compatibility():
+    """
+    Keep runtime compatibility for databases that predate the escrow
+    scheduler's due column.
+    """
+    try:
+        engine = db.engine
+        insp = inspect(engine)
+        tables = set(insp.get_table_names())
+        if "orders" not in tables:
+            return
+        dialect = (getattr(engine.dialect, "name", "") or "").lower()
+        dt_type = "TIMESTAMP" if "postgres" in dialect else "DATETIME"
+        cols_before = {str(c.get("name", "")).lower() for c in insp.get_columns("orders")}
+        with engine.begin() as conn:
+            if "next_escrow_check_at" not in cols_before:
+                conn.execute(text(f"ALTER TABLE orders ADD COLUMN next_escrow_check_at {dt_type}"))
+            if "assigned_at" not in cols_before:
+                # Left NULL for existing assignments: the stale sweep skips them.
+                conn.execute(text(f"ALTER TABLE orders ADD COLUMN assigned_at {dt_type}"))
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_orders_escrow_due "
+                    "ON orders (escrow_status, next_escrow_check_at)"
+                )
+            )
+            conn.execute(
+                text("CREATE INDEX IF NOT EXISTS ix_orders_status_assigned_at ON orders (status, assigned_at)")
+            )
+    except Exception:
+        # Never block startup on compatibility patch-up.
+        pass
+
+
+def _ensure_moneybox_schema_compatibility():
+    """
+    Keep runtime compatibility for databases that predate the MoneyBox
+    maturity processor's due column.
+    """
+    try:
+        engine = db.engine
+        insp = inspect(engine)
+        tables = set(insp.get_table_names())
+        if "moneybox_accounts" not in tables:
+            return
+        dialect = (getattr(engine.dialect, "name", "") or "").lower()
+        dt_type = "TIMESTAMP" if "postgres" in dialect else "DATETIME"
+        cols_before = {str(c.get("name", "")).lower() for c in insp.get_columns("moneybox_accounts")}
+        with engine.begin() as conn:
+            if "next_maturity_check_at" not in cols_before:
+                conn.execute(text(f"ALTER TABLE moneybox_accounts ADD COLUMN next_maturity_check_at {dt_type}"))
+                # Existing open accounts get one pass; the processor
+                # reschedules them precisely from there.
+                conn.execute(
+                    text(
+                        "UPDATE moneybox_accounts SET next_maturity_check_at = CURRENT_TIMESTAMP "
+                        "WHERE status IS NULL OR status != 'CLOSED'"
+                    )
+                )
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_moneybox_accounts_next_maturity_check_at "
+                    "ON moneybox_accounts (next_maturity_check_at)"
+                )
+            )
+    except Exception:
+        # Never block startup on compatibility patch-up.
+        pass
+
+
+def _ensure_payout_batch_schema_compatibility():
+    """
+    Keep runtime compatibility for payout_requests tables that predate
+    batched payout execution.
+    """
+    try:
+        engine = db.engine
+        insp = inspect(engine)
+        tables = set(insp.get_table_names())
+        if "payout_requests" not in tables:
+            return
+        cols = {str(c.get("name", "")).lower() for c in insp.get_columns("payout_requests")}
+        with engine.begin() as conn:
+            if "batch_id" not in cols:
+                conn.execute(text("ALTER TABLE payout_requests ADD COLUMN batch_id INTEGER"))
+            if "provider" not in cols:
+                conn.execute(text("ALTER TABLE payout_requests ADD COLUMN provider VARCHAR(32)"))
+            if "provider_reference" not in cols:
+                conn.execute(text("ALTER TABLE payout_requests ADD COLUMN provider_reference VARCHAR(120)"))
+            if "failure_reason" not in cols:
+                conn.execute(text("ALTER TABLE payout_requests ADD COLUMN failure_reason VARCHAR(240)"))
+            conn.execute(
+                text("CREATE INDEX IF NOT EXISTS ix_payout_requests_batch_id ON payout_requests (batch_id)")
+            )
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_payout_requests_provider_reference "
+                    "ON payout_requests (provider_reference)"
+                )
+            )
+    except Exception:
+        # Never block startup on compatibility patch-up.
+        pass
+
+
+def _ensure_idempotency_expiry_compatibility():
+    """
+    Keep runtime compatibility for idempotency_keys tables that predate
+    key expiry and compaction.
+    """
+    try:
+        engine = db.engine
+        insp = inspect(engine)
+        if "idempotency_keys" not in set(insp.get_table_names()):
+            return
+        dialect = (getattr(engine.dialect, "name", "") or "").lower()
+        dt_type = "TIMESTAMP" if "postgres" in dialect else "DATETIME"
+        cols = {str(c.get("name", "")).lower() for c in insp.get_columns("idempotency_keys")}
+        with engine.begin() as conn:
+            if "expires_at" not in cols:
+                conn.execute(text(f"ALTER TABLE idempotency_keys ADD COLUMN expires_at {dt_type}"))
+            conn.execute(
+                text("CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys (expires_at)")
+            )
+    except Exception:
+        # Never block startup on compatibility patch-up.
+        pass
+
+
+def _ensure_notification_queue_claim_compatibility():
+    """
+    Keep runtime compatibility for notification_queue tables that predate
+    claim-based delivery and bulk fan-out.
+    """
+    try:
+        engine = db.engine
+        insp = inspect(engine)
+        if "notification_queue" not in set(insp.get_table_names()):
+            return
+        dialect = (getattr(engine.dialect, "name", "") or "").lower()
+        dt_type = "TIMESTAMP" if "postgres" in dialect else "DATETIME"
+        cols = {str(c.get("name", "")).lower() for c in insp.get_columns("notification_queue")}
+        with engine.begin() as conn:
+            if "claim_token" not in cols:
+                conn.execute(text("ALTER TABLE notification_queue ADD COLUMN claim_token VARCHAR(32)"))
+            if "lease_expires_at" not in cols:
+                conn.execute(text(f"ALTER TABLE notification_queue ADD COLUMN lease_expires_at {dt_type}"))
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_notification_queue_status_next_attempt "
+                    "ON notification_queue (status, next_attempt_at)"
+                )
+            )
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_notification_queue_reference_to "
+                    'ON notification_queue (reference, "to", created_at)'
+                )
+            )
+    except Exception:
+        # Never block startup on compatibility patch-up.
+        pass
+
+
+def _ensure_notifications_cursor_index():
+    """Index the per-user ``since_id`` cursor reads on notifications."""
+    try:
+        engine = db.engine
+        if "notifications" not in set(inspect(engine).get_table_names()):
+            return
+        with engine.begin() as conn:
+            conn.execute(
+                text("CREATE INDEX IF NOT EXISTS ix_notifications_user_id_id ON notifications (user_id, id)")
+            )
+    except Exception:
+        pass
+
+
+def _ensure_driver_job_offer_indexes():
+    """Index the offer lookups made by batch matching and the expiry sweep."""
+    try:
+        engine = db.engine
+        if "driver_job_offers" not in set(inspect(engine).get_table_names()):
+            return
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_driver_job_offers_order_status "
+                    "ON driver_job_offers (order_id, status)"
+                )
+            )
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_driver_job_offers_driver_status "
+                    "ON driver_job_offers (driver_id, status)"
+                )
+            )
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_driver_job_offers_status_created "
+                    "ON driver_job_offers (status, created_at)"
+                )
+            )
+    except Exception:
+        pass
+
+
+def _ensure_inspector_dispatch_index():
+    """Create the inspector dispatch index; rows are seeded by ``flask inspector-dispatch-rebuild``."""
+    try:
+        from app.models import InspectorDispatchEntry
+
+        engine = db.engine
+        if "inspector_profiles" not in set(inspect(engine).get_table_names()):
+            return
+        InspectorDispatchEntry.__table__.create(bind=engine, checkfirst=True)
+    except Exception:
+        pass
+
+
+def _ensure_rollup_tables():
+    """Create the rollup tables; history is filled by ``flask rollup-backfill``."""
+    try:
+        from app.models import DailyPlatformMetric, RollupDirtyDay
+
+        engine = db.engine
+        tables = set(inspect(engine).get_table_names())
+        if "orders" not in tables or "users" not in tables:
+            return
+        DailyPlatformMetric.__table__.create(bind=engine, checkfirst=True)
+        RollupDirtyDay.__table__.create(bind=engine, checkfirst=True)
+    except Exception:
+        pass
+
+
+def _ensure_merchant_stats_table():
+    """Create merchant daily stats; history is seeded by ``flask merchant-stats-rebuild``."""
+    try:
+        from app.models import MerchantDailyStat
+
+        engine = db.engine
+        if "orders" not in set(inspect(engine).get_table_names()):
+            return
+        MerchantDailyStat.__table__.create(bind=engine, checkfirst=True)
+    except Exception:
+        pass
+
+
+def _ensure_leaderboard_table():
+    """Create the leaderboard table; it is filled by ``flask leaderboard-recompute``."""
+    try:
+        from app.models import LeaderboardScore
+
+        engine = db.engine
+        if "wallet_txns" not in set(inspect(engine).get_table_names()):
+            return
+        LeaderboardScore.__table__.create(bind=engine, checkfirst=True)
+    except Exception:
+        pass
+
+
+def _ensure_event_rollup_table():
+    """Index event range reads and create the hourly rollup; the beat job fills it."""
+    try:
+        from app.models import PlatformEventHourly
+
+        engine = db.engine
+        if "platform_events" not in set(inspect(engine).get_table_names()):
+            return
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_platform_events_created_at_type "
+                    "ON platform_events (created_at, event_type, severity)"
+                )
+            )
+        PlatformEventHourly.__table__.create(bind=engine, checkfirst=True)
+    except Exception:
+        pass
+
+
 def _ensure_saved_searches_schema_compatibility():
     try:
         from app.models import SavedSearch
@@ -349,14 +622,14 @@ def create_app():
     engine_options = {
         "pool_pre_ping": True,
         "pool_reset_on_return": "rollback",
-        "pool_recycle": _env_int("DB_POOL_RECYCLE_SECONDS", 1800, minimum=60, maximum=86400),
+        "pool_recycle": env_int("DB_POOL_RECYCLE_SECONDS", 1800, minimum=60, maximum=86400),
     }
     if not database_url.startswith("sqlite://"):
         engine_options.update(
             {
-                "pool_size": _env_int("DB_POOL_SIZE", 10, minimum=1, maximum=200),
-                "max_overflow": _env_int("DB_MAX_OVERFLOW", 20, minimum=0, maximum=500),
-                "pool_timeout": _env_int("DB_POOL_TIMEOUT_SECONDS", 30, minimum=1, maximum=300),
+                "pool_size": env_int("DB_POOL_SIZE", 10, minimum=1, maximum=200),
+                "max_overflow": env_int("DB_MAX_OVERFLOW", 20, minimum=0, maximum=500),
+                "pool_timeout": env_int("DB_POOL_TIMEOUT_SECONDS", 30, minimum=1, maximum=300),
             }
         )
         app.logger.info(
@@ -384,6 +657,18 @@ def create_app():
         _ensure_referral_schema_compatibility()
         _ensure_notifications_schema_compatibility()
         _ensure_listings_schema_compatibility()
+        _ensure_orders_schema_compatibility()
+        _ensure_moneybox_schema_compatibility()
+        _ensure_payout_batch_schema_compatibility()
+        _ensure_idempotency_expiry_compatibility()
+        _ensure_notification_queue_claim_compatibility()
+        _ensure_notifications_cursor_index()
+        _ensure_driver_job_offer_indexes()
+        _ensure_inspector_dispatch_index()
+        _ensure_rollup_tables()
+        _ensure_merchant_stats_table()
+        _ensure_leaderboard_table()
+        _ensure_event_rollup_table()
         _ensure_saved_searches_schema_compatibility()
         otel_env = (os.getenv("OTEL_ENABLED") or "").strip() == "1"
         otel_setting = False
@@ -795,6 +1080,7 @@ def create_app():
     app.register_blueprint(recipient_bp)
     app.register_blueprint(driver_offer_bp)
     app.register_blueprint(drivers_bp)
+    app.register_blueprint(delivery_quotes_bp)
 
     app.register_blueprint(audit_bp)
     app.register_blueprint(inspector_bonds_admin_bp)
@@ -839,6 +1125,70 @@ def create_app():
                 raise click.ClickException("Admin user already exists.")
             raise click.ClickException("Failed to bootstrap admin.")
 
+    @app.cli.command("rollup-backfill")
+    @click.option("--start", "start", required=True, help="First day to recompute (YYYY-MM-DD)")
+    @click.option("--end", "end", required=False, help="Last day to recompute (YYYY-MM-DD, default today)")
+    @click.option("--chunk-days", "chunk_days", default=31, show_default=True, help="Days per committed chunk")
+    def rollup_backfill(start: str, end: str | None, chunk_days: int):
+        from app.jobs.platform_rollups import run_platform_rollup_backfill
+
+        try:
+            first = date.fromisoformat(start)
+            last = date.fromisoformat(end) if end else datetime.utcnow().date()
+        except ValueError:
+            raise click.ClickException("Dates must be YYYY-MM-DD.")
+        if last < first:
+            raise click.ClickException("--end must not be before --start.")
+        result = run_platform_rollup_backfill(first, last, chunk_days=chunk_days)
+        if not result.get("ok"):
+            raise click.ClickException(f"Backfill failed: {result.get('error')}")
+        click.echo(f"rollup_backfill_ok days={result['days']} rows={result['rows']}")
+
+    @app.cli.command("merchant-stats-rebuild")
+    @click.option("--start", "start", required=False, help="First day to recompute (YYYY-MM-DD, default: earliest data)")
+    @click.option("--end", "end", required=False, help="Last day to recompute (YYYY-MM-DD, default today)")
+    def merchant_stats_rebuild(start: str | None, end: str | None):
+        from app.jobs.merchant_stats import run_merchant_stats_rebuild
+        from app.services.merchant_stats import earliest_source_day
+
+        try:
+            first = date.fromisoformat(start) if start else earliest_source_day()
+            last = date.fromisoformat(end) if end else datetime.utcnow().date()
+        except ValueError:
+            raise click.ClickException("Dates must be YYYY-MM-DD.")
+        if first is None:
+            click.echo("merchant_stats_rebuild_ok days=0 rows=0 drift=0")
+            return
+        if last < first:
+            raise click.ClickException("--end must not be before --start.")
+        result = run_merchant_stats_rebuild(start=first, end=last)
+        if not result.get("ok"):
+            raise click.ClickException(f"Rebuild failed: {result.get('error')}")
+        click.echo(f"merchant_stats_rebuild_ok days={result['days']} rows={result['rows']} drift={result['drift']}")
+
+    @app.cli.command("inspector-dispatch-rebuild")
+    def inspector_dispatch_rebuild():
+        from app.jobs.inspector_dispatch import run_inspector_dispatch_rebuild
+
+        result = run_inspector_dispatch_rebuild()
+        if not result.get("ok"):
+            raise click.ClickException(f"Rebuild failed: {result.get('error')}")
+        click.echo(
+            f"inspector_dispatch_rebuild_ok inspectors={result['inspectors']} "
+            f"inserted={result['inserted']} updated={result['updated']} removed={result['removed']}"
+        )
+
+    @app.cli.command("leaderboard-recompute")
+    def leaderboard_recompute():
+        from app.jobs.leaderboards import run_leaderboard_recompute
+
+        result = run_leaderboard_recompute()
+        if not result.get("ok"):
+            raise click.ClickException(f"Recompute failed: {result.get('error')}")
+        click.echo(
+            f"leaderboard_recompute_ok boards={result['boards']} entries={result['entries']} changed={result['changed']}"
+        )
+
     @app.cli.command("admin-reset-password")
     @click.option("--email", "email", required=False, help="Admin email to reset")
     @click.option("--password", "password", required=False, help="New password")
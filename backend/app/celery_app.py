@@ -38,6 +38,160 @@ def _escrow_interval_seconds() -> int:
     return value
 
 
+def _moneybox_maturity_interval_seconds() -> int:
+    raw = (os.getenv("MONEYBOX_MATURITY_INTERVAL_SECONDS") or "900").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 900
+    if value < 60:
+        value = 60
+    return value
+
+
+def _idempotency_compaction_interval_seconds() -> int:
+    raw = (os.getenv("IDEMPOTENCY_COMPACTION_INTERVAL_SECONDS") or "3600").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 3600
+    if value < 300:
+        value = 300
+    return value
+
+
+def _webhook_inbox_interval_seconds() -> int:
+    raw = (os.getenv("WEBHOOK_INBOX_DRAIN_INTERVAL_SECONDS") or "30").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 30
+    if value < 5:
+        value = 5
+    return value
+
+
+def _partition_maintenance_interval_seconds() -> int:
+    raw = (os.getenv("PARTITION_MAINTENANCE_INTERVAL_SECONDS") or "86400").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 86400
+    if value < 3600:
+        value = 3600
+    return value
+
+
+def _notification_delivery_interval_seconds() -> int:
+    raw = (os.getenv("NOTIFY_DELIVERY_INTERVAL_SECONDS") or "15").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 15
+    if value < 5:
+        value = 5
+    return value
+
+
+def _driver_track_flush_interval_seconds() -> int:
+    raw = (os.getenv("DRIVER_TRACK_FLUSH_INTERVAL_SECONDS") or "30").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 30
+    if value < 5:
+        value = 5
+    return value
+
+
+def _driver_matching_interval_seconds() -> int:
+    raw = (os.getenv("DRIVER_MATCH_INTERVAL_SECONDS") or "15").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 15
+    if value < 5:
+        value = 5
+    return value
+
+
+def _dispatch_sweep_interval_seconds() -> int:
+    raw = (os.getenv("DISPATCH_SWEEP_INTERVAL_SECONDS") or "60").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 60
+    if value < 10:
+        value = 10
+    return value
+
+
+def _inspector_dispatch_rebuild_interval_seconds() -> int:
+    raw = (os.getenv("INSPECTOR_DISPATCH_REBUILD_INTERVAL_SECONDS") or "3600").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 3600
+    if value < 60:
+        value = 60
+    return value
+
+
+def _merchant_stats_rebuild_interval_seconds() -> int:
+    raw = (os.getenv("MERCHANT_STATS_REBUILD_INTERVAL_SECONDS") or "3600").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 3600
+    if value < 60:
+        value = 60
+    return value
+
+
+def _leaderboard_recompute_interval_seconds() -> int:
+    raw = (os.getenv("LEADERBOARD_RECOMPUTE_INTERVAL_SECONDS") or "86400").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 86400
+    if value < 300:
+        value = 300
+    return value
+
+
+def _event_rollup_interval_seconds() -> int:
+    raw = (os.getenv("EVENT_ROLLUP_INTERVAL_SECONDS") or "600").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 600
+    if value < 60:
+        value = 60
+    return value
+
+
+def _platform_rollup_interval_seconds() -> int:
+    raw = (os.getenv("PLATFORM_ROLLUP_INTERVAL_SECONDS") or "300").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 300
+    if value < 30:
+        value = 30
+    return value
+
+
+def _payout_batch_reconcile_interval_seconds() -> int:
+    raw = (os.getenv("PAYOUT_BATCH_RECONCILE_INTERVAL_SECONDS") or "300").strip()
+    try:
+        value = int(raw)
+    except Exception:
+        value = 300
+    if value < 60:
+        value = 60
+    return value
+
+
 def _extract_trace_id(args, kwargs) -> str:
     try:
         if isinstance(kwargs, dict):
@@ -118,6 +272,62 @@ def create_celery_app(flask_app) -> Celery:
                 "task": "app.tasks.scale_tasks.run_escrow_settlement",
                 "schedule": float(_escrow_interval_seconds()),
             },
+            "moneybox-maturity-runner": {
+                "task": "app.tasks.scale_tasks.run_moneybox_maturity",
+                "schedule": float(_moneybox_maturity_interval_seconds()),
+            },
+            "idempotency-compaction": {
+                "task": "app.tasks.scale_tasks.compact_idempotency_keys",
+                "schedule": float(_idempotency_compaction_interval_seconds()),
+            },
+            "webhook-inbox-drain": {
+                "task": "app.tasks.scale_tasks.drain_webhook_inbox",
+                "schedule": float(_webhook_inbox_interval_seconds()),
+            },
+            "notification-delivery": {
+                "task": "app.tasks.scale_tasks.deliver_notifications",
+                "schedule": float(_notification_delivery_interval_seconds()),
+            },
+            "partition-maintenance": {
+                "task": "app.tasks.scale_tasks.maintain_partitions",
+                "schedule": float(_partition_maintenance_interval_seconds()),
+            },
+            "driver-track-flush": {
+                "task": "app.tasks.scale_tasks.flush_driver_tracks",
+                "schedule": float(_driver_track_flush_interval_seconds()),
+            },
+            "driver-matching": {
+                "task": "app.tasks.scale_tasks.match_drivers",
+                "schedule": float(_driver_matching_interval_seconds()),
+            },
+            "dispatch-sweep": {
+                "task": "app.tasks.scale_tasks.sweep_dispatch",
+                "schedule": float(_dispatch_sweep_interval_seconds()),
+            },
+            "inspector-dispatch-rebuild": {
+                "task": "app.tasks.scale_tasks.rebuild_inspector_dispatch",
+                "schedule": float(_inspector_dispatch_rebuild_interval_seconds()),
+            },
+            "platform-rollups": {
+                "task": "app.tasks.scale_tasks.rollup_platform_metrics",
+                "schedule": float(_platform_rollup_interval_seconds()),
+            },
+            "merchant-stats-rebuild": {
+                "task": "app.tasks.scale_tasks.rebuild_merchant_stats",
+                "schedule": float(_merchant_stats_rebuild_interval_seconds()),
+            },
+            "leaderboard-recompute": {
+                "task": "app.tasks.scale_tasks.recompute_leaderboards",
+                "schedule": float(_leaderboard_recompute_interval_seconds()),
+            },
+            "event-rollups": {
+                "task": "app.tasks.scale_tasks.rollup_platform_events",
+                "schedule": float(_event_rollup_interval_seconds()),
+            },
+            "payout-batch-reconcile": {
+                "task": "app.tasks.scale_tasks.reconcile_open_payout_batches",
+                "schedule": float(_payout_batch_reconcile_interval_seconds()),
+            },
         },
     )
     celery.conf.update(flask_app.config)
@@ -0,0 +1,298 @@
+"""Shared outbound HTTP layer: pooled sessions, timeouts, retries, breakers, metrics."""
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.utils.env import env_int
+
+try:
+    from urllib3.exceptions import NewConnectionError
+except Exception:  # pragma: no cover - urllib3 ships with requests
+    NewConnectionError = None
+
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+_LATENCY_WINDOW = 200
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while a provider's breaker is open."""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"CIRCUIT_OPEN:{provider} (retry in {retry_in:.1f}s)")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+def _env_float(name: str, default: float, *, minimum: float = 0.0, maximum: float = 3600.0) -> float:
+    try:
+        value = float((os.getenv(name) or str(default)).strip() or default)
+    except Exception:
+        value = float(default)
+    return max(minimum, min(value, maximum))
+
+
+@dataclass
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half_open -> closed.
+
+    After ``failure_threshold`` consecutive failures the breaker opens for
+    ``reset_seconds``; the first call after that is let through as a probe
+    and decides whether it closes again or re-opens.
+    """
+
+    provider: str
+    failure_threshold: int = 5
+    reset_seconds: float = 30.0
+    failures: int = 0
+    state: str = "closed"
+    opened_at: float | None = None
+    probing: bool = False
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == "closed":
+                return
+            now = time.monotonic()
+            elapsed = now - float(self.opened_at or now)
+            if self.state == "open" and elapsed >= self.reset_seconds:
+                self.state = "half_open"
+                self.probing = False
+            if self.state == "half_open" and not self.probing:
+                self.probing = True
+                return
+            raise CircuitOpenError(self.provider, max(0.0, self.reset_seconds - elapsed))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.state = "closed"
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "failures": int(self.failures)}
+
+
+@dataclass
+class _HostStats:
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    short_circuited: int = 0
+    last_status: int | None = None
+    latencies_ms: deque = field(default_factory=lambda: deque(maxlen=_LATENCY_WINDOW))
+
+    def snapshot(self) -> dict:
+        samples = sorted(self.latencies_ms)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else None
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "short_circuited": self.short_circuited,
+            "last_status": self.last_status,
+            "avg_ms": round(sum(samples) / len(samples), 2) if samples else None,
+            "p95_ms": round(p95, 2) if p95 is not None else None,
+        }
+
+
+_LOCK = threading.Lock()
+_SESSIONS: dict[str, requests.Session] = {}
+_BREAKERS: dict[str, CircuitBreaker] = {}
+_STATS: dict[str, _HostStats] = {}
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def session_for(url: str) -> requests.Session:
+    key = _host_key(url)
+    with _LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=env_int("HTTP_POOL_MAXSIZE", 20, minimum=1, maximum=500),
+                max_retries=0,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _SESSIONS[key] = session
+        return session
+
+
+def breaker_for(provider: str) -> CircuitBreaker:
+    with _LOCK:
+        breaker = _BREAKERS.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                provider=provider,
+                failure_threshold=env_int("HTTP_BREAKER_FAILURES", 5, minimum=1, maximum=100),
+                reset_seconds=_env_float("HTTP_BREAKER_RESET_SECONDS", 30.0, minimum=0.0),
+            )
+            _BREAKERS[provider] = breaker
+        return breaker
+
+
+def _stats_for(host: str) -> _HostStats:
+    with _LOCK:
+        stats = _STATS.get(host)
+        if stats is None:
+            stats = _HostStats()
+            _STATS[host] = stats
+        return stats
+
+
+def _never_sent(exc: Exception) -> bool:
+    # Connect failures happen before the request is written, so even
+    # non-idempotent calls are safe to retry.
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.exceptions.ConnectionError) and NewConnectionError is not None:
+        reason = getattr(exc.args[0], "reason", None) if exc.args else None
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+def never_sent(exc: Exception) -> bool:
+    """Whether a failed request provably never reached the provider."""
+    return isinstance(exc, CircuitOpenError) or _never_sent(exc)
+
+
+def _backoff(attempt: int) -> float:
+    base = _env_float("HTTP_RETRY_BACKOFF_SECONDS", 0.2, maximum=30.0)
+    delay = min(base * (2 ** max(0, attempt - 1)), _env_float("HTTP_RETRY_BACKOFF_MAX_SECONDS", 5.0, maximum=60.0))
+    return random.uniform(delay / 2.0, delay)
+
+
+def request(
+    provider: str,
+    method: str,
+    url: str,
+    *,
+    timeout: float | tuple[float, float] | None = None,
+    retries: int | None = None,
+    idempotent: bool | None = None,
+    **kwargs,
+) -> requests.Response:
+    """Send one outbound request on behalf of ``provider``.
+
+    ``timeout`` is the read timeout (or a (connect, read) pair). Responses
+    with 5xx statuses count against the provider's breaker; after retries
+    are exhausted the last response is returned, as with ``requests``.
+    Raises CircuitOpenError while the breaker is open.
+    """
+    verb = (method or "GET").upper()
+    safe = verb in IDEMPOTENT_METHODS if idempotent is None else bool(idempotent)
+    max_retries = env_int("HTTP_MAX_RETRIES", 2, minimum=0, maximum=10) if retries is None else max(0, int(retries))
+    if isinstance(timeout, tuple):
+        timeouts = timeout
+    else:
+        timeouts = (
+            _env_float("HTTP_CONNECT_TIMEOUT_SECONDS", 3.05, minimum=0.1, maximum=60.0),
+            float(timeout) if timeout is not None else _env_float("HTTP_READ_TIMEOUT_SECONDS", 20.0, minimum=0.1),
+        )
+    host = _host_key(url)
+    session = session_for(url)
+    breaker = breaker_for(provider)
+    stats = _stats_for(host)
+
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            with _LOCK:
+                stats.short_circuited += 1
+            raise
+        started = time.perf_counter()
+        try:
+            response = session.request(verb, url, timeout=timeouts, **kwargs)
+        except requests.RequestException as exc:
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            breaker.record_failure()
+            with _LOCK:
+                stats.requests += 1
+                stats.errors += 1
+                stats.last_status = None
+                stats.latencies_ms.append(elapsed_ms)
+            if attempt <= max_retries and (safe or _never_sent(exc)):
+                with _LOCK:
+                    stats.retries += 1
+                time.sleep(_backoff(attempt))
+                continue
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        status = int(getattr(response, "status_code", 0) or 0)
+        failed = status >= 500
+        if failed:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        with _LOCK:
+            stats.requests += 1
+            stats.errors += 1 if failed else 0
+            stats.last_status = status
+            stats.latencies_ms.append(elapsed_ms)
+        if status in RETRY_STATUSES and safe and attempt <= max_retries:
+            with _LOCK:
+                stats.retries += 1
+            response.close()
+            time.sleep(_backoff(attempt))
+            continue
+        return response
+
+
+def get(provider: str, url: str, **kwargs) -> requests.Response:
+    return request(provider, "GET", url, **kwargs)
+
+
+def post(provider: str, url: str, **kwargs) -> requests.Response:
+    return request(provider, "POST", url, **kwargs)
+
+
+def http_metrics() -> dict:
+    with _LOCK:
+        hosts = dict(_STATS)
+        breakers = dict(_BREAKERS)
+    return {
+        "hosts": {host: stats.snapshot() for host, stats in sorted(hosts.items())},
+        "breakers": {name: breaker.snapshot() for name, breaker in sorted(breakers.items())},
+    }
+
+
+def _reset_http_state_for_tests() -> None:
+    with _LOCK:
+        for session in _SESSIONS.values():
+            try:
+                session.close()
+            except Exception:
+                pass
+        _SESSIONS.clear()
+        _BREAKERS.clear()
+        _STATS.clear()
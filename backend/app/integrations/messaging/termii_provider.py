@@ -3,6 +3,7 @@ from __future__ import annotations
 import os
 import requests
 
+from app.integrations import http as outbound
 from app.integrations.messaging.base import MessagingProvider, MessageResult
 
 
@@ -48,7 +49,7 @@ class TermiiMessagingProvider(MessagingProvider):
         if reference:
             payload["custom_uid"] = reference[:48]
         try:
-            r = requests.post(f"{TERMII_BASE}/sms/send", json=payload, timeout=12)
+            r = outbound.post("termii", f"{TERMII_BASE}/sms/send", json=payload, timeout=12)
             data = r.json() if r.content else {}
             if 200 <= r.status_code < 300:
                 return MessageResult(ok=True, code="OK", message="sent", raw=data if isinstance(data, dict) else {"payload": data})
@@ -20,6 +20,34 @@ class PaymentVerifyResult:
     raw: dict | None = None
 
 
+@dataclass
+class TransferItem:
+    reference: str
+    amount: float
+    recipient: str = ""
+    account_number: str = ""
+    bank_name: str = ""
+    reason: str = ""
+
+
+@dataclass
+class TransferResult:
+    reference: str
+    status: str  # pending|success|failed
+    transfer_code: str = ""
+    reason: str = ""  # "not_found" on a pending result: the provider has no such transfer (yet)
+    raw: dict | None = None
+
+
+class TransferRejected(RuntimeError):
+    """The provider provably did not accept a transfer submission.
+
+    Raised only when nothing can have been sent: the circuit is open, the
+    connection never opened, or the provider answered with an explicit 4xx
+    rejection. Any other submission error leaves the outcome unknown.
+    """
+
+
 class PaymentsProvider:
     name = "unknown"
 
@@ -29,3 +57,14 @@ class PaymentsProvider:
     def verify(self, reference: str) -> PaymentVerifyResult:
         raise NotImplementedError
 
+    def bulk_transfer(self, items: list[TransferItem], *, batch_reference: str) -> list[TransferResult]:
+        """Submit many transfers in one provider call; results follow input order.
+
+        Raises TransferRejected when the submission provably did not go
+        through. Items the provider did not acknowledge come back pending.
+        """
+        raise NotImplementedError
+
+    def transfer_status(self, transfer_code: str) -> TransferResult:
+        """Current state of one transfer, by provider transfer code or by our transfer reference."""
+        raise NotImplementedError
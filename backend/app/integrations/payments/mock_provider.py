@@ -1,6 +1,16 @@
 from __future__ import annotations
 
-from app.integrations.payments.base import PaymentsProvider, PaymentInitializeResult, PaymentVerifyResult
+from app.integrations.payments.base import (
+    PaymentsProvider,
+    PaymentInitializeResult,
+    PaymentVerifyResult,
+    TransferItem,
+    TransferResult,
+)
+
+# Account numbers ending in this suffix are declined by the mock, so tests can
+# exercise the failure path deterministically.
+MOCK_DECLINED_ACCOUNT_SUFFIX = "0000"
 
 
 class MockPaymentsProvider(PaymentsProvider):
@@ -30,3 +40,28 @@ class MockPaymentsProvider(PaymentsProvider):
             raw={"reference": reference, "provider": self.name},
         )
 
+    def bulk_transfer(self, items: list[TransferItem], *, batch_reference: str) -> list[TransferResult]:
+        results = []
+        for item in items:
+            if not (item.recipient or item.account_number):
+                results.append(TransferResult(reference=item.reference, status="failed", reason="missing_destination"))
+                continue
+            outcome = "F" if (item.account_number or "").endswith(MOCK_DECLINED_ACCOUNT_SUFFIX) else "S"
+            results.append(
+                TransferResult(
+                    reference=item.reference,
+                    status="pending",
+                    transfer_code=f"MOCKTRF-{outcome}-{item.reference}",
+                    raw={"batch_reference": batch_reference, "provider": self.name},
+                )
+            )
+        return results
+
+    def transfer_status(self, transfer_code: str) -> TransferResult:
+        code = (transfer_code or "").strip()
+        parts = code.split("-", 2)
+        if len(parts) != 3 or parts[0] != "MOCKTRF":
+            return TransferResult(reference="", status="failed", transfer_code=code, reason="unknown_transfer")
+        if parts[1] == "F":
+            return TransferResult(reference=parts[2], status="failed", transfer_code=code, reason="mock_declined")
+        return TransferResult(reference=parts[2], status="success", transfer_code=code)
@@ -1,9 +1,25 @@
 from __future__ import annotations
 
 import os
-import requests
 
-from app.integrations.payments.base import PaymentsProvider, PaymentInitializeResult, PaymentVerifyResult
+from app.integrations import http as outbound
+from app.integrations.payments.base import (
+    PaymentsProvider,
+    PaymentInitializeResult,
+    PaymentVerifyResult,
+    TransferItem,
+    TransferRejected,
+    TransferResult,
+)
+
+
+def _transfer_status(raw_status: str) -> str:
+    status = (raw_status or "").strip().lower()
+    if status == "success":
+        return "success"
+    if status in ("failed", "reversed", "rejected", "abandoned"):
+        return "failed"
+    return "pending"
 
 
 class PaystackPaymentsProvider(PaymentsProvider):
@@ -26,7 +42,7 @@ class PaystackPaymentsProvider(PaymentsProvider):
             "Authorization": f"Bearer {self.secret_key}",
             "Content-Type": "application/json",
         }
-        r = requests.post("https://api.paystack.co/transaction/initialize", headers=headers, json=payload, timeout=25)
+        r = outbound.post("paystack", "https://api.paystack.co/transaction/initialize", headers=headers, json=payload, timeout=25)
         j = r.json() if r.content else {}
         if r.status_code < 200 or r.status_code >= 300 or j.get("status") is not True:
             msg = (j.get("message") or f"HTTP {r.status_code}").strip()
@@ -45,7 +61,7 @@ class PaystackPaymentsProvider(PaymentsProvider):
             "Authorization": f"Bearer {self.secret_key}",
             "Content-Type": "application/json",
         }
-        r = requests.get(f"https://api.paystack.co/transaction/verify/{ref}", headers=headers, timeout=25)
+        r = outbound.get("paystack", f"https://api.paystack.co/transaction/verify/{ref}", headers=headers, timeout=25)
         j = r.json() if r.content else {}
         if r.status_code < 200 or r.status_code >= 300 or j.get("status") is not True:
             msg = (j.get("message") or f"HTTP {r.status_code}").strip()
@@ -65,3 +81,85 @@ class PaystackPaymentsProvider(PaymentsProvider):
             raw=j if isinstance(j, dict) else {"payload": j},
         )
 
+    def bulk_transfer(self, items: list[TransferItem], *, batch_reference: str) -> list[TransferResult]:
+        results: dict[str, TransferResult] = {}
+        transfers = []
+        for item in items:
+            if not item.recipient:
+                results[item.reference] = TransferResult(reference=item.reference, status="failed", reason="missing_recipient")
+                continue
+            transfers.append(
+                {
+                    "amount": int(round(float(item.amount) * 100)),
+                    "recipient": item.recipient,
+                    "reference": item.reference,
+                    "reason": item.reason or batch_reference,
+                }
+            )
+        if transfers:
+            headers = {
+                "Authorization": f"Bearer {self.secret_key}",
+                "Content-Type": "application/json",
+            }
+            try:
+                r = outbound.post(
+                    "paystack",
+                    "https://api.paystack.co/transfer/bulk",
+                    headers=headers,
+                    json={"currency": "NGN", "source": "balance", "transfers": transfers},
+                    timeout=25,
+                )
+            except Exception as exc:
+                if outbound.never_sent(exc):
+                    raise TransferRejected(f"PAYSTACK_BULK_TRANSFER_NOT_SENT:{exc}") from exc
+                # A read timeout or reset may come after Paystack accepted the batch.
+                raise
+            j = r.json() if r.content else {}
+            if r.status_code < 200 or r.status_code >= 300 or j.get("status") is not True:
+                msg = (j.get("message") or f"HTTP {r.status_code}").strip()
+                if 400 <= r.status_code < 500:
+                    raise TransferRejected(f"PAYSTACK_BULK_TRANSFER_REJECTED:{msg}")
+                raise RuntimeError(f"PAYSTACK_BULK_TRANSFER_FAILED:{msg}")
+            for row in j.get("data") or []:
+                ref = (row.get("reference") or "").strip()
+                results[ref] = TransferResult(
+                    reference=ref,
+                    status=_transfer_status(row.get("status") or "pending"),
+                    transfer_code=(row.get("transfer_code") or "").strip(),
+                    raw=row if isinstance(row, dict) else None,
+                )
+        # Unacknowledged items may still have been queued; reconciliation
+        # looks them up by reference.
+        return [
+            results.get(item.reference)
+            or TransferResult(reference=item.reference, status="pending", reason="not_acknowledged")
+            for item in items
+        ]
+
+    def transfer_status(self, transfer_code: str) -> TransferResult:
+        code = (transfer_code or "").strip()
+        headers = {
+            "Authorization": f"Bearer {self.secret_key}",
+            "Content-Type": "application/json",
+        }
+        # Transfer codes look like TRF_xxx; anything else is our own reference.
+        if code.startswith("TRF_"):
+            url = f"https://api.paystack.co/transfer/{code}"
+        else:
+            url = f"https://api.paystack.co/transfer/verify/{code}"
+        r = outbound.get("paystack", url, headers=headers, timeout=25)
+        j = r.json() if r.content else {}
+        if r.status_code == 404:
+            return TransferResult(reference=code, status="pending", reason="not_found")
+        if r.status_code < 200 or r.status_code >= 300 or j.get("status") is not True:
+            msg = (j.get("message") or f"HTTP {r.status_code}").strip()
+            raise RuntimeError(f"PAYSTACK_TRANSFER_FETCH_FAILED:{msg}")
+        data = j.get("data") or {}
+        status = _transfer_status(data.get("status") or "")
+        return TransferResult(
+            reference=(data.get("reference") or "").strip(),
+            status=status,
+            transfer_code=(data.get("transfer_code") or code).strip(),
+            reason=(data.get("reason") or "").strip() if status == "failed" else "",
+            raw=j if isinstance(j, dict) else {"payload": j},
+        )
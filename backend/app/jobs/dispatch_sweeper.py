@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app.extensions import db
+from app.models import DriverJobOffer, Order
+from app.realtime.bus import publish as realtime_publish
+from app.realtime.rooms import driver_room, order_room
+from app.services import merchant_stats
+from app.services.driver_matching import match_pending_orders
+from app.utils.env import env_int
+from app.utils.job_runs import record_job_run
+
+
+JOB_NAME = "dispatch_sweep"
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def _offer_expiry() -> timedelta:
+    return timedelta(minutes=env_int("DISPATCH_OFFER_EXPIRY_MINUTES", 6, maximum=24 * 60))
+
+
+def _stale_assignment() -> timedelta | None:
+    # Off by default: orders sit in "assigned" until pickup, so releasing
+    # them is an opt-in policy (e.g. DISPATCH_STALE_ASSIGNMENT_MINUTES=120).
+    minutes = env_int("DISPATCH_STALE_ASSIGNMENT_MINUTES", 0, minimum=0, maximum=7 * 24 * 60)
+    return timedelta(minutes=minutes) if minutes > 0 else None
+
+
+def _chunk_size() -> int:
+    return env_int("DISPATCH_SWEEP_CHUNK_SIZE", 500, maximum=20000)
+
+
+def _max_chunks() -> int:
+    return env_int("DISPATCH_SWEEP_MAX_CHUNKS", 20, maximum=1000)
+
+
+def expire_stale_offers(
+    *,
+    expiry: timedelta | None = None,
+    chunk_size: int | None = None,
+    max_chunks: int | None = None,
+    now: datetime | None = None,
+) -> list[tuple[int, int, int]]:
+    """Expire overdue offers chunk by chunk; returns ``(offer_id, order_id, driver_id)``.
+
+    Each chunk is one ``UPDATE ... WHERE id IN (oldest N overdue) RETURNING``
+    committed on its own, so a large backlog never holds one long lock.
+    """
+    now = now or _now()
+    cutoff = now - (expiry or _offer_expiry())
+    size = int(chunk_size or _chunk_size())
+    expired: list[tuple[int, int, int]] = []
+    for _ in range(int(max_chunks or _max_chunks())):
+        due = (
+            select(DriverJobOffer.id)
+            .where(DriverJobOffer.status == "offered", DriverJobOffer.created_at <= cutoff)
+            .order_by(DriverJobOffer.created_at.asc(), DriverJobOffer.id.asc())
+            .limit(size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = db.session.execute(
+            update(DriverJobOffer)
+            .where(DriverJobOffer.id.in_(due.scalar_subquery()), DriverJobOffer.status == "offered")
+            .values(status="expired", decided_at=now)
+            .returning(DriverJobOffer.id, DriverJobOffer.order_id, DriverJobOffer.driver_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.session.commit()
+        expired.extend((int(a), int(b), int(c)) for a, b, c in rows)
+        if len(rows) < size:
+            break
+    return expired
+
+
+def release_stale_assignments(
+    *,
+    stale_after: timedelta | None = None,
+    chunk_size: int | None = None,
+    max_chunks: int | None = None,
+    now: datetime | None = None,
+) -> list[tuple[int, int]]:
+    """Put offer-accepted orders that never progressed back up for matching.
+
+    Returns ``(order_id, released_driver_id)``. The accepted offer is closed
+    in the same transaction so matching neither skips the order nor hands it
+    back to the same driver. Does nothing unless ``stale_after`` is given or
+    DISPATCH_STALE_ASSIGNMENT_MINUTES is set; orders without an
+    ``assigned_at`` (assigned before the column existed) are never released.
+    """
+    stale_after = stale_after or _stale_assignment()
+    if stale_after is None:
+        return []
+    now = now or _now()
+    cutoff = now - stale_after
+    size = int(chunk_size or _chunk_size())
+    released: list[tuple[int, int]] = []
+    for _ in range(int(max_chunks or _max_chunks())):
+        due = (
+            select(Order.id)
+            .where(Order.status == "assigned", Order.assigned_at.isnot(None), Order.assigned_at <= cutoff)
+            .order_by(Order.assigned_at.asc(), Order.id.asc())
+            .limit(size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = db.session.execute(
+            update(Order)
+            .where(Order.id.in_(due.scalar_subquery()), Order.status == "assigned")
+            .values(status="paid", driver_id=None, assigned_at=None, updated_at=now)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        previous: dict[int, int] = {}
+        if rows:
+            merchant_stats.record_status_moves(db.session.connection(), rows, from_status="assigned", now=now)
+            previous = {
+                int(order_id): int(driver_id)
+                for order_id, driver_id in db.session.execute(
+                    update(DriverJobOffer)
+                    .where(DriverJobOffer.order_id.in_([int(r) for r in rows]), DriverJobOffer.status == "accepted")
+                    .values(status="expired", decided_at=now)
+                    .returning(DriverJobOffer.order_id, DriverJobOffer.driver_id)
+                    .execution_options(synchronize_session=False)
+                ).all()
+            }
+        db.session.commit()
+        released.extend((int(r), previous.get(int(r), 0)) for r in rows)
+        if len(rows) < size:
+            break
+    return released
+
+
+def run_dispatch_sweep(
+    *,
+    chunk_size: int | None = None,
+    max_chunks: int | None = None,
+    reoffer: bool = True,
+    now: datetime | None = None,
+) -> dict:
+    """Expire offers, release stale assignments, then re-offer only the affected orders."""
+    started_at = _now()
+    now = now or started_at
+    totals = {"expired": 0, "released": 0, "reoffered": 0}
+    error = None
+    try:
+        expired = expire_stale_offers(chunk_size=chunk_size, max_chunks=max_chunks, now=now)
+        released = release_stale_assignments(chunk_size=chunk_size, max_chunks=max_chunks, now=now)
+        totals["expired"] = len(expired)
+        totals["released"] = len(released)
+
+        # Bulk updates skip the ORM session hooks, so publish here.
+        for offer_id, order_id, driver_id in expired:
+            realtime_publish(
+                driver_room(driver_id),
+                "driver.offer",
+                {"id": offer_id, "order_id": order_id, "driver_id": driver_id, "status": "expired"},
+            )
+        for order_id, driver_id in released:
+            realtime_publish(order_room(order_id), "order.status", {"order_id": order_id, "status": "paid"})
+            if driver_id:
+                realtime_publish(
+                    driver_room(driver_id),
+                    "driver.offer",
+                    {"order_id": order_id, "driver_id": driver_id, "status": "expired"},
+                )
+
+        affected = sorted({order_id for _, order_id, _ in expired} | {order_id for order_id, _ in released})
+        if reoffer and affected:
+            totals["reoffered"] = int(match_pending_orders(order_ids=affected, now=now).get("offered") or 0)
+    except Exception as exc:
+        db.session.rollback()
+        error = str(exc)
+
+    record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    totals["ok"] = error is None
+    if error:
+        totals["error"] = error
+    return totals
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from app.extensions import db
+from app.services.driver_matching import match_pending_orders
+from app.utils.job_runs import record_job_run
+
+
+JOB_NAME = "driver_matching"
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def run_driver_matching(*, max_orders: int | None = None, now: datetime | None = None) -> dict:
+    """One batch matching pass over pending orders."""
+    started_at = _now()
+    totals = {"orders": 0, "drivers": 0, "offered": 0, "unmatched": 0}
+    error = None
+    try:
+        totals.update(match_pending_orders(max_orders=max_orders, now=now or started_at))
+    except Exception as exc:
+        db.session.rollback()
+        error = str(exc)
+
+    record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    totals["ok"] = error is None
+    if error:
+        totals["error"] = error
+    return totals
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from app.services.driver_locations import flush_track_buffer, prune_stale_positions
+from app.utils.job_runs import record_job_run
+
+
+JOB_NAME = "driver_track_flush"
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def flush_driver_tracks(*, max_rows: int | None = None, now: datetime | None = None) -> dict:
+    """Bulk-insert buffered track points and drop long-stale latest positions."""
+    started_at = _now()
+    totals = {"inserted": 0, "batches": 0, "pruned": 0}
+    error = None
+    try:
+        totals.update(flush_track_buffer(max_rows=max_rows))
+        totals["pruned"] = prune_stale_positions(now=now or started_at)
+    except Exception as exc:
+        error = str(exc)
+
+    record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    totals["ok"] = error is None
+    if error:
+        totals["error"] = error
+    return totals
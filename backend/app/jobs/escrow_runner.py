@@ -5,8 +5,10 @@ from datetime import datetime, timedelta
 from app.extensions import db
 import json
 
+from sqlalchemy import and_, or_, select, update
+
 from app.models import Order, AuditLog, User, Listing, MerchantProfile, OrderEvent, EscrowUnlock
-from app.utils.wallets import post_txn
+from app.utils.wallets import post_txns
 from app.utils.commission import (
     compute_order_commissions_minor,
     money_major_to_minor,
@@ -119,66 +121,88 @@ def _ensure_commission_snapshot(order: Order, listing: Listing | None = None) ->
     return snapshot
 
 
-def _credit_seller(order: Order, listing: Listing | None, ref: str, order_amount: float) -> None:
+def _seller_legs(order: Order, listing: Listing | None, ref: str, *, platform_user_id: int | None = None) -> list[dict]:
     snapshot = _ensure_commission_snapshot(order, listing)
     sale = snapshot.get("sale") if isinstance(snapshot.get("sale"), dict) else {}
     seller_minor = int(sale.get("seller_minor") or 0)
     platform_minor = int(sale.get("platform_minor") or 0)
     top_tier_minor = int(sale.get("top_tier_incentive_minor") or 0)
 
+    legs = []
     if seller_minor > 0:
-        post_txn(
-            user_id=int(order.merchant_id),
-            direction="credit",
-            amount=money_minor_to_major(seller_minor),
-            kind="order_sale",
-            reference=ref,
-            note=f"Order sale for order #{int(order.id)}",
+        legs.append(
+            dict(
+                user_id=int(order.merchant_id),
+                direction="credit",
+                amount=money_minor_to_major(seller_minor),
+                kind="order_sale",
+                reference=ref,
+                note=f"Order sale for order #{int(order.id)}",
+            )
         )
     if top_tier_minor > 0:
-        post_txn(
-            user_id=int(order.merchant_id),
-            direction="credit",
-            amount=money_minor_to_major(top_tier_minor),
-            kind="top_tier_incentive",
-            reference=ref,
-            note=f"Top-tier incentive for order #{int(order.id)}",
+        legs.append(
+            dict(
+                user_id=int(order.merchant_id),
+                direction="credit",
+                amount=money_minor_to_major(top_tier_minor),
+                kind="top_tier_incentive",
+                reference=ref,
+                note=f"Top-tier incentive for order #{int(order.id)}",
+            )
         )
     if platform_minor > 0:
-        post_txn(
-            user_id=_platform_user_id(),
-            direction="credit",
-            amount=money_minor_to_major(platform_minor),
-            kind="platform_fee",
-            reference=ref,
-            note=f"Platform fee for order #{int(order.id)}",
+        legs.append(
+            dict(
+                user_id=platform_user_id or _platform_user_id(),
+                direction="credit",
+                amount=money_minor_to_major(platform_minor),
+                kind="platform_fee",
+                reference=ref,
+                note=f"Platform fee for order #{int(order.id)}",
+            )
         )
+    return legs
 
 
-def _credit_driver(order: Order, ref: str, delivery_fee: float) -> None:
+def _driver_legs(order: Order, ref: str, *, platform_user_id: int | None = None) -> list[dict]:
     snapshot = _ensure_commission_snapshot(order)
     delivery = snapshot.get("delivery") if isinstance(snapshot.get("delivery"), dict) else {}
     actor_minor = int(delivery.get("actor_minor") or 0)
     platform_minor = int(delivery.get("platform_minor") or 0)
 
+    legs = []
     if actor_minor > 0 and order.driver_id:
-        post_txn(
-            user_id=int(order.driver_id),
-            direction="credit",
-            amount=money_minor_to_major(actor_minor),
-            kind="delivery_fee",
-            reference=ref,
-            note=f"Delivery fee for order #{int(order.id)}",
+        legs.append(
+            dict(
+                user_id=int(order.driver_id),
+                direction="credit",
+                amount=money_minor_to_major(actor_minor),
+                kind="delivery_fee",
+                reference=ref,
+                note=f"Delivery fee for order #{int(order.id)}",
+            )
         )
     if platform_minor > 0:
-        post_txn(
-            user_id=_platform_user_id(),
-            direction="credit",
-            amount=money_minor_to_major(platform_minor),
-            kind="delivery_commission",
-            reference=ref,
-            note=f"Delivery platform share for order #{int(order.id)}",
+        legs.append(
+            dict(
+                user_id=platform_user_id or _platform_user_id(),
+                direction="credit",
+                amount=money_minor_to_major(platform_minor),
+                kind="delivery_commission",
+                reference=ref,
+                note=f"Delivery platform share for order #{int(order.id)}",
+            )
         )
+    return legs
+
+
+def _credit_seller(order: Order, listing: Listing | None, ref: str, order_amount: float) -> None:
+    post_txns(_seller_legs(order, listing, ref))
+
+
+def _credit_driver(order: Order, ref: str, delivery_fee: float) -> None:
+    post_txns(_driver_legs(order, ref))
 
 
 def _hold_order_into_escrow(order: Order) -> None:
@@ -206,12 +230,10 @@ def _hold_order_into_escrow(order: Order) -> None:
     )
 
 
-def _release_escrow(order: Order) -> None:
+def _release_escrow(order: Order, *, commit: bool = True) -> None:
     if (order.escrow_status or "NONE") != "HELD":
         return
     ref = f"order:{int(order.id)}"
-    order_amount = float(order.amount or 0.0)
-    delivery_fee = float(order.delivery_fee or 0.0)
     listing = None
     if order.listing_id:
         try:
@@ -219,14 +241,19 @@ def _release_escrow(order: Order) -> None:
         except Exception:
             listing = None
 
-    _credit_seller(order, listing, ref, order_amount)
-    _credit_driver(order, ref, delivery_fee)
-    _settle_inspection_fee(order)
+    # All settlement legs land in one transaction (see wallets.post_txns).
+    platform_user_id = _platform_user_id()
+    post_txns(
+        _seller_legs(order, listing, ref, platform_user_id=platform_user_id)
+        + _driver_legs(order, ref, platform_user_id=platform_user_id)
+        + _inspection_legs(order, platform_user_id=platform_user_id),
+        commit=commit,
+    )
 
     order.escrow_status = "RELEASED"
     order.escrow_release_at = _now()
     order.updated_at = _now()
-    _event_once(int(order.id), "escrow_released", "Escrow released")
+    _event_once(int(order.id), "escrow_released", "Escrow released", commit=commit)
     log_event(
         "settlement_applied",
         subject_type="order",
@@ -236,7 +263,7 @@ def _release_escrow(order: Order) -> None:
     )
 
 
-def _refund_escrow(order: Order) -> None:
+def _refund_escrow(order: Order, *, commit: bool = True) -> None:
     if (order.escrow_status or "NONE") != "HELD":
         return
     amount = float(order.escrow_hold_amount or 0.0)
@@ -244,18 +271,23 @@ def _refund_escrow(order: Order) -> None:
         order.escrow_status = "REFUNDED"
         order.escrow_refund_at = _now()
         return
-    post_txn(
-        user_id=int(order.buyer_id),
-        direction="credit",
-        amount=amount,
-        kind="escrow_refund",
-        reference=f"order:{int(order.id)}",
-        note=f"Escrow refund for order #{int(order.id)}",
+    post_txns(
+        [
+            dict(
+                user_id=int(order.buyer_id),
+                direction="credit",
+                amount=amount,
+                kind="escrow_refund",
+                reference=f"order:{int(order.id)}",
+                note=f"Escrow refund for order #{int(order.id)}",
+            )
+        ],
+        commit=commit,
     )
     order.escrow_status = "REFUNDED"
     order.escrow_refund_at = _now()
     order.updated_at = _now()
-    _event_once(int(order.id), "escrow_refunded", "Escrow refunded")
+    _event_once(int(order.id), "escrow_refunded", "Escrow refunded", commit=commit)
     log_event(
         "settlement_applied",
         subject_type="order",
@@ -265,7 +297,7 @@ def _refund_escrow(order: Order) -> None:
     )
 
 
-def _event_once(order_id: int, event: str, note: str = "") -> None:
+def _event_once(order_id: int, event: str, note: str = "", *, commit: bool = True) -> None:
     try:
         key = f"order:{int(order_id)}:{event}:system"
         existing = OrderEvent.query.filter_by(idempotency_key=key[:160]).first()
@@ -280,38 +312,54 @@ def _event_once(order_id: int, event: str, note: str = "") -> None:
             note=note[:240],
             idempotency_key=key[:160],
         )
+        if not commit:
+            with db.session.begin_nested():
+                db.session.add(row)
+            return
         db.session.add(row)
         db.session.commit()
     except Exception:
+        if not commit:
+            return
         try:
             db.session.rollback()
         except Exception:
             pass
 
 
-def _settle_inspection_fee(order: Order) -> None:
+def _inspection_legs(order: Order, *, platform_user_id: int | None = None) -> list[dict]:
     snapshot = _ensure_commission_snapshot(order)
     inspection = snapshot.get("inspection") if isinstance(snapshot.get("inspection"), dict) else {}
     actor_minor = int(inspection.get("actor_minor") or 0)
     platform_minor = int(inspection.get("platform_minor") or 0)
+    legs = []
     if actor_minor > 0 and order.inspector_id:
-        post_txn(
-            user_id=int(order.inspector_id),
-            direction="credit",
-            amount=money_minor_to_major(actor_minor),
-            kind="inspection_fee",
-            reference=f"inspection:{int(order.id)}",
-            note=f"Inspection fee for order #{int(order.id)}",
+        legs.append(
+            dict(
+                user_id=int(order.inspector_id),
+                direction="credit",
+                amount=money_minor_to_major(actor_minor),
+                kind="inspection_fee",
+                reference=f"inspection:{int(order.id)}",
+                note=f"Inspection fee for order #{int(order.id)}",
+            )
         )
     if platform_minor > 0:
-        post_txn(
-            user_id=_platform_user_id(),
-            direction="credit",
-            amount=money_minor_to_major(platform_minor),
-            kind="inspection_commission",
-            reference=f"inspection:{int(order.id)}",
-            note=f"Inspection platform share for order #{int(order.id)}",
+        legs.append(
+            dict(
+                user_id=platform_user_id or _platform_user_id(),
+                direction="credit",
+                amount=money_minor_to_major(platform_minor),
+                kind="inspection_commission",
+                reference=f"inspection:{int(order.id)}",
+                note=f"Inspection platform share for order #{int(order.id)}",
+            )
         )
+    return legs
+
+
+def _settle_inspection_fee(order: Order, *, commit: bool = True) -> None:
+    post_txns(_inspection_legs(order), commit=commit)
 
 
 def _inspection_unlock_ready(order_id: int) -> bool:
@@ -322,14 +370,158 @@ def _inspection_unlock_ready(order_id: int) -> bool:
         return False
 
 
+def _env_minutes(name: str, default: int) -> int:
+    raw = (os.getenv(name) or "").strip()
+    try:
+        value = int(raw) if raw else int(default)
+    except Exception:
+        value = int(default)
+    return max(1, min(value, 7 * 24 * 60))
+
+
+def _claim_lease() -> timedelta:
+    # How long a claimed batch is hidden from other runners before it becomes
+    # claimable again (covers a worker crashing mid-batch).
+    return timedelta(minutes=_env_minutes("ESCROW_CLAIM_LEASE_MINUTES", 10))
+
+
+def _recheck_delay() -> timedelta:
+    return timedelta(minutes=_env_minutes("ESCROW_RECHECK_MINUTES", 15))
+
+
+def _idle_recheck_delay() -> timedelta:
+    return timedelta(minutes=_env_minutes("ESCROW_IDLE_RECHECK_MINUTES", 360))
+
+
+def next_escrow_check_at(order: Order, *, now: datetime | None = None) -> datetime | None:
+    """When the runner next needs to evaluate `order`, given it was just checked.
+
+    Orders that are not HELD are never due. TIMEOUT releases wake up at their
+    deadline; conditions that depend on another actor (inspection unlock,
+    buyer confirmation, admin) are re-polled on a back-off, and any change to
+    the trigger columns pulls the check forward (see models.order).
+    """
+    now = now or _now()
+    if (order.escrow_status or "NONE") != "HELD":
+        return None
+    outcome = (order.inspection_outcome or "NONE").upper()
+    cond = (order.release_condition or "INSPECTION_PASS").upper()
+    if outcome == "PASS" and cond == "TIMEOUT":
+        held_at = order.escrow_held_at or order.created_at or now
+        deadline = held_at + timedelta(hours=int(order.release_timeout_hours or 48))
+        return max(deadline, now)
+    if outcome == "PASS" and cond == "INSPECTION_PASS":
+        return now + _recheck_delay()
+    return now + _idle_recheck_delay()
+
+
+def _due_filter(now: datetime):
+    return and_(
+        Order.escrow_status == "HELD",
+        or_(Order.next_escrow_check_at.is_(None), Order.next_escrow_check_at <= now),
+    )
+
+
+def claim_due_escrow_orders(*, limit: int, now: datetime | None = None) -> list[int]:
+    """Claim up to `limit` due HELD orders for this runner and commit the claim.
+
+    The claim is one UPDATE ... WHERE id IN (due subquery) RETURNING id that
+    pushes next_escrow_check_at out by the lease. On Postgres the subquery
+    takes FOR UPDATE SKIP LOCKED so parallel runners split the due set instead
+    of blocking on each other; SQLite serialises the single UPDATE under its
+    database write lock, which gives the same exclusivity.
+    """
+    now = now or _now()
+    due = (
+        select(Order.id)
+        .where(_due_filter(now))
+        .order_by(Order.next_escrow_check_at.asc().nulls_first(), Order.id.asc())
+        .limit(max(1, int(limit)))
+    )
+    if (db.engine.dialect.name or "").lower() == "postgresql":
+        due = due.with_for_update(skip_locked=True)
+    stmt = (
+        update(Order.__table__)
+        .where(Order.id.in_(due.scalar_subquery()))
+        .where(_due_filter(now))
+        .values(next_escrow_check_at=now + _claim_lease())
+        .returning(Order.id)
+    )
+    try:
+        ids = [int(row[0]) for row in db.session.execute(stmt).all()]
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return sorted(ids)
+
+
+def _evaluate_held_order(o: Order) -> str:
+    """Apply the escrow rules to one claimed order; returns the outcome bucket."""
+    status = (o.status or "").strip().lower()
+    if status in ("delivered", "completed", "closed") and (o.escrow_status or "NONE") == "HELD":
+        o.escrow_status = "DISPUTED"
+        o.escrow_disputed_at = _now()
+        o.updated_at = _now()
+        _event_once(int(o.id), "escrow_disputed", f"Escrow disputed due to status {status}", commit=False)
+        db.session.add(
+            AuditLog(
+                actor_user_id=None,
+                action="escrow_violation",
+                target_type="order",
+                target_id=int(o.id),
+                meta=json.dumps({
+                    "order_id": int(o.id),
+                    "status": status,
+                    "escrow_status": "HELD",
+                    "ts": _now().isoformat(),
+                }),
+            )
+        )
+        return "skipped"
+
+    outcome = (o.inspection_outcome or "NONE").upper()
+    cond = (o.release_condition or "INSPECTION_PASS").upper()
+
+    # Refund is immediate on FAIL/FRAUD.
+    if outcome in ("FAIL", "FRAUD"):
+        _settle_inspection_fee(o, commit=False)
+        _refund_escrow(o, commit=False)
+        return "refunded"
+
+    if outcome == "PASS":
+        if cond == "INSPECTION_PASS":
+            if not _inspection_unlock_ready(int(o.id)):
+                return "skipped"
+            _settle_inspection_fee(o, commit=False)
+            _release_escrow(o, commit=False)
+            return "released"
+        _settle_inspection_fee(o, commit=False)
+        if cond == "TIMEOUT":
+            held_at = o.escrow_held_at or o.created_at
+            timeout = timedelta(hours=int(o.release_timeout_hours or 48))
+            if held_at and _now() >= (held_at + timeout):
+                _release_escrow(o, commit=False)
+                return "released"
+        # BUYER_CONFIRM / ADMIN are not auto.
+        return "skipped"
+
+    return "skipped"
+
+
 def run_escrow_automation(*, limit: int = 500) -> dict:
-    """Run escrow automation for HELD orders.
+    """Run escrow automation for due HELD orders.
 
     Rules:
       - If inspection_outcome == PASS: release when release_condition allows.
       - If inspection_outcome in (FAIL, FRAUD): refund.
       - If inspection_outcome == PASS and release_condition == TIMEOUT: release after timeout.
       - Otherwise: do nothing.
+
+    Only orders whose next_escrow_check_at is due are claimed, so several
+    runners can work the backlog in parallel. Each order runs inside its own
+    savepoint: a failure rolls back that order only and it is retried once
+    its claim lease expires.
     """
 
     started_at = _now()
@@ -356,83 +548,34 @@ def run_escrow_automation(*, limit: int = 500) -> dict:
         )
         return result
 
+    counts = {"released": 0, "refunded": 0, "skipped": 0}
     processed = 0
-    released = 0
-    refunded = 0
-    skipped = 0
     errors = 0
 
-    rows = (
-        Order.query.filter_by(escrow_status="HELD")
-        .order_by(Order.id.asc())
-        .limit(int(limit))
-        .all()
-    )
+    try:
+        claimed = claim_due_escrow_orders(limit=int(limit))
+    except Exception:
+        claimed = []
+        errors += 1
+    rows = []
+    if claimed:
+        rows = (
+            Order.query.filter(Order.id.in_(claimed))
+            .order_by(Order.id.asc())
+            .execution_options(populate_existing=True)
+            .all()
+        )
 
     for o in rows:
         processed += 1
         try:
-            status = (o.status or "").strip().lower()
-            if status in ("delivered", "completed", "closed") and (o.escrow_status or "NONE") == "HELD":
-                o.escrow_status = "DISPUTED"
-                o.escrow_disputed_at = _now()
-                o.updated_at = _now()
-                _event_once(int(o.id), "escrow_disputed", f"Escrow disputed due to status {status}")
-                try:
-                    db.session.add(
-                        AuditLog(
-                            actor_user_id=None,
-                            action="escrow_violation",
-                            target_type="order",
-                            target_id=int(o.id),
-                            meta=json.dumps({
-                                "order_id": int(o.id),
-                                "status": status,
-                                "escrow_status": "HELD",
-                                "ts": _now().isoformat(),
-                            }),
-                        )
-                    )
-                except Exception:
-                    pass
-                skipped += 1
-                continue
-
-            outcome = (o.inspection_outcome or "NONE").upper()
-            cond = (o.release_condition or "INSPECTION_PASS").upper()
-
-            # Refund is immediate on FAIL/FRAUD.
-            if outcome in ("FAIL", "FRAUD"):
-                _settle_inspection_fee(o)
-                _refund_escrow(o)
-                refunded += 1
-                continue
-
-            if outcome == "PASS":
-                if cond == "INSPECTION_PASS":
-                    if not _inspection_unlock_ready(int(o.id)):
-                        skipped += 1
-                        continue
-                    _settle_inspection_fee(o)
-                    _release_escrow(o)
-                    released += 1
-                    continue
-                _settle_inspection_fee(o)
-                if cond == "TIMEOUT":
-                    held_at = o.escrow_held_at or o.created_at
-                    timeout = timedelta(hours=int(o.release_timeout_hours or 48))
-                    if held_at and _now() >= (held_at + timeout):
-                        _release_escrow(o)
-                        released += 1
-                        continue
-                # BUYER_CONFIRM / ADMIN are not auto.
-                skipped += 1
-                continue
-
-            skipped += 1
+            with db.session.begin_nested():
+                bucket = _evaluate_held_order(o)
+                o.next_escrow_check_at = next_escrow_check_at(o)
+                db.session.add(o)
+            counts[bucket] += 1
         except Exception:
             errors += 1
-            db.session.rollback()
 
     try:
         db.session.commit()
@@ -443,9 +586,9 @@ def run_escrow_automation(*, limit: int = 500) -> dict:
     result = {
         "ok": True,
         "processed": processed,
-        "released": released,
-        "refunded": refunded,
-        "skipped": skipped,
+        "released": counts["released"],
+        "refunded": counts["refunded"],
+        "skipped": counts["skipped"],
         "errors": errors,
         "ts": _now().isoformat(),
     }
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from app.extensions import db
+from app.services.event_rollups import refresh_event_rollup
+from app.utils.env import env_int
+from app.utils.job_runs import record_job_run
+
+
+JOB_NAME = "event_rollups"
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def run_event_rollups(*, now: datetime | None = None) -> dict:
+    """Roll up complete event hours since the last run, plus the trailing ``EVENT_ROLLUP_LOOKBACK_HOURS``."""
+    started_at = _now()
+    totals = {"hours": 0, "rows": 0, "pruned": 0}
+    error = None
+    try:
+        totals.update(
+            refresh_event_rollup(
+                lookback_hours=env_int("EVENT_ROLLUP_LOOKBACK_HOURS", 2, minimum=0, maximum=168),
+                now=now or started_at,
+            )
+        )
+    except Exception as exc:
+        db.session.rollback()
+        error = str(exc)
+
+    record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    totals["ok"] = error is None
+    if error:
+        totals["error"] = error
+    return totals
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, not_, or_, select
+
+from app.extensions import db
+from app.models import IdempotencyKey
+from app.utils.idempotency import durable_scope_prefixes, idempotency_retention_days
+from app.utils.job_runs import record_job_run
+
+
+JOB_NAME = "idempotency_compaction"
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def _batch_size() -> int:
+    try:
+        value = int((os.getenv("IDEMPOTENCY_COMPACTION_BATCH_SIZE") or "1000").strip() or 1000)
+    except Exception:
+        value = 1000
+    return max(1, min(value, 20000))
+
+
+def _expired_filter(now: datetime):
+    legacy_cutoff = now - timedelta(days=idempotency_retention_days())
+    # Money-moving scopes are stored without an expiry and are never compacted.
+    durable = or_(
+        *[
+            or_(
+                IdempotencyKey.scope.startswith(prefix, autoescape=True),
+                (IdempotencyKey.scope == "") & IdempotencyKey.route.startswith(prefix, autoescape=True),
+            )
+            for prefix in durable_scope_prefixes()
+        ]
+    )
+    return or_(
+        IdempotencyKey.expires_at <= now,
+        and_(
+            IdempotencyKey.expires_at.is_(None),
+            IdempotencyKey.created_at < legacy_cutoff,
+            not_(durable),
+        ),
+    )
+
+
+def compact_idempotency_keys(
+    *,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+    now: datetime | None = None,
+) -> dict:
+    """Delete expired idempotency rows in short, separately committed batches.
+
+    Each batch holds locks only on the ids it selected, so compaction can run
+    next to live traffic without one long delete against the unique index.
+    """
+    started_at = _now()
+    now = now or started_at
+    size = max(1, int(batch_size or _batch_size()))
+    totals = {"deleted": 0, "batches": 0}
+    error = None
+    try:
+        while max_batches is None or totals["batches"] < int(max_batches):
+            ids = list(
+                db.session.execute(
+                    select(IdempotencyKey.id)
+                    .where(_expired_filter(now))
+                    .order_by(IdempotencyKey.id.asc())
+                    .limit(size)
+                ).scalars()
+            )
+            if not ids:
+                break
+            result = db.session.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)).execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            totals["deleted"] += int(result.rowcount or 0)
+            totals["batches"] += 1
+            if len(ids) < size:
+                break
+    except Exception as exc:
+        db.session.rollback()
+        error = str(exc)
+
+    record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    totals["ok"] = error is None
+    if error:
+        totals["error"] = error
+    return totals
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from app.extensions import db
+from app.services.inspector_dispatch import rebuild_dispatch_index
+from app.utils.job_runs import record_job_run
+
+
+JOB_NAME = "inspector_dispatch_rebuild"
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def run_inspector_dispatch_rebuild(*, now: datetime | None = None) -> dict:
+    """Recompute the inspector dispatch index and report the drift it corrected."""
+    started_at = _now()
+    totals = {"inspectors": 0, "inserted": 0, "updated": 0, "removed": 0, "load_drift": 0}
+    error = None
+    try:
+        totals.update(rebuild_dispatch_index(now=now or started_at))
+    except Exception as exc:
+        db.session.rollback()
+        error = str(exc)
+
+    record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    totals["ok"] = error is None
+    if error:
+        totals["error"] = error
+    return totals
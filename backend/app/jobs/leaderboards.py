@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from app.extensions import db
+from app.services.leaderboards import recompute_leaderboards
+from app.utils.job_runs import record_job_run
+
+
+JOB_NAME = "leaderboard_recompute"
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def run_leaderboard_recompute(*, now: datetime | None = None) -> dict:
+    """Rebuild every leaderboard from the ledger and merchant profiles."""
+    started_at = _now()
+    totals = {"boards": 0, "entries": 0, "changed": 0}
+    error = None
+    try:
+        totals.update(recompute_leaderboards(now=now or started_at))
+    except Exception as exc:
+        db.session.rollback()
+        error = str(exc)
+
+    record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    totals["ok"] = error is None
+    if error:
+        totals["error"] = error
+    return totals
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+from app.extensions import db
+from app.services.merchant_stats import rebuild_merchant_stats, rebuild_window_days
+from app.utils.job_runs import record_job_run
+
+
+JOB_NAME = "merchant_stats_rebuild"
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def run_merchant_stats_rebuild(
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    now: datetime | None = None,
+) -> dict:
+    """Recompute merchant daily stats from the source tables and report the drift it corrected.
+
+    Without ``start`` the last ``MERCHANT_STATS_REBUILD_DAYS`` (90) days are rebuilt.
+    """
+    started_at = _now()
+    now = now or started_at
+    start = start or (now.date() - timedelta(days=rebuild_window_days() - 1))
+    totals = {"days": 0, "rows": 0, "inserted": 0, "updated": 0, "removed": 0, "drift": 0}
+    error = None
+    try:
+        totals.update(rebuild_merchant_stats(start, end or now.date(), now=now))
+    except Exception as exc:
+        db.session.rollback()
+        error = str(exc)
+
+    record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    totals["ok"] = error is None
+    if error:
+        totals["error"] = error
+    return totals
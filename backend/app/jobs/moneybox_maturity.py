@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models import JobRun, MoneyBoxAccount
+from app.utils.env import env_int
+from app.utils.job_runs import record_job_run
+from app.utils.moneybox import maybe_award_bonus, record_ledger
+
+
+JOB_NAME = "moneybox_maturity"
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def _chunk_size() -> int:
+    return env_int("MONEYBOX_MATURITY_CHUNK_SIZE", 500, maximum=5000)
+
+
+def _retry_delay() -> timedelta:
+    return timedelta(minutes=env_int("MONEYBOX_MATURITY_RETRY_MINUTES", 30, maximum=1440))
+
+
+def _due_filter(now: datetime):
+    return MoneyBoxAccount.next_maturity_check_at.isnot(None) & (MoneyBoxAccount.next_maturity_check_at <= now)
+
+
+def count_due_accounts(now: datetime | None = None) -> int:
+    stmt = select(func.count(MoneyBoxAccount.id)).where(_due_filter(now or _now()))
+    return int(db.session.execute(stmt).scalar() or 0)
+
+
+def _process_account(acct: MoneyBoxAccount, now: datetime) -> dict:
+    """Apply due auto-open/maturity transitions; only touches changed rows."""
+    result = {"changed": False, "auto_opened": False, "bonus": False}
+    if acct.status == "ACTIVE" and acct.auto_open_at and now >= acct.auto_open_at:
+        acct.status = "OPEN"
+        auto_key = f"auto_open:{int(acct.id)}:{int(acct.auto_open_at.timestamp())}"
+        record_ledger(acct, "AUTO_OPEN", 0.0, reference=f"auto_open:{int(acct.id)}", idempotency_key=auto_key)
+        result.update(changed=True, auto_opened=True)
+
+    if maybe_award_bonus(acct) > 0:
+        result.update(changed=True, bonus=True)
+
+    if acct.maturity_at and now >= acct.maturity_at and acct.status not in ("CLOSED", "MATURED"):
+        acct.status = "MATURED"
+        result["changed"] = True
+
+    nxt = acct.pending_maturity_checkpoint()
+    # A checkpoint that is still in the past cannot make progress until the
+    # account itself changes, and the model listener reschedules it then.
+    acct.next_maturity_check_at = nxt if nxt is not None and nxt > now else None
+    if result["changed"]:
+        acct.updated_at = now
+    return result
+
+
+def run_moneybox_maturity(
+    *,
+    chunk_size: int | None = None,
+    max_chunks: int | None = None,
+    now: datetime | None = None,
+) -> dict:
+    """Process due MoneyBox accounts in id-ordered chunks, committing per chunk.
+
+    Committed chunks are no longer due, so a crashed run simply resumes with
+    whatever is still due on the next invocation.
+    """
+    started_at = _now()
+    now = now or started_at
+    size = max(1, int(chunk_size or _chunk_size()))
+    totals = {"processed": 0, "changed": 0, "auto_opened": 0, "bonuses": 0, "errors": 0, "chunks": 0}
+    last_id = 0
+    error = None
+
+    try:
+        while max_chunks is None or totals["chunks"] < int(max_chunks):
+            rows = (
+                MoneyBoxAccount.query.filter(_due_filter(now), MoneyBoxAccount.id > last_id)
+                .order_by(MoneyBoxAccount.id.asc())
+                .limit(size)
+                .all()
+            )
+            if not rows:
+                break
+            for acct in rows:
+                last_id = int(acct.id)
+                totals["processed"] += 1
+                try:
+                    with db.session.begin_nested():
+                        res = _process_account(acct, now)
+                except Exception:
+                    totals["errors"] += 1
+                    db.session.refresh(acct)
+                    acct.next_maturity_check_at = now + _retry_delay()
+                    continue
+                totals["changed"] += int(res["changed"])
+                totals["auto_opened"] += int(res["auto_opened"])
+                totals["bonuses"] += int(res["bonus"])
+            db.session.commit()
+            totals["chunks"] += 1
+            if len(rows) < size:
+                break
+    except Exception as exc:
+        db.session.rollback()
+        error = str(exc)
+
+    record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    totals["ok"] = error is None
+    totals["remaining_due"] = count_due_accounts(now)
+    if error:
+        totals["error"] = error
+    return totals
+
+
+def maturity_progress() -> dict:
+    last = JobRun.query.filter_by(job_name=JOB_NAME).order_by(JobRun.ran_at.desc(), JobRun.id.desc()).first()
+    return {
+        "due": count_due_accounts(),
+        "last_run": last.to_dict() if last else None,
+    }
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import bindparam, or_, select, update
+
+from app.extensions import db
+from app.integrations.common import IntegrationDisabledError, IntegrationMisconfiguredError
+from app.integrations.messaging.base import MessagingProvider
+from app.integrations.messaging.factory import build_messaging_provider
+from app.models import NotificationQueue
+from app.utils.autopilot import get_settings
+from app.utils.env import env_int
+from app.utils.job_runs import record_job_run
+
+
+JOB_NAME = "notification_delivery"
+
+PROVIDER_CHANNELS = ("sms", "whatsapp")
+IMMEDIATE_DEAD_CODES = (
+    "TERMII_INVALID_RECIPIENT",
+    "TERMII_INVALID_SENDER",
+    "TERMII_AUTH_FAILED",
+)
+# Integration switched off or missing credentials: retry later without
+# spending an attempt.
+DEFER_DELAY = timedelta(minutes=5)
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def _batch_size() -> int:
+    return env_int("NOTIFY_DELIVERY_BATCH_SIZE", 100, maximum=2000)
+
+
+def _pool_size() -> int:
+    return env_int("NOTIFY_DELIVERY_POOL_SIZE", 8, maximum=64)
+
+
+def _send_timeout() -> int:
+    # Slowest a single provider call can take (Termii's read timeout is 12s).
+    return env_int("NOTIFY_SEND_TIMEOUT_SECONDS", 12, maximum=600)
+
+
+def _lease() -> timedelta:
+    """How long a claimed row stays ours without being written or renewed.
+
+    Outcomes are written (and the rest of the batch re-leased) after every
+    pool-sized chunk of sends, so the lease only has to outlast one chunk:
+    never less than a few provider timeouts plus a margin.
+    """
+    floor = 3 * _send_timeout() + 30
+    return timedelta(seconds=max(floor, env_int("NOTIFY_DELIVERY_LEASE_SECONDS", 120, minimum=10, maximum=3600)))
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff with equal jitter, so retries after an outage spread out."""
+    base = env_int("NOTIFY_RETRY_BASE_SECONDS", 15, maximum=3600)
+    cap = env_int("NOTIFY_RETRY_MAX_SECONDS", 3600, maximum=86400)
+    delay = min(base * (2 ** max(0, int(attempts) - 1)), cap)
+    return timedelta(seconds=random.uniform(delay / 2.0, float(delay)))
+
+
+@dataclass
+class _Claimed:
+    id: int
+    channel: str
+    to: str
+    message: str
+    attempt_count: int
+    max_attempts: int
+
+
+@dataclass
+class _Outcome:
+    ok: bool
+    code: str = ""
+    detail: str = ""
+    deferred: bool = False
+
+
+def _claimable(now: datetime):
+    return or_(
+        (NotificationQueue.status == "queued")
+        & (NotificationQueue.next_attempt_at.is_(None) | (NotificationQueue.next_attempt_at <= now)),
+        (NotificationQueue.status == "sending") & (NotificationQueue.lease_expires_at < now),
+    )
+
+
+def _claim_batch(size: int, now: datetime, token: str) -> list[_Claimed]:
+    """Lease up to ``size`` due rows to this worker with a single UPDATE ... RETURNING."""
+    candidates = (
+        select(NotificationQueue.id)
+        .where(_claimable(now))
+        .order_by(NotificationQueue.created_at.asc(), NotificationQueue.id.asc())
+        .limit(int(size))
+    )
+    if (db.engine.dialect.name or "").lower() == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+    stmt = (
+        update(NotificationQueue.__table__)
+        .where(NotificationQueue.id.in_(candidates.scalar_subquery()), _claimable(now))
+        .values(status="sending", claim_token=token, lease_expires_at=now + _lease())
+        .returning(
+            NotificationQueue.id,
+            NotificationQueue.channel,
+            NotificationQueue.to,
+            NotificationQueue.message,
+            NotificationQueue.attempt_count,
+            NotificationQueue.max_attempts,
+        )
+    )
+    rows = db.session.execute(stmt).all()
+    db.session.commit()
+    return sorted(
+        (
+            _Claimed(
+                id=int(r.id),
+                channel=(r.channel or "").strip().lower(),
+                to=r.to or "",
+                message=r.message or "",
+                attempt_count=int(r.attempt_count or 0),
+                max_attempts=int(r.max_attempts or 5),
+            )
+            for r in rows
+        ),
+        key=lambda c: c.id,
+    )
+
+
+def _providers_for(
+    channels: set[str],
+    provider_factory: Callable[..., MessagingProvider],
+) -> dict[str, MessagingProvider | _Outcome]:
+    """Build one provider per channel for the whole batch (or the reason it is unavailable)."""
+    needed = sorted(ch for ch in channels if ch in PROVIDER_CHANNELS)
+    if not needed:
+        return {}
+    settings = get_settings()
+    out: dict[str, MessagingProvider | _Outcome] = {}
+    for ch in needed:
+        try:
+            out[ch] = provider_factory(settings, channel=ch)
+        except IntegrationDisabledError as exc:
+            out[ch] = _Outcome(ok=False, code="INTEGRATION_DISABLED", detail=str(exc), deferred=True)
+        except IntegrationMisconfiguredError as exc:
+            out[ch] = _Outcome(ok=False, code="INTEGRATION_MISCONFIGURED", detail=str(exc), deferred=True)
+    return out
+
+
+def _send_one(item: _Claimed, providers: dict) -> _Outcome:
+    if item.channel == "in_app":
+        return _Outcome(ok=True)
+    provider = providers.get(item.channel)
+    if provider is None:
+        return _Outcome(ok=False, code="UNSUPPORTED_CHANNEL", detail=f"Unsupported channel: {item.channel}")
+    if isinstance(provider, _Outcome):
+        return provider
+    try:
+        send = provider.send_sms if item.channel == "sms" else provider.send_whatsapp
+        result = send(to=item.to, message=item.message, reference=f"notif:{item.id}")
+    except Exception as exc:
+        return _Outcome(ok=False, code="TERMII_PROVIDER_DOWN", detail=str(exc) or "exception")
+    return _Outcome(
+        ok=bool(result.ok),
+        code=(result.code or "").strip().upper(),
+        detail=(result.message or "").strip(),
+    )
+
+
+def _status_row(item: _Claimed, outcome: _Outcome, now: datetime) -> dict:
+    row = {
+        "b_id": item.id,
+        "b_status": "queued",
+        "b_attempt_count": item.attempt_count,
+        "b_next_attempt_at": None,
+        "b_last_error": None,
+        "b_sent_at": None,
+        "b_dead_lettered_at": None,
+    }
+    if outcome.ok:
+        row.update(b_status="sent", b_sent_at=now)
+        return row
+    code = outcome.code or "SEND_FAILED"
+    row["b_last_error"] = f"{code}:{outcome.detail or 'send_failed'}"[:240]
+    if outcome.deferred:
+        row["b_next_attempt_at"] = now + DEFER_DELAY
+        return row
+    attempts = item.attempt_count + 1
+    row["b_attempt_count"] = attempts
+    if code in IMMEDIATE_DEAD_CODES or attempts >= item.max_attempts:
+        row.update(b_status="dead", b_dead_lettered_at=now)
+    else:
+        row["b_next_attempt_at"] = now + retry_delay(attempts)
+    return row
+
+
+def _write_statuses(rows: list[dict], token: str) -> None:
+    """Apply every outcome of a batch in one executemany UPDATE.
+
+    Rows whose lease expired and were re-claimed by another worker no longer
+    carry our token and are left alone.
+    """
+    table = NotificationQueue.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("b_id"), table.c.claim_token == token)
+        .values(
+            status=bindparam("b_status"),
+            attempt_count=bindparam("b_attempt_count"),
+            next_attempt_at=bindparam("b_next_attempt_at"),
+            last_error=bindparam("b_last_error"),
+            sent_at=bindparam("b_sent_at"),
+            dead_lettered_at=bindparam("b_dead_lettered_at"),
+            claim_token=None,
+            lease_expires_at=None,
+        )
+    )
+    db.session.execute(stmt, rows)
+    db.session.commit()
+
+
+def _renew_lease(token: str, now: datetime) -> None:
+    """Push back the lease on the rows of a batch that are still being sent."""
+    table = NotificationQueue.__table__
+    db.session.execute(
+        update(table)
+        .where(table.c.claim_token == token, table.c.status == "sending")
+        .values(lease_expires_at=now + _lease())
+    )
+    db.session.commit()
+
+
+def deliver_notifications(
+    *,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+    pool_size: int | None = None,
+    now: datetime | None = None,
+    provider_factory: Callable[..., MessagingProvider] | None = None,
+) -> dict:
+    """Claim due notifications in batches and send them through a thread pool.
+
+    Each batch is leased with one UPDATE ... RETURNING (SKIP LOCKED on
+    Postgres) and sent concurrently through providers shared by the whole
+    batch. Outcomes are written back with one bulk UPDATE per pool-sized
+    chunk of completed sends, which also renews the lease on the rest of the
+    batch. A crashed worker's rows become claimable again once their lease
+    expires.
+    """
+    started_at = _now()
+    size = max(1, int(batch_size or _batch_size()))
+    workers = max(1, int(pool_size or _pool_size()))
+    factory = provider_factory or build_messaging_provider
+    totals = {"claimed": 0, "sent": 0, "failed": 0, "dead": 0, "deferred": 0, "batches": 0}
+    error = None
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notify-delivery") as pool:
+            while max_batches is None or totals["batches"] < int(max_batches):
+                batch_now = now or _now()
+                token = uuid.uuid4().hex
+                claimed = _claim_batch(size, batch_now, token)
+                if not claimed:
+                    break
+                providers = _providers_for({c.channel for c in claimed}, factory)
+                futures = {pool.submit(_send_one, item, providers): item for item in claimed}
+                rows: list[dict] = []
+                outcomes: list[_Outcome] = []
+                chunk: list[dict] = []
+                for future in as_completed(futures):
+                    outcome = future.result()
+                    chunk.append(_status_row(futures[future], outcome, now or _now()))
+                    outcomes.append(outcome)
+                    if len(chunk) >= workers and len(rows) + len(chunk) < len(claimed):
+                        _write_statuses(chunk, token)
+                        _renew_lease(token, now or _now())
+                        rows.extend(chunk)
+                        chunk = []
+                if chunk:
+                    _write_statuses(chunk, token)
+                    rows.extend(chunk)
+                totals["batches"] += 1
+                totals["claimed"] += len(claimed)
+                for row, outcome in zip(rows, outcomes):
+                    if row["b_status"] == "sent":
+                        totals["sent"] += 1
+                    elif row["b_status"] == "dead":
+                        totals["dead"] += 1
+                    else:
+                        totals["failed"] += 1
+                        if outcome.deferred:
+                            totals["deferred"] += 1
+                if len(claimed) < size:
+                    break
+    except Exception as exc:
+        db.session.rollback()
+        error = str(exc)
+
+    if totals["batches"] or error:
+        record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    totals["ok"] = error is None
+    if error:
+        totals["error"] = error
+    return totals
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from app.utils.job_runs import record_job_run
+from app.utils.partitions import ensure_partitions
+
+
+JOB_NAME = "partition_maintenance"
+
+
+def run_partition_maintenance(*, now: datetime | None = None, months_ahead: int | None = None) -> dict:
+    """Keep monthly partitions created ahead of the write path.
+
+    Rows whose month has no partition land in the table's default partition,
+    which then blocks creating that month, so this runs well before the
+    month boundary.
+    """
+    started_at = datetime.utcnow()
+    result = ensure_partitions(now=now, months_ahead=months_ahead)
+    if result.get("supported"):
+        error = "; ".join(f"{name}: {msg}" for name, msg in sorted(result["errors"].items())) or None
+        record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    return result
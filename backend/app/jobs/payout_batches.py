@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime
+
+from app.extensions import db
+from app.integrations.payments.factory import build_payments_provider
+from app.models import User
+from app.services.payout_batch_service import reconcile_open_payout_batches
+from app.utils.autopilot import get_settings
+from app.utils.job_runs import record_job_run
+
+
+JOB_NAME = "payout_batch_reconcile"
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def _platform_user_id() -> int:
+    raw = (os.getenv("PLATFORM_USER_ID") or "").strip()
+    if raw.isdigit():
+        return int(raw)
+    try:
+        admin = User.query.filter_by(role="admin").order_by(User.id.asc()).first()
+        if admin:
+            return int(admin.id)
+    except Exception:
+        pass
+    return 1
+
+
+def _batch_limit() -> int:
+    try:
+        value = int((os.getenv("PAYOUT_BATCH_RECONCILE_LIMIT") or "50").strip() or 50)
+    except Exception:
+        value = 50
+    return max(1, min(value, 500))
+
+
+def run_payout_batch_reconcile(*, limit: int | None = None) -> dict:
+    """Re-poll the provider for payout batches that still have items in flight."""
+    started_at = _now()
+    error = None
+    result: dict = {}
+    try:
+        result = reconcile_open_payout_batches(
+            provider=build_payments_provider(get_settings()),
+            platform_user_id=_platform_user_id(),
+            limit=int(limit or _batch_limit()),
+        )
+    except Exception as exc:
+        db.session.rollback()
+        error = str(exc)
+
+    record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    result["ok"] = error is None
+    if error:
+        result["error"] = error
+    return result
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+from datetime import date, datetime
+
+from app.extensions import db
+from app.services.rollups import backfill_platform_rollup, refresh_platform_rollup
+from app.utils.job_runs import record_job_run
+
+
+JOB_NAME = "platform_rollups"
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def _lookback_days() -> int:
+    try:
+        value = int((os.getenv("ROLLUP_LOOKBACK_DAYS") or "2").strip())
+    except Exception:
+        value = 2
+    return max(0, min(value, 31))
+
+
+def run_platform_rollups(*, now: datetime | None = None) -> dict:
+    """Roll up days marked dirty since the last run, plus the trailing ``ROLLUP_LOOKBACK_DAYS``."""
+    started_at = _now()
+    totals = {"days": 0, "rows": 0, "dirty": 0}
+    error = None
+    try:
+        totals.update(refresh_platform_rollup(lookback_days=_lookback_days(), now=now or started_at))
+    except Exception as exc:
+        db.session.rollback()
+        error = str(exc)
+
+    record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    totals["ok"] = error is None
+    if error:
+        totals["error"] = error
+    return totals
+
+
+def run_platform_rollup_backfill(start: date, end: date, *, chunk_days: int = 31) -> dict:
+    """Recompute every day in ``[start, end]``; safe to rerun over any range."""
+    started_at = _now()
+    totals = {"days": 0, "rows": 0}
+    error = None
+    try:
+        totals.update(backfill_platform_rollup(start, end, chunk_days=chunk_days, now=started_at))
+    except Exception as exc:
+        db.session.rollback()
+        error = str(exc)
+
+    record_job_run(job_name=f"{JOB_NAME}_backfill", ok=error is None, started_at=started_at, error=error)
+    totals["ok"] = error is None
+    if error:
+        totals["error"] = error
+    return totals
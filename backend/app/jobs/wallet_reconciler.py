@@ -1,76 +1,186 @@
 from __future__ import annotations
 
 import json
+import os
 from datetime import datetime
 
 from app.extensions import db
-from sqlalchemy import func
+from sqlalchemy import case, func, insert, or_, select, text
 from app.models import Wallet, WalletTxn, AuditLog
+from app.utils.partitions import table_is_partitioned
 
 
-def _sum_ledger(wallet_id: int) -> float:
-    credits = db.session.query(func.coalesce(func.sum(WalletTxn.amount), 0.0)).filter(
-        WalletTxn.wallet_id == int(wallet_id),
-        WalletTxn.direction == "credit",
-    ).scalar() or 0.0
-    debits = db.session.query(func.coalesce(func.sum(WalletTxn.amount), 0.0)).filter(
-        WalletTxn.wallet_id == int(wallet_id),
-        WalletTxn.direction == "debit",
-    ).scalar() or 0.0
-    return float(credits) - float(debits)
+def _env_chunk_size(default: int = 2000) -> int:
+    raw = (os.getenv("WALLET_RECONCILE_CHUNK_SIZE") or "").strip()
+    try:
+        value = int(raw) if raw else int(default)
+    except Exception:
+        value = int(default)
+    return max(50, min(value, 100000))
 
 
-def reconcile_wallets(*, limit: int = 500, tolerance: float = 0.01) -> dict:
-    """Detect wallet anomalies (ledger vs stored balance).
+def _signed_ledger_amount():
+    direction = func.lower(WalletTxn.direction)
+    return case(
+        (direction == "credit", WalletTxn.amount),
+        (direction == "debit", -WalletTxn.amount),
+        else_=0.0,
+    )
 
-    This does NOT auto-correct balances. It logs anomalies into AuditLog so they are visible.
-    """
-    checked = 0
-    anomalies = 0
-    now = datetime.utcnow()
 
-    wallets = Wallet.query.order_by(Wallet.id.asc()).limit(int(limit)).all()
+def wallet_id_ranges(*, chunk_size: int | None = None, max_wallet_id: int | None = None) -> list[tuple[int, int]]:
+    """Split the wallets id space into inclusive (start, end) ranges.
+
+    Ranges are computed from MIN/MAX(id) so each partition is an index range
+    scan on wallets and wallet_txns.wallet_id, independent of table size.
+    """
+    size = int(chunk_size or _env_chunk_size())
+    lo, hi = db.session.execute(select(func.min(Wallet.id), func.max(Wallet.id))).one()
+    if lo is None or hi is None:
+        return []
+    if max_wallet_id is not None:
+        hi = min(int(hi), int(max_wallet_id))
+    out = []
+    start = int(lo)
+    while start <= int(hi):
+        end = min(start + size - 1, int(hi))
+        out.append((start, end))
+        start = end + 1
+    return out
 
-    for w in wallets:
-        checked += 1
-        try:
-            computed = _sum_ledger(int(w.id))
-            stored = float(w.balance or 0.0)
-            reserved = float(w.reserved_balance or 0.0)
 
-            issues = []
-            if abs(computed - stored) > float(tolerance):
-                issues.append("ledger_mismatch")
-            if reserved < -0.0001:
-                issues.append("negative_reserved")
-            if reserved - stored > float(tolerance):
-                issues.append("reserved_exceeds_balance")
+def scan_wallet_range(id_start: int, id_end: int, *, tolerance: float = 0.01) -> dict:
+    """Find anomalous wallets in [id_start, id_end] with one grouped aggregate.
 
-            if not issues:
-                continue
+    The ledger is summed per wallet with a single GROUP BY over the range and
+    joined back to wallets; only mismatching rows leave the database.
+    """
+    tol = float(tolerance)
+    if table_is_partitioned(WalletTxn.__tablename__):
+        # Balances need the full history, so no partition can be pruned; let
+        # Postgres aggregate each monthly partition separately and combine.
+        db.session.execute(text("SET LOCAL enable_partitionwise_aggregate = on"))
+    ledger = (
+        select(
+            WalletTxn.wallet_id.label("wallet_id"),
+            func.sum(_signed_ledger_amount()).label("computed"),
+        )
+        .where(WalletTxn.wallet_id >= int(id_start), WalletTxn.wallet_id <= int(id_end))
+        .group_by(WalletTxn.wallet_id)
+        .subquery()
+    )
+    computed = func.coalesce(ledger.c.computed, 0.0)
+    balance = func.coalesce(Wallet.balance, 0.0)
+    reserved = func.coalesce(Wallet.reserved_balance, 0.0)
+    stmt = (
+        select(
+            Wallet.id,
+            Wallet.user_id,
+            balance.label("balance"),
+            reserved.label("reserved_balance"),
+            Wallet.currency,
+            computed.label("computed"),
+        )
+        .select_from(Wallet.__table__.outerjoin(ledger, ledger.c.wallet_id == Wallet.id))
+        .where(Wallet.id >= int(id_start), Wallet.id <= int(id_end))
+        .where(
+            or_(
+                func.abs(balance - computed) > tol,
+                reserved < -0.0001,
+                reserved - balance > tol,
+            )
+        )
+        .order_by(Wallet.id.asc())
+    )
+    checked = db.session.execute(
+        select(func.count(Wallet.id)).where(Wallet.id >= int(id_start), Wallet.id <= int(id_end))
+    ).scalar() or 0
 
-            anomalies += 1
-            meta = {
+    items = []
+    for row in db.session.execute(stmt):
+        stored = float(row.balance or 0.0)
+        reserved_value = float(row.reserved_balance or 0.0)
+        computed_value = float(row.computed or 0.0)
+        issues = []
+        if abs(computed_value - stored) > tol:
+            issues.append("ledger_mismatch")
+        if reserved_value < -0.0001:
+            issues.append("negative_reserved")
+        if reserved_value - stored > tol:
+            issues.append("reserved_exceeds_balance")
+        if not issues:
+            continue
+        items.append(
+            {
                 "issues": issues,
-                "wallet_id": int(w.id),
-                "user_id": int(w.user_id),
-                "computed_balance": round(computed, 4),
+                "wallet_id": int(row.id),
+                "user_id": int(row.user_id),
+                "computed_balance": round(computed_value, 4),
                 "stored_balance": round(stored, 4),
-                "reserved_balance": round(reserved, 4),
-                "currency": w.currency or "NGN",
-                "at": now.isoformat(),
+                "reserved_balance": round(reserved_value, 4),
+                "drift": round(stored - computed_value, 4),
+                "currency": row.currency or "NGN",
             }
-            log = AuditLog(
-                actor_user_id=None,
-                action="wallet_anomaly",
-                target_type="wallet",
-                target_id=int(w.id),
-                meta=json.dumps(meta),
-                created_at=now,
-            )
-            db.session.add(log)
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
+        )
+    return {"id_start": int(id_start), "id_end": int(id_end), "checked": int(checked), "items": items}
+
+
+def reconcile_wallet_range(id_start: int, id_end: int, *, tolerance: float = 0.01) -> dict:
+    """Scan one id range and bulk-insert its anomalies in a single transaction."""
+    now = datetime.utcnow()
+    scan = scan_wallet_range(id_start, id_end, tolerance=tolerance)
+    rows = []
+    for item in scan["items"]:
+        meta = {
+            "issues": item["issues"],
+            "wallet_id": item["wallet_id"],
+            "user_id": item["user_id"],
+            "computed_balance": item["computed_balance"],
+            "stored_balance": item["stored_balance"],
+            "reserved_balance": item["reserved_balance"],
+            "currency": item["currency"],
+            "at": now.isoformat(),
+        }
+        rows.append(
+            {
+                "actor_user_id": None,
+                "action": "wallet_anomaly",
+                "target_type": "wallet",
+                "target_id": int(item["wallet_id"]),
+                "meta": json.dumps(meta),
+                "created_at": now,
+            }
+        )
+    try:
+        if rows:
+            db.session.execute(insert(AuditLog.__table__), rows)
+        db.session.commit()
+    except Exception:
+        # Raise so the range task retries; the drift found here must not be dropped.
+        db.session.rollback()
+        raise
+    return {"id_start": int(id_start), "id_end": int(id_end), "checked": int(scan["checked"]), "anomalies": len(rows)}
+
+
+def reconcile_wallets(*, limit: int | None = 500, tolerance: float = 0.01, chunk_size: int | None = None) -> dict:
+    """Detect wallet anomalies (ledger vs stored balance).
+
+    This does NOT auto-correct balances. It logs anomalies into AuditLog so they are visible.
+    Wallets are processed in id ranges; `limit` caps the scan to the first N wallets by id.
+    """
+    max_wallet_id = None
+    if limit is not None:
+        max_wallet_id = db.session.execute(
+            select(Wallet.id).order_by(Wallet.id.asc()).offset(max(0, int(limit) - 1)).limit(1)
+        ).scalar()
+        if max_wallet_id is None:
+            max_wallet_id = db.session.execute(select(func.max(Wallet.id))).scalar()
+
+    checked = 0
+    anomalies = 0
+    for id_start, id_end in wallet_id_ranges(chunk_size=chunk_size, max_wallet_id=max_wallet_id):
+        res = reconcile_wallet_range(id_start, id_end, tolerance=tolerance)
+        checked += int(res.get("checked") or 0)
+        anomalies += int(res.get("anomalies") or 0)
 
     return {"checked": checked, "anomalies": anomalies}
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+from app.extensions import db
+from app.models import WebhookInbox
+from app.utils.db_compat import dialect_insert
+from app.utils.env import env_int
+from app.utils.job_runs import record_job_run
+from app.utils.transactions import batch_transaction
+
+
+JOB_NAME = "webhook_inbox"
+FAILED_ERROR = "WEBHOOK_PROCESSING_FAILED"
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def _batch_size() -> int:
+    return env_int("WEBHOOK_INBOX_BATCH_SIZE", 100, maximum=2000)
+
+
+def _max_attempts() -> int:
+    return env_int("WEBHOOK_INBOX_MAX_ATTEMPTS", 5, maximum=50)
+
+
+def _stale_after() -> timedelta:
+    return timedelta(seconds=env_int("WEBHOOK_INBOX_STALE_SECONDS", 300, minimum=30, maximum=86400))
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(3600, 30 * (2 ** max(0, int(attempts) - 1))))
+
+
+def append_webhook(
+    *,
+    provider: str,
+    event_id: str,
+    event_type: str,
+    reference: str,
+    source: str,
+    signature: str | None,
+    raw_text: str,
+) -> int | None:
+    """Record a verified webhook with a single INSERT.
+
+    Returns the new inbox id, or None when the (provider, event_id) pair was
+    already recorded.
+    """
+    now = _now()
+    values = dict(
+        provider=(provider or "paystack")[:32],
+        event_id=(event_id or "")[:128],
+        event_type=(event_type or "")[:64],
+        reference=(reference or "")[:128] or None,
+        source=(source or "")[:80],
+        signature=(signature or "")[:256] or None,
+        payload_json=raw_text or "{}",
+        status="pending",
+        attempts=0,
+        received_at=now,
+        available_at=now,
+    )
+    stmt = dialect_insert(WebhookInbox.__table__)
+    if stmt is not None:
+        stmt = (
+            stmt.values(**values)
+            .on_conflict_do_nothing(index_elements=["provider", "event_id"])
+            .returning(WebhookInbox.id)
+        )
+        new_id = db.session.execute(stmt).scalar()
+        db.session.commit()
+        return int(new_id) if new_id is not None else None
+    try:
+        row = WebhookInbox(**values)
+        db.session.add(row)
+        db.session.commit()
+        return int(row.id)
+    except IntegrityError:
+        db.session.rollback()
+        return None
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(WebhookInbox.status == "pending", WebhookInbox.available_at <= now),
+        and_(WebhookInbox.status == "processing", WebhookInbox.claimed_at < now - _stale_after()),
+    )
+
+
+def _claim_batch(size: int, now: datetime, ids: list[int] | None = None) -> list[int]:
+    earlier = aliased(WebhookInbox)
+    # Skip events parked behind an earlier one that is retrying or in flight,
+    # so they do not fill the batch.
+    parked = (
+        select(earlier.id)
+        .where(
+            earlier.reference == WebhookInbox.reference,
+            earlier.id < WebhookInbox.id,
+            or_(
+                and_(earlier.status == "pending", earlier.available_at > now),
+                and_(earlier.status == "processing", earlier.claimed_at >= now - _stale_after()),
+            ),
+        )
+        .exists()
+    )
+    stmt = (
+        select(WebhookInbox)
+        .where(_claimable(now), ~parked)
+        .order_by(WebhookInbox.id.asc())
+        .limit(int(size))
+    )
+    if ids is not None:
+        stmt = stmt.where(WebhookInbox.id.in_([int(i) for i in ids]))
+    if (db.engine.dialect.name or "").lower() == "postgresql":
+        stmt = stmt.with_for_update(skip_locked=True)
+    rows = list(db.session.execute(stmt).scalars().all())
+    if not rows:
+        db.session.rollback()
+        return []
+
+    # Rows another worker skipped past (SKIP LOCKED) can still precede ours.
+    claimed_ids = [int(r.id) for r in rows]
+    refs = sorted({r.reference for r in rows if r.reference})
+    first_open: dict[str, int] = {}
+    if refs:
+        first_open = dict(
+            db.session.execute(
+                select(WebhookInbox.reference, func.min(WebhookInbox.id))
+                .where(
+                    WebhookInbox.reference.in_(refs),
+                    WebhookInbox.status.in_(("pending", "processing")),
+                    WebhookInbox.id.notin_(claimed_ids),
+                )
+                .group_by(WebhookInbox.reference)
+            ).all()
+        )
+    ready = [r for r in rows if not (r.reference in first_open and int(first_open[r.reference]) < int(r.id))]
+    for row in ready:
+        row.status = "processing"
+        row.claimed_at = now
+        row.attempts = int(row.attempts or 0) + 1
+    db.session.commit()
+    return [int(r.id) for r in ready]
+
+
+def _apply_event(row: WebhookInbox) -> bool:
+    from app.segments.segment_payments import process_paystack_webhook
+
+    try:
+        payload = json.loads(row.payload_json or "{}")
+    except Exception:
+        payload = None
+    try:
+        body, code = process_paystack_webhook(
+            payload=payload if isinstance(payload, dict) else {},
+            raw=(row.payload_json or "").encode("utf-8"),
+            signature=row.signature,
+            source=row.source or "webhook_inbox",
+            retry_failed=True,
+        )
+    except Exception as exc:
+        db.session.rollback()
+        body, code = {"ok": False, "error": FAILED_ERROR, "message": type(exc).__name__}, 500
+    row.result_code = int(code)
+    try:
+        row.result_json = json.dumps(body, separators=(",", ":"), default=str)[:20000]
+    except Exception:
+        row.result_json = None
+    if (body or {}).get("error") != FAILED_ERROR and int(code) < 500:
+        row.status = "processed"
+        row.error = None
+        row.processed_at = _now()
+        return True
+    row.error = str((body or {}).get("message") or FAILED_ERROR)[:500]
+    if int(row.attempts or 0) >= _max_attempts():
+        row.status = "failed"
+        row.processed_at = _now()
+    else:
+        row.status = "pending"
+        row.claimed_at = None
+        row.available_at = _now() + _retry_delay(int(row.attempts or 0))
+    return False
+
+
+def _process_claimed(ids: list[int]) -> dict:
+    counts = {"processed": 0, "failed": 0, "deferred": 0}
+    with batch_transaction():
+        rows = WebhookInbox.query.filter(WebhookInbox.id.in_(ids)).order_by(WebhookInbox.id.asc()).all()
+        groups: OrderedDict[str, list[WebhookInbox]] = OrderedDict()
+        for row in rows:
+            groups.setdefault(row.reference or f"#{int(row.id)}", []).append(row)
+        for group in groups.values():
+            blocked = False
+            for row in group:
+                if blocked:
+                    # Keep per-reference order: later events wait for the
+                    # failed one to be retried.
+                    row.status = "pending"
+                    row.claimed_at = None
+                    row.attempts = max(0, int(row.attempts or 0) - 1)
+                    counts["deferred"] += 1
+                    continue
+                if _apply_event(row):
+                    counts["processed"] += 1
+                else:
+                    counts["failed"] += 1
+                    blocked = True
+                db.session.commit()
+    return counts
+
+
+def drain_webhook_inbox(
+    *,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+    only_ids: list[int] | None = None,
+    now: datetime | None = None,
+) -> dict:
+    """Claim pending inbox rows in batches and apply each batch in one transaction.
+
+    ``only_ids`` limits the run to those rows; a row still waiting behind an
+    earlier event for its reference is left for a later drain.
+    """
+    started_at = _now()
+    size = max(1, int(batch_size or _batch_size()))
+    totals = {"processed": 0, "failed": 0, "deferred": 0, "batches": 0}
+    error = None
+    try:
+        while max_batches is None or totals["batches"] < int(max_batches):
+            ids = _claim_batch(size, now or _now(), only_ids)
+            if not ids:
+                break
+            try:
+                counts = _process_claimed(ids)
+            except Exception:
+                db.session.rollback()
+                db.session.execute(
+                    update(WebhookInbox)
+                    .where(WebhookInbox.id.in_(ids), WebhookInbox.status == "processing")
+                    .values(status="pending", claimed_at=None)
+                )
+                db.session.commit()
+                raise
+            for key, value in counts.items():
+                totals[key] += int(value)
+            totals["batches"] += 1
+            if len(ids) < size:
+                break
+    except Exception as exc:
+        db.session.rollback()
+        error = str(exc)
+
+    record_job_run(job_name=JOB_NAME, ok=error is None, started_at=started_at, error=error)
+    totals["ok"] = error is None
+    if error:
+        totals["error"] = error
+    return totals
+
+
+def replay_webhook_inbox(*, ids: list[int] | None = None, status: str | None = None) -> int:
+    """Put finished or dead-lettered rows back in the queue."""
+    if not ids and not status:
+        return 0
+    stmt = update(WebhookInbox).where(WebhookInbox.status != "processing")
+    if ids:
+        stmt = stmt.where(WebhookInbox.id.in_([int(i) for i in ids]))
+    if status:
+        stmt = stmt.where(WebhookInbox.status == str(status))
+    now = _now()
+    result = db.session.execute(
+        stmt.values(status="pending", attempts=0, error=None, claimed_at=None, processed_at=None, available_at=now)
+    )
+    db.session.commit()
+    return int(result.rowcount or 0)
+
+
+def inbox_stats() -> dict:
+    rows = db.session.execute(
+        select(WebhookInbox.status, func.count(WebhookInbox.id)).group_by(WebhookInbox.status)
+    ).all()
+    return {str(status): int(count) for status, count in rows}
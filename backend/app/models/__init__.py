@@ -24,7 +24,7 @@ from .inspection_ticket import InspectionTicket  # noqa: F401
 
 from .wallet import Wallet  # noqa: F401
 from .wallet_txn import WalletTxn  # noqa: F401
-from .payout import PayoutRequest  # noqa: F401
+from .payout import PayoutRequest, PayoutBatch  # noqa: F401
 from .commission_rule import CommissionRule  # noqa: F401
 from .moneybox import MoneyBoxAccount, MoneyBoxLedger  # noqa: F401
 from .role_change_request import RoleChangeRequest  # noqa: F401
@@ -42,12 +42,14 @@ from .payment_intent import PaymentIntent  # noqa: F401
 
 from .driver_job_offer import DriverJobOffer  # noqa: F401
 from .driver_job import DriverJob  # noqa: F401
+from .driver_location import DriverLocationPing  # noqa: F401
 
 from .payout_recipient import PayoutRecipient  # noqa: F401
 
 from .idempotency_key import IdempotencyKey  # noqa: F401
 
 from .webhook_event import WebhookEvent  # noqa: F401
+from .webhook_inbox import WebhookInbox  # noqa: F401
 from .payment_intent_transition import PaymentIntentTransition  # noqa: F401
 from .escrow_transition import EscrowTransition  # noqa: F401
 from .risk_event import RiskEvent  # noqa: F401
@@ -58,6 +60,7 @@ from .job_run import JobRun  # noqa: F401
 # Inspector Agent Mode + Reputation
 from .inspection_reputation import InspectorProfile, InspectionReview, InspectionAudit  # noqa: F401
 from .inspector_bond import InspectorBond, BondEvent  # noqa: F401
+from .inspector_dispatch import InspectorDispatchEntry  # noqa: F401
 from .merchant_follow import MerchantFollow  # noqa: F401
 from .inspector_request import InspectorRequest  # noqa: F401
 from .category import Category  # noqa: F401
@@ -78,3 +81,5 @@ from .economics import PricingBenchmark, CommissionPolicy, CommissionPolicyRule
 from .autopilot_recommendation import AutopilotSnapshot, AutopilotRecommendation, AutopilotEvent  # noqa: F401
 from .strategic_intelligence import ElasticitySnapshot, FraudFlag  # noqa: F401
 from .saved_search import SavedSearch  # noqa: F401
+from .rollups import DailyPlatformMetric, MerchantDailyStat, PlatformEventHourly, RollupDirtyDay  # noqa: F401
+from .leaderboard import LeaderboardScore  # noqa: F401
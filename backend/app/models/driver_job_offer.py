@@ -14,6 +14,12 @@ class DriverJobOffer(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     decided_at = db.Column(db.DateTime, nullable=True)
 
+    __table_args__ = (
+        db.Index("ix_driver_job_offers_order_status", "order_id", "status"),
+        db.Index("ix_driver_job_offers_driver_status", "driver_id", "status"),
+        db.Index("ix_driver_job_offers_status_created", "status", "created_at"),
+    )
+
     def to_dict(self):
         return {
             "id": int(self.id),
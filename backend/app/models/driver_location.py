@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class DriverLocationPing(db.Model):
+    """Downsampled driver track history; the live position lives in the location store."""
+
+    __tablename__ = "driver_location_pings"
+
+    id = db.Column(db.Integer, primary_key=True)
+    driver_id = db.Column(db.Integer, nullable=False)
+    order_id = db.Column(db.Integer, nullable=True, index=True)
+
+    lat = db.Column(db.Float, nullable=False)
+    lng = db.Column(db.Float, nullable=False)
+    accuracy_m = db.Column(db.Float, nullable=True)
+    speed_mps = db.Column(db.Float, nullable=True)
+
+    recorded_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_driver_location_pings_driver_recorded", "driver_id", "recorded_at"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": int(self.id),
+            "driver_id": int(self.driver_id),
+            "order_id": int(self.order_id) if self.order_id is not None else None,
+            "lat": float(self.lat),
+            "lng": float(self.lng),
+            "accuracy_m": float(self.accuracy_m) if self.accuracy_m is not None else None,
+            "speed_mps": float(self.speed_mps) if self.speed_mps is not None else None,
+            "recorded_at": self.recorded_at.isoformat() if self.recorded_at else None,
+        }
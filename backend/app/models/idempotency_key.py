@@ -24,6 +24,8 @@ class IdempotencyKey(db.Model):
 
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # NULL on rows written before expiry existed; compaction ages those by created_at.
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
 
     @property
     def effective_scope(self) -> str:
@@ -41,4 +43,5 @@ class IdempotencyKey(db.Model):
             "response_code": int(self.response_code or self.status_code or 200),
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
         }
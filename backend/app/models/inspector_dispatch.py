@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class InspectorDispatchEntry(db.Model):
+    """Precomputed inspector eligibility and open load, kept current by session hooks.
+
+    ``ix_inspector_dispatch_pick`` (per region) and ``ix_inspector_dispatch_rank``
+    (any region) order eligible inspectors by assignment priority, so picking
+    one is a single index seek.
+    """
+
+    __tablename__ = "inspector_dispatch"
+
+    id = db.Column(db.Integer, primary_key=True)
+    inspector_user_id = db.Column(db.Integer, nullable=False, unique=True, index=True)
+
+    region = db.Column(db.String(64), nullable=False, default="")
+    eligible = db.Column(db.Boolean, nullable=False, default=False)
+    tier_rank = db.Column(db.Integer, nullable=False, default=1)
+    reputation_score = db.Column(db.Float, nullable=False, default=0.0)
+    open_load = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "inspector_user_id": int(self.inspector_user_id),
+            "region": self.region or "",
+            "eligible": bool(self.eligible),
+            "tier_rank": int(self.tier_rank or 0),
+            "reputation_score": float(self.reputation_score or 0.0),
+            "open_load": int(self.open_load or 0),
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+db.Index(
+    "ix_inspector_dispatch_pick",
+    InspectorDispatchEntry.eligible,
+    InspectorDispatchEntry.region,
+    InspectorDispatchEntry.tier_rank.desc(),
+    InspectorDispatchEntry.reputation_score.desc(),
+    InspectorDispatchEntry.open_load,
+)
+db.Index(
+    "ix_inspector_dispatch_rank",
+    InspectorDispatchEntry.eligible,
+    InspectorDispatchEntry.tier_rank.desc(),
+    InspectorDispatchEntry.reputation_score.desc(),
+    InspectorDispatchEntry.open_load,
+)
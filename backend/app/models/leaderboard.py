@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class LeaderboardScore(db.Model):
+    """One user's score on a ranked board.
+
+    ``board`` is ``merchant`` or ``driver`` for ledger earnings over the last
+    ``window_days`` days, or ``merchant_score`` (window 0) for the merchant
+    profile score. The table is the fallback and source of truth for the
+    Redis sorted sets that serve the same boards.
+    """
+
+    __tablename__ = "leaderboard_scores"
+    __table_args__ = (
+        db.UniqueConstraint("board", "window_days", "user_id", name="uq_leaderboard_scores_entry"),
+        db.Index("ix_leaderboard_scores_rank", "board", "window_days", "score"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    board = db.Column(db.String(32), nullable=False)
+    window_days = db.Column(db.Integer, nullable=False, default=0)
+    user_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
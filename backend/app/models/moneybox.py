@@ -1,5 +1,7 @@
 from datetime import datetime
 
+from sqlalchemy import event, inspect as sa_inspect
+
 from app.extensions import db
 
 
@@ -26,10 +28,30 @@ class MoneyBoxAccount(db.Model):
     bonus_eligible = db.Column(db.Boolean, nullable=False, default=True)
     bonus_awarded_at = db.Column(db.DateTime, nullable=True)
     last_withdraw_at = db.Column(db.DateTime, nullable=True)
+    # Earliest auto-open/maturity/bonus checkpoint still pending; NULL when the
+    # maturity processor has nothing left to do for this account.
+    next_maturity_check_at = db.Column(db.DateTime, nullable=True, index=True)
 
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
+    def pending_maturity_checkpoint(self) -> datetime | None:
+        status = (self.status or "CLOSED").upper()
+        if status == "CLOSED":
+            return None
+        due = []
+        if status == "ACTIVE" and self.auto_open_at is not None:
+            due.append(self.auto_open_at)
+        if self.maturity_at is not None:
+            bonus_pending = (
+                self.bonus_awarded_at is None
+                and bool(self.bonus_eligible)
+                and float(self.principal_balance or 0.0) > 0.0
+            )
+            if status in ("ACTIVE", "OPEN") or bonus_pending:
+                due.append(self.maturity_at)
+        return min(due) if due else None
+
     def to_dict(self):
         total = float(self.principal_balance or 0.0) + float(self.bonus_balance or 0.0)
         projected_bonus = 0.0
@@ -63,6 +85,31 @@ class MoneyBoxAccount(db.Model):
         }
 
 
+_MATURITY_TRIGGER_FIELDS = (
+    "status",
+    "auto_open_at",
+    "maturity_at",
+    "bonus_awarded_at",
+    "bonus_eligible",
+    "principal_balance",
+)
+
+
+@event.listens_for(MoneyBoxAccount, "before_insert")
+def _schedule_maturity_check_on_insert(mapper, connection, target):
+    if target.next_maturity_check_at is None:
+        target.next_maturity_check_at = target.pending_maturity_checkpoint()
+
+
+@event.listens_for(MoneyBoxAccount, "before_update")
+def _schedule_maturity_check_on_update(mapper, connection, target):
+    state = sa_inspect(target)
+    if state.attrs.next_maturity_check_at.history.has_changes():
+        return
+    if any(state.attrs[name].history.has_changes() for name in _MATURITY_TRIGGER_FIELDS):
+        target.next_maturity_check_at = target.pending_maturity_checkpoint()
+
+
 class MoneyBoxLedger(db.Model):
     __tablename__ = "moneybox_ledger"
 
@@ -22,6 +22,10 @@ class Notification(db.Model):
 
     meta = db.Column(db.Text, nullable=True)  # JSON string
 
+    __table_args__ = (
+        db.Index("ix_notifications_user_id_id", "user_id", "id"),
+    )
+
     def _load_meta(self):
         raw = (self.meta or "").strip()
         if not raw:
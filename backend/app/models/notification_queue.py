@@ -11,10 +11,14 @@ class NotificationQueue(db.Model):
     to = db.Column(db.String(128), nullable=False)
     message = db.Column(db.Text, nullable=False)
 
-    # queued -> sent / failed / dead
+    # queued -> sending (claimed by a delivery worker) -> sent / queued / dead
     status = db.Column(db.String(32), nullable=False, default="queued")
     reference = db.Column(db.String(128), nullable=True)
 
+    # Delivery worker claim; an expired lease makes a "sending" row claimable again.
+    claim_token = db.Column(db.String(32), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+
     # Reliability fields
     attempt_count = db.Column(db.Integer, nullable=False, default=0)
     max_attempts = db.Column(db.Integer, nullable=False, default=5)
@@ -25,6 +29,11 @@ class NotificationQueue(db.Model):
     sent_at = db.Column(db.DateTime, nullable=True)
     dead_lettered_at = db.Column(db.DateTime, nullable=True)
 
+    __table_args__ = (
+        db.Index("ix_notification_queue_status_next_attempt", "status", "next_attempt_at"),
+        db.Index("ix_notification_queue_reference_to", "reference", "to", "created_at"),
+    )
+
     def schedule_next_attempt(self, *, base_seconds: int = 15, max_seconds: int = 3600):
         """Exponential backoff with a cap."""
         try:
@@ -1,5 +1,7 @@
 from datetime import datetime
 
+from sqlalchemy import event, inspect as sa_inspect
+
 from app.extensions import db
 
 
@@ -42,6 +44,7 @@ class Order(db.Model):
     handshake_id = db.Column(db.String(64), nullable=True, index=True)
 
     driver_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True, index=True)
+    assigned_at = db.Column(db.DateTime, nullable=True)
 
     # =====================================================
     # DELIVERY SECRET CODES (Seller ↔ Driver ↔ Buyer)
@@ -80,6 +83,9 @@ class Order(db.Model):
         default="INSPECTION_PASS",
     )
     release_timeout_hours = db.Column(db.Integer, nullable=False, default=48)
+    # Earliest time the escrow runner needs to look at this HELD order again.
+    # NULL on a HELD row means "due now" (rows predating the scheduler).
+    next_escrow_check_at = db.Column(db.DateTime, nullable=True)
 
     # Inspection gate
     inspection_required = db.Column(db.Boolean, nullable=False, default=False)
@@ -110,6 +116,11 @@ class Order(db.Model):
     inspection_evidence_urls = db.Column(db.Text, nullable=True)
     inspection_note = db.Column(db.String(400), nullable=True)
 
+    __table_args__ = (
+        db.Index("ix_orders_escrow_due", "escrow_status", "next_escrow_check_at"),
+        db.Index("ix_orders_status_assigned_at", "status", "assigned_at"),
+    )
+
     def to_dict(self) -> dict:
         return {
             "id": int(self.id),
@@ -162,3 +173,27 @@ class Order(db.Model):
             "inspection_evidence_urls": self.inspection_evidence_urls or "[]",
             "inspection_note": self.inspection_note or "",
         }
+
+
+# Any change that can make a HELD order releasable/refundable pulls its next
+# escrow check forward to "now"; the runner pushes it back out after evaluating.
+_ESCROW_TRIGGER_FIELDS = ("escrow_status", "inspection_outcome", "release_condition", "status", "release_timeout_hours")
+
+
+@event.listens_for(Order, "before_insert")
+def _schedule_escrow_check_on_insert(mapper, connection, target):
+    if (target.escrow_status or "NONE") == "HELD" and target.next_escrow_check_at is None:
+        target.next_escrow_check_at = datetime.utcnow()
+
+
+@event.listens_for(Order, "before_update")
+def _schedule_escrow_check_on_update(mapper, connection, target):
+    state = sa_inspect(target)
+    if state.attrs.next_escrow_check_at.history.has_changes():
+        return
+    if not any(state.attrs[name].history.has_changes() for name in _ESCROW_TRIGGER_FIELDS):
+        return
+    if (target.escrow_status or "NONE") == "HELD":
+        target.next_escrow_check_at = datetime.utcnow()
+    else:
+        target.next_escrow_check_at = None
@@ -19,6 +19,12 @@ class PayoutRequest(db.Model):
     account_number = db.Column(db.String(32), nullable=True)
     account_name = db.Column(db.String(120), nullable=True)
 
+    # Set once the payout is submitted through a PayoutBatch.
+    batch_id = db.Column(db.Integer, db.ForeignKey("payout_batches.id"), nullable=True, index=True)
+    provider = db.Column(db.String(32), nullable=True)
+    provider_reference = db.Column(db.String(120), nullable=True, index=True)
+    failure_reason = db.Column(db.String(240), nullable=True)
+
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
@@ -34,6 +40,51 @@ class PayoutRequest(db.Model):
             "bank_name": self.bank_name or "",
             "account_number": self.account_number or "",
             "account_name": self.account_name or "",
+            "batch_id": int(self.batch_id) if self.batch_id is not None else None,
+            "provider": self.provider or "",
+            "provider_reference": self.provider_reference or "",
+            "failure_reason": self.failure_reason or "",
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+class PayoutBatch(db.Model):
+    __tablename__ = "payout_batches"
+
+    id = db.Column(db.Integer, primary_key=True)
+    reference = db.Column(db.String(80), nullable=False, unique=True, index=True)
+    provider = db.Column(db.String(32), nullable=False, default="mock")
+    status = db.Column(db.String(24), nullable=False, default="created", index=True)  # created/submitted/completed/failed
+
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)
+    paid_count = db.Column(db.Integer, nullable=False, default=0)
+    failed_count = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String(240), nullable=True)
+
+    created_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    submitted_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        pending = max(0, int(self.item_count or 0) - int(self.paid_count or 0) - int(self.failed_count or 0))
+        return {
+            "id": int(self.id),
+            "reference": self.reference,
+            "provider": self.provider or "",
+            "status": self.status,
+            "item_count": int(self.item_count or 0),
+            "total_amount": float(self.total_amount or 0.0),
+            "paid_count": int(self.paid_count or 0),
+            "failed_count": int(self.failed_count or 0),
+            "pending_count": pending,
+            "error": self.error or "",
+            "created_by": int(self.created_by) if self.created_by is not None else None,
             "created_at": self.created_at.isoformat() if self.created_at else None,
+            "submitted_at": self.submitted_at.isoformat() if self.submitted_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
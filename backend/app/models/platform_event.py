@@ -6,6 +6,10 @@ from app.extensions import db
 
 class PlatformEvent(db.Model):
     __tablename__ = "platform_events"
+    __table_args__ = (
+        # Covers the grouped hour/type/severity counts over a created_at range.
+        db.Index("ix_platform_events_created_at_type", "created_at", "event_type", "severity"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
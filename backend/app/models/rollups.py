@@ -0,0 +1,120 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class DailyPlatformMetric(db.Model):
+    """One day of platform activity for a (city, vertical) pair.
+
+    ``vertical`` is ``declutter`` (orders), ``shortlet`` (paid bookings) or
+    ``accounts`` (signups). Rows are rebuilt whole per day by the rollup job,
+    so a day can be recomputed any number of times.
+    """
+
+    __tablename__ = "daily_platform_metrics"
+    __table_args__ = (
+        db.UniqueConstraint("day", "city", "vertical", name="uq_daily_platform_metrics_day_city_vertical"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    city = db.Column(db.String(64), nullable=False, default="")
+    vertical = db.Column(db.String(16), nullable=False)
+
+    transactions = db.Column(db.Integer, nullable=False, default=0)
+    gmv_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    commission_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    sale_platform_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    delivery_platform_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    inspection_platform_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    seller_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    signups = db.Column(db.Integer, nullable=False, default=0)
+    merchant_signups = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "day": self.day.isoformat() if self.day else None,
+            "city": self.city or "",
+            "vertical": self.vertical or "",
+            "transactions": int(self.transactions or 0),
+            "gmv_minor": int(self.gmv_minor or 0),
+            "commission_minor": int(self.commission_minor or 0),
+            "signups": int(self.signups or 0),
+            "merchant_signups": int(self.merchant_signups or 0),
+        }
+
+
+class RollupDirtyDay(db.Model):
+    """A day whose source rows changed since it was last rolled up."""
+
+    __tablename__ = "rollup_dirty_days"
+    __table_args__ = (db.UniqueConstraint("rollup", "day", name="uq_rollup_dirty_days_rollup_day"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    rollup = db.Column(db.String(32), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    marked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class MerchantDailyStat(db.Model):
+    """Counters for one merchant, day, listing and order status.
+
+    Order rows carry the order's current ``status`` and are keyed by the day
+    the order was created. Rows with an empty ``status`` hold listing views,
+    seller wallet credits and receipts for their own day. ``listing_id`` 0
+    means "no listing". Counters move by deltas as events happen; the rebuild
+    job recomputes them from the source tables.
+    """
+
+    __tablename__ = "merchant_daily_stats"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "merchant_id",
+            "day",
+            "listing_id",
+            "status",
+            name="uq_merchant_daily_stats_key",
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    merchant_id = db.Column(db.Integer, nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    listing_id = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(32), nullable=False, default="")
+
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    amount_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    delivery_fee_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    sale_fee_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    seller_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    credits = db.Column(db.Integer, nullable=False, default=0)
+    credited_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    receipt_fee_minor = db.Column(db.BigInteger, nullable=False, default=0)
+    receipt_total_minor = db.Column(db.BigInteger, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class PlatformEventHourly(db.Model):
+    """Platform event counts per UTC hour, event type and severity.
+
+    Only complete hours are rolled up; readers take hours after the last
+    rolled hour live from ``platform_events``.
+    """
+
+    __tablename__ = "platform_event_hourly"
+    __table_args__ = (
+        db.UniqueConstraint("hour", "event_type", "severity", name="uq_platform_event_hourly_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    hour = db.Column(db.DateTime, nullable=False)
+    event_type = db.Column(db.String(80), nullable=False)
+    severity = db.Column(db.String(16), nullable=False, default="INFO")
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from app.extensions import db
+
+
+class WebhookInbox(db.Model):
+    """Append-only record of verified provider webhooks awaiting processing."""
+
+    __tablename__ = "webhook_inbox"
+    __table_args__ = (
+        db.UniqueConstraint("provider", "event_id", name="uq_webhook_inbox_provider_event"),
+        db.Index("ix_webhook_inbox_status_id", "status", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    provider = db.Column(db.String(32), nullable=False, default="paystack")
+    event_id = db.Column(db.String(128), nullable=False)
+    event_type = db.Column(db.String(64), nullable=False, default="")
+    reference = db.Column(db.String(128), nullable=True, index=True)
+    source = db.Column(db.String(80), nullable=False, default="")
+    signature = db.Column(db.String(256), nullable=True)
+    payload_json = db.Column(db.Text, nullable=False, default="{}")
+
+    status = db.Column(db.String(24), nullable=False, default="pending")  # pending/processing/processed/failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    result_code = db.Column(db.Integer, nullable=True)
+    result_json = db.Column(db.Text, nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+
+    received_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Earliest time the row may be claimed; pushed back after a failed attempt.
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": int(self.id),
+            "provider": self.provider,
+            "event_id": self.event_id,
+            "event_type": self.event_type or "",
+            "reference": self.reference or "",
+            "source": self.source or "",
+            "status": self.status,
+            "attempts": int(self.attempts or 0),
+            "result_code": int(self.result_code) if self.result_code is not None else None,
+            "error": self.error or "",
+            "received_at": self.received_at.isoformat() if self.received_at else None,
+            "available_at": self.available_at.isoformat() if self.available_at else None,
+            "claimed_at": self.claimed_at.isoformat() if self.claimed_at else None,
+            "processed_at": self.processed_at.isoformat() if self.processed_at else None,
+        }
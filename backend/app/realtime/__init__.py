@@ -1,5 +1,6 @@
 """Realtime helpers.
 
-FlipTrybe can optionally use Socket.IO for live updates.
-These modules provide a safe interface even when SocketIO is disabled.
+Events are published to rooms through ``app.realtime.bus`` (Redis pub/sub,
+or an in-process bus in tests) and delivered to clients by the standalone
+gateway in ``app.realtime.gateway``.
 """
@@ -0,0 +1,126 @@
+"""Publish side of the realtime gateway.
+
+Any web or Celery process publishes ``(room, event, payload)`` envelopes;
+the gateway process (``python -m app.realtime.gateway``) subscribes and
+fans them out to connected clients. Redis pub/sub carries envelopes between
+processes; without Redis (or with ``REALTIME_BUS=memory``) an in-process bus
+is used, which is what tests and single-process dev setups run on.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable
+
+try:
+    import redis
+except Exception:  # pragma: no cover - optional dependency safety
+    redis = None
+
+
+def realtime_redis_url() -> str:
+    return (os.getenv("REALTIME_REDIS_URL") or os.getenv("REDIS_URL") or "").strip()
+
+
+def channel_prefix() -> str:
+    return (os.getenv("REALTIME_CHANNEL_PREFIX") or "fliptrybe:rt:").strip()
+
+
+def encode_envelope(room: str, event: str, payload: dict[str, Any] | None) -> str:
+    return json.dumps(
+        {"room": str(room), "event": str(event), "payload": payload or {}, "ts": time.time()},
+        default=str,
+        separators=(",", ":"),
+    )
+
+
+class MemoryBus:
+    """In-process bus: subscribers are called synchronously on publish."""
+
+    backend = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: list[Callable[[str, str], None]] = []
+        self.published = 0
+
+    def subscribe(self, callback: Callable[[str, str], None]) -> Callable[[], None]:
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def _unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return _unsubscribe
+
+    def publish(self, room: str, message: str) -> bool:
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for callback in subscribers:
+            try:
+                callback(room, message)
+            except Exception:
+                pass
+        return True
+
+
+class RedisBus:
+    backend = "redis"
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client = redis.Redis.from_url(url, socket_connect_timeout=0.5, socket_timeout=0.5)
+        self.published = 0
+        self.errors = 0
+
+    def publish(self, room: str, message: str) -> bool:
+        try:
+            self._client.publish(f"{channel_prefix()}{room}", message)
+            self.published += 1
+            return True
+        except Exception:
+            self.errors += 1
+            return False
+
+
+_LOCK = threading.Lock()
+_BUS: MemoryBus | RedisBus | None = None
+
+
+def get_bus() -> MemoryBus | RedisBus:
+    global _BUS
+    with _LOCK:
+        if _BUS is not None:
+            return _BUS
+        url = realtime_redis_url()
+        wanted = (os.getenv("REALTIME_BUS") or "").strip().lower()
+        if wanted != "memory" and url and redis is not None:
+            try:
+                _BUS = RedisBus(url)
+            except Exception:
+                _BUS = MemoryBus()
+        else:
+            _BUS = MemoryBus()
+        return _BUS
+
+
+def publish(room: str, event: str, payload: dict[str, Any] | None = None) -> bool:
+    """Publish one event to a room; never raises."""
+    if not room:
+        return False
+    try:
+        return bool(get_bus().publish(str(room), encode_envelope(room, event, payload)))
+    except Exception:
+        return False
+
+
+def _reset_bus_for_tests(bus: MemoryBus | RedisBus | None = None) -> MemoryBus | RedisBus:
+    global _BUS
+    with _LOCK:
+        _BUS = bus if bus is not None else MemoryBus()
+        return _BUS
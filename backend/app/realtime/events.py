@@ -0,0 +1,61 @@
+"""Publish realtime events for rows committed through the ORM.
+
+Writers do not call the bus themselves: new order events, order status
+changes, driver offers, support messages and in-app notifications are
+collected on flush and published once the outermost transaction commits
+(``app.utils.commit_hooks``), so a rolled-back write never reaches a
+client, even when it was flushed inside a released savepoint.
+"""
+from __future__ import annotations
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.realtime.bus import publish
+from app.realtime.rooms import driver_room, order_room, thread_room, user_room
+from app.utils import commit_hooks
+
+
+def _status_changed(obj) -> bool:
+    try:
+        return bool(inspect(obj).attrs.status.history.has_changes())
+    except Exception:
+        return False
+
+
+def _events_for(obj, *, is_new: bool) -> list[tuple[str, str, dict]]:
+    table = getattr(obj, "__tablename__", "")
+    if table == "order_events" and is_new:
+        return [(order_room(obj.order_id), "order.event", obj.to_dict())]
+    if table == "orders" and not is_new and _status_changed(obj):
+        payload = {"order_id": int(obj.id), "status": obj.status}
+        return [(order_room(obj.id), "order.status", payload)]
+    if table == "driver_job_offers" and (is_new or _status_changed(obj)):
+        return [(driver_room(obj.driver_id), "driver.offer", obj.to_dict())]
+    if table == "support_messages" and is_new:
+        payload = obj.to_dict()
+        out = [(thread_room(obj.user_id), "chat.message", payload)]
+        for uid in {obj.user_id, obj.recipient_id} - {None, obj.sender_id}:
+            out.append((user_room(uid), "chat.message", payload))
+        return out
+    if table == "notifications" and is_new:
+        return [(user_room(obj.user_id), "notification", {"id": int(obj.id), "title": obj.title or ""})]
+    return []
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_realtime_events(session, _flush_context) -> None:
+    pending = []
+    for obj in session.new:
+        pending.extend(_events_for(obj, is_new=True))
+    for obj in session.dirty:
+        pending.extend(_events_for(obj, is_new=False))
+    commit_hooks.defer(session, "realtime_events", pending)
+
+
+def _publish_realtime_events(events: list) -> None:
+    for room, name, payload in events:
+        publish(room, name, payload)
+
+
+commit_hooks.register("realtime_events", _publish_realtime_events)
@@ -0,0 +1,514 @@
+"""Standalone realtime gateway: ``python -m app.realtime.gateway``.
+
+One asyncio process holds the client connections, so an idle subscriber
+costs a socket and a small queue rather than a web worker thread.
+
+- ``GET /sse?rooms=user:1,order:9`` streams Server-Sent Events.
+- ``GET /ws`` upgrades to a WebSocket; clients send
+  ``{"action": "subscribe", "room": "order:9"}`` (or ``unsubscribe``).
+- ``GET /healthz`` reports connection and fan-out stats.
+
+Clients authenticate with ``Authorization: Bearer <jwt>`` or ``?token=``.
+Every connection has a bounded send queue: when a client cannot keep up
+the oldest frames are dropped, and a client that keeps falling behind is
+disconnected so one slow reader never stalls the rest.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import time
+from collections import deque
+from typing import Awaitable, Callable
+from urllib.parse import parse_qs, urlsplit
+
+from app.realtime.bus import MemoryBus, channel_prefix, get_bus, realtime_redis_url
+from app.realtime.rooms import parse_room
+from app.utils.env import env_int
+from app.utils.jwt_utils import decode_token, get_bearer_token
+
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_MAX_HEADER_BYTES = 16384
+_MAX_WS_FRAME = 65536
+_LATENCY_WINDOW = 2000
+
+Authorizer = Callable[[int, list[str]], Awaitable[bool]]
+
+
+def _env_float(name: str, default: float, *, minimum: float = 0.0, maximum: float = 3600.0) -> float:
+    try:
+        value = float((os.getenv(name) or str(default)).strip() or default)
+    except Exception:
+        value = float(default)
+    return max(minimum, min(value, maximum))
+
+
+def _sse_frame(event: str, data: str) -> bytes:
+    return f"event: {event}\ndata: {data}\n\n".encode("utf-8")
+
+
+def _ws_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    size = len(payload)
+    if size < 126:
+        header = struct.pack("!BB", 0x80 | opcode, size)
+    elif size < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, size)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, size)
+    return header + payload
+
+
+class Connection:
+    """One client: its rooms and a bounded queue drained by a writer task."""
+
+    def __init__(self, writer: asyncio.StreamWriter, *, user_id: int, kind: str, queue_size: int, max_dropped: int):
+        self.writer = writer
+        self.user_id = int(user_id)
+        self.kind = kind
+        self.rooms: set[str] = set()
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=max(1, int(queue_size)))
+        self.max_dropped = max(1, int(max_dropped))
+        self.dropped = 0
+        self.sent = 0
+        self.closed = asyncio.Event()
+
+    def frame(self, event: str, data: str) -> bytes:
+        if self.kind == "ws":
+            return _ws_frame(data.encode("utf-8"))
+        return _sse_frame(event, data)
+
+    def offer(self, frame: bytes) -> bool:
+        """Queue a frame without waiting; drop the oldest one when full."""
+        if self.closed.is_set():
+            return False
+        if self.queue.full():
+            self._drop_oldest()
+            self.dropped += 1
+            if self.dropped >= self.max_dropped:
+                self.close()
+                return False
+        self.queue.put_nowait(frame)
+        return True
+
+    def _drop_oldest(self) -> None:
+        try:
+            self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+
+    def close(self) -> None:
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        # Wake the pump; pending frames are abandoned anyway.
+        if self.queue.full():
+            self._drop_oldest()
+        self.queue.put_nowait(None)
+
+    async def pump(self, send_timeout: float) -> None:
+        while True:
+            frame = await self.queue.get()
+            if frame is None:
+                break
+            # Coalesce whatever else is already queued into one write.
+            chunks = [frame]
+            while not self.queue.empty():
+                frame = self.queue.get_nowait()
+                if frame is None:
+                    break
+                chunks.append(frame)
+            if self.closed.is_set():
+                break
+            self.writer.write(b"".join(chunks))
+            try:
+                await asyncio.wait_for(self.writer.drain(), timeout=send_timeout)
+            except Exception:
+                # Socket buffer stayed full: treat as a dead or stalled client.
+                self.close()
+                break
+            self.sent += len(chunks)
+
+
+class Gateway:
+    def __init__(
+        self,
+        *,
+        authorize: Authorizer,
+        queue_size: int | None = None,
+        max_dropped: int | None = None,
+        heartbeat_seconds: float | None = None,
+        send_timeout: float | None = None,
+    ):
+        self.authorize = authorize
+        self.queue_size = int(queue_size or env_int("REALTIME_SEND_QUEUE_SIZE", 256, maximum=100000))
+        self.max_dropped = int(max_dropped or env_int("REALTIME_MAX_DROPPED", 1024, maximum=1000000))
+        self.heartbeat_seconds = float(heartbeat_seconds or _env_float("REALTIME_HEARTBEAT_SECONDS", 25.0, minimum=1.0))
+        self.send_timeout = float(send_timeout or _env_float("REALTIME_SEND_TIMEOUT_SECONDS", 10.0, minimum=0.1))
+        self.rooms: dict[str, set[Connection]] = {}
+        self.connections: set[Connection] = set()
+        self.stats = {"delivered": 0, "dropped_connections": 0, "messages": 0, "rejected": 0}
+        self.latencies_ms: deque = deque(maxlen=_LATENCY_WINDOW)
+        self._server: asyncio.AbstractServer | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    # -- room registry -------------------------------------------------
+
+    def join(self, conn: Connection, room: str) -> None:
+        conn.rooms.add(room)
+        self.rooms.setdefault(room, set()).add(conn)
+
+    def leave(self, conn: Connection, room: str) -> None:
+        conn.rooms.discard(room)
+        members = self.rooms.get(room)
+        if members is not None:
+            members.discard(conn)
+            if not members:
+                self.rooms.pop(room, None)
+
+    def _forget(self, conn: Connection) -> None:
+        for room in list(conn.rooms):
+            self.leave(conn, room)
+        self.connections.discard(conn)
+        if conn.dropped >= conn.max_dropped:
+            self.stats["dropped_connections"] += 1
+
+    def dispatch(self, room: str, message: str) -> int:
+        """Fan one published envelope out to the room's connections."""
+        members = self.rooms.get(room)
+        self.stats["messages"] += 1
+        if not members:
+            return 0
+        try:
+            envelope = json.loads(message)
+            published_at = float(envelope.get("ts") or 0.0)
+            event = str(envelope.get("event") or "message")
+        except Exception:
+            return 0
+        if published_at:
+            self.latencies_ms.append(max(0.0, (time.time() - published_at) * 1000.0))
+        frames: dict[str, bytes] = {}
+        delivered = 0
+        for conn in list(members):
+            frame = frames.get(conn.kind)
+            if frame is None:
+                frame = frames[conn.kind] = conn.frame(event, message)
+            if conn.offer(frame):
+                delivered += 1
+        self.stats["delivered"] += delivered
+        return delivered
+
+    def snapshot(self) -> dict:
+        samples = sorted(self.latencies_ms)
+
+        def _pct(q: float):
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(len(samples) * q))], 2)
+
+        return {
+            "connections": len(self.connections),
+            "rooms": len(self.rooms),
+            **self.stats,
+            "publish_to_dispatch_p50_ms": _pct(0.50),
+            "publish_to_dispatch_p99_ms": _pct(0.99),
+        }
+
+    # -- HTTP / protocol handling ---------------------------------------
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        raw = await reader.readuntil(b"\r\n\r\n")
+        if len(raw) > _MAX_HEADER_BYTES:
+            raise ValueError("headers too large")
+        lines = raw.decode("latin-1").split("\r\n")
+        method, target, _ = (lines[0].split(" ", 2) + ["", ""])[:3]
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        parts = urlsplit(target)
+        return method.upper(), parts.path, parse_qs(parts.query), headers
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: str, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1")
+            + data
+        )
+
+    @staticmethod
+    def _user_id(query: dict, headers: dict) -> int | None:
+        token = get_bearer_token(headers.get("authorization", "")) or (query.get("token") or [""])[0]
+        payload = decode_token(token) if token else None
+        try:
+            return int(payload.get("sub")) if payload else None
+        except Exception:
+            return None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, query, headers = await asyncio.wait_for(self._read_request(reader), timeout=10.0)
+        except Exception:
+            writer.close()
+            return
+        try:
+            if path == "/healthz":
+                self._respond(writer, "200 OK", {"ok": True, **self.snapshot()})
+                await writer.drain()
+                return
+            if method != "GET" or path not in ("/sse", "/ws"):
+                self._respond(writer, "404 Not Found", {"ok": False, "error": "NOT_FOUND"})
+                await writer.drain()
+                return
+            user_id = self._user_id(query, headers)
+            if user_id is None:
+                self.stats["rejected"] += 1
+                self._respond(writer, "401 Unauthorized", {"ok": False, "error": "UNAUTHORIZED"})
+                await writer.drain()
+                return
+            if path == "/sse":
+                await self._serve_sse(reader, writer, user_id, query)
+            else:
+                await self._serve_ws(reader, writer, user_id, headers)
+        except Exception:
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    async def _requested_rooms(self, user_id: int, rooms: list[str]) -> list[str] | None:
+        rooms = sorted({r.strip() for r in rooms if r.strip()})
+        if not rooms or any(parse_room(r) is None for r in rooms):
+            return None
+        return rooms if await self.authorize(user_id, rooms) else None
+
+    async def _serve_sse(self, reader, writer, user_id: int, query: dict) -> None:
+        raw = ",".join(query.get("rooms") or [])
+        rooms = await self._requested_rooms(user_id, raw.split(","))
+        if rooms is None:
+            self.stats["rejected"] += 1
+            self._respond(writer, "403 Forbidden", {"ok": False, "error": "ROOM_FORBIDDEN"})
+            await writer.drain()
+            return
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-store\r\n"
+            b"Connection: keep-alive\r\nX-Accel-Buffering: no\r\n\r\nretry: 2000\n\n"
+        )
+        await writer.drain()
+        conn = self._register(writer, user_id, "sse", rooms)
+        pump = asyncio.ensure_future(conn.pump(self.send_timeout))
+        # SSE is one-way: the read only returns when the client goes away.
+        eof = asyncio.ensure_future(reader.read())
+        closed = asyncio.ensure_future(conn.closed.wait())
+        try:
+            await asyncio.wait({eof, pump, closed}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            eof.cancel()
+            closed.cancel()
+            conn.close()
+            pump.cancel()
+            self._forget(conn)
+
+    async def _serve_ws(self, reader, writer, user_id: int, headers: dict) -> None:
+        key = headers.get("sec-websocket-key", "")
+        if "websocket" not in headers.get("upgrade", "").lower() or not key:
+            self._respond(writer, "400 Bad Request", {"ok": False, "error": "UPGRADE_REQUIRED"})
+            await writer.drain()
+            return
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode("latin-1")).digest()).decode("ascii")
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+        conn = self._register(writer, user_id, "ws", [])
+        pump = asyncio.ensure_future(conn.pump(self.send_timeout))
+        try:
+            while not conn.closed.is_set():
+                frame = await self._read_ws_frame(reader)
+                if frame is None:
+                    break
+                opcode, payload = frame
+                if opcode == 0x8:
+                    conn.offer(_ws_frame(b"", 0x8))
+                    break
+                if opcode == 0x9:
+                    conn.offer(_ws_frame(payload, 0xA))
+                elif opcode == 0x1:
+                    await self._ws_command(conn, payload)
+        finally:
+            # Let a queued close/pong frame go out before tearing down.
+            await asyncio.sleep(0)
+            conn.close()
+            pump.cancel()
+            self._forget(conn)
+
+    async def _read_ws_frame(self, reader: asyncio.StreamReader) -> tuple[int, bytes] | None:
+        try:
+            head = await reader.readexactly(2)
+            opcode = head[0] & 0x0F
+            masked = bool(head[1] & 0x80)
+            size = head[1] & 0x7F
+            if size == 126:
+                size = struct.unpack("!H", await reader.readexactly(2))[0]
+            elif size == 127:
+                size = struct.unpack("!Q", await reader.readexactly(8))[0]
+            if size > _MAX_WS_FRAME or not masked:
+                return None
+            mask = await reader.readexactly(4)
+            data = bytearray(await reader.readexactly(size))
+            for i in range(size):
+                data[i] ^= mask[i % 4]
+            return opcode, bytes(data)
+        except Exception:
+            return None
+
+    async def _ws_command(self, conn: Connection, payload: bytes) -> None:
+        try:
+            command = json.loads(payload.decode("utf-8"))
+            action = str(command.get("action") or "").lower()
+            room = str(command.get("room") or "")
+        except Exception:
+            action, room = "", ""
+        if action == "subscribe":
+            rooms = await self._requested_rooms(conn.user_id, [room])
+            if rooms is None:
+                self.stats["rejected"] += 1
+                reply = {"event": "error", "room": room, "error": "ROOM_FORBIDDEN"}
+            else:
+                self.join(conn, rooms[0])
+                reply = {"event": "subscribed", "room": rooms[0]}
+        elif action == "unsubscribe":
+            self.leave(conn, room)
+            reply = {"event": "unsubscribed", "room": room}
+        else:
+            reply = {"event": "error", "error": "UNKNOWN_ACTION"}
+        conn.offer(_ws_frame(json.dumps(reply).encode("utf-8")))
+
+    def _register(self, writer, user_id: int, kind: str, rooms: list[str]) -> Connection:
+        conn = Connection(writer, user_id=user_id, kind=kind, queue_size=self.queue_size, max_dropped=self.max_dropped)
+        self.connections.add(conn)
+        for room in rooms:
+            self.join(conn, room)
+        return conn
+
+    # -- lifecycle -------------------------------------------------------
+
+    async def _heartbeat(self) -> None:
+        sse_ping = b": ping\n\n"
+        ws_ping = _ws_frame(b"", 0x9)
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            for conn in list(self.connections):
+                conn.offer(ws_ping if conn.kind == "ws" else sse_ping)
+
+    async def _listen_redis(self, url: str) -> None:
+        from redis import asyncio as aioredis
+
+        prefix = channel_prefix()
+        while True:
+            try:
+                client = aioredis.Redis.from_url(url)
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.psubscribe(f"{prefix}*")
+                async for message in pubsub.listen():
+                    channel = message.get("channel")
+                    data = message.get("data")
+                    if isinstance(channel, bytes):
+                        channel = channel.decode("utf-8", "replace")
+                    if isinstance(data, bytes):
+                        data = data.decode("utf-8", "replace")
+                    if channel and str(channel).startswith(prefix) and isinstance(data, str):
+                        self.dispatch(str(channel)[len(prefix):], data)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(1.0)
+
+    def attach_memory_bus(self, bus: MemoryBus, loop: asyncio.AbstractEventLoop) -> Callable[[], None]:
+        """Relay publishes from any thread of this process into the event loop."""
+
+        def _relay(room: str, message: str) -> None:
+            loop.call_soon_threadsafe(self.dispatch, room, message)
+
+        return bus.subscribe(_relay)
+
+    async def start(self, host: str, port: int, *, bus=None) -> int:
+        bus = bus if bus is not None else get_bus()
+        loop = asyncio.get_running_loop()
+        if isinstance(bus, MemoryBus):
+            self.attach_memory_bus(bus, loop)
+        else:
+            self._tasks.append(asyncio.ensure_future(self._listen_redis(bus.url)))
+        self._tasks.append(asyncio.ensure_future(self._heartbeat()))
+        self._server = await asyncio.start_server(self.handle, host, port, backlog=4096, limit=_MAX_HEADER_BYTES)
+        return int(self._server.sockets[0].getsockname()[1])
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for conn in list(self.connections):
+            conn.close()
+        await asyncio.sleep(0)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+def app_authorizer(app) -> Authorizer:
+    """Check room access against the database, off the event loop."""
+    from app.extensions import db
+    from app.models import User
+    from app.realtime.rooms import can_join
+
+    def _check(user_id: int, rooms: list[str]) -> bool:
+        with app.app_context():
+            try:
+                user = db.session.get(User, int(user_id))
+                return user is not None and all(can_join(user, room) for room in rooms)
+            finally:
+                db.session.remove()
+
+    async def _authorize(user_id: int, rooms: list[str]) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(None, _check, user_id, rooms)
+
+    return _authorize
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="FlipTrybe realtime gateway (SSE + WebSocket).")
+    parser.add_argument("--host", default=os.getenv("REALTIME_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT") or os.getenv("REALTIME_PORT") or 8765))
+    args = parser.parse_args()
+
+    from app import create_app
+
+    app = create_app()
+    if not realtime_redis_url():
+        app.logger.warning("realtime_gateway_memory_bus: no REDIS_URL; only in-process publishes will be delivered")
+    gateway = Gateway(authorize=app_authorizer(app))
+
+    async def _run() -> None:
+        port = await gateway.start(args.host, args.port)
+        app.logger.info("realtime_gateway_listening host=%s port=%s", args.host, port)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,57 @@
+"""Room names and who may subscribe to them."""
+from __future__ import annotations
+
+from app.extensions import db
+
+
+ROOM_KINDS = ("user", "order", "thread", "driver")
+
+
+def user_room(user_id: int) -> str:
+    return f"user:{int(user_id)}"
+
+
+def order_room(order_id: int) -> str:
+    return f"order:{int(order_id)}"
+
+
+def thread_room(thread_user_id: int) -> str:
+    return f"thread:{int(thread_user_id)}"
+
+
+def driver_room(driver_id: int) -> str:
+    return f"driver:{int(driver_id)}"
+
+
+def parse_room(room: str) -> tuple[str, int] | None:
+    kind, _, ident = (room or "").strip().partition(":")
+    if kind not in ROOM_KINDS:
+        return None
+    try:
+        value = int(ident)
+    except Exception:
+        return None
+    return (kind, value) if value > 0 else None
+
+
+def can_join(user, room: str) -> bool:
+    """Whether ``user`` may receive events for ``room``. Needs an app context."""
+    parsed = parse_room(room)
+    if user is None or parsed is None:
+        return False
+    kind, ident = parsed
+    uid = int(user.id)
+    is_admin = (getattr(user, "role", "") or "").strip().lower() == "admin"
+    if kind in ("user", "driver"):
+        return ident == uid
+    if kind == "thread":
+        return ident == uid or is_admin
+    from app.models import Order
+
+    order = db.session.get(Order, ident)
+    if order is None:
+        return False
+    if is_admin:
+        return True
+    parties = (order.buyer_id, order.merchant_id, order.driver_id, getattr(order, "inspector_id", None))
+    return uid in {int(p) for p in parties if p is not None}
@@ -1,15 +1,18 @@
-"""Socket.IO broadcast utilities.
+"""Room broadcast utilities.
 
-Some segments call `broadcast_room_event(room, payload)`.
-In dev or minimal deployments, SocketIO may be disabled.
-This function becomes a safe no-op in that case.
+Some segments call `broadcast_room_event(room, payload)`. Events go out
+through the realtime bus and reach clients via the gateway process; when
+nothing is subscribed they are simply dropped.
 """
 
 from __future__ import annotations
 
 from typing import Any, Dict
 
-from app.extensions import socketio
+from app.realtime.bus import publish
+
+
+FEED_ROOM = "feed"
 
 
 def broadcast_room_event(
@@ -19,16 +22,9 @@ def broadcast_room_event(
 ) -> bool:
     """Broadcast an event to a room.
 
-    Returns True if emitted via SocketIO, False if SocketIO is disabled.
+    Returns True if the event was handed to the bus.
     """
-    if socketio is None:
-        return False
-
-    try:
-        socketio.emit(event, payload, room=room)
-        return True
-    except Exception:
-        return False
+    return publish(room, event, payload)
 
 
 def broadcast_feed_event(
@@ -36,15 +32,8 @@ def broadcast_feed_event(
     payload: Dict[str, Any],
     namespace: str = "/",
 ) -> bool:
-    """Broadcast an event to all connected clients.
+    """Broadcast an event on the shared feed room.
 
     Older segments sometimes refer to a feed-level broadcaster.
     """
-    if socketio is None:
-        return False
-
-    try:
-        socketio.emit(event, payload, broadcast=True, namespace=namespace)
-        return True
-    except Exception:
-        return False
+    return publish(FEED_ROOM, event, payload)
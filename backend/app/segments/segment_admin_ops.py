@@ -8,7 +8,7 @@ import os
 import subprocess
 
 from flask import Blueprint, jsonify, request, Response
-from sqlalchemy import or_, text
+from sqlalchemy import or_, select, text
 
 try:
     import redis
@@ -16,6 +16,7 @@ except Exception:  # pragma: no cover - optional dependency
     redis = None
 
 from app.extensions import db
+from app.services import event_rollups, rollups
 from app.models import (
     AuditLog,
     EscrowTransition,
@@ -34,7 +35,6 @@ from app.models import (
     NotificationQueue,
     PayoutRequest,
     Shortlet,
-    ShortletBooking,
     Referral,
     ListingFavorite,
 )
@@ -42,6 +42,15 @@ from app.utils.jwt_utils import decode_token, get_bearer_token
 from app.utils.autopilot import get_settings
 from app.utils.feature_flags import get_all_flags
 from app.utils.cache_layer import cache_stats
+from app.integrations.http import http_metrics
+from app.utils.exports import (
+    ExportFilterError,
+    export_date_range,
+    export_format,
+    export_int_arg,
+    export_list_arg,
+    export_response,
+)
 from app.utils.observability import get_request_id
 from app.services.search import listings_index_name, search_engine_is_meili
 from app.services.search.meili_client import SearchNotInitialized, SearchUnavailable, get_meili_client
@@ -604,104 +613,69 @@ def _month_add(dt: datetime, months: int) -> datetime:
     return datetime(year, month, 1)
 
 
-def _paid_orders(from_dt: datetime | None = None, to_dt: datetime | None = None):
-    q = Order.query.filter(
-        Order.status.in_(("paid", "merchant_accepted", "driver_assigned", "picked_up", "delivered", "completed"))
-    )
-    if from_dt is not None:
-        q = q.filter(Order.created_at >= from_dt)
-    if to_dt is not None:
-        q = q.filter(Order.created_at < to_dt)
-    return q
-
-
-def _paid_shortlet_bookings(from_dt: datetime | None = None, to_dt: datetime | None = None):
-    q = ShortletBooking.query.filter(ShortletBooking.payment_status == "paid")
-    if from_dt is not None:
-        q = q.filter(ShortletBooking.created_at >= from_dt)
-    if to_dt is not None:
-        q = q.filter(ShortletBooking.created_at < to_dt)
-    return q
+def _parse_day(value: str | None):
+    try:
+        return datetime.strptime((value or "").strip()[:10], "%Y-%m-%d").date()
+    except Exception:
+        return None
 
 
 def _analytics_overview_payload() -> dict:
+    rollups.ensure_platform_rollup_fresh()
     now = datetime.utcnow()
     users_total = User.query.count()
     merchants_total = User.query.filter(User.role == "merchant").count()
     shortlets_total = Shortlet.query.count()
-    orders_q = _paid_orders()
-    bookings_q = _paid_shortlet_bookings()
-    orders = orders_q.all()
-    bookings = bookings_q.all()
-
-    orders_gmv_minor = sum(_money_to_minor(getattr(o, "total_price", None) or getattr(o, "amount", 0.0)) for o in orders)
-    shortlet_gmv_minor = sum(_money_to_minor(getattr(b, "total_amount", 0.0)) for b in bookings)
-    total_gmv_minor = int(orders_gmv_minor + shortlet_gmv_minor)
-
-    order_commission_minor = sum(
-        int(getattr(o, "sale_platform_minor", 0) or 0)
-        + int(getattr(o, "delivery_platform_minor", 0) or 0)
-        + int(getattr(o, "inspection_platform_minor", 0) or 0)
-        for o in orders
-    )
-    shortlet_commission_minor = sum(
-        _money_to_minor(float(getattr(b, "total_amount", 0.0) or 0.0) * 0.05) for b in bookings
-    )
-    total_commission_minor = int(order_commission_minor + shortlet_commission_minor)
 
-    last_30 = now - timedelta(days=30)
-    prev_30 = now - timedelta(days=60)
-    current_tx = _paid_orders(last_30, now).count() + _paid_shortlet_bookings(last_30, now).count()
-    prev_tx = _paid_orders(prev_30, last_30).count() + _paid_shortlet_bookings(prev_30, last_30).count()
+    totals = rollups.platform_totals()
+    declutter = totals[rollups.VERTICAL_DECLUTTER]
+    shortlets = totals[rollups.VERTICAL_SHORTLET]
+    total_gmv_minor = int(declutter["gmv_minor"] + shortlets["gmv_minor"])
+    total_commission_minor = int(declutter["commission_minor"] + shortlets["commission_minor"])
+
+    tomorrow = now.date() + timedelta(days=1)
+    last_30 = tomorrow - timedelta(days=30)
+    prev_30 = tomorrow - timedelta(days=60)
+    current = rollups.platform_totals(last_30, tomorrow)
+    previous = rollups.platform_totals(prev_30, last_30)
+    current_tx = sum(current[v]["transactions"] for v in (rollups.VERTICAL_DECLUTTER, rollups.VERTICAL_SHORTLET))
+    prev_tx = sum(previous[v]["transactions"] for v in (rollups.VERTICAL_DECLUTTER, rollups.VERTICAL_SHORTLET))
     if prev_tx <= 0:
         monthly_growth_rate = 100.0 if current_tx > 0 else 0.0
     else:
         monthly_growth_rate = round(((current_tx - prev_tx) / prev_tx) * 100.0, 2)
 
-    active_users = set()
-    for row in Order.query.filter(Order.created_at >= last_30).all():
-        if row.buyer_id:
-            active_users.add(int(row.buyer_id))
-        if row.merchant_id:
-            active_users.add(int(row.merchant_id))
-    for row in ShortletBooking.query.filter(ShortletBooking.created_at >= last_30).all():
-        if row.user_id:
-            active_users.add(int(row.user_id))
-    for row in WalletTxn.query.filter(WalletTxn.created_at >= last_30).all():
-        if row.user_id:
-            active_users.add(int(row.user_id))
+    active_users = rollups.active_user_count(now - timedelta(days=30), include_wallet=True)
 
     return {
         "ok": True,
         "total_users": int(users_total),
         "total_merchants": int(merchants_total),
         "total_shortlets": int(shortlets_total),
-        "total_orders": int(len(orders) + len(bookings)),
+        "total_orders": int(declutter["transactions"] + shortlets["transactions"]),
         "total_gmv_minor": int(total_gmv_minor),
         "total_commission_minor": int(total_commission_minor),
         "monthly_growth_rate": float(monthly_growth_rate),
-        "active_users_last_30_days": int(len(active_users)),
+        "active_users_last_30_days": int(active_users),
     }
 
 
 def _analytics_breakdown_payload() -> dict:
-    orders = _paid_orders().all()
-    bookings = _paid_shortlet_bookings().all()
-
-    declutter_gmv = sum(_money_to_minor(getattr(o, "total_price", None) or getattr(o, "amount", 0.0)) for o in orders)
-    shortlet_gmv = sum(_money_to_minor(getattr(b, "total_amount", 0.0)) for b in bookings)
-    merchant_gmv = sum(int(getattr(o, "sale_seller_minor", 0) or 0) for o in orders)
+    rollups.ensure_platform_rollup_fresh()
+    totals = rollups.platform_totals()
+    declutter = totals[rollups.VERTICAL_DECLUTTER]
+    shortlets = totals[rollups.VERTICAL_SHORTLET]
     commissions_by_type = {
-        "sale_platform_minor": int(sum(int(getattr(o, "sale_platform_minor", 0) or 0) for o in orders)),
-        "delivery_platform_minor": int(sum(int(getattr(o, "delivery_platform_minor", 0) or 0) for o in orders)),
-        "inspection_platform_minor": int(sum(int(getattr(o, "inspection_platform_minor", 0) or 0) for o in orders)),
-        "shortlet_sale_minor": int(sum(_money_to_minor(float(getattr(b, "total_amount", 0.0) or 0.0) * 0.05) for b in bookings)),
+        "sale_platform_minor": int(declutter["sale_platform_minor"]),
+        "delivery_platform_minor": int(declutter["delivery_platform_minor"]),
+        "inspection_platform_minor": int(declutter["inspection_platform_minor"]),
+        "shortlet_sale_minor": int(shortlets["commission_minor"]),
     }
     return {
         "ok": True,
-        "declutter_gmv": int(declutter_gmv),
-        "shortlet_gmv": int(shortlet_gmv),
-        "merchant_gmv": int(merchant_gmv),
+        "declutter_gmv": int(declutter["gmv_minor"]),
+        "shortlet_gmv": int(shortlets["gmv_minor"]),
+        "merchant_gmv": int(declutter["seller_minor"]),
         "commissions_by_type": commissions_by_type,
     }
 
@@ -755,21 +729,33 @@ def admin_events_summary():
     _, err = _require_admin()
     if err:
         return err
-    now = datetime.utcnow()
-    cutoff_24h = now - timedelta(hours=24)
-    cutoff_7d = now - timedelta(days=7)
+    # Complete hours come from the hourly rollup; only the partial hours at
+    # each end of the window are grouped live from platform_events.
+    return jsonify({"ok": True, **event_rollups.event_summary()}), 200
+
 
-    rows_24h = PlatformEvent.query.filter(PlatformEvent.created_at >= cutoff_24h).all()
-    rows_7d = PlatformEvent.query.filter(PlatformEvent.created_at >= cutoff_7d).all()
-    by_type_24h: dict[str, int] = {}
-    by_type_7d: dict[str, int] = {}
-    for row in rows_24h:
-        key = (row.event_type or "unknown").strip() or "unknown"
-        by_type_24h[key] = int(by_type_24h.get(key, 0) + 1)
-    for row in rows_7d:
-        key = (row.event_type or "unknown").strip() or "unknown"
-        by_type_7d[key] = int(by_type_7d.get(key, 0) + 1)
-    return jsonify({"ok": True, "last_24h": by_type_24h, "last_7d": by_type_7d}), 200
+@admin_ops_bp.get("/events/series")
+def admin_events_series():
+    _, err = _require_admin()
+    if err:
+        return err
+    try:
+        hours = int(request.args.get("hours") or 24)
+    except Exception:
+        hours = 24
+    hours = max(1, min(hours, 24 * 31))
+    event_type = (request.args.get("event_type") or "").strip() or None
+    severity = (request.args.get("severity") or "").strip().upper() or None
+    points = event_rollups.event_series(hours, event_type=event_type, severity=severity)
+    return jsonify(
+        {
+            "ok": True,
+            "hours": int(hours),
+            "event_type": event_type or "",
+            "severity": severity or "",
+            "points": points,
+        }
+    ), 200
 
 
 @admin_ops_bp.get("/health/summary")
@@ -810,12 +796,8 @@ def admin_health_summary():
 
     cutoff_1h = now - timedelta(hours=1)
     cutoff_24h = now - timedelta(hours=24)
-    events_last_1h_errors = PlatformEvent.query.filter(
-        PlatformEvent.created_at >= cutoff_1h, PlatformEvent.severity == "ERROR"
-    ).count()
-    events_last_24h_errors = PlatformEvent.query.filter(
-        PlatformEvent.created_at >= cutoff_24h, PlatformEvent.severity == "ERROR"
-    ).count()
+    events_last_1h_errors = event_rollups.event_total(cutoff_1h, now, severity="ERROR")
+    events_last_24h_errors = event_rollups.event_total(cutoff_24h, now, severity="ERROR")
 
     payload = {
         "ok": True,
@@ -1297,6 +1279,44 @@ def admin_analytics_revenue_breakdown():
     return jsonify(_analytics_breakdown_payload()), 200
 
 
+@admin_ops_bp.get("/analytics/daily")
+def admin_analytics_daily():
+    """Rollup series for ``from``..``to`` (inclusive, default the last 30 days).
+
+    ``by=day|month`` sets the bucket; ``group=city|vertical`` splits each bucket.
+    """
+    _, err = _require_admin()
+    if err:
+        return err
+    today = datetime.utcnow().date()
+    end = _parse_day(request.args.get("to")) or today
+    start = _parse_day(request.args.get("from")) or (end - timedelta(days=29))
+    if end < start:
+        return jsonify({"ok": False, "message": "from must not be after to"}), 400
+    if (end - start).days > 731:
+        return jsonify({"ok": False, "message": "Range is limited to two years"}), 400
+    by = (request.args.get("by") or "day").strip().lower()
+    if by not in ("day", "month"):
+        by = "day"
+    group = (request.args.get("group") or "").strip().lower() or None
+    if group not in (None, "city", "vertical"):
+        group = None
+    rollups.ensure_platform_rollup_fresh()
+    series = rollups.platform_series(start, end + timedelta(days=1), by=by, group=group)
+    totals = rollups.platform_totals(start, end + timedelta(days=1))
+    return jsonify(
+        {
+            "ok": True,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "by": by,
+            "group": group,
+            "series": series,
+            "totals": totals,
+        }
+    ), 200
+
+
 @admin_ops_bp.get("/analytics/projection")
 def admin_analytics_projection():
     _, err = _require_admin()
@@ -1310,32 +1330,22 @@ def admin_analytics_projection():
 
     now = datetime.utcnow()
     this_month = _month_floor(now)
+    rollups.ensure_platform_rollup_fresh()
+    first = _month_add(this_month, -3)
+    by_month = {
+        row["period"]: row
+        for row in rollups.platform_series(first.date(), _month_add(this_month, 1).date(), by="month")
+    }
     history = []
     for back in range(3, -1, -1):
         start = _month_add(this_month, -back)
-        end = _month_add(start, 1)
-        orders = _paid_orders(start, end).all()
-        bookings = _paid_shortlet_bookings(start, end).all()
-        tx_count = int(len(orders) + len(bookings))
-        gmv_minor = int(
-            sum(_money_to_minor(getattr(o, "total_price", None) or getattr(o, "amount", 0.0)) for o in orders)
-            + sum(_money_to_minor(getattr(b, "total_amount", 0.0)) for b in bookings)
-        )
-        commission_minor = int(
-            sum(
-                int(getattr(o, "sale_platform_minor", 0) or 0)
-                + int(getattr(o, "delivery_platform_minor", 0) or 0)
-                + int(getattr(o, "inspection_platform_minor", 0) or 0)
-                for o in orders
-            )
-            + sum(_money_to_minor(float(getattr(b, "total_amount", 0.0) or 0.0) * 0.05) for b in bookings)
-        )
+        row = by_month.get(start.strftime("%Y-%m")) or {}
         history.append(
             {
                 "month": start.strftime("%Y-%m"),
-                "transactions": tx_count,
-                "gmv_minor": gmv_minor,
-                "commission_minor": commission_minor,
+                "transactions": int(row.get("transactions") or 0),
+                "gmv_minor": int(row.get("gmv_minor") or 0),
+                "commission_minor": int(row.get("commission_minor") or 0),
             }
         )
 
@@ -1439,6 +1449,90 @@ def admin_analytics_export_csv():
     )
 
 
+@admin_ops_bp.get("/integrations/http")
+def admin_integrations_http():
+    _, err = _require_admin()
+    if err:
+        return err
+    return jsonify({"ok": True, **http_metrics()}), 200
+
+
+@admin_ops_bp.get("/exports/orders")
+def admin_export_orders():
+    _, err = _require_admin()
+    if err:
+        return err
+    try:
+        fmt = export_format(request.args)
+        start, end = export_date_range(request.args)
+        buyer_id = export_int_arg(request.args, "buyer_id")
+        merchant_id = export_int_arg(request.args, "merchant_id")
+    except ExportFilterError as exc:
+        return jsonify({"message": str(exc)}), 400
+    stmt = select(
+        Order.id,
+        Order.created_at,
+        Order.buyer_id,
+        Order.merchant_id,
+        Order.listing_id,
+        Order.status,
+        Order.amount,
+        Order.total_price,
+        Order.delivery_fee,
+        Order.inspection_fee,
+        Order.escrow_status,
+        Order.payment_reference,
+        Order.updated_at,
+    )
+    if start is not None:
+        stmt = stmt.where(Order.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(Order.created_at < end)
+    statuses = export_list_arg(request.args, "status")
+    if statuses:
+        stmt = stmt.where(Order.status.in_(statuses))
+    if buyer_id is not None:
+        stmt = stmt.where(Order.buyer_id == buyer_id)
+    if merchant_id is not None:
+        stmt = stmt.where(Order.merchant_id == merchant_id)
+    return export_response(stmt.order_by(Order.id.asc()), fmt=fmt, filename="fliptrybe-orders")
+
+
+@admin_ops_bp.get("/exports/audit-logs")
+def admin_export_audit_logs():
+    _, err = _require_admin()
+    if err:
+        return err
+    try:
+        fmt = export_format(request.args)
+        start, end = export_date_range(request.args)
+        actor_user_id = export_int_arg(request.args, "actor_user_id")
+    except ExportFilterError as exc:
+        return jsonify({"message": str(exc)}), 400
+    stmt = select(
+        AuditLog.id,
+        AuditLog.created_at,
+        AuditLog.actor_user_id,
+        AuditLog.action,
+        AuditLog.target_type,
+        AuditLog.target_id,
+        AuditLog.meta,
+    )
+    if start is not None:
+        stmt = stmt.where(AuditLog.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(AuditLog.created_at < end)
+    actions = export_list_arg(request.args, "action")
+    if actions:
+        stmt = stmt.where(AuditLog.action.in_(actions))
+    target_type = (request.args.get("target_type") or "").strip()
+    if target_type:
+        stmt = stmt.where(AuditLog.target_type == target_type)
+    if actor_user_id is not None:
+        stmt = stmt.where(AuditLog.actor_user_id == actor_user_id)
+    return export_response(stmt.order_by(AuditLog.id.asc()), fmt=fmt, filename="fliptrybe-audit-logs")
+
+
 @admin_ops_bp.get("/simulation/baseline")
 def admin_simulation_baseline():
     _, err = _require_admin()
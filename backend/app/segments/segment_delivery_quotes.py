@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import os
+
+from flask import Blueprint, jsonify, request
+
+from app.services import delivery_matrix
+
+delivery_quotes_bp = Blueprint("delivery_quotes_bp", __name__, url_prefix="/api/delivery")
+
+
+def _max_batch() -> int:
+    try:
+        value = int((os.getenv("DELIVERY_QUOTE_MAX_BATCH") or "200").strip())
+    except Exception:
+        value = 200
+    return max(1, min(value, 5000))
+
+
+def _place_from_args(prefix: str) -> dict:
+    return {
+        "state": request.args.get(f"{prefix}_state"),
+        "city": request.args.get(f"{prefix}_city"),
+        "locality": request.args.get(f"{prefix}_locality"),
+    }
+
+
+def _place_from_json(value) -> dict | None:
+    if isinstance(value, str):
+        return {"city": value}
+    if isinstance(value, dict):
+        return {k: value.get(k) for k in ("state", "city", "locality")}
+    return None
+
+
+@delivery_quotes_bp.get("/matrix")
+def delivery_matrix_snapshot():
+    """Places, fee bands and the pairwise distance/band matrix, for clients that quote offline."""
+    return jsonify({"ok": True, **delivery_matrix.describe()}), 200
+
+
+@delivery_quotes_bp.get("/quote")
+def delivery_quote():
+    """Distance and fee for ``from_state/from_city/from_locality`` -> ``to_*``."""
+    result = delivery_matrix.quote(_place_from_args("from"), _place_from_args("to"))
+    if result is None:
+        return jsonify({"ok": False, "message": "Unknown origin or destination"}), 404
+    return jsonify({"ok": True, "quote": result}), 200
+
+
+@delivery_quotes_bp.post("/quotes")
+def delivery_quotes_batch():
+    """Batch quotes: ``{"pairs": [{"from": {...}|"City", "to": {...}|"City"}, ...]}``.
+
+    Results keep request order; unknown places quote as ``null``.
+    """
+    payload = request.get_json(silent=True) or {}
+    pairs = payload.get("pairs")
+    if not isinstance(pairs, list) or not pairs:
+        return jsonify({"ok": False, "message": "pairs must be a non-empty list"}), 400
+    limit = _max_batch()
+    if len(pairs) > limit:
+        return jsonify({"ok": False, "message": f"At most {limit} pairs per request"}), 400
+    parsed = [
+        (_place_from_json(p.get("from")), _place_from_json(p.get("to"))) if isinstance(p, dict) else (None, None)
+        for p in pairs
+    ]
+    quotes = delivery_matrix.quote_many(parsed)
+    return jsonify({"ok": True, "quotes": quotes, "unknown": sum(1 for q in quotes if q is None)}), 200
@@ -10,6 +10,9 @@ from app.utils.jwt_utils import decode_token
 from app.utils.escrow_unlocks import ensure_unlock, set_code_if_missing
 from app.utils.notify import queue_sms, queue_whatsapp
 from app.utils.events import log_event
+from app.realtime.bus import publish as realtime_publish
+from app.realtime.rooms import order_room
+from app.services.driver_locations import LocationStoreUnavailable, PingError, drivers_within, ingest_pings
 
 drivers_bp = Blueprint("drivers_bp", __name__, url_prefix="/api/driver")
 
@@ -181,6 +184,7 @@ def accept_job(job_id: int):
                 {
                     Order.driver_id: int(u.id),
                     Order.status: "driver_assigned",
+                    Order.assigned_at: now,
                     Order.updated_at: now,
                 },
                 synchronize_session=False,
@@ -295,3 +299,67 @@ def get_job(job_id: int):
         return jsonify({"message": "Forbidden"}), 403
 
     return jsonify(_job_dict(o)), 200
+
+
+@drivers_bp.post("/location")
+def post_location():
+    """Batched location pings: ``{"pings": [{"lat", "lng", "ts", "order_id"?}, ...]}``.
+
+    A single ping object is accepted too. Only the newest point updates the
+    live position; the rest feed the (downsampled) track history.
+    """
+    u = _current_user()
+    if not u:
+        return jsonify({"message": "Unauthorized"}), 401
+    if _role(u) != "driver":
+        return jsonify({"message": "Forbidden"}), 403
+
+    payload = request.get_json(silent=True) or {}
+    pings = payload.get("pings") if isinstance(payload, dict) and "pings" in payload else [payload]
+    try:
+        result = ingest_pings(int(u.id), pings)
+    except PingError as e:
+        return jsonify({"message": str(e)}), 400
+    except LocationStoreUnavailable:
+        # The device keeps its buffer and re-sends the batch.
+        return jsonify({"ok": False, "error": "LOCATION_STORE_UNAVAILABLE", "message": "Try again shortly"}), 503, {"Retry-After": "5"}
+
+    latest = result.pop("latest", None)
+    if result.get("latest_updated") and latest and latest.get("order_id"):
+        o = Order.query.get(int(latest["order_id"]))
+        if o is not None and o.driver_id is not None and int(o.driver_id) == int(u.id):
+            realtime_publish(
+                order_room(int(o.id)),
+                "driver.location",
+                {
+                    "order_id": int(o.id),
+                    "driver_id": int(u.id),
+                    "lat": latest["lat"],
+                    "lng": latest["lng"],
+                    "recorded_at": datetime.utcfromtimestamp(latest["ts"]).isoformat(),
+                },
+            )
+    return jsonify({"ok": True, **result}), 200
+
+
+@drivers_bp.get("/locations/nearby")
+def nearby_drivers():
+    u = _current_user()
+    if not u:
+        return jsonify({"message": "Unauthorized"}), 401
+    if _role(u) != "admin":
+        return jsonify({"message": "Forbidden"}), 403
+
+    try:
+        lat = float(request.args.get("lat"))
+        lng = float(request.args.get("lng"))
+    except Exception:
+        return jsonify({"message": "lat and lng required"}), 400
+    try:
+        radius_km = float(request.args.get("radius_km") or 5)
+        limit = int(request.args.get("limit") or 50)
+    except Exception:
+        return jsonify({"message": "Invalid radius_km or limit"}), 400
+
+    items = drivers_within(lat, lng, radius_km, limit=limit)
+    return jsonify({"ok": True, "items": items, "count": len(items)}), 200
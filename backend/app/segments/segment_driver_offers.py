@@ -82,6 +82,7 @@ def accept(offer_id: int):
     off.decided_at = datetime.utcnow()
     o.driver_id = int(u.id)
     o.status = "assigned"
+    o.assigned_at = off.decided_at
 
     try:
         unlock = ensure_unlock(int(o.id), "pickup_seller")
@@ -18,8 +18,6 @@ from sqlalchemy import func, desc
 from app.extensions import db
 from app.models import User, Listing, Order, Transaction
 
-from app.segments.segment_notifications_engine import dispatch_notification
-
 # =====================================================
 # MODELS
 # =====================================================
@@ -314,18 +312,9 @@ def refresh_weekly_rankings():
 # =====================================================
 
 def notify_followers_new_listing(listing):
+    from app.services.fanout_service import notify_followers_new_listing as fanout_new_listing
 
-    followers = MerchantFollow.query.filter_by(
-        merchant_id=listing.user_id
-    ).all()
-
-    for f in followers:
-        dispatch_notification(
-            f.user_id,
-            "New Listing 🚀",
-            f"{listing.title} just dropped!",
-            ("sms", "whatsapp"),
-        )
+    return fanout_new_listing(listing, channels=("sms", "whatsapp"))
 
 
 print("🏆 Segment 6 Loaded: Growth Intelligence Online")
\ No newline at end of file
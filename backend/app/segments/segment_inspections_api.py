@@ -16,13 +16,11 @@ from app.utils.notify import queue_sms, queue_whatsapp
 from app.jobs.escrow_runner import _hold_order_into_escrow, run_escrow_automation
 from app.escrow import release_inspector_payout
 from app.utils.events import log_event
+from app.services import inspector_dispatch
 from app.utils.bonding import (
-    get_or_create_bond,
     refresh_bond_required_for_tier,
-    reserve_for_inspection,
     release_for_inspection,
     slash_for_audit,
-    required_amount_for_tier,
 )
 
 
@@ -120,26 +118,6 @@ def _event(order_id: int, actor_id: int | None, event: str, note: str = "") -> N
             pass
 
 
-def _tier_rank(tier: str | None) -> int:
-    t = (tier or "BRONZE").strip().upper()
-    if t == "PLATINUM":
-        return 4
-    if t == "GOLD":
-        return 3
-    if t == "SILVER":
-        return 2
-    return 1
-
-
-def _active_inspection_count(inspector_user_id: int) -> int:
-    return (
-        Order.query
-        .filter(Order.inspector_id == int(inspector_user_id))
-        .filter(Order.inspection_status.in_(["PENDING", "ON_MY_WAY", "ARRIVED", "INSPECTED"]))
-        .count()
-    )
-
-
 def _recompute_profile_score(prof: InspectorProfile, order: Order | None = None) -> InspectorProfile:
     rows = InspectionReview.query.filter_by(inspector_user_id=int(prof.user_id)).all()
     if rows:
@@ -183,66 +161,12 @@ def _recompute_profile_score(prof: InspectorProfile, order: Order | None = None)
 
 
 def _assign_inspector(order: Order) -> int | None:
-    """Pick the best available inspector.
-
-    Current strategy (safe default):
-      - Active inspector profile
-      - Region match (if provided)
-      - Higher reputation tier
-      - Higher reputation score
-      - Lower active inspection load
-    """
-    profiles = InspectorProfile.query.filter_by(is_active=True).all()
-    if not profiles:
-        return None
-
-    region_hint = (order.pickup or "").strip().lower()
-    scored = []
+    """Pick the best available inspector and reserve their bond.
 
-    for prof in profiles:
-        try:
-            bond = refresh_bond_required_for_tier(int(prof.user_id), prof.reputation_tier)
-        except Exception:
-            bond = get_or_create_bond(int(prof.user_id), tier=prof.reputation_tier)
-
-        if float(bond.bond_available_amount or 0.0) < float(bond.bond_required_amount or 0.0):
-            continue
-        if (bond.status or "") != "ACTIVE":
-            continue
-
-        region = (prof.region or "").strip().lower()
-        region_match = 0
-        if region and region_hint:
-            if region == region_hint or region in region_hint:
-                region_match = 1
-
-        load = _active_inspection_count(int(prof.user_id))
-        scored.append(
-            (
-                region_match,
-                _tier_rank(prof.reputation_tier),
-                float(prof.reputation_score or 0.0),
-                -int(load),
-                prof,
-            )
-        )
-
-    if not scored:
-        return None
-
-    scored.sort(reverse=True, key=lambda x: (x[0], x[1], x[2], x[3]))
-
-    for _, _, _, _, prof in scored:
-        try:
-            bond = refresh_bond_required_for_tier(int(prof.user_id), prof.reputation_tier)
-        except Exception:
-            bond = get_or_create_bond(int(prof.user_id), tier=prof.reputation_tier)
-
-        required = float(bond.bond_required_amount or required_amount_for_tier(prof.reputation_tier))
-        if reserve_for_inspection(int(prof.user_id), int(order.id), required):
-            return int(prof.user_id)
-
-    return None
+    Ranking (region match, tier, score, open load) is served from the
+    precomputed ``inspector_dispatch`` index; see app.services.inspector_dispatch.
+    """
+    return inspector_dispatch.assign_inspector(order)
 
 
 @inspections_bp.post("/orders/<int:order_id>/inspection/request")
@@ -299,13 +223,7 @@ def request_inspection(order_id: int):
         if picked:
             try:
                 # Atomic assignment (prevents double-accept / race overwrites)
-                updated = (
-                    db.session.query(Order)
-                    .filter(Order.id == int(o.id))
-                    .filter(Order.inspector_id.is_(None))
-                    .update({Order.inspector_id: int(picked)})
-                )
-                if updated:
+                if inspector_dispatch.claim_inspector(int(o.id), int(picked)):
                     o.inspector_id = int(picked)
             except Exception:
                 db.session.rollback()
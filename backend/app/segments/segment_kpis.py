@@ -1,10 +1,9 @@
 from __future__ import annotations
 
 from flask import Blueprint, jsonify, request
-from sqlalchemy import func
-
 from app.extensions import db
-from app.models import User, Order, Receipt
+from app.models import User
+from app.services import merchant_stats
 from app.utils.jwt_utils import decode_token
 
 kpi_bp = Blueprint("kpi_bp", __name__, url_prefix="/api/kpis")
@@ -54,23 +53,16 @@ def merchant_kpis():
     if not u:
         return jsonify({"message": "Unauthorized"}), 401
 
-    # Orders for this merchant
-    total_orders = db.session.query(func.count(Order.id)).filter(Order.merchant_id == u.id).scalar() or 0
-    completed = db.session.query(func.count(Order.id)).filter(Order.merchant_id == u.id, Order.status.in_(["delivered", "completed"])).scalar() or 0
-
-    revenue = db.session.query(func.sum(Order.amount)).filter(Order.merchant_id == u.id, Order.status.in_(["delivered", "completed"])).scalar() or 0.0
-    delivery = db.session.query(func.sum(Order.delivery_fee)).filter(Order.merchant_id == u.id, Order.status.in_(["delivered", "completed"])).scalar() or 0.0
-
-    # Commission receipts for merchant
-    fees = db.session.query(func.sum(Receipt.fee)).filter(Receipt.user_id == u.id).scalar() or 0.0
+    stats = merchant_stats.read_merchant_stats(int(u.id))
+    completed_stats = stats["completed"]
 
     return jsonify({
         "ok": True,
         "kpis": {
-            "total_orders": int(total_orders),
-            "completed_orders": int(completed),
-            "gross_revenue": float(revenue),
-            "delivery_total": float(delivery),
-            "platform_fees": float(fees),
+            "total_orders": int(stats["totals"].get("orders", 0)),
+            "completed_orders": int(completed_stats.get("orders", 0)),
+            "gross_revenue": completed_stats.get("amount_minor", 0) / 100.0,
+            "delivery_total": completed_stats.get("delivery_fee_minor", 0) / 100.0,
+            "platform_fees": stats["totals"].get("receipt_fee_minor", 0) / 100.0,
         }
     }), 200
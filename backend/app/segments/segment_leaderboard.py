@@ -5,7 +5,9 @@ from datetime import datetime, timedelta
 from flask import Blueprint, jsonify, request
 
 from app.extensions import db
-from app.models import User, WalletTxn
+from app.models import WalletTxn
+from app.services import leaderboards
+from app.utils.jwt_utils import decode_token
 
 leader_bp = Blueprint("leader_bp", __name__, url_prefix="/api/leaderboard")
 
@@ -24,43 +26,89 @@ def _ensure_tables_once():
     _INIT = True
 
 
-@leader_bp.get("/merchants")
-def top_merchants():
-    days = int(request.args.get("days") or 30)
+def _bearer_token() -> str | None:
+    header = request.headers.get("Authorization", "")
+    if not header.startswith("Bearer "):
+        return None
+    return header.replace("Bearer ", "", 1).strip() or None
+
+
+def _current_user_id() -> int | None:
+    token = _bearer_token()
+    if not token:
+        return None
+    payload = decode_token(token)
+    if not payload:
+        return None
+    try:
+        return int(payload.get("sub"))
+    except Exception:
+        return None
+
+
+def _days() -> int:
+    try:
+        days = int(request.args.get("days") or 30)
+    except Exception:
+        days = 30
+    return max(1, min(days, 366))
+
+
+def _earnings_board(board: str):
+    days = _days()
+    if days in leaderboards.EARNINGS_WINDOWS:
+        rows = leaderboards.top_entries(board, days, limit=50)
+        return jsonify([
+            {"rank": r["rank"], "user_id": r["user_id"], "name": r["name"], "role": r["role"], "earnings": r["score"]}
+            for r in rows
+        ]), 200
+
+    # Windows without a precomputed board: one grouped query plus one user lookup.
     since = datetime.utcnow() - timedelta(days=days)
     rows = (
         db.session.query(WalletTxn.user_id, db.func.sum(WalletTxn.amount).label("earnings"))
-        .filter(WalletTxn.kind == "order_sale", WalletTxn.direction == "credit", WalletTxn.created_at >= since)
+        .filter(
+            WalletTxn.kind.in_(leaderboards.BOARD_KINDS[board]),
+            WalletTxn.direction == "credit",
+            WalletTxn.created_at >= since,
+        )
         .group_by(WalletTxn.user_id)
         .order_by(db.desc("earnings"))
         .limit(50)
         .all()
     )
+    users = leaderboards.hydrate_users(uid for uid, _ in rows)
     out = []
-    for uid, earnings in rows:
-        u = User.query.get(int(uid))
+    for position, (uid, earnings) in enumerate(rows):
+        u = users.get(int(uid))
         if not u:
             continue
-        out.append({"user_id": int(uid), "name": u.name, "role": u.role or "buyer", "earnings": float(earnings or 0.0)})
+        out.append({"rank": position + 1, "user_id": int(uid), "name": u["name"], "role": u["role"], "earnings": float(earnings or 0.0)})
     return jsonify(out), 200
 
 
+@leader_bp.get("/merchants")
+def top_merchants():
+    return _earnings_board("merchant")
+
+
 @leader_bp.get("/drivers")
 def top_drivers():
-    days = int(request.args.get("days") or 30)
-    since = datetime.utcnow() - timedelta(days=days)
-    rows = (
-        db.session.query(WalletTxn.user_id, db.func.sum(WalletTxn.amount).label("earnings"))
-        .filter(WalletTxn.kind == "delivery_fee", WalletTxn.direction == "credit", WalletTxn.created_at >= since)
-        .group_by(WalletTxn.user_id)
-        .order_by(db.desc("earnings"))
-        .limit(50)
-        .all()
-    )
-    out = []
-    for uid, earnings in rows:
-        u = User.query.get(int(uid))
-        if not u:
-            continue
-        out.append({"user_id": int(uid), "name": u.name, "role": u.role or "buyer", "earnings": float(earnings or 0.0)})
-    return jsonify(out), 200
+    return _earnings_board("driver")
+
+
+@leader_bp.get("/me")
+def my_rank():
+    """The caller's rank on ``?board=merchant|driver|merchant_score`` (``?days=`` 7, 30 or 90 for earnings)."""
+    uid = _current_user_id()
+    if uid is None:
+        return jsonify({"ok": False, "message": "Unauthorized"}), 401
+    board = (request.args.get("board") or "merchant").strip().lower()
+    windows = leaderboards.board_windows(board)
+    if not windows:
+        return jsonify({"ok": False, "message": "Unknown board"}), 400
+    window = _days() if board in leaderboards.BOARD_KINDS else 0
+    if window not in windows:
+        return jsonify({"ok": False, "message": f"days must be one of {list(windows)}"}), 400
+    result = leaderboards.rank_of(board, window, uid)
+    return jsonify({"ok": True, "board": board, "days": window, "user_id": uid, **result}), 200
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 from flask import Blueprint, jsonify, request
+from sqlalchemy import and_, func
 
 from app.extensions import db
-from app.models import MerchantProfile, User
+from app.models import LeaderboardScore, MerchantProfile
+from app.services import leaderboards
 
 leaderboards_bp = Blueprint("leaderboards_bp", __name__, url_prefix="/api/leaderboards")
 
@@ -22,9 +24,69 @@ def _ensure_tables_once():
     _INIT_DONE = True
 
 
-def _sort(items):
-    items.sort(key=lambda x: float(x.score()), reverse=True)
-    return items
+def _board_score():
+    return func.coalesce(LeaderboardScore.score, 0.0)
+
+
+def _scored_profiles():
+    """Non-suspended profiles joined to their precomputed ``merchant_score`` entry."""
+    return (
+        db.session.query(MerchantProfile)
+        .outerjoin(
+            LeaderboardScore,
+            and_(
+                LeaderboardScore.board == leaderboards.SCORE_BOARD,
+                LeaderboardScore.window_days == 0,
+                LeaderboardScore.user_id == MerchantProfile.user_id,
+            ),
+        )
+        .filter(MerchantProfile.is_suspended.is_(False))
+    )
+
+
+def _rows(items, *, ranked: bool = False) -> list[dict]:
+    users = leaderboards.hydrate_users(m.user_id for m in items)
+    out = []
+    for position, m in enumerate(items):
+        row = m.to_dict()
+        row["profile_image_url"] = (users.get(int(m.user_id)) or {}).get("profile_image_url", "") if m.user_id is not None else ""
+        if ranked:
+            row["rank"] = position + 1
+        out.append(row)
+    return out
+
+
+def _top_per_group(group_key, limit: int) -> dict[str, list[dict]]:
+    """Top ``limit`` profiles per group in one windowed query."""
+    rn = func.row_number().over(
+        partition_by=group_key,
+        order_by=(_board_score().desc(), MerchantProfile.user_id.asc()),
+    )
+    ranked_ids = (
+        _scored_profiles()
+        .with_entities(MerchantProfile.id.label("pid"), group_key.label("grp"), rn.label("rn"))
+        .subquery()
+    )
+    rows = (
+        db.session.query(MerchantProfile, ranked_ids.c.grp)
+        .join(ranked_ids, ranked_ids.c.pid == MerchantProfile.id)
+        .filter(ranked_ids.c.rn <= limit)
+        .order_by(ranked_ids.c.grp.asc(), ranked_ids.c.rn.asc())
+        .all()
+    )
+    hydrated = _rows([m for m, _ in rows])
+    out: dict[str, list[dict]] = {}
+    for (_, grp), row in zip(rows, hydrated):
+        out.setdefault(grp, []).append(row)
+    return out
+
+
+def _state_key():
+    return func.coalesce(func.nullif(func.trim(MerchantProfile.state), ""), "Unknown")
+
+
+def _city_key():
+    return _state_key() + "|" + func.coalesce(func.nullif(func.trim(MerchantProfile.city), ""), "Unknown")
 
 
 @leaderboards_bp.get("")
@@ -41,97 +103,64 @@ def ranked():
 
     state = (request.args.get("state") or "").strip()
     try:
-        q = MerchantProfile.query.filter_by(is_suspended=False)
         if state and state.lower() != "all nigeria":
-            q = q.filter(MerchantProfile.state.ilike(state))
-        items = q.all()
-        _sort(items)
+            items = (
+                _scored_profiles()
+                .filter(MerchantProfile.state.ilike(state))
+                .order_by(_board_score().desc(), MerchantProfile.user_id.asc())
+                .limit(limit)
+                .all()
+            )
+        else:
+            ids = [uid for uid, _ in leaderboards.top(leaderboards.SCORE_BOARD, 0, limit=limit)]
+            by_user = {
+                int(m.user_id): m
+                for m in MerchantProfile.query.filter(
+                    MerchantProfile.user_id.in_(ids), MerchantProfile.is_suspended.is_(False)
+                ).all()
+            } if ids else {}
+            items = [by_user[uid] for uid in ids if uid in by_user]
     except Exception as e:
         db.session.rollback()
         return jsonify({"ok": False, "message": "Failed to load leaderboards", "error": str(e)}), 500
 
-    out = []
-    rank = 1
-    for m in items[:limit]:
-        row = m.to_dict()
-        user = User.query.get(int(m.user_id)) if m.user_id is not None else None
-        row["profile_image_url"] = (getattr(user, "profile_image_url", "") or "") if user else ""
-        row["rank"] = rank
-        out.append(row)
-        rank += 1
-    return jsonify({"ok": True, "items": out}), 200
+    return jsonify({"ok": True, "items": _rows(items, ranked=True)}), 200
 
 
 @leaderboards_bp.get("/featured")
 def featured():
-    items = MerchantProfile.query.filter_by(is_featured=True, is_suspended=False).all()
-    _sort(items)
-    return jsonify({"ok": True, "items": [x.to_dict() for x in items[:30]]}), 200
+    items = (
+        _scored_profiles()
+        .filter(MerchantProfile.is_featured.is_(True))
+        .order_by(_board_score().desc(), MerchantProfile.user_id.asc())
+        .limit(30)
+        .all()
+    )
+    return jsonify({"ok": True, "items": [x.to_dict() for x in items]}), 200
 
 
-@leaderboards_bp.get("/states")
-def top_by_state():
-    """Return { state: [top merchants] } for Nigeria."
-    limit per state is configurable."
-    """
+def _group_limit(default: int = 10) -> int:
     raw_limit = (request.args.get("limit") or "").strip()
     try:
-        limit = int(raw_limit) if raw_limit else 10
+        limit = int(raw_limit) if raw_limit else default
     except Exception:
-        limit = 10
+        limit = default
     if limit < 1:
-        limit = 10
+        limit = default
     if limit > 30:
         limit = 30
+    return limit
 
-    # Pull all merchants, group in python (simple, sqlite friendly)
-    rows = MerchantProfile.query.filter_by(is_suspended=False).all()
-    by_state = {}
-    for m in rows:
-        st = (m.state or "").strip() or "Unknown"
-        by_state.setdefault(st, []).append(m)
-    out = {}
-    for st, items in by_state.items():
-        _sort(items)
-        rows = []
-        for x in items[:limit]:
-            row = x.to_dict()
-            user = User.query.get(int(x.user_id)) if x.user_id is not None else None
-            row["profile_image_url"] = (getattr(user, "profile_image_url", "") or "") if user else ""
-            rows.append(row)
-        out[st] = rows
-    return jsonify({"ok": True, "items": out}), 200
+
+@leaderboards_bp.get("/states")
+def top_by_state():
+    """Return { state: [top merchants] } for Nigeria.
+    limit per state is configurable.
+    """
+    return jsonify({"ok": True, "items": _top_per_group(_state_key(), _group_limit())}), 200
 
 
 @leaderboards_bp.get("/cities")
 def top_by_city():
-    """Return { 'State|City': [top merchants] }."
-    """
-    raw_limit = (request.args.get("limit") or "").strip()
-    try:
-        limit = int(raw_limit) if raw_limit else 10
-    except Exception:
-        limit = 10
-    if limit < 1:
-        limit = 10
-    if limit > 30:
-        limit = 30
-
-    rows = MerchantProfile.query.filter_by(is_suspended=False).all()
-    by_city = {}
-    for m in rows:
-        st = (m.state or "").strip() or "Unknown"
-        ct = (m.city or "").strip() or "Unknown"
-        key = f"{st}|{ct}"
-        by_city.setdefault(key, []).append(m)
-    out = {}
-    for key, items in by_city.items():
-        _sort(items)
-        rows = []
-        for x in items[:limit]:
-            row = x.to_dict()
-            user = User.query.get(int(x.user_id)) if x.user_id is not None else None
-            row["profile_image_url"] = (getattr(user, "profile_image_url", "") or "") if user else ""
-            rows.append(row)
-        out[key] = rows
-    return jsonify({"ok": True, "items": out}), 200
+    """Return { 'State|City': [top merchants] }."""
+    return jsonify({"ok": True, "items": _top_per_group(_city_key(), _group_limit())}), 200
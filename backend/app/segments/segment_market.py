@@ -24,7 +24,13 @@ from app.models import (
     MerchantProfile,
     ImageFingerprint,
 )
-from app.utils.commission import compute_commission, RATES
+from app.utils.commission import (
+    RATES,
+    compute_commission,
+    compute_order_commissions_minor_batch,
+    money_major_to_minor,
+    money_minor_to_major,
+)
 from app.utils.listing_caps import enforce_listing_cap
 from app.utils.jwt_utils import decode_token, get_bearer_token
 from app.utils.autopilot import get_settings
@@ -986,6 +992,22 @@ def _enqueue_search_index(listing_id: int) -> None:
             pass
 
 
+def _fanout_new_listing(listing: Listing) -> None:
+    try:
+        settings = get_settings()
+        if not bool(getattr(settings, "watcher_notifications_v1", False)):
+            return
+        from app.services.fanout_service import notify_followers_new_listing
+
+        notify_followers_new_listing(listing)
+    except Exception:
+        db.session.rollback()
+        try:
+            current_app.logger.exception("follower_fanout_failed listing_id=%s", int(listing.id))
+        except Exception:
+            pass
+
+
 def _enqueue_search_delete(listing_id: int) -> None:
     if not search_engine_is_meili():
         return
@@ -2340,6 +2362,100 @@ def fees_quote():
     return jsonify({"ok": True, "kind": kind, "amount": amount, "rate": rate, "fee": fee, "total": float(amount) + float(fee)}), 200
 
 
+def _fees_quote_batch_max() -> int:
+    try:
+        return max(1, min(int((os.getenv("FEES_QUOTE_BATCH_MAX") or "300").strip() or 300), 1000))
+    except Exception:
+        return 300
+
+
+def _quote_minor(item: dict, major_key: str, minor_key: str) -> int | None:
+    if item.get(minor_key) is not None:
+        try:
+            return max(0, int(item.get(minor_key)))
+        except Exception:
+            return None
+    try:
+        return money_major_to_minor(float(item.get(major_key) or 0.0))
+    except Exception:
+        return None
+
+
+@market_bp.post("/fees/quote/batch")
+def fees_quote_batch():
+    """Commission splits for a cart or listing grid in one call, in input order."""
+    payload = request.get_json(silent=True) or {}
+    raw_items = payload.get("items")
+    if not isinstance(raw_items, list) or not raw_items:
+        return jsonify({"ok": False, "message": "items must be a non-empty list"}), 400
+    max_items = _fees_quote_batch_max()
+    if len(raw_items) > max_items:
+        return jsonify({"ok": False, "message": f"at most {max_items} items per batch"}), 400
+
+    inputs = []
+    for idx, raw in enumerate(raw_items):
+        item = raw if isinstance(raw, dict) else {}
+        amount_minor = _quote_minor(item, "amount", "amount_minor")
+        delivery_minor = _quote_minor(item, "delivery_fee", "delivery_minor")
+        inspection_minor = _quote_minor(item, "inspection_fee", "inspection_minor")
+        if amount_minor is None or delivery_minor is None or inspection_minor is None:
+            return jsonify({"ok": False, "message": "invalid amount", "index": idx}), 400
+        listing_type = str(item.get("listing_type") or "declutter").strip().lower()
+        seller_type = str(item.get("seller_type") or "all").strip().lower()
+        if seller_type in ("driver", "inspector"):
+            seller_type = "merchant"
+        elif seller_type == "buyer":
+            seller_type = "user"
+        inputs.append(
+            {
+                "sale_kind": "shortlet" if listing_type == "shortlet" else "declutter",
+                "sale_charge_minor": amount_minor,
+                "delivery_minor": delivery_minor,
+                "inspection_minor": inspection_minor,
+                "is_top_tier": bool(item.get("is_top_tier")),
+                "seller_type": seller_type if seller_type in ("user", "merchant") else "all",
+                "city": str(item.get("city") or "").strip(),
+            }
+        )
+
+    snapshots = compute_order_commissions_minor_batch(inputs)
+    quotes = []
+    groups: dict[str, int] = {}
+    for idx, (inp, snap) in enumerate(zip(inputs, snapshots)):
+        sale = snap.get("sale") or {}
+        policy = snap.get("policy") or {}
+        rule = (snap.get("rules") or {}).get("sale") or ""
+        groups[rule] = groups.get(rule, 0) + 1
+        quotes.append(
+            {
+                "index": idx,
+                "listing_type": inp["sale_kind"],
+                "seller_type": inp["seller_type"],
+                "city": inp["city"],
+                "amount_minor": int(sale.get("charge_minor") or 0),
+                "fee_minor": int(sale.get("fee_minor") or 0),
+                "fee": money_minor_to_major(sale.get("fee_minor") or 0),
+                "seller_minor": int(sale.get("seller_minor") or 0),
+                "platform_minor": int(sale.get("platform_minor") or 0),
+                "top_tier_incentive_minor": int(sale.get("top_tier_incentive_minor") or 0),
+                "delivery": snap.get("delivery") or {},
+                "inspection": snap.get("inspection") or {},
+                "rule": rule,
+                "policy_id": policy.get("policy_id"),
+                "rule_id": policy.get("rule_id"),
+                "effective_rate_bps": int(policy.get("effective_rate_bps") or 0),
+            }
+        )
+    return jsonify(
+        {
+            "ok": True,
+            "count": len(quotes),
+            "items": quotes,
+            "groups": [{"rule": rule, "count": count} for rule, count in groups.items()],
+        }
+    ), 200
+
+
 @market_bp.post("/listings/price-preview")
 def listing_price_preview():
     payload = request.get_json(silent=True) or {}
@@ -3017,6 +3133,7 @@ def create_listing():
         db.session.commit()
         _invalidate_listing_read_caches(int(listing.id))
         _enqueue_search_index(int(listing.id))
+        _fanout_new_listing(listing)
 
         base = _base_url()
         return jsonify({"ok": True, "listing": listing.to_dict(base_url=base)}), 201
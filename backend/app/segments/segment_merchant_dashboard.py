@@ -1,8 +1,12 @@
 from datetime import datetime, timedelta
 
 from flask import Blueprint, jsonify, request, current_app
+from sqlalchemy import func
+
 from app.extensions import db
-from app.models import Listing, User, Order, Receipt
+from app.models import Listing, MerchantDailyStat, User, Order
+from app.services import merchant_stats
+from app.services.rollups import ORDER_SUCCESS_STATUSES
 from app.utils.jwt_utils import decode_token
 
 merchant_bp = Blueprint("merchant_bp", __name__, url_prefix="/api/merchant")
@@ -79,7 +83,7 @@ def merchant_dashboard():
 
 @merchant_bp.get("/kpis")
 def merchant_kpis():
-    """Real merchant KPIs computed from listings/orders/receipts (token-based)."""
+    """Merchant KPIs from the per-merchant daily stats (token-based)."""
     u = _current_user()
     if not u:
         return jsonify({"ok": True, "kpis": {}}), 200
@@ -88,25 +92,13 @@ def merchant_kpis():
 
     listings_count = Listing.query.filter_by(user_id=mid).count()
 
-    orders = Order.query.filter_by(merchant_id=mid).all()
-    orders_count = len(orders)
-
-    by_status = {}
-    revenue = 0.0
-    delivery_fees = 0.0
-    for o in orders:
-        st = (o.status or "unknown").lower()
-        by_status[st] = by_status.get(st, 0) + 1
-        revenue += float(o.amount or 0.0)
-        delivery_fees += float(o.delivery_fee or 0.0)
-
-    # receipts for this merchant
-    recs = Receipt.query.filter_by(user_id=mid).all()
-    commission_total = sum(float(r.fee or 0.0) for r in recs)
-    receipts_total = sum(float(r.total or 0.0) for r in recs)
+    stats = merchant_stats.read_merchant_stats(mid)
+    totals = stats["totals"]
+    orders_count = int(totals.get("orders", 0))
+    by_status = {st: int(row.get("orders", 0)) for st, row in stats["by_status"].items()}
 
     # simple health score (demo-friendly)
-    completed = by_status.get("completed", 0) + by_status.get("delivered", 0)
+    completed = int(stats["completed"].get("orders", 0))
     completion_rate = (completed / orders_count) if orders_count else 0.0
     score = int(40 + min(60, (completion_rate * 50) + min(10, listings_count)))
 
@@ -116,19 +108,57 @@ def merchant_kpis():
             "listings_count": listings_count,
             "orders_count": orders_count,
             "orders_by_status": by_status,
-            "revenue_gross": round(revenue, 2),
-            "delivery_fees_gross": round(delivery_fees, 2),
-            "commission_total": round(commission_total, 2),
-            "receipts_total": round(receipts_total, 2),
+            "revenue_gross": round(totals.get("amount_minor", 0) / 100.0, 2),
+            "delivery_fees_gross": round(totals.get("delivery_fee_minor", 0) / 100.0, 2),
+            "commission_total": round(totals.get("receipt_fee_minor", 0) / 100.0, 2),
+            "receipts_total": round(totals.get("receipt_total_minor", 0) / 100.0, 2),
             "completion_rate": round(completion_rate, 3),
             "score": score,
         }
     }), 200
 
 
+def _window_days() -> int:
+    try:
+        days = int(request.args.get("days") or 30)
+    except Exception:
+        days = 30
+    return max(1, min(days, 366))
+
+
+def _top_listings(stats: dict, limit: int = 5) -> list[dict]:
+    ranked = sorted(
+        ((lid, row) for lid, row in stats["listings"].items() if lid and (row.get("paid_orders") or row.get("views"))),
+        key=lambda item: (item[1].get("paid_amount_minor", 0), item[1].get("paid_orders", 0), item[1].get("views", 0)),
+        reverse=True,
+    )[:limit]
+    titles = {}
+    if ranked:
+        titles = dict(
+            db.session.query(Listing.id, Listing.title).filter(Listing.id.in_([lid for lid, _ in ranked])).all()
+        )
+    out = []
+    for lid, row in ranked:
+        views = int(row.get("views", 0))
+        paid = int(row.get("paid_orders", 0))
+        out.append({
+            "listing_id": int(lid),
+            "title": titles.get(lid) or "",
+            "paid_orders": paid,
+            "revenue_minor": int(row.get("paid_amount_minor", 0)),
+            "views": views,
+            "conversion_rate": round(paid / views * 100.0, 2) if views > 0 else 0.0,
+        })
+    return out
+
+
 @merchant_bp.get("/analytics")
 def merchant_analytics():
-    """Lightweight sales analytics for merchant accounts."""
+    """Sales analytics for merchant accounts, answered from the per-merchant daily stats.
+
+    ``?days=`` (default 30, max 366) sets the window for ``revenue_series`` and
+    ``top_listings``; the other totals are all-time.
+    """
     u = _current_user()
     if not u:
         return jsonify({"ok": True, "paid_last_7": 0, "paid_last_30": 0, "recent_paid": []}), 200
@@ -138,23 +168,22 @@ def merchant_analytics():
     except Exception:
         return jsonify({"ok": True, "paid_last_7": 0, "paid_last_30": 0, "recent_paid": []}), 200
 
-    paid_statuses = {
-        "paid",
-        "merchant_accepted",
-        "driver_assigned",
-        "picked_up",
-        "delivered",
-        "completed",
-    }
-
     try:
-        now = datetime.utcnow()
-        base_q = Order.query.filter_by(merchant_id=mid).filter(Order.status.in_(list(paid_statuses)))
-        paid_last_7 = base_q.filter(Order.created_at >= (now - timedelta(days=7))).count()
-        paid_last_30 = base_q.filter(Order.created_at >= (now - timedelta(days=30))).count()
-        paid_orders = base_q.all()
-
-        recent = base_q.order_by(Order.created_at.desc()).limit(12).all()
+        today = datetime.utcnow().date()
+        window_start = today - timedelta(days=_window_days() - 1)
+        stats = merchant_stats.read_merchant_stats(mid, listings_since=window_start)
+        paid = stats["paid"]
+
+        def _paid_since(first_day):
+            return sum(int(row.get("paid_orders", 0)) for d, row in stats["days"].items() if d >= first_day)
+
+        recent = (
+            Order.query.filter_by(merchant_id=mid)
+            .filter(Order.status.in_(ORDER_SUCCESS_STATUSES))
+            .order_by(Order.created_at.desc())
+            .limit(12)
+            .all()
+        )
         recent_out = []
         for o in recent:
             recent_out.append({
@@ -165,32 +194,22 @@ def merchant_analytics():
                 "created_at": o.created_at.isoformat() if o.created_at else None,
             })
 
-        total_sales = int(len(paid_orders))
-        commission_paid_minor = 0
-        net_earnings_minor = 0
-        for o in paid_orders:
-            sale_fee_minor = int(getattr(o, "sale_fee_minor", 0) or 0)
-            seller_minor = int(getattr(o, "sale_seller_minor", 0) or 0)
-            if sale_fee_minor <= 0:
-                sale_fee_minor = int(round(float(getattr(o, "amount", 0.0) or 0.0) * 100 * 0.05))
-            if seller_minor <= 0:
-                seller_minor = int(round(float(getattr(o, "amount", 0.0) or 0.0) * 100 * 0.95))
-            commission_paid_minor += sale_fee_minor
-            net_earnings_minor += seller_minor
-
-        listings = Listing.query.filter_by(user_id=mid).all()
-        total_views = sum(int(getattr(row, "views_count", 0) or 0) for row in listings)
+        total_sales = int(paid.get("orders", 0))
+        total_views = int(stats["totals"].get("views", 0))
         conversion_rate = (float(total_sales) / float(total_views) * 100.0) if total_views > 0 else 0.0
 
         return jsonify({
             "ok": True,
             "total_sales": int(total_sales),
-            "commission_paid_minor": int(commission_paid_minor),
-            "net_earnings_minor": int(net_earnings_minor),
+            "commission_paid_minor": int(paid.get("sale_fee_minor", 0)),
+            "net_earnings_minor": int(paid.get("seller_minor", 0)),
+            "credited_minor": int(stats["totals"].get("credited_minor", 0)),
             "conversion_rate": round(conversion_rate, 2),
-            "paid_last_7": int(paid_last_7),
-            "paid_last_30": int(paid_last_30),
+            "paid_last_7": int(_paid_since(today - timedelta(days=6))),
+            "paid_last_30": int(_paid_since(today - timedelta(days=29))),
             "recent_paid": recent_out,
+            "revenue_series": merchant_stats.daily_series(stats, window_start, today + timedelta(days=1)),
+            "top_listings": _top_listings(stats),
         }), 200
     except Exception:
         db.session.rollback()
@@ -203,10 +222,13 @@ def merchant_analytics():
             "total_sales": 0,
             "commission_paid_minor": 0,
             "net_earnings_minor": 0,
+            "credited_minor": 0,
             "conversion_rate": 0.0,
             "paid_last_7": 0,
             "paid_last_30": 0,
             "recent_paid": [],
+            "revenue_series": [],
+            "top_listings": [],
         }), 200
 
 
@@ -214,33 +236,48 @@ def merchant_analytics():
 def merchant_leaderboard():
     """Public-ish leaderboard for demo (top merchants by score)."""
     # Pull recent merchants from listings table
-    rows = (
-        Listing.query.order_by(Listing.created_at.desc())
-        .limit(500)
+    rows = db.session.query(Listing.user_id).order_by(Listing.created_at.desc()).limit(500).all()
+    merchant_ids = []
+    for (uid,) in rows:
+        if uid and int(uid) not in merchant_ids:
+            merchant_ids.append(int(uid))
+    merchant_ids = merchant_ids[:50]
+    if not merchant_ids:
+        return jsonify([]), 200
+
+    # One grouped read each for listings, per-status order stats and users.
+    listing_counts = dict(
+        db.session.query(Listing.user_id, func.count(Listing.id))
+        .filter(Listing.user_id.in_(merchant_ids))
+        .group_by(Listing.user_id)
         .all()
     )
-    merchant_ids = []
-    for l in rows:
-        if l.user_id and int(l.user_id) not in merchant_ids:
-            merchant_ids.append(int(l.user_id))
+    by_merchant: dict[int, dict[str, tuple[int, int]]] = {}
+    for mid, status, orders, amount_minor in (
+        db.session.query(
+            MerchantDailyStat.merchant_id,
+            MerchantDailyStat.status,
+            func.sum(MerchantDailyStat.orders),
+            func.sum(MerchantDailyStat.amount_minor),
+        )
+        .filter(MerchantDailyStat.merchant_id.in_(merchant_ids), MerchantDailyStat.status != "")
+        .group_by(MerchantDailyStat.merchant_id, MerchantDailyStat.status)
+        .all()
+    ):
+        by_merchant.setdefault(int(mid), {})[status] = (int(orders or 0), int(amount_minor or 0))
+    users = {int(u.id): u for u in User.query.filter(User.id.in_(merchant_ids)).all()}
 
     out = []
-    for mid in merchant_ids[:50]:
-        # compute score quickly from existing kpis function logic
-        listings_count = Listing.query.filter_by(user_id=mid).count()
-        orders = Order.query.filter_by(merchant_id=mid).all()
-        orders_count = len(orders)
-        by_status = {}
-        revenue = 0.0
-        for o in orders:
-            st = (o.status or "unknown").lower()
-            by_status[st] = by_status.get(st, 0) + 1
-            revenue += float(o.amount or 0.0)
-        completed = by_status.get("completed", 0) + by_status.get("delivered", 0)
+    for mid in merchant_ids:
+        listings_count = int(listing_counts.get(mid, 0))
+        statuses = by_merchant.get(mid, {})
+        orders_count = sum(n for n, _ in statuses.values())
+        revenue = sum(minor for _, minor in statuses.values()) / 100.0
+        completed = sum(statuses.get(st, (0, 0))[0] for st in merchant_stats.COMPLETED_STATUSES)
         completion_rate = (completed / orders_count) if orders_count else 0.0
         score = int(40 + min(60, (completion_rate * 50) + min(10, listings_count)))
 
-        u = User.query.get(mid)
+        u = users.get(mid)
         out.append({
             "merchant_id": mid,
             "name": (u.name if u else "") or "",
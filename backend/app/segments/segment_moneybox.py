@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 import json
+import os
 
 from flask import Blueprint, jsonify, request
 
@@ -468,13 +469,14 @@ def withdraw():
         return jsonify({"message": "Failed", "error": str(e)}), 500
 
     try:
-        from app.utils.wallets import post_txn
-        post_txn(user_id=int(u.id), direction="credit", amount=float(payout_amount), kind="moneybox_withdraw", reference=ref, note="MoneyBox withdrawal")
+        from app.utils.wallets import post_txns
+        legs = [dict(user_id=int(u.id), direction="credit", amount=float(payout_amount), kind="moneybox_withdraw", reference=ref, note="MoneyBox withdrawal")]
         if float(penalty_amount) > 0:
             # Penalty is platform revenue: credit admin/system wallet (id=1).
-            post_txn(user_id=1, direction="credit", amount=float(penalty_amount), kind="moneybox_penalty", reference=ref, note="MoneyBox early-withdraw penalty", idempotency_key=f"platform_penalty:{ref}")
+            legs.append(dict(user_id=1, direction="credit", amount=float(penalty_amount), kind="moneybox_penalty", reference=ref, note="MoneyBox early-withdraw penalty", idempotency_key=f"platform_penalty:{ref}"))
+        post_txns(legs)
     except Exception:
-        pass
+        db.session.rollback()
 
     log_event(
         "moneybox_withdraw",
@@ -541,49 +543,63 @@ def set_tier():
     return open_moneybox()
 
 
+def _celery_broker_url() -> str:
+    return (os.getenv("CELERY_BROKER_URL") or "").strip() or (os.getenv("REDIS_URL") or "").strip()
+
+
 @moneybox_system_bp.post("/process-maturity")
 def process_maturity():
     u = _current_user()
     if not _is_admin(u):
         return jsonify({"message": "Forbidden"}), 403
 
-    processed = 0
-    auto_opened = 0
-    bonuses = 0
-
-    rows = MoneyBoxAccount.query.all()
-    now = datetime.utcnow()
-
-    for acct in rows:
-        if acct.status in ("CLOSED",):
-            continue
-        processed += 1
-
-        if acct.auto_open_at and now >= acct.auto_open_at and acct.status == "ACTIVE":
-            acct.status = "OPEN"
-            auto_key = f"auto_open:{int(acct.id)}:{int(acct.auto_open_at.timestamp()) if acct.auto_open_at else ''}"
-            record_ledger(acct, "AUTO_OPEN", 0.0, reference=f"auto_open:{int(acct.id)}", idempotency_key=auto_key)
-            auto_opened += 1
+    from app.jobs.moneybox_maturity import maturity_progress, run_moneybox_maturity
 
+    if _celery_broker_url():
         try:
-            bonus = maybe_award_bonus(acct)
-            if bonus > 0:
-                bonuses += 1
+            from app.tasks.scale_tasks import run_moneybox_maturity_task
+
+            task = run_moneybox_maturity_task.delay(trace_id=get_request_id())
+            return jsonify(
+                {
+                    "ok": True,
+                    "queued": True,
+                    "task_id": str(getattr(task, "id", "") or ""),
+                    "progress": maturity_progress(),
+                }
+            ), 202
         except Exception:
-            pass
-
-        if acct.maturity_at and now >= acct.maturity_at and acct.status not in ("CLOSED", "MATURED"):
-            acct.status = "MATURED"
-
-        acct.updated_at = now
-        db.session.add(acct)
+            db.session.rollback()
 
+    # No worker available: drain a bounded slice inline; the rest stays due.
     try:
-        db.session.commit()
+        max_chunks = max(1, int((os.getenv("MONEYBOX_MATURITY_INLINE_CHUNKS") or "4").strip() or 4))
     except Exception:
-        db.session.rollback()
+        max_chunks = 4
+    result = run_moneybox_maturity(max_chunks=max_chunks)
+    return jsonify(
+        {
+            "ok": bool(result.get("ok")),
+            "queued": False,
+            "processed": int(result.get("processed") or 0),
+            "auto_opened": int(result.get("auto_opened") or 0),
+            "bonuses": int(result.get("bonuses") or 0),
+            "errors": int(result.get("errors") or 0),
+            "remaining_due": int(result.get("remaining_due") or 0),
+            "progress": maturity_progress(),
+        }
+    ), 200
+
+
+@moneybox_system_bp.get("/process-maturity/status")
+def process_maturity_status():
+    u = _current_user()
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+
+    from app.jobs.moneybox_maturity import maturity_progress
 
-    return jsonify({"ok": True, "processed": processed, "auto_opened": auto_opened, "bonuses": bonuses}), 200
+    return jsonify({"ok": True, "progress": maturity_progress()}), 200
 
 
 @moneybox_system_bp.post("/liquidate-on-suspension")
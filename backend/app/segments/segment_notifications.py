@@ -5,6 +5,7 @@ from flask import Blueprint, jsonify, request
 from app.extensions import db
 from app.models import User, Notification
 from app.utils.jwt_utils import decode_token
+from app.utils.live_events import live_response, since_id_arg, user_channel
 
 notifications_bp = Blueprint("notifications_bp", __name__, url_prefix="/api")
 
@@ -47,6 +48,16 @@ def _current_user():
     return User.query.get(user_id)
 
 
+def _notifications_after(user_id: int, since_id: int, limit: int = 80) -> list[tuple[int, dict]]:
+    rows = (
+        Notification.query.filter(Notification.user_id == int(user_id), Notification.id > int(since_id))
+        .order_by(Notification.id.asc())
+        .limit(int(limit))
+        .all()
+    )
+    return [(int(x.id), x.to_dict()) for x in rows]
+
+
 @notifications_bp.get("/notifications")
 def list_notifications():
     user = _current_user()
@@ -54,13 +65,19 @@ def list_notifications():
         return jsonify({"message": "Unauthorized"}), 401
 
     try:
+        if request.args.get("since_id") not in (None, ""):
+            since_id = since_id_arg()
+            rows = _notifications_after(int(user.id), since_id)
+            cursor = rows[-1][0] if rows else since_id
+            return jsonify({"ok": True, "items": [item for _, item in rows], "cursor": cursor}), 200
         rows = (
             Notification.query.filter_by(user_id=user.id)
             .order_by(Notification.created_at.desc())
             .limit(80)
             .all()
         )
-        return jsonify({"ok": True, "items": [x.to_dict() for x in rows]}), 200
+        cursor = max((int(x.id) for x in rows), default=0)
+        return jsonify({"ok": True, "items": [x.to_dict() for x in rows], "cursor": cursor}), 200
     except Exception as e:
         db.session.rollback()
         return (
@@ -76,6 +93,21 @@ def list_notifications():
         )
 
 
+@notifications_bp.get("/notifications/stream")
+def stream_notifications():
+    """SSE (``Accept: text/event-stream``) or long-poll feed of notifications after the cursor."""
+    user = _current_user()
+    if not user:
+        return jsonify({"message": "Unauthorized"}), 401
+    user_id = int(user.id)
+    return live_response(
+        channels=[user_channel(user_id)],
+        fetch=lambda after: _notifications_after(user_id, after),
+        since_id=since_id_arg(),
+        event_name="notification",
+    )
+
+
 @notifications_bp.post("/notifications/<notification_id>/read")
 def mark_notification_read(notification_id: str):
     user = _current_user()
@@ -41,6 +41,7 @@ from app.utils.commission import (
     resolve_rate,
     RATES,
     compute_order_commissions_minor,
+    compute_order_commissions_minor_batch,
     money_major_to_minor,
     snapshot_to_order_columns,
 )
@@ -582,11 +583,13 @@ def _order_sale_kind(order: Order, listing: Listing | None = None) -> str:
     return "declutter"
 
 
-def _ensure_order_commission_snapshot(order: Order, listing: Listing | None = None) -> dict:
-    existing = _snapshot_from_order(order)
-    if existing is not None:
-        return existing
-
+def _commission_inputs_for_order(
+    order: Order,
+    listing: Listing | None = None,
+    *,
+    seller_type: str | None = None,
+    is_top_tier: bool | None = None,
+) -> dict:
     sale_kind = _order_sale_kind(order, listing)
     source_listing = listing
     if source_listing is None and getattr(order, "listing_id", None):
@@ -594,16 +597,22 @@ def _ensure_order_commission_snapshot(order: Order, listing: Listing | None = No
             source_listing = db.session.get(Listing, int(order.listing_id))
         except Exception:
             source_listing = None
+    if is_top_tier is None:
+        is_top_tier = _is_top_tier_merchant(getattr(order, "merchant_id", None))
+    if seller_type is None:
+        seller_type = _seller_type_for_order(order)
+    return {
+        "sale_kind": sale_kind,
+        "sale_charge_minor": money_major_to_minor(float(getattr(order, "amount", 0.0) or 0.0)),
+        "delivery_minor": money_major_to_minor(float(getattr(order, "delivery_fee", 0.0) or 0.0)),
+        "inspection_minor": money_major_to_minor(float(getattr(order, "inspection_fee", 0.0) or 0.0)),
+        "is_top_tier": bool(is_top_tier),
+        "seller_type": seller_type,
+        "city": (getattr(source_listing, "city", None) if source_listing is not None else ""),
+    }
 
-    snapshot = compute_order_commissions_minor(
-        sale_kind=sale_kind,
-        sale_charge_minor=money_major_to_minor(float(getattr(order, "amount", 0.0) or 0.0)),
-        delivery_minor=money_major_to_minor(float(getattr(order, "delivery_fee", 0.0) or 0.0)),
-        inspection_minor=money_major_to_minor(float(getattr(order, "inspection_fee", 0.0) or 0.0)),
-        is_top_tier=_is_top_tier_merchant(getattr(order, "merchant_id", None)),
-        seller_type=_seller_type_for_order(order),
-        city=(getattr(source_listing, "city", None) if source_listing is not None else ""),
-    )
+
+def _record_order_commission_snapshot(order: Order, snapshot: dict) -> None:
     _apply_snapshot_to_order(order, snapshot)
     order_id = int(getattr(order, "id", 0) or 0) if getattr(order, "id", None) is not None else None
     log_event(
@@ -618,7 +627,7 @@ def _ensure_order_commission_snapshot(order: Order, listing: Listing | None = No
             else None
         ),
         metadata={
-            "sale_kind": sale_kind,
+            "sale_kind": snapshot.get("sale_kind"),
             "sale_fee_minor": int(getattr(order, "sale_fee_minor", 0) or 0),
             "delivery_actor_minor": int(getattr(order, "delivery_actor_minor", 0) or 0),
             "inspection_actor_minor": int(getattr(order, "inspection_actor_minor", 0) or 0),
@@ -634,9 +643,62 @@ def _ensure_order_commission_snapshot(order: Order, listing: Listing | None = No
             ),
         },
     )
+
+
+def _ensure_order_commission_snapshot(order: Order, listing: Listing | None = None) -> dict:
+    existing = _snapshot_from_order(order)
+    if existing is not None:
+        return existing
+
+    snapshot = compute_order_commissions_minor(**_commission_inputs_for_order(order, listing))
+    _record_order_commission_snapshot(order, snapshot)
     return snapshot
 
 
+def _ensure_order_commission_snapshots(pairs: list[tuple[Order, Listing | None]]) -> list[dict]:
+    """Batch variant of _ensure_order_commission_snapshot for cart checkout.
+
+    Seller roles and top-tier flags are loaded once per merchant and policy is
+    resolved once per (kind, seller type, city) group.
+    """
+    merchant_ids = sorted(
+        {int(order.merchant_id) for order, _listing in pairs if getattr(order, "merchant_id", None)}
+    )
+    seller_types: dict[int, str] = {}
+    top_tier: dict[int, bool] = {}
+    if merchant_ids:
+        for row in User.query.filter(User.id.in_(merchant_ids)).all():
+            role = (getattr(row, "role", None) or "").strip().lower()
+            seller_types[int(row.id)] = "merchant" if role == "merchant" else ("user" if role else "all")
+        try:
+            for prof in MerchantProfile.query.filter(MerchantProfile.user_id.in_(merchant_ids)).all():
+                top_tier[int(prof.user_id)] = bool(getattr(prof, "is_top_tier", False))
+        except Exception:
+            top_tier = {}
+
+    out: list[dict | None] = []
+    pending: list[tuple[int, Order, dict]] = []
+    for order, listing in pairs:
+        existing = _snapshot_from_order(order)
+        out.append(existing)
+        if existing is not None:
+            continue
+        merchant_id = int(getattr(order, "merchant_id", 0) or 0)
+        inputs = _commission_inputs_for_order(
+            order,
+            listing,
+            seller_type=seller_types.get(merchant_id, "all"),
+            is_top_tier=top_tier.get(merchant_id, False),
+        )
+        pending.append((len(out) - 1, order, inputs))
+
+    snapshots = compute_order_commissions_minor_batch([inputs for _idx, _order, inputs in pending])
+    for (idx, order, _inputs), snapshot in zip(pending, snapshots):
+        _record_order_commission_snapshot(order, snapshot)
+        out[idx] = snapshot
+    return out
+
+
 def _money_to_minor(amount: float | Decimal | int | None) -> int:
     try:
         parsed = Decimal(str(amount or 0))
@@ -718,8 +780,19 @@ def _settle_wallet_batch(*, buyer_id: int, total_minor: int, reference: str, ord
     if amount > 0:
         post_ref = f"wallet_purchase:{reference}"
         try:
-            from app.utils.wallets import post_txn
-            post_txn(int(buyer_id), amount, kind="purchase", direction="debit", reference=post_ref)
+            from app.utils.wallets import post_txns
+            post_txns(
+                [
+                    dict(
+                        user_id=int(buyer_id),
+                        direction="debit",
+                        amount=amount,
+                        kind="purchase",
+                        reference=post_ref,
+                        note=f"Wallet checkout for {len(order_ids)} order(s)",
+                    )
+                ]
+            )
         except Exception:
             db.session.rollback()
 
@@ -1235,6 +1308,7 @@ def create_orders_bulk():
         return jsonify({"ok": False, "message": "listing not found", "missing_listing_ids": missing}), 404
 
     orders: list[Order] = []
+    order_listings: list[tuple[Order, Listing]] = []
     total_minor = 0
     for lid in listing_ids:
         listing = listing_map[int(lid)]
@@ -1260,10 +1334,11 @@ def create_orders_bulk():
             updated_at=datetime.utcnow(),
             handshake_id=str(uuid.uuid4()),
         )
-        _ensure_order_commission_snapshot(order, listing)
         db.session.add(order)
         orders.append(order)
+        order_listings.append((order, listing))
         total_minor += _money_to_minor(amount)
+    _ensure_order_commission_snapshots(order_listings)
 
     try:
         db.session.commit()
@@ -2155,6 +2230,7 @@ def assign_driver(order_id: int):
     o.driver_id = driver_id
     o.status = "driver_assigned"
     o.updated_at = datetime.utcnow()
+    o.assigned_at = o.updated_at
 
     try:
         _issue_pickup_unlock(o)
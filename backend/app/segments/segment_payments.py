@@ -6,7 +6,7 @@ import os
 from datetime import datetime
 from decimal import Decimal, ROUND_HALF_UP
 
-from flask import Blueprint, jsonify, request, current_app, g
+from flask import Blueprint, jsonify, request, current_app, g, has_request_context
 
 from app.extensions import db
 from app.models import AuditLog, User, PaymentIntent, PaymentIntentTransition, WebhookEvent, Order, ShortletBooking
@@ -139,6 +139,9 @@ def _request_id() -> str:
             return str(rid)
     except Exception:
         pass
+    if not has_request_context():
+        # Webhooks are also processed from workers draining the inbox.
+        return ""
     return (request.headers.get("X-Request-Id") or "").strip()
 
 
@@ -436,7 +439,14 @@ def _credit_wallet_from_reference(reference: str):
         metadata={"reference": reference},
     )
 
-    post_txn(int(pi.user_id), float(pi.amount or 0.0), kind="topup", direction="credit", reference=f"pay:{reference}")
+    post_txn(
+        user_id=int(pi.user_id),
+        direction="credit",
+        amount=float(pi.amount or 0.0),
+        kind="topup",
+        reference=f"pay:{reference}",
+        note="Wallet top-up",
+    )
     return True
 
 
@@ -499,87 +509,124 @@ def _touch_last_paystack_webhook(settings) -> None:
         db.session.rollback()
 
 
-def process_paystack_webhook(*, payload: dict, raw: bytes, signature: str | None, source: str = "payments") -> tuple[dict, int]:
+def _paystack_signature_check(settings, *, raw: bytes, signature: str | None, source: str) -> tuple[tuple[dict, int] | None, bool]:
+    """Return (error_response, verified). Live Paystack must validate the
+    signature; mock/disabled paths and admin replays never require it."""
+    mode = (getattr(settings, "integrations_mode", "disabled") or "disabled").strip().lower()
+    provider = (getattr(settings, "payments_provider", "mock") or "mock").strip().lower()
+    enabled = bool(getattr(settings, "paystack_enabled", False))
+    strict_signature = mode == "live" and provider == "paystack" and enabled and not str(source or "").startswith("admin_replay")
+    if not strict_signature:
+        return None, False
+    secret = (os.getenv("PAYSTACK_WEBHOOK_SECRET") or os.getenv("PAYSTACK_SECRET_KEY") or "").strip()
+    if not secret:
+        return (
+            {
+                "ok": False,
+                "error": "INTEGRATION_MISCONFIGURED",
+                "message": "missing PAYSTACK_WEBHOOK_SECRET (or PAYSTACK_SECRET_KEY)",
+            },
+            400,
+        ), False
+    if not signature:
+        return (
+            {
+                "ok": False,
+                "error": "INTEGRATION_MISCONFIGURED",
+                "message": "missing X-Paystack-Signature",
+            },
+            400,
+        ), False
+    if not verify_signature(raw or b"", signature):
+        return ({"ok": False, "error": "INVALID_SIGNATURE"}, 400), False
+    return None, True
+
+
+def _paystack_event_id(payload: dict, *, event: str, reference: str, data: dict, source: str) -> str:
+    event_id = ""
+    try:
+        maybe_id = payload.get("id") or payload.get("event_id") or ""
+        event_id = str(maybe_id).strip()
+    except Exception:
+        event_id = ""
+    if not event_id:
+        base = f"{event}:{reference}:{data.get('amount', '')}:{source}"
+        event_id = hashlib.sha256(base.encode("utf-8")).hexdigest()[:32]
+    return event_id
+
+
+def _parse_paystack_payload(payload) -> tuple[tuple[dict, int] | None, str, dict]:
+    """Return (error_response, event, data) for a raw webhook payload."""
+    if not isinstance(payload, dict):
+        return ({"ok": False, "error": "INVALID_PAYLOAD", "message": "payload must be an object"}, 400), "", {}
+    event_raw = payload.get("event")
+    data_raw = payload.get("data")
+    if not isinstance(event_raw, str) or not event_raw.strip():
+        return ({"ok": False, "error": "INVALID_PAYLOAD", "message": "event is required"}, 400), "", {}
+    if data_raw is None:
+        data = {}
+    elif isinstance(data_raw, dict):
+        data = data_raw
+    else:
+        return ({"ok": False, "error": "INVALID_PAYLOAD", "message": "data must be an object"}, 400), "", {}
+    return None, event_raw.strip(), data
+
+
+def process_paystack_webhook(
+    *,
+    payload: dict,
+    raw: bytes,
+    signature: str | None,
+    source: str = "payments",
+    retry_failed: bool = False,
+) -> tuple[dict, int]:
     webhook_row = None
     try:
         settings = get_settings()
-        mode = (getattr(settings, "integrations_mode", "disabled") or "disabled").strip().lower()
-        provider = (getattr(settings, "payments_provider", "mock") or "mock").strip().lower()
-        enabled = bool(getattr(settings, "paystack_enabled", False))
-
-        if not isinstance(payload, dict):
-            return {"ok": False, "error": "INVALID_PAYLOAD", "message": "payload must be an object"}, 400
-
-        event_raw = payload.get("event")
-        data_raw = payload.get("data")
-        if not isinstance(event_raw, str) or not event_raw.strip():
-            return {"ok": False, "error": "INVALID_PAYLOAD", "message": "event is required"}, 400
-        if data_raw is None:
-            data = {}
-        elif isinstance(data_raw, dict):
-            data = data_raw
-        else:
-            return {"ok": False, "error": "INVALID_PAYLOAD", "message": "data must be an object"}, 400
 
-        event = event_raw.strip()
+        parse_error, event, data = _parse_paystack_payload(payload)
+        if parse_error is not None:
+            return parse_error
+
         reference = str((data.get("reference") or "")).strip()
         _touch_last_paystack_webhook(settings)
         payload_hash = hashlib.sha256(raw or b"").hexdigest()
         request_id = _request_id() or None
 
-        # Live Paystack must validate signature. Mock/disabled paths never require it.
-        verified = False
-        strict_signature = mode == "live" and provider == "paystack" and enabled and not str(source or "").startswith("admin_replay")
-        if strict_signature:
-            secret = (os.getenv("PAYSTACK_WEBHOOK_SECRET") or os.getenv("PAYSTACK_SECRET_KEY") or "").strip()
-            if not secret:
-                return {
-                    "ok": False,
-                    "error": "INTEGRATION_MISCONFIGURED",
-                    "message": "missing PAYSTACK_WEBHOOK_SECRET (or PAYSTACK_SECRET_KEY)",
-                }, 400
-            if not signature:
-                return {
-                    "ok": False,
-                    "error": "INTEGRATION_MISCONFIGURED",
-                    "message": "missing X-Paystack-Signature",
-                }, 400
-            verified = bool(verify_signature(raw or b"", signature))
-            if not verified:
-                return {"ok": False, "error": "INVALID_SIGNATURE"}, 400
+        sig_error, verified = _paystack_signature_check(settings, raw=raw, signature=signature, source=source)
+        if sig_error is not None:
+            return sig_error
 
-        event_id = ""
-        try:
-            maybe_id = payload.get("id") or payload.get("event_id") or ""
-            event_id = str(maybe_id).strip()
-        except Exception:
-            event_id = ""
-        if not event_id:
-            base = f"{event}:{reference}:{data.get('amount', '')}:{source}"
-            event_id = hashlib.sha256(base.encode("utf-8")).hexdigest()[:32]
+        event_id = _paystack_event_id(payload, event=event, reference=reference, data=data, source=source)
 
         existing = WebhookEvent.query.filter_by(provider="paystack", event_id=event_id).first()
         if existing:
-            if (existing.status or "").strip().lower() in ("processed", "ignored", "replayed"):
+            status_key = (existing.status or "").strip().lower()
+            if not (retry_failed and status_key in ("received", "failed")):
                 return {"ok": True, "replayed": True, "verified": verified}, 200
-            return {"ok": True, "replayed": True, "verified": verified}, 200
-
-        try:
-            webhook_row = WebhookEvent(
-                provider="paystack",
-                event_id=event_id,
-                reference=reference,
-                status="received",
-                request_id=request_id,
-                payload_hash=payload_hash,
-                payload_json=((raw or b"{}").decode("utf-8", errors="ignore"))[:200000],
-                processed_at=None,
-                error=None,
-            )
+            # An earlier attempt crashed part-way; run it again on the same row.
+            webhook_row = existing
+            webhook_row.status = "received"
+            webhook_row.error = None
             db.session.add(webhook_row)
             db.session.commit()
-        except Exception:
-            db.session.rollback()
+        else:
+            try:
+                webhook_row = WebhookEvent(
+                    provider="paystack",
+                    event_id=event_id,
+                    reference=reference,
+                    status="received",
+                    request_id=request_id,
+                    payload_hash=payload_hash,
+                    payload_json=((raw or b"{}").decode("utf-8", errors="ignore"))[:200000],
+                    processed_at=None,
+                    error=None,
+                )
+                db.session.add(webhook_row)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
 
         _save_audit("paystack_webhook", {"verified": verified, "event": event, "reference": reference, "source": source})
 
@@ -931,6 +978,61 @@ def admin_set_payments_mode():
     return jsonify({"ok": True, "settings": _payments_mode_payload(settings)}), 200
 
 
+@admin_payments_bp.get("/webhook-inbox")
+def admin_webhook_inbox():
+    u = _current_user()
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+    from app.jobs.webhook_inbox import inbox_stats
+    from app.models import WebhookInbox
+
+    status = (request.args.get("status") or "").strip().lower()
+    try:
+        limit = max(1, min(int(request.args.get("limit") or 100), 500))
+    except Exception:
+        limit = 100
+    qry = WebhookInbox.query
+    if status:
+        qry = qry.filter_by(status=status)
+    rows = qry.order_by(WebhookInbox.id.desc()).limit(limit).all()
+    return jsonify({"ok": True, "stats": inbox_stats(), "items": [r.to_dict() for r in rows]}), 200
+
+
+@admin_payments_bp.post("/webhook-inbox/replay")
+def admin_replay_webhook_inbox():
+    u = _current_user()
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+    from app.jobs.webhook_inbox import inbox_stats, replay_webhook_inbox
+
+    data = request.get_json(silent=True) or {}
+    raw_ids = data.get("ids")
+    ids = None
+    if raw_ids is not None:
+        if not isinstance(raw_ids, list) or not raw_ids:
+            return jsonify({"ok": False, "message": "ids must be a non-empty list"}), 400
+        try:
+            ids = [int(x) for x in raw_ids]
+        except Exception:
+            return jsonify({"ok": False, "message": "ids must be integers"}), 400
+    status = (str(data.get("status") or "")).strip().lower() or None
+    if status is not None and status not in ("failed", "processed"):
+        return jsonify({"ok": False, "message": "status must be failed|processed"}), 400
+    if ids is None and status is None:
+        return jsonify({"ok": False, "message": "ids or status is required"}), 400
+
+    replayed = replay_webhook_inbox(ids=ids, status=status)
+    _save_admin_audit(
+        actor_id=int(u.id),
+        action="webhook_inbox_replay",
+        target_type="webhook_inbox",
+        target_id=None,
+        meta={"ids": ids or [], "status": status or "", "count": replayed},
+    )
+    queued = _kick_webhook_inbox(_request_id(), ids) if replayed else False
+    return jsonify({"ok": True, "replayed": replayed, "queued": queued, "stats": inbox_stats()}), 200
+
+
 @payments_bp.post("/initialize")
 def initialize_payment():
     u = _current_user()
@@ -1290,12 +1392,77 @@ def submit_manual_payment_proof_root_alias(intent_id: int):
     return submit_manual_payment_proof(intent_id)
 
 
+def _celery_broker_url() -> str:
+    return (os.getenv("CELERY_BROKER_URL") or "").strip() or (os.getenv("REDIS_URL") or "").strip()
+
+
+def _kick_webhook_inbox(trace_id: str = "", inbox_ids: list[int] | None = None) -> bool:
+    """Hand the inbox to a worker; without one, drain a single batch inline.
+
+    With ``inbox_ids`` the inline batch is limited to those rows, so a webhook
+    request applies only its own event and leaves the backlog to the beat
+    task or the autopilot tick.
+    """
+    if _celery_broker_url():
+        try:
+            from app.tasks.scale_tasks import drain_webhook_inbox_task
+
+            drain_webhook_inbox_task.delay(trace_id=trace_id)
+            return True
+        except Exception:
+            db.session.rollback()
+    from app.jobs.webhook_inbox import drain_webhook_inbox
+
+    drain_webhook_inbox(max_batches=1, only_ids=list(inbox_ids) if inbox_ids else None)
+    return False
+
+
+def _append_paystack_webhook_to_inbox(*, payload, raw: bytes, signature: str | None, source: str) -> tuple[dict, int]:
+    parse_error, event, data = _parse_paystack_payload(payload)
+    if parse_error is not None:
+        return parse_error
+    sig_error, verified = _paystack_signature_check(get_settings(), raw=raw, signature=signature, source=source)
+    if sig_error is not None:
+        return sig_error
+    reference = str((data.get("reference") or "")).strip()
+    event_id = _paystack_event_id(payload, event=event, reference=reference, data=data, source=source)
+
+    from app.jobs.webhook_inbox import append_webhook
+
+    inbox_id = append_webhook(
+        provider="paystack",
+        event_id=event_id,
+        event_type=event,
+        reference=reference,
+        source=source,
+        signature=signature,
+        raw_text=(raw or b"").decode("utf-8", errors="ignore") or json.dumps(payload),
+    )
+    trace_id = _request_id()
+    if inbox_id is None:
+        return {"ok": True, "replayed": True, "verified": verified, "event_id": event_id}, 200
+    try:
+        _kick_webhook_inbox(trace_id, [int(inbox_id)])
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("webhook_inbox_kick_failed inbox_id=%s", inbox_id)
+    return {"ok": True, "queued": True, "verified": verified, "inbox_id": int(inbox_id), "trace_id": trace_id}, 200
+
+
 @payments_bp.post("/webhook/paystack")
 def paystack_webhook():
     try:
         raw = request.get_data() or b""
         sig = request.headers.get("X-Paystack-Signature")
         payload = request.get_json(silent=True) or {}
+        if _env_bool("PAYSTACK_WEBHOOK_INBOX", True):
+            body, status = _append_paystack_webhook_to_inbox(
+                payload=payload,
+                raw=raw,
+                signature=sig,
+                source="api/payments/webhook/paystack:inbox",
+            )
+            return jsonify(body), int(status)
         if _env_bool("PAYSTACK_WEBHOOK_QUEUE", True):
             trace_id = _request_id()
             try:
@@ -1,11 +1,21 @@
 from __future__ import annotations
 
-from flask import Blueprint, jsonify, request
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 
 from app.utils.reconciliation import reconcile_latest
 from app.utils.jwt_utils import decode_token
 from app.models import User, ReconciliationReport
-from app.services.reconciliation_service import recompute_wallet_balances, persist_report
+from app.services.reconciliation_service import (
+    DRIFT_CSV_COLUMNS,
+    iter_wallet_drift,
+    recompute_wallet_balances,
+    persist_report,
+)
 
 recon_bp = Blueprint("recon_bp", __name__, url_prefix="/api/admin/reconcile")
 
@@ -44,7 +54,11 @@ def run_recon():
     mode = (data.get("mode") or "legacy").strip().lower()
     if mode == "wallet_ledger":
         since = (data.get("since") or "").strip() or None
-        summary = recompute_wallet_balances(since=since)
+        try:
+            workers = max(1, min(int(data.get("workers") or 1), 16))
+        except Exception:
+            workers = 1
+        summary = recompute_wallet_balances(since=since, workers=workers)
         persist = bool(data.get("persist", True))
         report_id = None
         if persist:
@@ -64,3 +78,78 @@ def latest_report():
     if not row:
         return jsonify({"ok": True, "report": None}), 200
     return jsonify({"ok": True, "report": row.to_dict()}), 200
+
+
+def _float_arg(name: str, default: float) -> float:
+    try:
+        return float(request.args.get(name) or default)
+    except Exception:
+        return float(default)
+
+
+def _int_arg(name: str, default: int | None) -> int | None:
+    raw = (request.args.get(name) or "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except Exception:
+        return default
+
+
+@recon_bp.get("/wallet-ledger/stream")
+def stream_wallet_ledger_report():
+    u = _current_user()
+    if not u or (u.role or "") != "admin":
+        return jsonify({"message": "Admin required"}), 403
+    fmt = (request.args.get("format") or "ndjson").strip().lower()
+    if fmt not in ("ndjson", "csv"):
+        return jsonify({"message": "format must be ndjson or csv"}), 400
+    tolerance = _float_arg("tolerance", 0.01)
+    chunk_size = _int_arg("chunk_size", None)
+    since = (request.args.get("since") or "").strip()
+    persist = (request.args.get("persist") or "").strip().lower() in ("1", "true", "yes")
+    actor_id = int(u.id)
+
+    def _generate():
+        drift_count = 0
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(DRIFT_CSV_COLUMNS)
+            yield buf.getvalue()
+        for item in iter_wallet_drift(tolerance=tolerance, chunk_size=chunk_size):
+            drift_count += 1
+            if fmt == "csv":
+                buf = io.StringIO()
+                csv.writer(buf).writerow([item.get(col) for col in DRIFT_CSV_COLUMNS])
+                yield buf.getvalue()
+            else:
+                yield json.dumps({"type": "drift", **item}, separators=(",", ":")) + "\n"
+        summary = {
+            "ok": True,
+            "scope": "wallet_ledger",
+            "since": since,
+            "drift_count": drift_count,
+            "streamed": True,
+            "generated_at": datetime.utcnow().isoformat(),
+        }
+        if persist:
+            try:
+                summary["report_id"] = int(persist_report(summary, created_by=actor_id).id)
+            except Exception:
+                summary["report_id"] = None
+        if fmt == "ndjson":
+            yield json.dumps({"type": "summary", **summary}, separators=(",", ":")) + "\n"
+
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    filename = f"wallet-ledger-reconciliation.{fmt}"
+    return Response(
+        stream_with_context(_generate()),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -15,7 +15,7 @@ from app.models.shortlet import Shortlet, ShortletBooking
 from app.services.commission_policy_service import compute_fee_minor
 from app.utils.receipts import create_receipt
 from app.utils.notify import queue_in_app, queue_sms, queue_whatsapp, mark_sent
-from app.utils.wallets import post_txn
+from app.utils.wallets import post_txns
 from app.models import User, PaymentIntent, ShortletMedia
 from app.utils.jwt_utils import decode_token
 from app.utils.listing_caps import enforce_listing_cap
@@ -947,25 +947,30 @@ def book_shortlet(shortlet_id: int):
             db.session.add(b)
             db.session.commit()
             try:
-                post_txn(
-                    user_id=int(u.id),
-                    direction="debit",
-                    amount=float(total),
-                    kind="shortlet_booking",
-                    reference=f"shortlet:booking:{int(b.id)}",
-                    note="Shortlet booking payment",
-                )
+                legs = [
+                    dict(
+                        user_id=int(u.id),
+                        direction="debit",
+                        amount=float(total),
+                        kind="shortlet_booking",
+                        reference=f"shortlet:booking:{int(b.id)}",
+                        note="Shortlet booking payment",
+                    )
+                ]
                 if platform_fee > 0:
-                    post_txn(
-                        user_id=_platform_user_id(),
-                        direction="credit",
-                        amount=float(platform_fee),
-                        kind="platform_fee",
-                        reference=f"shortlet:{int(shortlet_id)}:{int(b.id)}",
-                        note="Shortlet platform fee",
+                    legs.append(
+                        dict(
+                            user_id=_platform_user_id(),
+                            direction="credit",
+                            amount=float(platform_fee),
+                            kind="platform_fee",
+                            reference=f"shortlet:{int(shortlet_id)}:{int(b.id)}",
+                            note="Shortlet platform fee",
+                        )
                     )
+                post_txns(legs)
             except Exception:
-                pass
+                db.session.rollback()
             return jsonify({"ok": True, "mode": "wallet", "payment_method": "wallet", "booking": b.to_dict(), "quote": {"nights": nights, "subtotal": subtotal, "platform_fee": platform_fee, "total": total}}), 201
 
         settings = get_settings()
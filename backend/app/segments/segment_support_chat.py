@@ -12,6 +12,7 @@ from app.utils.autopilot import get_settings
 from app.utils.rate_limit import check_limit
 from app.services.risk_engine_service import record_event
 from app.utils.content_moderation import CONTACT_BLOCK_MESSAGE, contains_contact_details
+from app.utils.live_events import live_response, since_id_arg, support_thread_channel, user_channel
 
 support_bp = Blueprint("support_chat_bp", __name__, url_prefix="/api/support")
 support_admin_bp = Blueprint("support_admin_bp", __name__, url_prefix="/api/admin/support")
@@ -107,7 +108,44 @@ def _resolve_thread_user(thread_id: int) -> User | None:
     return target
 
 
+def _thread_messages_after(thread_id: int, since_id: int, limit: int = 1000) -> list[tuple[int, dict]]:
+    rows = (
+        SupportMessage.query
+        .filter(SupportMessage.user_id == int(thread_id), SupportMessage.id > int(since_id))
+        .order_by(SupportMessage.id.asc())
+        .limit(int(limit))
+        .all()
+    )
+    return [(int(r.id), r.to_dict()) for r in rows]
+
+
+def _my_messages_after(user_id: int, since_id: int, limit: int = 500) -> list[tuple[int, dict]]:
+    rows = (
+        SupportMessage.query
+        .filter(
+            or_(
+                SupportMessage.user_id == int(user_id),
+                SupportMessage.sender_id == int(user_id),
+                SupportMessage.recipient_id == int(user_id),
+            ),
+            SupportMessage.id > int(since_id),
+        )
+        .order_by(SupportMessage.id.asc())
+        .limit(int(limit))
+        .all()
+    )
+    return [(int(r.id), r.to_dict()) for r in rows]
+
+
+def _since_payload(rows: list[tuple[int, dict]], since_id: int):
+    cursor = rows[-1][0] if rows else int(since_id)
+    return jsonify({"ok": True, "items": [item for _, item in rows], "cursor": cursor}), 200
+
+
 def _admin_thread_messages(thread_id: int):
+    if request.args.get("since_id") not in (None, ""):
+        since_id = since_id_arg()
+        return _since_payload(_thread_messages_after(int(thread_id), since_id), since_id)
     rows = (
         SupportMessage.query
         .filter_by(user_id=int(thread_id))
@@ -115,7 +153,8 @@ def _admin_thread_messages(thread_id: int):
         .limit(1000)
         .all()
     )
-    return jsonify({"ok": True, "items": [r.to_dict() for r in rows]}), 200
+    cursor = max((int(r.id) for r in rows), default=0)
+    return jsonify({"ok": True, "items": [r.to_dict() for r in rows], "cursor": cursor}), 200
 
 
 def _admin_send_to_thread(*, admin_user: User, thread_id: int, body: str):
@@ -196,6 +235,9 @@ def my_messages():
     if not u:
         return jsonify({"message": "Unauthorized"}), 401
 
+    if request.args.get("since_id") not in (None, ""):
+        since_id = since_id_arg()
+        return _since_payload(_my_messages_after(int(u.id), since_id), since_id)
     rows = (
         SupportMessage.query
         .filter(
@@ -209,7 +251,22 @@ def my_messages():
         .limit(500)
         .all()
     )
-    return jsonify({"ok": True, "items": [r.to_dict() for r in rows]}), 200
+    cursor = max((int(r.id) for r in rows), default=0)
+    return jsonify({"ok": True, "items": [r.to_dict() for r in rows], "cursor": cursor}), 200
+
+
+@support_bp.get("/messages/stream")
+def my_messages_stream():
+    u = _current_user()
+    if not u:
+        return jsonify({"message": "Unauthorized"}), 401
+    user_id = int(u.id)
+    return live_response(
+        channels=[user_channel(user_id)],
+        fetch=lambda after: _my_messages_after(user_id, after),
+        since_id=since_id_arg(),
+        event_name="support_message",
+    )
 
 
 @support_bp.post("/messages")
@@ -435,6 +492,24 @@ def admin_get_thread_messages(thread_id: int):
         return jsonify({"ok": True, "items": []}), 200
 
 
+@support_admin_bp.get("/threads/<int:thread_id>/messages/stream")
+def admin_thread_messages_stream(thread_id: int):
+    u = _current_user()
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+
+    target = _resolve_thread_user(int(thread_id))
+    if not target:
+        return jsonify({"message": "Not found"}), 404
+
+    return live_response(
+        channels=[support_thread_channel(int(thread_id))],
+        fetch=lambda after: _thread_messages_after(int(thread_id), after),
+        since_id=since_id_arg(),
+        event_name="support_message",
+    )
+
+
 @support_admin_bp.post("/threads/<int:thread_id>/messages")
 def admin_reply_thread(thread_id: int):
     u = _current_user()
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from flask import Blueprint, jsonify, request
 
 from app.extensions import db
+from app.services import rollups
 from app.models import (
     ListingFavorite,
     Order,
@@ -26,24 +27,6 @@ _ORDER_SUCCESS_STATUSES = (
 )
 
 
-def _paid_orders(from_dt: datetime | None = None, to_dt: datetime | None = None):
-    q = Order.query.filter(Order.status.in_(_ORDER_SUCCESS_STATUSES))
-    if from_dt is not None:
-        q = q.filter(Order.created_at >= from_dt)
-    if to_dt is not None:
-        q = q.filter(Order.created_at < to_dt)
-    return q
-
-
-def _paid_shortlet_bookings(from_dt: datetime | None = None, to_dt: datetime | None = None):
-    q = ShortletBooking.query.filter(ShortletBooking.payment_status == "paid")
-    if from_dt is not None:
-        q = q.filter(ShortletBooking.created_at >= from_dt)
-    if to_dt is not None:
-        q = q.filter(ShortletBooking.created_at < to_dt)
-    return q
-
-
 def _money_to_minor(value) -> int:
     try:
         return int(round(float(value or 0.0) * 100.0))
@@ -135,55 +118,35 @@ def investor_analytics():
 
     now = datetime.utcnow()
     start_month = _month_add(_month_floor(now), -5)
+    rollups.ensure_platform_rollup_fresh()
+    by_month = {
+        row["period"]: row
+        for row in rollups.platform_series(
+            start_month.date(), _month_add(_month_floor(now), 1).date(), by="month"
+        )
+    }
 
     gmv_trend: list[dict] = []
     total_gmv_minor = 0
     total_commission_minor = 0
     total_orders = 0
-    active_users_last_30_days: set[int] = set()
 
     cursor = start_month
     while cursor <= _month_floor(now):
-        next_month = _month_add(cursor, 1)
-        orders = _paid_orders(cursor, next_month).all()
-        bookings = _paid_shortlet_bookings(cursor, next_month).all()
-
-        month_orders_gmv = sum(
-            _money_to_minor(getattr(o, "total_price", None) or getattr(o, "amount", 0.0))
-            for o in orders
-        )
-        month_bookings_gmv = sum(_money_to_minor(getattr(b, "total_amount", 0.0)) for b in bookings)
-        month_gmv_minor = int(month_orders_gmv + month_bookings_gmv)
+        row = by_month.get(cursor.strftime("%Y-%m")) or {}
+        month_gmv_minor = int(row.get("gmv_minor") or 0)
         gmv_trend.append(
             {
                 "month": cursor.strftime("%Y-%m"),
                 "gmv_minor": int(month_gmv_minor),
             }
         )
-
-        month_commission_minor = sum(
-            int(getattr(o, "sale_platform_minor", 0) or 0)
-            + int(getattr(o, "delivery_platform_minor", 0) or 0)
-            + int(getattr(o, "inspection_platform_minor", 0) or 0)
-            for o in orders
-        ) + sum(_money_to_minor(float(getattr(b, "total_amount", 0.0) or 0.0) * 0.05) for b in bookings)
-
         total_gmv_minor += int(month_gmv_minor)
-        total_commission_minor += int(month_commission_minor)
-        total_orders += int(len(orders) + len(bookings))
-        cursor = next_month
-
-    window_start = now - timedelta(days=30)
-    recent_orders = _paid_orders(window_start, now).all()
-    recent_bookings = _paid_shortlet_bookings(window_start, now).all()
-    for row in recent_orders:
-        if getattr(row, "buyer_id", None):
-            active_users_last_30_days.add(int(row.buyer_id))
-        if getattr(row, "merchant_id", None):
-            active_users_last_30_days.add(int(row.merchant_id))
-    for row in recent_bookings:
-        if getattr(row, "user_id", None):
-            active_users_last_30_days.add(int(row.user_id))
+        total_commission_minor += int(row.get("commission_minor") or 0)
+        total_orders += int(row.get("transactions") or 0)
+        cursor = _month_add(cursor, 1)
+
+    active_users_last_30_days = rollups.active_user_count(now - timedelta(days=30), paid_only=True)
 
     try:
         cac_minor = max(0, int(request.args.get("cac_minor") or 0))
@@ -197,7 +160,7 @@ def investor_analytics():
         {
             "ok": True,
             "mode": "investor_analytics",
-            "active_users_last_30_days": int(len(active_users_last_30_days)),
+            "active_users_last_30_days": int(active_users_last_30_days),
             "gmv_trend": gmv_trend,
             "commission_revenue_minor": int(total_commission_minor),
             "unit_economics": {
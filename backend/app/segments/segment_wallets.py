@@ -17,6 +17,15 @@ from app.services.fraud import should_block_withdrawal
 from app.utils.events import log_event
 from app.utils.observability import get_request_id
 from app.utils.idempotency import lookup_response, store_response
+from app.utils.exports import (
+    ExportFilterError,
+    export_date_range,
+    export_format,
+    export_int_arg,
+    export_list_arg,
+    export_response,
+)
+from sqlalchemy import select
 import os
 
 wallets_bp = Blueprint("wallets_bp", __name__, url_prefix="/api/wallet")
@@ -126,6 +135,72 @@ def my_ledger():
     return jsonify([t.to_dict() for t in rows]), 200
 
 
+_LEDGER_EXPORT_COLUMNS = (
+    WalletTxn.id,
+    WalletTxn.created_at,
+    WalletTxn.wallet_id,
+    WalletTxn.user_id,
+    WalletTxn.direction,
+    WalletTxn.amount,
+    WalletTxn.kind,
+    WalletTxn.reference,
+    WalletTxn.note,
+)
+
+
+def _ledger_export_select(args, *, wallet_id: int | None = None, user_id: int | None = None):
+    start, end = export_date_range(args)
+    stmt = select(*_LEDGER_EXPORT_COLUMNS)
+    if wallet_id is not None:
+        stmt = stmt.where(WalletTxn.wallet_id == int(wallet_id))
+    if user_id is not None:
+        stmt = stmt.where(WalletTxn.user_id == int(user_id))
+    if start is not None:
+        stmt = stmt.where(WalletTxn.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(WalletTxn.created_at < end)
+    kinds = export_list_arg(args, "kind")
+    if kinds:
+        stmt = stmt.where(WalletTxn.kind.in_(kinds))
+    direction = (args.get("direction") or "").strip().lower()
+    if direction:
+        if direction not in ("credit", "debit"):
+            raise ExportFilterError("direction must be credit or debit")
+        stmt = stmt.where(WalletTxn.direction == direction)
+    return stmt.order_by(WalletTxn.id.asc())
+
+
+@wallets_bp.get("/ledger/export")
+def export_my_ledger():
+    u = _current_user()
+    if not u:
+        return jsonify({"message": "Unauthorized"}), 401
+    w = get_or_create_wallet(int(u.id))
+    try:
+        fmt = export_format(request.args)
+        stmt = _ledger_export_select(request.args, wallet_id=int(w.id))
+    except ExportFilterError as exc:
+        return jsonify({"message": str(exc)}), 400
+    return export_response(stmt, fmt=fmt, filename=f"wallet-ledger-{int(w.id)}")
+
+
+@wallets_bp.get("/admin/ledger/export")
+def admin_export_ledger():
+    u = _current_user()
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+    try:
+        fmt = export_format(request.args)
+        stmt = _ledger_export_select(
+            request.args,
+            wallet_id=export_int_arg(request.args, "wallet_id"),
+            user_id=export_int_arg(request.args, "user_id"),
+        )
+    except ExportFilterError as exc:
+        return jsonify({"message": str(exc)}), 400
+    return export_response(stmt, fmt=fmt, filename="wallet-ledger")
+
+
 @wallets_bp.post("/payouts")
 def request_payout():
     u = _current_user()
@@ -233,18 +308,37 @@ def list_payouts():
     return jsonify([p.to_dict() for p in rows]), 200
 
 
+def _locked_payout(payout_id: int) -> PayoutRequest | None:
+    # Row lock (Postgres) so an admin action and a batch builder cannot both
+    # act on the same payout.
+    return db.session.execute(
+        select(PayoutRequest).where(PayoutRequest.id == int(payout_id)).with_for_update()
+    ).scalar_one_or_none()
+
+
+def _batch_conflict(p: PayoutRequest):
+    # Debited and in flight with the provider: only the batch reconciler may settle it.
+    if p.status == "processing":
+        return jsonify({"message": "Payout is being processed in a batch", "payout": p.to_dict()}), 409
+    return None
+
+
 @wallets_bp.post("/payouts/<int:payout_id>/admin/mark-paid")
 def admin_mark_paid(payout_id: int):
     u = _current_user()
     if not _is_admin(u):
         return jsonify({"message": "Forbidden"}), 403
 
-    p = PayoutRequest.query.get(payout_id)
+    p = _locked_payout(payout_id)
     if not p:
         return jsonify({"message": "Not found"}), 404
 
     if p.status == "paid":
         return jsonify({"ok": True, "payout": p.to_dict()}), 200
+    conflict = _batch_conflict(p)
+    if conflict is not None:
+        db.session.rollback()
+        return conflict
 
     # compute fees if missing (legacy payout requests)
     fee_amount = float(getattr(p, "fee_amount", 0.0) or 0.0)
@@ -324,17 +418,141 @@ def admin_list_payouts():
     return jsonify([p.to_dict() for p in rows]), 200
 
 
+def _celery_broker_url() -> str:
+    return (os.getenv("CELERY_BROKER_URL") or "").strip() or (os.getenv("REDIS_URL") or "").strip()
+
+
+@wallets_bp.post("/admin/payout-batches")
+def admin_create_payout_batch():
+    u = _current_user()
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+
+    payload = request.get_json(silent=True) or {}
+    raw_ids = payload.get("payout_ids")
+    payout_ids = None
+    if raw_ids is not None:
+        if not isinstance(raw_ids, list):
+            return jsonify({"message": "payout_ids must be a list"}), 400
+        try:
+            payout_ids = [int(x) for x in raw_ids]
+        except Exception:
+            return jsonify({"message": "payout_ids must be integers"}), 400
+        if not payout_ids:
+            return jsonify({"message": "payout_ids is empty"}), 400
+    try:
+        limit = int(payload.get("limit") or 0) or None
+    except Exception:
+        return jsonify({"message": "limit must be an integer"}), 400
+
+    from app.integrations.common import IntegrationDisabledError, IntegrationMisconfiguredError
+    from app.integrations.payments.factory import build_payments_provider
+    from app.services.payout_batch_service import create_payout_batch, payout_batch_status
+    from app.utils.autopilot import get_settings
+
+    try:
+        provider = build_payments_provider(get_settings())
+    except IntegrationDisabledError as exc:
+        return jsonify({"ok": False, "error": "INTEGRATION_DISABLED", "message": str(exc)}), 503
+    except IntegrationMisconfiguredError as exc:
+        return jsonify({"ok": False, "error": "INTEGRATION_MISCONFIGURED", "message": str(exc)}), 500
+
+    platform_user_id = _platform_user_id()
+    try:
+        batch = create_payout_batch(
+            provider=provider,
+            platform_user_id=platform_user_id,
+            created_by=int(u.id),
+            payout_ids=payout_ids,
+            limit=limit,
+            fee_rate_for=_withdrawal_fee_rate,
+        )
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed", "error": str(e)}), 500
+    if batch is None:
+        return jsonify({"ok": True, "batch": None, "message": "No approved payouts to batch"}), 200
+
+    queued = False
+    if batch.status == "submitted" and _celery_broker_url():
+        try:
+            from app.tasks.scale_tasks import reconcile_payout_batch_task
+
+            reconcile_payout_batch_task.delay(
+                batch_id=int(batch.id),
+                platform_user_id=int(platform_user_id),
+                trace_id=get_request_id(),
+            )
+            queued = True
+        except Exception:
+            db.session.rollback()
+
+    out = payout_batch_status(int(batch.id)) or {}
+    out.update({"ok": True, "reconcile_queued": queued})
+    return jsonify(out), 201
+
+
+@wallets_bp.get("/admin/payout-batches/<int:batch_id>")
+def admin_payout_batch_status(batch_id: int):
+    u = _current_user()
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+
+    from app.services.payout_batch_service import payout_batch_status
+
+    out = payout_batch_status(int(batch_id))
+    if out is None:
+        return jsonify({"message": "Not found"}), 404
+    out["ok"] = True
+    return jsonify(out), 200
+
+
+@wallets_bp.post("/admin/payout-batches/<int:batch_id>/reconcile")
+def admin_reconcile_payout_batch(batch_id: int):
+    u = _current_user()
+    if not _is_admin(u):
+        return jsonify({"message": "Forbidden"}), 403
+
+    from app.integrations.common import IntegrationDisabledError, IntegrationMisconfiguredError
+    from app.integrations.payments.factory import build_payments_provider
+    from app.services.payout_batch_service import reconcile_payout_batch
+    from app.utils.autopilot import get_settings
+
+    try:
+        provider = build_payments_provider(get_settings())
+    except IntegrationDisabledError as exc:
+        return jsonify({"ok": False, "error": "INTEGRATION_DISABLED", "message": str(exc)}), 503
+    except IntegrationMisconfiguredError as exc:
+        return jsonify({"ok": False, "error": "INTEGRATION_MISCONFIGURED", "message": str(exc)}), 500
+
+    try:
+        result = reconcile_payout_batch(int(batch_id), provider=provider, platform_user_id=_platform_user_id())
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed", "error": str(e)}), 500
+    if not result.get("ok"):
+        return jsonify({"message": "Not found"}), 404
+    return jsonify(result), 200
+
+
 @wallets_bp.post("/payouts/<int:payout_id>/admin/approve")
 def admin_approve(payout_id: int):
     u = _current_user()
     if not _is_admin(u):
         return jsonify({"message": "Forbidden"}), 403
-    p = PayoutRequest.query.get(payout_id)
+    p = _locked_payout(payout_id)
     if not p:
         return jsonify({"message": "Not found"}), 404
     if p.status in ("paid", "rejected"):
         return jsonify({"ok": True, "payout": p.to_dict()}), 200
+    conflict = _batch_conflict(p)
+    if conflict is not None:
+        db.session.rollback()
+        return conflict
     p.status = "approved"
+    # A payout failed by an earlier batch had its debit reversed; detach it
+    # so the next batch can pick it up again.
+    p.batch_id = None
     p.updated_at = datetime.utcnow()
     try:
         db.session.add(p)
@@ -359,11 +577,15 @@ def admin_reject(payout_id: int):
     u = _current_user()
     if not _is_admin(u):
         return jsonify({"message": "Forbidden"}), 403
-    p = PayoutRequest.query.get(payout_id)
+    p = _locked_payout(payout_id)
     if not p:
         return jsonify({"message": "Not found"}), 404
     if p.status == "paid":
         return jsonify({"message": "Already paid"}), 400
+    conflict = _batch_conflict(p)
+    if conflict is not None:
+        db.session.rollback()
+        return conflict
     # Release reserved funds back to available
     try:
         release_reserved(int(p.user_id), float(p.amount or 0.0))
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import os
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal, ROUND_HALF_UP
 
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, event, or_
 
 from app.extensions import db
-from app.models import CommissionPolicy, CommissionPolicyRule
+from app.models import CommissionPolicy, CommissionPolicyRule, CommissionRule
 
 
 DEFAULT_DECLUTTER_BPS = 500
@@ -95,6 +98,187 @@ def _rule_specificity(rule: CommissionPolicyRule, *, applies_to: str, seller_typ
     return score
 
 
+@dataclass(frozen=True)
+class _CompiledRule:
+    id: int
+    applies_to: str
+    seller_type: str
+    city: str
+    base_rate_bps: int | None
+    min_fee_minor: int | None
+    max_fee_minor: int | None
+    promo_discount_bps: int | None
+    starts_at: datetime | None
+    ends_at: datetime | None
+
+    def active_at(self, now: datetime) -> bool:
+        if self.starts_at is not None and self.starts_at > now:
+            return False
+        if self.ends_at is not None and self.ends_at < now:
+            return False
+        return True
+
+
+@dataclass
+class _CompiledPolicyTable:
+    version: int
+    compiled_at: float
+    policy_id: int | None
+    policy_name: str
+    # (applies_to, seller_type, city) -> rules, best tie-break first.
+    rules: dict = field(default_factory=dict)
+    # (kind, state, category) -> legacy CommissionRule rate.
+    legacy_rates: dict = field(default_factory=dict)
+
+
+_POLICY_LOCK = threading.Lock()
+_POLICY_VERSION = 0
+_POLICY_TABLE: _CompiledPolicyTable | None = None
+_POLICY_STATS = {"compiles": 0, "hits": 0}
+
+
+def _policy_cache_ttl_seconds() -> float:
+    raw = (os.getenv("COMMISSION_POLICY_CACHE_TTL_SECONDS") or "").strip()
+    try:
+        return max(0.0, float(raw)) if raw else 30.0
+    except Exception:
+        return 30.0
+
+
+def bump_policy_version() -> int:
+    """Invalidate the compiled policy table of this process."""
+    global _POLICY_VERSION, _POLICY_TABLE
+    with _POLICY_LOCK:
+        _POLICY_VERSION += 1
+        _POLICY_TABLE = None
+        return _POLICY_VERSION
+
+
+def policy_cache_stats() -> dict:
+    with _POLICY_LOCK:
+        table = _POLICY_TABLE
+        return {
+            "version": int(_POLICY_VERSION),
+            "compiles": int(_POLICY_STATS["compiles"]),
+            "hits": int(_POLICY_STATS["hits"]),
+            "policy_id": table.policy_id if table else None,
+            "rule_buckets": len(table.rules) if table else 0,
+        }
+
+
+def _on_policy_rows_changed(*_args, **_kwargs) -> None:
+    bump_policy_version()
+
+
+for _model in (CommissionPolicy, CommissionPolicyRule, CommissionRule):
+    for _name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _name, _on_policy_rows_changed)
+    event.listen(_model.__table__, "after_drop", _on_policy_rows_changed)
+    event.listen(_model.__table__, "after_create", _on_policy_rows_changed)
+
+
+def _key_text(value: str | None) -> str:
+    return (value or "").strip().lower()
+
+
+def _compile_policy_table(version: int) -> _CompiledPolicyTable:
+    policy = get_active_policy()
+    table = _CompiledPolicyTable(
+        version=int(version),
+        compiled_at=time.monotonic(),
+        policy_id=int(policy.id) if policy else None,
+        policy_name=(policy.name or f"policy-{policy.id}") if policy else "default",
+    )
+    if policy is not None:
+        rows = CommissionPolicyRule.query.filter_by(policy_id=int(policy.id)).all()
+        for row in rows:
+            rule = _CompiledRule(
+                id=int(row.id),
+                applies_to=row.applies_to or "",
+                seller_type=row.seller_type or "",
+                city=(row.city or "").strip(),
+                base_rate_bps=row.base_rate_bps,
+                min_fee_minor=row.min_fee_minor,
+                max_fee_minor=row.max_fee_minor,
+                promo_discount_bps=row.promo_discount_bps,
+                starts_at=row.starts_at,
+                ends_at=row.ends_at,
+            )
+            key = (rule.applies_to, rule.seller_type, rule.city.lower())
+            table.rules.setdefault(key, []).append(rule)
+        for bucket in table.rules.values():
+            # Within a bucket only the time-window bonus and id separate rules.
+            bucket.sort(key=lambda r: (bool(r.starts_at or r.ends_at), r.id), reverse=True)
+
+    legacy = CommissionRule.query.filter_by(is_active=True).order_by(CommissionRule.id.asc()).all()
+    for row in legacy:
+        key = ((row.kind or "").strip(), _key_text(row.state), _key_text(row.category))
+        table.legacy_rates.setdefault(key, float(row.rate or 0.0))
+    return table
+
+
+def _compiled_policy_table() -> _CompiledPolicyTable:
+    global _POLICY_TABLE
+    ttl = _policy_cache_ttl_seconds()
+    with _POLICY_LOCK:
+        table = _POLICY_TABLE
+        version = _POLICY_VERSION
+        if table is not None and table.version == version and (time.monotonic() - table.compiled_at) < ttl:
+            _POLICY_STATS["hits"] += 1
+            return table
+    compiled = _compile_policy_table(version)
+    with _POLICY_LOCK:
+        _POLICY_STATS["compiles"] += 1
+        if _POLICY_VERSION == version:
+            _POLICY_TABLE = compiled
+    return compiled
+
+
+def _best_compiled_rule(
+    table: _CompiledPolicyTable, *, scope: str, actor: str, city: str, now: datetime
+) -> _CompiledRule | None:
+    city_key = city.lower()
+    best = None
+    best_rank = None
+    for r_applies in {scope, "all"}:
+        for r_seller in {actor, "all"}:
+            for r_city in {city_key, ""}:
+                bucket = table.rules.get((r_applies, r_seller, r_city))
+                if not bucket:
+                    continue
+                rule = next((r for r in bucket if r.active_at(now)), None)
+                if rule is None:
+                    continue
+                rank = (
+                    _rule_specificity(rule, applies_to=scope, seller_type=actor, city=city),
+                    rule.id,
+                )
+                if best_rank is None or rank > best_rank:
+                    best, best_rank = rule, rank
+    return best
+
+
+def compiled_legacy_rate(kind: str, state: str = "", category: str = "") -> float | None:
+    """Most specific active CommissionRule rate, or None when no rule applies."""
+    table = _compiled_policy_table()
+    k = (kind or "").strip()
+    s = _key_text(state)
+    c = _key_text(category)
+    candidates = []
+    if s and c:
+        candidates.append((k, s, c))
+    if s:
+        candidates.append((k, s, ""))
+    if c:
+        candidates.append((k, "", c))
+    candidates.append((k, "", ""))
+    for key in candidates:
+        rate = table.legacy_rates.get(key)
+        if rate is not None:
+            return float(rate)
+    return None
+
+
 def get_active_policy(now: datetime | None = None) -> CommissionPolicy | None:
     _ = now  # reserved for future policy activation windows.
     return (
@@ -104,6 +288,53 @@ def get_active_policy(now: datetime | None = None) -> CommissionPolicy | None:
     )
 
 
+def _resolution(
+    *,
+    policy_id: int | None,
+    policy_name: str,
+    rule,
+    scope: str,
+    actor: str,
+    city: str,
+    source: str,
+) -> CommissionResolution:
+    if rule is None:
+        bps = _default_bps(scope)
+        return CommissionResolution(
+            policy_id=policy_id,
+            policy_name=policy_name,
+            rule_id=None,
+            applies_to=scope,
+            seller_type=actor,
+            city=city,
+            base_rate_bps=bps,
+            promo_discount_bps=0,
+            effective_rate_bps=bps,
+            min_fee_minor=None,
+            max_fee_minor=None,
+            source=source,
+        )
+    base_rate = max(0, int(rule.base_rate_bps or _default_bps(scope)))
+    promo_discount = max(0, int(rule.promo_discount_bps or 0))
+    effective = max(0, base_rate - promo_discount)
+    min_fee = int(rule.min_fee_minor) if rule.min_fee_minor is not None else None
+    max_fee = int(rule.max_fee_minor) if rule.max_fee_minor is not None else None
+    return CommissionResolution(
+        policy_id=policy_id,
+        policy_name=policy_name,
+        rule_id=int(rule.id),
+        applies_to=scope,
+        seller_type=actor,
+        city=city,
+        base_rate_bps=base_rate,
+        promo_discount_bps=promo_discount,
+        effective_rate_bps=effective,
+        min_fee_minor=min_fee,
+        max_fee_minor=max_fee,
+        source="policy_rule",
+    )
+
+
 def resolve_commission_policy(
     *,
     applies_to: str,
@@ -116,22 +347,42 @@ def resolve_commission_policy(
     actor = _normalize_seller_type(seller_type)
     city_norm = (city or "").strip()
 
+    table = _compiled_policy_table()
+    if table.policy_id is None:
+        return _resolution(
+            policy_id=None, policy_name="default", rule=None,
+            scope=scope, actor=actor, city=city_norm, source="default",
+        )
+    rule = _best_compiled_rule(table, scope=scope, actor=actor, city=city_norm, now=now)
+    return _resolution(
+        policy_id=table.policy_id,
+        policy_name=table.policy_name,
+        rule=rule,
+        scope=scope,
+        actor=actor,
+        city=city_norm,
+        source="policy_fallback",
+    )
+
+
+def _resolve_commission_policy_via_queries(
+    *,
+    applies_to: str,
+    seller_type: str = "all",
+    city: str = "",
+    at_time: datetime | None = None,
+) -> CommissionResolution:
+    """Uncompiled reference resolver; kept for benchmarks and parity checks."""
+    now = at_time or datetime.utcnow()
+    scope = _normalize_applies_to(applies_to)
+    actor = _normalize_seller_type(seller_type)
+    city_norm = (city or "").strip()
+
     policy = get_active_policy(now=now)
     if not policy:
-        bps = _default_bps(scope)
-        return CommissionResolution(
-            policy_id=None,
-            policy_name="default",
-            rule_id=None,
-            applies_to=scope,
-            seller_type=actor,
-            city=city_norm,
-            base_rate_bps=bps,
-            promo_discount_bps=0,
-            effective_rate_bps=bps,
-            min_fee_minor=None,
-            max_fee_minor=None,
-            source="default",
+        return _resolution(
+            policy_id=None, policy_name="default", rule=None,
+            scope=scope, actor=actor, city=city_norm, source="default",
         )
 
     rules = (
@@ -157,54 +408,36 @@ def resolve_commission_policy(
         )
         .all()
     )
-
-    if not rules:
-        bps = _default_bps(scope)
-        return CommissionResolution(
-            policy_id=int(policy.id),
-            policy_name=policy.name or f"policy-{policy.id}",
-            rule_id=None,
-            applies_to=scope,
-            seller_type=actor,
-            city=city_norm,
-            base_rate_bps=bps,
-            promo_discount_bps=0,
-            effective_rate_bps=bps,
-            min_fee_minor=None,
-            max_fee_minor=None,
-            source="policy_fallback",
-        )
-
-    best = sorted(
-        rules,
-        key=lambda row: (
-            _rule_specificity(row, applies_to=scope, seller_type=actor, city=city_norm),
-            int(row.id or 0),
-        ),
-        reverse=True,
-    )[0]
-
-    base_rate = max(0, int(best.base_rate_bps or _default_bps(scope)))
-    promo_discount = max(0, int(best.promo_discount_bps or 0))
-    effective = max(0, base_rate - promo_discount)
-    min_fee = int(best.min_fee_minor) if best.min_fee_minor is not None else None
-    max_fee = int(best.max_fee_minor) if best.max_fee_minor is not None else None
-    return CommissionResolution(
+    best = None
+    if rules:
+        best = sorted(
+            rules,
+            key=lambda row: (
+                _rule_specificity(row, applies_to=scope, seller_type=actor, city=city_norm),
+                int(row.id or 0),
+            ),
+            reverse=True,
+        )[0]
+    return _resolution(
         policy_id=int(policy.id),
         policy_name=policy.name or f"policy-{policy.id}",
-        rule_id=int(best.id),
-        applies_to=scope,
-        seller_type=actor,
+        rule=best,
+        scope=scope,
+        actor=actor,
         city=city_norm,
-        base_rate_bps=base_rate,
-        promo_discount_bps=promo_discount,
-        effective_rate_bps=effective,
-        min_fee_minor=min_fee,
-        max_fee_minor=max_fee,
-        source="policy_rule",
+        source="policy_fallback",
     )
 
 
+def fee_minor_for_resolution(amount_minor: int, resolution: CommissionResolution) -> int:
+    fee = _bps_minor_half_up(amount_minor, resolution.effective_rate_bps)
+    if resolution.min_fee_minor is not None:
+        fee = max(fee, int(resolution.min_fee_minor))
+    if resolution.max_fee_minor is not None:
+        fee = min(fee, int(resolution.max_fee_minor))
+    return int(max(0, fee))
+
+
 def compute_fee_minor(
     *,
     amount_minor: int,
@@ -219,13 +452,8 @@ def compute_fee_minor(
         city=city,
         at_time=at_time,
     )
-    fee = _bps_minor_half_up(amount_minor, resolution.effective_rate_bps)
-    if resolution.min_fee_minor is not None:
-        fee = max(fee, int(resolution.min_fee_minor))
-    if resolution.max_fee_minor is not None:
-        fee = min(fee, int(resolution.max_fee_minor))
     return {
-        "fee_minor": int(max(0, fee)),
+        "fee_minor": fee_minor_for_resolution(amount_minor, resolution),
         "policy": resolution.to_dict(),
     }
 
@@ -269,6 +497,7 @@ def add_policy_rule(
     )
     db.session.add(rule)
     db.session.commit()
+    bump_policy_version()
     return rule
 
 
@@ -285,6 +514,7 @@ def activate_policy(policy_id: int) -> CommissionPolicy | None:
     target.activated_at = now
     db.session.add(target)
     db.session.commit()
+    bump_policy_version()
     return target
 
 
@@ -295,4 +525,5 @@ def archive_policy(policy_id: int) -> CommissionPolicy | None:
     target.status = "archived"
     db.session.add(target)
     db.session.commit()
+    bump_policy_version()
     return target
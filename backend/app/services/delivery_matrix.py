@@ -0,0 +1,228 @@
+"""Precomputed delivery distance and fee-band matrix.
+
+Every place with known coordinates in ``ng_locations.CITY_COORDS``, plus a
+centroid per state that has at least one of them, becomes a row. Pairwise
+great-circle distances and fee-band indexes are computed once into flat
+``array`` buffers. A quote is then two dict lookups and an array read, with
+no trigonometry. The matrix rebuilds itself when the location data or the
+band configuration changes.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+
+from app.services.driver_locations import haversine_km
+from app.utils import ng_locations
+from app.utils.env import env_int
+
+
+def _env_float(name: str, default: float, *, minimum: float = 0.0, maximum: float = 1e9) -> float:
+    try:
+        value = float((os.getenv(name) or str(default)).strip() or default)
+    except Exception:
+        value = float(default)
+    return max(minimum, min(value, maximum))
+
+
+DEFAULT_FEE_BANDS = "10:1500,25:2500,60:4000,200:7500,600:12000"
+
+
+def _parse_bands(raw: str) -> list[tuple[float, float]]:
+    bands = []
+    for part in (raw or "").split(","):
+        try:
+            max_km, fee = part.split(":", 1)
+            bands.append((float(max_km), float(fee)))
+        except Exception:
+            continue
+    return sorted(bands)
+
+
+def fee_bands() -> tuple[tuple[float, float], ...]:
+    """``DELIVERY_FEE_BANDS`` as ``((max_km, fee), ...)`` plus an open-ended long-haul band."""
+    bands = _parse_bands(os.getenv("DELIVERY_FEE_BANDS") or "") or _parse_bands(DEFAULT_FEE_BANDS)
+    long_haul = _env_float("DELIVERY_FEE_LONG_HAUL", bands[-1][1] * 1.5)
+    return tuple(bands) + ((float("inf"), long_haul),)
+
+
+def normalize_place(value: str | None) -> str:
+    return " ".join((value or "").strip().lower().split())
+
+
+def _state_key(state: str) -> str:
+    return f"state:{normalize_place(state)}"
+
+
+@dataclass(frozen=True)
+class DeliveryMatrix:
+    names: tuple[str, ...]
+    index: dict
+    distances: array
+    bands: array
+    fee_bands: tuple
+    fingerprint: tuple
+
+    @property
+    def size(self) -> int:
+        return len(self.names)
+
+    def distance_km(self, i: int, j: int) -> float:
+        return self.distances[i * len(self.names) + j]
+
+    def band(self, i: int, j: int) -> int:
+        return self.bands[i * len(self.names) + j]
+
+    def fee(self, i: int, j: int) -> float:
+        return self.fee_bands[self.bands[i * len(self.names) + j]][1]
+
+
+def _fingerprint() -> tuple:
+    return (
+        tuple(sorted(ng_locations.CITY_COORDS.items())),
+        tuple((row.get("state"), tuple(row.get("cities") or ())) for row in ng_locations.NIGERIA_LOCATIONS),
+        os.getenv("DELIVERY_FEE_BANDS") or "",
+        os.getenv("DELIVERY_FEE_LONG_HAUL") or "",
+        os.getenv("DELIVERY_INTRACITY_KM") or "",
+    )
+
+
+def _places() -> list[tuple[str, float, float]]:
+    places = [(normalize_place(name), float(lat), float(lng)) for name, (lat, lng) in ng_locations.CITY_COORDS.items()]
+    for row in ng_locations.NIGERIA_LOCATIONS:
+        coords = [ng_locations.CITY_COORDS[c] for c in (row.get("cities") or []) if c in ng_locations.CITY_COORDS]
+        if coords:
+            lat = sum(c[0] for c in coords) / len(coords)
+            lng = sum(c[1] for c in coords) / len(coords)
+            places.append((_state_key(row.get("state") or ""), lat, lng))
+    return places
+
+
+def build_matrix() -> DeliveryMatrix:
+    places = _places()
+    bands = fee_bands()
+    intracity = _env_float("DELIVERY_INTRACITY_KM", 8.0, minimum=0.0, maximum=200.0)
+    n = len(places)
+    distances = array("f", bytes(4 * n * n))
+    band_ids = array("B", bytes(n * n))
+    for i, (_, lat1, lng1) in enumerate(places):
+        for j in range(i, n):
+            _, lat2, lng2 = places[j]
+            km = intracity if i == j else max(intracity, haversine_km(lat1, lng1, lat2, lng2))
+            band = next(b for b, (max_km, _) in enumerate(bands) if km <= max_km)
+            for a, b in ((i, j), (j, i)):
+                distances[a * n + b] = km
+                band_ids[a * n + b] = band
+    names = tuple(name for name, _, _ in places)
+    index = {name: i for i, name in enumerate(names)}
+    # Exact spellings from the dataset resolve without normalising.
+    index.update({name: index[normalize_place(name)] for name in ng_locations.CITY_COORDS})
+    return DeliveryMatrix(
+        names=names,
+        index=index,
+        distances=distances,
+        bands=band_ids,
+        fee_bands=bands,
+        fingerprint=_fingerprint(),
+    )
+
+
+_lock = threading.Lock()
+_matrix: DeliveryMatrix | None = None
+_checked_at = 0.0
+
+
+def get_matrix() -> DeliveryMatrix:
+    """The process-wide matrix, rebuilt when locations or band settings change.
+
+    The change check runs at most every ``DELIVERY_MATRIX_CHECK_SECONDS`` (30).
+    """
+    global _matrix, _checked_at
+    now = time.monotonic()
+    matrix = _matrix
+    if matrix is not None and now - _checked_at < env_int("DELIVERY_MATRIX_CHECK_SECONDS", 30, minimum=0):
+        return matrix
+    with _lock:
+        if _matrix is None or _matrix.fingerprint != _fingerprint():
+            _matrix = build_matrix()
+        _checked_at = now
+        return _matrix
+
+
+def refresh_matrix() -> DeliveryMatrix:
+    global _matrix, _checked_at
+    with _lock:
+        _matrix = build_matrix()
+        _checked_at = time.monotonic()
+        return _matrix
+
+
+def resolve_place(matrix: DeliveryMatrix, place: dict | None) -> tuple[int | None, bool]:
+    """Row for ``{"state", "city", "locality"}``: locality, then city, then state centroid.
+
+    The flag is true when only the state centroid matched.
+    """
+    place = place or {}
+    index = matrix.index
+    for key in ("locality", "city"):
+        value = place.get(key)
+        if not value:
+            continue
+        idx = index.get(value)
+        if idx is None:
+            idx = index.get(normalize_place(value))
+        if idx is not None:
+            return idx, False
+    state = place.get("state")
+    if state:
+        idx = matrix.index.get(_state_key(state))
+        if idx is not None:
+            return idx, True
+    return None, False
+
+
+def quote(origin: dict | None, destination: dict | None, *, matrix: DeliveryMatrix | None = None) -> dict | None:
+    """Distance and banded fee between two places, or None when either is unknown."""
+    matrix = matrix or get_matrix()
+    i, approx_i = resolve_place(matrix, origin)
+    j, approx_j = resolve_place(matrix, destination)
+    if i is None or j is None:
+        return None
+    k = i * len(matrix.names) + j
+    band = matrix.bands[k]
+    return {
+        "distance_km": round(matrix.distances[k], 1),
+        "band": band,
+        "fee": matrix.fee_bands[band][1],
+        "approximate": bool(approx_i or approx_j),
+    }
+
+
+def quote_many(pairs: list[tuple[dict | None, dict | None]]) -> list[dict | None]:
+    matrix = get_matrix()
+    return [quote(origin, destination, matrix=matrix) for origin, destination in pairs]
+
+
+def describe(matrix: DeliveryMatrix | None = None) -> dict:
+    """Places, bands and distances in a JSON-friendly shape for clients that cache the matrix."""
+    matrix = matrix or get_matrix()
+    n = matrix.size
+    return {
+        "places": list(matrix.names),
+        "bands": [
+            {"band": b, "max_km": (None if max_km == float("inf") else max_km), "fee": fee}
+            for b, (max_km, fee) in enumerate(matrix.fee_bands)
+        ],
+        "distances_km": [[round(float(matrix.distances[i * n + j]), 1) for j in range(n)] for i in range(n)],
+        "bands_matrix": [[int(matrix.bands[i * n + j]) for j in range(n)] for i in range(n)],
+    }
+
+
+def _reset_matrix_for_tests() -> None:
+    global _matrix, _checked_at
+    with _lock:
+        _matrix = None
+        _checked_at = 0.0
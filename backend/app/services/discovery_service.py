@@ -11,10 +11,10 @@ from app.models import (
     ShortletFavorite,
     ListingView,
     ShortletView,
-    NotificationQueue,
     MerchantFollow,
     User,
 )
+from app.services.fanout_service import enqueue_fanout
 from app.utils.autopilot import get_settings
 
 
@@ -22,6 +22,10 @@ HEAT_NORMAL = "normal"
 HEAT_HOT = "hot"
 HEAT_HOTTER = "hotter"
 
+# A watcher hears about the same heat change (or unavailability) at most
+# once per day, however many times the event fires.
+WATCHER_COLLAPSE_SECONDS = 86400
+
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc).replace(tzinfo=None)
@@ -53,6 +57,10 @@ def compute_heat_level(*, favorites_last_24h: int, favorites_last_7d: int) -> tu
     return HEAT_NORMAL, 0
 
 
+def _watcher_audience(entity: str) -> str:
+    return "listing_watchers" if entity == "listing" else "shortlet_watchers"
+
+
 def _queue_watcher_notifications(*, entity: str, entity_id: int, heat_level: str) -> None:
     settings = get_settings()
     if not bool(getattr(settings, "watcher_notifications_v1", False)):
@@ -60,70 +68,29 @@ def _queue_watcher_notifications(*, entity: str, entity_id: int, heat_level: str
     if heat_level not in (HEAT_HOT, HEAT_HOTTER):
         return
 
-    day_token = _day_key()
-    ref = f"watchers:{entity}:{int(entity_id)}:{heat_level}:{day_token}"
-    existing = NotificationQueue.query.filter_by(reference=ref).first()
-    if existing:
-        return
-
-    if entity == "listing":
-        watcher_rows = (
-            ListingFavorite.query.filter_by(listing_id=int(entity_id))
-            .order_by(ListingFavorite.created_at.desc())
-            .limit(500)
-            .all()
-        )
-        user_ids = {int(r.user_id) for r in watcher_rows if r.user_id is not None}
-        title = (db.session.get(Listing, int(entity_id)).title if db.session.get(Listing, int(entity_id)) else "Listing")
-        message = f"{title} is now {heat_level.upper()}."
-    else:
-        watcher_rows = (
-            ShortletFavorite.query.filter_by(shortlet_id=int(entity_id))
-            .order_by(ShortletFavorite.created_at.desc())
-            .limit(500)
-            .all()
-        )
-        user_ids = {int(r.user_id) for r in watcher_rows if r.user_id is not None}
-        title = (db.session.get(Shortlet, int(entity_id)).title if db.session.get(Shortlet, int(entity_id)) else "Shortlet")
-        message = f"{title} is now {heat_level.upper()}."
-
-    for uid in user_ids:
-        q = NotificationQueue(
-            channel="in_app",
-            to=str(uid),
-            message=message[:500],
-            status="queued",
-            reference=ref,
-        )
-        db.session.add(q)
-    db.session.commit()
+    model = Listing if entity == "listing" else Shortlet
+    item = db.session.get(model, int(entity_id))
+    title = (item.title if item else None) or ("Listing" if entity == "listing" else "Shortlet")
+    enqueue_fanout(
+        audience=_watcher_audience(entity),
+        subject_id=int(entity_id),
+        message=f"{title} is now {heat_level.upper()}.",
+        collapse_key=f"watchers:{entity}:{int(entity_id)}:{heat_level}",
+        collapse_seconds=WATCHER_COLLAPSE_SECONDS,
+    )
 
 
 def queue_item_unavailable_notifications(*, entity: str, entity_id: int, title: str = "") -> None:
     settings = get_settings()
     if not bool(getattr(settings, "watcher_notifications_v1", False)):
         return
-    day_token = _day_key()
-    ref = f"watchers:{entity}:{int(entity_id)}:unavailable:{day_token}"
-    if NotificationQueue.query.filter_by(reference=ref).first():
-        return
-    if entity == "listing":
-        watcher_rows = ListingFavorite.query.filter_by(listing_id=int(entity_id)).limit(500).all()
-    else:
-        watcher_rows = ShortletFavorite.query.filter_by(shortlet_id=int(entity_id)).limit(500).all()
-    user_ids = {int(row.user_id) for row in watcher_rows if row.user_id is not None}
-    message = f"{title or 'Item'} is no longer available."
-    for uid in user_ids:
-        db.session.add(
-            NotificationQueue(
-                channel="in_app",
-                to=str(uid),
-                message=message[:500],
-                status="queued",
-                reference=ref,
-            )
-        )
-    db.session.commit()
+    enqueue_fanout(
+        audience=_watcher_audience(entity),
+        subject_id=int(entity_id),
+        message=f"{title or 'Item'} is no longer available.",
+        collapse_key=f"watchers:{entity}:{int(entity_id)}:unavailable",
+        collapse_seconds=WATCHER_COLLAPSE_SECONDS,
+    )
 
 
 def _favorites_windows_for_listing(listing_id: int) -> tuple[int, int]:
@@ -0,0 +1,669 @@
+"""Driver location ingestion and the latest-position store.
+
+Pings arrive in batches. Each driver's newest point replaces their entry in
+the location store (Redis GEO when configured, otherwise an in-process
+geohash grid), which answers "drivers within R km" without touching SQL.
+Only a downsampled subset of points is buffered for the track history and
+bulk-inserted into ``driver_location_pings`` later, by the
+``flush_driver_tracks`` task (Redis) or inline once the in-process buffer
+is large or old enough.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert
+
+from app.extensions import db
+from app.models import DriverLocationPing
+from app.utils.env import env_int
+
+try:
+    import redis
+except Exception:  # pragma: no cover - optional dependency safety
+    redis = None
+
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_EPOCH = datetime(1970, 1, 1)
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _env_float(name: str, default: float, *, minimum: float = 0.0, maximum: float = 1e9) -> float:
+    try:
+        value = float((os.getenv(name) or str(default)).strip() or default)
+    except Exception:
+        value = float(default)
+    return max(minimum, min(value, maximum))
+
+
+def max_batch_size() -> int:
+    return env_int("DRIVER_LOCATION_MAX_BATCH", 500, maximum=5000)
+
+
+def cell_precision() -> int:
+    return env_int("DRIVER_LOCATION_CELL_PRECISION", 5, minimum=3, maximum=7)
+
+
+def stale_after_seconds() -> int:
+    return env_int("DRIVER_LOCATION_STALE_SECONDS", 300, minimum=10, maximum=86400)
+
+
+def track_min_seconds() -> float:
+    return _env_float("DRIVER_TRACK_MIN_SECONDS", 15.0, maximum=3600.0)
+
+
+def track_min_meters() -> float:
+    return _env_float("DRIVER_TRACK_MIN_METERS", 50.0, maximum=100000.0)
+
+
+def track_flush_batch() -> int:
+    return env_int("DRIVER_TRACK_FLUSH_BATCH", 1000, maximum=20000)
+
+
+def track_flush_max_age_seconds() -> float:
+    return _env_float("DRIVER_TRACK_FLUSH_MAX_AGE_SECONDS", 30.0, minimum=1.0, maximum=3600.0)
+
+
+def to_epoch(dt: datetime) -> float:
+    return (dt - _EPOCH).total_seconds()
+
+
+def from_epoch(ts: float) -> datetime:
+    return datetime.utcfromtimestamp(float(ts))
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def geohash(lat: float, lng: float, precision: int) -> str:
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    out, bits, ch, even = [], 0, 0, True
+    while len(out) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch = (ch << 1) | 1
+                lng_lo = mid
+            else:
+                ch <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(out)
+
+
+def cells_covering(lat: float, lng: float, radius_km: float, precision: int) -> set[str]:
+    """Geohash cells overlapping the bounding box of a circle."""
+    lat_bits = (5 * precision) // 2
+    lng_bits = 5 * precision - lat_bits
+    cell_h = 180.0 / (2 ** lat_bits)
+    cell_w = 360.0 / (2 ** lng_bits)
+    dlat = radius_km / 111.32
+    dlng = radius_km / max(1e-6, 111.32 * math.cos(math.radians(lat)))
+    lat_lo, lat_hi = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    lng_lo, lng_hi = lng - dlng, lng + dlng
+    cells = set()
+    y = lat_lo
+    while True:
+        x = lng_lo
+        while True:
+            wrapped = ((x + 180.0) % 360.0) - 180.0
+            cells.add(geohash(min(89.999999, y), wrapped, precision))
+            if x >= lng_hi:
+                break
+            x = min(lng_hi, x + cell_w)
+        if y >= lat_hi:
+            break
+        y = min(lat_hi, y + cell_h)
+    return cells
+
+
+@dataclass
+class DriverPosition:
+    driver_id: int
+    lat: float
+    lng: float
+    ts: float
+    order_id: int | None = None
+
+    def to_dict(self, now_ts: float | None = None) -> dict:
+        out = {
+            "driver_id": int(self.driver_id),
+            "lat": self.lat,
+            "lng": self.lng,
+            "recorded_at": from_epoch(self.ts).isoformat(),
+            "order_id": self.order_id,
+        }
+        if now_ts is not None:
+            out["age_seconds"] = round(max(0.0, now_ts - self.ts), 1)
+        return out
+
+
+class MemoryLocationStore:
+    """Latest positions indexed by geohash cell, plus the pending track buffer."""
+
+    backend = "memory"
+
+    def __init__(self, precision: int):
+        self.precision = int(precision)
+        self._lock = threading.Lock()
+        self._latest: dict[int, tuple[DriverPosition, str]] = {}
+        self._cells: dict[str, set[int]] = {}
+        self._kept: dict[int, tuple[float, float, float]] = {}
+        self._buffer: deque = deque()
+        self._oldest_buffered: float | None = None
+
+    def update_latest(self, pos: DriverPosition) -> bool:
+        cell = geohash(pos.lat, pos.lng, self.precision)
+        with self._lock:
+            current = self._latest.get(pos.driver_id)
+            if current is not None and current[0].ts >= pos.ts:
+                return False
+            if current is not None and current[1] != cell:
+                members = self._cells.get(current[1])
+                if members is not None:
+                    members.discard(pos.driver_id)
+                    if not members:
+                        self._cells.pop(current[1], None)
+            self._latest[pos.driver_id] = (pos, cell)
+            self._cells.setdefault(cell, set()).add(pos.driver_id)
+            return True
+
+    def latest(self, driver_id: int) -> DriverPosition | None:
+        with self._lock:
+            entry = self._latest.get(int(driver_id))
+            return entry[0] if entry else None
+
+    def latest_many(self, driver_ids) -> dict[int, DriverPosition]:
+        with self._lock:
+            return {int(d): self._latest[int(d)][0] for d in driver_ids if int(d) in self._latest}
+
+    def within(self, lat: float, lng: float, radius_km: float, limit: int, min_ts: float) -> list[tuple[DriverPosition, float]]:
+        cells = cells_covering(lat, lng, radius_km, self.precision)
+        with self._lock:
+            candidates = [
+                self._latest[driver_id][0]
+                for cell in cells
+                for driver_id in self._cells.get(cell, ())
+            ]
+        out = []
+        for pos in candidates:
+            if pos.ts < min_ts:
+                continue
+            dist = haversine_km(lat, lng, pos.lat, pos.lng)
+            if dist <= radius_km:
+                out.append((pos, dist))
+        out.sort(key=lambda item: item[1])
+        return out[: int(limit)]
+
+    def prune(self, min_ts: float) -> int:
+        with self._lock:
+            stale = [d for d, (pos, _cell) in self._latest.items() if pos.ts < min_ts]
+            for driver_id in stale:
+                _pos, cell = self._latest.pop(driver_id)
+                members = self._cells.get(cell)
+                if members is not None:
+                    members.discard(driver_id)
+                    if not members:
+                        self._cells.pop(cell, None)
+                self._kept.pop(driver_id, None)
+            return len(stale)
+
+    def last_kept(self, driver_id: int) -> tuple[float, float, float] | None:
+        with self._lock:
+            return self._kept.get(int(driver_id))
+
+    def set_last_kept(self, driver_id: int, lat: float, lng: float, ts: float) -> None:
+        with self._lock:
+            self._kept[int(driver_id)] = (lat, lng, ts)
+
+    def push_track(self, rows: list[dict]) -> int:
+        with self._lock:
+            if rows and self._oldest_buffered is None:
+                self._oldest_buffered = time.monotonic()
+            self._buffer.extend(rows)
+            return len(self._buffer)
+
+    def pop_track(self, limit: int) -> list[dict]:
+        with self._lock:
+            out = [self._buffer.popleft() for _ in range(min(int(limit), len(self._buffer)))]
+            if not self._buffer:
+                self._oldest_buffered = None
+            return out
+
+    def buffer_state(self) -> tuple[int, float]:
+        with self._lock:
+            age = time.monotonic() - self._oldest_buffered if self._oldest_buffered is not None else 0.0
+            return len(self._buffer), age
+
+    def restore_track(self, rows: list[dict]) -> None:
+        with self._lock:
+            self._buffer.extendleft(reversed(rows))
+            if self._oldest_buffered is None and rows:
+                self._oldest_buffered = time.monotonic()
+
+
+# Compare-and-set of a driver's latest position: concurrent batches for the
+# same driver cannot interleave the timestamp check and the writes.
+_UPDATE_LATEST_LUA = """
+local current = redis.call('HGET', KEYS[1], 'ts')
+if current and tonumber(current) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('GEOADD', KEYS[2], ARGV[2], ARGV[1], ARGV[5])
+redis.call('ZADD', KEYS[3], ARGV[3], ARGV[5])
+redis.call('HSET', KEYS[1], 'lat', ARGV[1], 'lng', ARGV[2], 'ts', ARGV[3], 'order_id', ARGV[4])
+return 1
+"""
+
+
+class RedisLocationStore:
+    """Redis GEO set of latest positions (geohash-scored) plus a track list."""
+
+    backend = "redis"
+
+    def __init__(self, client, prefix: str):
+        self.client = client
+        self.prefix = prefix
+        self._update_latest = client.register_script(_UPDATE_LATEST_LUA)
+
+    def _k(self, name: str) -> str:
+        return f"{self.prefix}{name}"
+
+    def update_latest(self, pos: DriverPosition) -> bool:
+        updated = self._update_latest(
+            keys=[self._k(f"pos:{int(pos.driver_id)}"), self._k("geo"), self._k("seen")],
+            args=[
+                repr(float(pos.lat)),
+                repr(float(pos.lng)),
+                repr(float(pos.ts)),
+                "" if pos.order_id is None else str(int(pos.order_id)),
+                str(int(pos.driver_id)),
+            ],
+        )
+        return bool(int(updated or 0))
+
+    @staticmethod
+    def _position(driver_id: int, raw: dict) -> DriverPosition | None:
+        if not raw or raw.get(b"ts") is None:
+            return None
+        order_raw = (raw.get(b"order_id") or b"").decode()
+        return DriverPosition(
+            driver_id=int(driver_id),
+            lat=float(raw[b"lat"]),
+            lng=float(raw[b"lng"]),
+            ts=float(raw[b"ts"]),
+            order_id=int(order_raw) if order_raw else None,
+        )
+
+    def latest(self, driver_id: int) -> DriverPosition | None:
+        return self._position(driver_id, self.client.hgetall(self._k(f"pos:{int(driver_id)}")))
+
+    def latest_many(self, driver_ids) -> dict[int, DriverPosition]:
+        ids = [int(d) for d in driver_ids]
+        if not ids:
+            return {}
+        pipe = self.client.pipeline(transaction=False)
+        for driver_id in ids:
+            pipe.hgetall(self._k(f"pos:{driver_id}"))
+        out = {}
+        for driver_id, raw in zip(ids, pipe.execute()):
+            pos = self._position(driver_id, raw)
+            if pos is not None:
+                out[driver_id] = pos
+        return out
+
+    def within(self, lat: float, lng: float, radius_km: float, limit: int, min_ts: float) -> list[tuple[DriverPosition, float]]:
+        hits = self.client.geosearch(
+            self._k("geo"),
+            longitude=lng,
+            latitude=lat,
+            radius=radius_km,
+            unit="km",
+            sort="ASC",
+            count=max(1, int(limit) * 2),
+            withdist=True,
+        )
+        if not hits:
+            return []
+        pipe = self.client.pipeline(transaction=False)
+        for member, _dist in hits:
+            pipe.hgetall(self._k(f"pos:{int(member)}"))
+        out = []
+        for (member, dist), raw in zip(hits, pipe.execute()):
+            pos = self._position(int(member), raw)
+            if pos is not None and pos.ts >= min_ts:
+                out.append((pos, float(dist)))
+        return out[: int(limit)]
+
+    def prune(self, min_ts: float) -> int:
+        stale = self.client.zrangebyscore(self._k("seen"), "-inf", f"({min_ts}")
+        if not stale:
+            return 0
+        pipe = self.client.pipeline(transaction=True)
+        pipe.zrem(self._k("geo"), *stale)
+        pipe.zrem(self._k("seen"), *stale)
+        for member in stale:
+            pipe.delete(self._k(f"pos:{int(member)}"), self._k(f"kept:{int(member)}"))
+        pipe.execute()
+        return len(stale)
+
+    def last_kept(self, driver_id: int) -> tuple[float, float, float] | None:
+        raw = self.client.get(self._k(f"kept:{int(driver_id)}"))
+        if not raw:
+            return None
+        lat, lng, ts = (float(v) for v in raw.decode().split(","))
+        return lat, lng, ts
+
+    def set_last_kept(self, driver_id: int, lat: float, lng: float, ts: float) -> None:
+        self.client.set(self._k(f"kept:{int(driver_id)}"), f"{lat},{lng},{ts}", ex=86400)
+
+    def push_track(self, rows: list[dict]) -> int:
+        if not rows:
+            return int(self.client.llen(self._k("track")))
+        return int(self.client.rpush(self._k("track"), *(json.dumps(r, default=str) for r in rows)))
+
+    def pop_track(self, limit: int) -> list[dict]:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.lrange(self._k("track"), 0, int(limit) - 1)
+        pipe.ltrim(self._k("track"), int(limit), -1)
+        raw, _ = pipe.execute()
+        return [json.loads(item) for item in raw]
+
+    def buffer_state(self) -> tuple[int, float]:
+        return int(self.client.llen(self._k("track"))), 0.0
+
+    def restore_track(self, rows: list[dict]) -> None:
+        if rows:
+            self.client.lpush(self._k("track"), *(json.dumps(r, default=str) for r in reversed(rows)))
+
+
+_LOCK = threading.Lock()
+_STORE: MemoryLocationStore | RedisLocationStore | None = None
+
+
+def _store_redis_url() -> str:
+    return (os.getenv("DRIVER_LOCATION_REDIS_URL") or os.getenv("REDIS_URL") or "").strip()
+
+
+def get_location_store() -> MemoryLocationStore | RedisLocationStore:
+    global _STORE
+    with _LOCK:
+        if _STORE is not None:
+            return _STORE
+        url = _store_redis_url()
+        if url and redis is not None:
+            try:
+                client = redis.Redis.from_url(url, socket_connect_timeout=0.5, socket_timeout=0.5)
+                client.ping()
+                _STORE = RedisLocationStore(client, (os.getenv("DRIVER_LOCATION_PREFIX") or "fliptrybe:loc:").strip())
+            except Exception:
+                _STORE = None
+        if _STORE is None:
+            _STORE = MemoryLocationStore(cell_precision())
+        return _STORE
+
+
+def _reset_location_store_for_tests(store=None):
+    global _STORE
+    with _LOCK:
+        _STORE = store
+    return store
+
+
+class PingError(ValueError):
+    pass
+
+
+class LocationStoreUnavailable(RuntimeError):
+    """The location store could not be written; the batch should be retried."""
+
+
+def _parse_ts(raw, now_ts: float) -> float:
+    if raw in (None, ""):
+        return now_ts
+    if isinstance(raw, (int, float)) or str(raw).replace(".", "", 1).isdigit():
+        value = float(raw)
+        return value / 1000.0 if value > 1e11 else value
+    text = str(raw).strip().replace("Z", "+00:00")
+    dt = datetime.fromisoformat(text)
+    if dt.tzinfo is not None:
+        return dt.timestamp()
+    return to_epoch(dt)
+
+
+def _parse_ping(raw: dict, now_ts: float) -> dict:
+    if not isinstance(raw, dict):
+        raise PingError("ping must be an object")
+    try:
+        lat = float(raw.get("lat", raw.get("latitude")))
+        lng = float(raw.get("lng", raw.get("longitude")))
+    except Exception:
+        raise PingError("lat/lng required")
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0) or math.isnan(lat) or math.isnan(lng):
+        raise PingError("lat/lng out of range")
+    try:
+        ts = _parse_ts(raw.get("ts", raw.get("recorded_at")), now_ts)
+    except Exception:
+        raise PingError("invalid timestamp")
+    if ts > now_ts + 60:
+        raise PingError("timestamp in the future")
+    if ts < now_ts - 86400:
+        raise PingError("timestamp too old")
+
+    def _opt_float(key: str):
+        try:
+            return float(raw[key]) if raw.get(key) not in (None, "") else None
+        except Exception:
+            return None
+
+    order_raw = raw.get("order_id")
+    try:
+        order_id = int(order_raw) if order_raw not in (None, "") else None
+    except Exception:
+        order_id = None
+    return {
+        "lat": lat,
+        "lng": lng,
+        "ts": ts,
+        "order_id": order_id,
+        "accuracy_m": _opt_float("accuracy_m") if raw.get("accuracy_m") is not None else _opt_float("accuracy"),
+        "speed_mps": _opt_float("speed_mps") if raw.get("speed_mps") is not None else _opt_float("speed"),
+    }
+
+
+def _downsample(store, driver_id: int, points: list[dict]) -> list[dict]:
+    """Keep a point when enough time has passed or the driver moved far enough."""
+    min_seconds = track_min_seconds()
+    min_km = track_min_meters() / 1000.0
+    last = store.last_kept(driver_id)
+    kept = []
+    for p in points:
+        if last is not None:
+            if p["ts"] <= last[2]:
+                continue
+            if p["ts"] - last[2] < min_seconds and haversine_km(last[0], last[1], p["lat"], p["lng"]) < min_km:
+                continue
+        kept.append(
+            {
+                "driver_id": int(driver_id),
+                "order_id": p["order_id"],
+                "lat": p["lat"],
+                "lng": p["lng"],
+                "accuracy_m": p["accuracy_m"],
+                "speed_mps": p["speed_mps"],
+                "ts": p["ts"],
+            }
+        )
+        last = (p["lat"], p["lng"], p["ts"])
+    if kept:
+        store.set_last_kept(driver_id, kept[-1]["lat"], kept[-1]["lng"], kept[-1]["ts"])
+    return kept
+
+
+def ingest_pings(driver_id: int, pings: list, *, now: datetime | None = None) -> dict:
+    """Apply a batch of pings for one driver.
+
+    Invalid points are counted and skipped rather than failing the batch,
+    since devices upload whatever they buffered while offline. Raises
+    LocationStoreUnavailable when the store cannot be written.
+    """
+    if not isinstance(pings, list) or not pings:
+        raise PingError("pings required")
+    if len(pings) > max_batch_size():
+        raise PingError(f"at most {max_batch_size()} pings per request")
+    now_ts = to_epoch(now or datetime.utcnow())
+    points, errors = [], []
+    for idx, raw in enumerate(pings):
+        try:
+            points.append(_parse_ping(raw, now_ts))
+        except PingError as exc:
+            errors.append({"index": idx, "error": str(exc)})
+    points.sort(key=lambda p: p["ts"])
+
+    store = get_location_store()
+    latest_updated = False
+    newest = points[-1] if points else None
+    try:
+        if newest is not None:
+            latest_updated = store.update_latest(
+                DriverPosition(driver_id=int(driver_id), lat=newest["lat"], lng=newest["lng"], ts=newest["ts"], order_id=newest["order_id"])
+            )
+        kept = _downsample(store, int(driver_id), points)
+        store.push_track(kept)
+    except Exception as exc:
+        # Re-sending the batch is safe: older points never move the latest
+        # position and already-kept points are skipped by the downsampler.
+        raise LocationStoreUnavailable(str(exc) or type(exc).__name__) from exc
+    flushed = _maybe_flush_inline(store)
+    return {
+        "accepted": len(points),
+        "rejected": len(errors),
+        "errors": errors[:20],
+        "track_points": len(kept),
+        "latest_updated": bool(latest_updated),
+        "latest": newest and {"lat": newest["lat"], "lng": newest["lng"], "order_id": newest["order_id"], "ts": newest["ts"]},
+        "flushed": flushed,
+    }
+
+
+def _maybe_flush_inline(store) -> int:
+    # A process-local buffer is invisible to workers, so it is flushed here
+    # once it is big or old enough; the Redis buffer is left to the task.
+    if not isinstance(store, MemoryLocationStore):
+        return 0
+    size, age = store.buffer_state()
+    if size >= track_flush_batch() or (size and age >= track_flush_max_age_seconds()):
+        try:
+            return int(flush_track_buffer().get("inserted") or 0)
+        except Exception:
+            # The pings are already applied and the failed rows are back in
+            # the buffer, so the request still succeeds; a later flush retries.
+            current_app.logger.exception("driver_track_inline_flush_failed buffered=%s", size)
+    return 0
+
+
+def flush_track_buffer(*, max_rows: int | None = None) -> dict:
+    """Bulk-insert buffered track points, one executemany per batch."""
+    store = get_location_store()
+    batch = track_flush_batch()
+    budget = int(max_rows) if max_rows is not None else None
+    inserted = batches = 0
+    while budget is None or inserted < budget:
+        size = batch if budget is None else min(batch, budget - inserted)
+        rows = store.pop_track(size)
+        if not rows:
+            break
+        created_at = datetime.utcnow()
+        values = [
+            {
+                "driver_id": int(r["driver_id"]),
+                "order_id": r.get("order_id"),
+                "lat": float(r["lat"]),
+                "lng": float(r["lng"]),
+                "accuracy_m": r.get("accuracy_m"),
+                "speed_mps": r.get("speed_mps"),
+                "recorded_at": from_epoch(float(r["ts"])),
+                "created_at": created_at,
+            }
+            for r in rows
+        ]
+        try:
+            db.session.execute(insert(DriverLocationPing.__table__), values)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            store.restore_track(rows)
+            raise
+        inserted += len(rows)
+        batches += 1
+        if len(rows) < size:
+            break
+    return {"inserted": inserted, "batches": batches}
+
+
+def drivers_within(
+    lat: float,
+    lng: float,
+    radius_km: float,
+    *,
+    limit: int = 50,
+    max_age_seconds: int | None = None,
+    now: datetime | None = None,
+) -> list[dict]:
+    """Drivers whose latest fresh position is within ``radius_km``, nearest first."""
+    radius = max(0.05, min(float(radius_km), 100.0))
+    now_ts = to_epoch(now or datetime.utcnow())
+    min_ts = now_ts - float(max_age_seconds if max_age_seconds is not None else stale_after_seconds())
+    hits = get_location_store().within(float(lat), float(lng), radius, max(1, min(int(limit), 500)), min_ts)
+    out = []
+    for pos, dist in hits:
+        item = pos.to_dict(now_ts)
+        item["distance_km"] = round(dist, 3)
+        out.append(item)
+    return out
+
+
+def latest_position(driver_id: int) -> dict | None:
+    pos = get_location_store().latest(int(driver_id))
+    return pos.to_dict(to_epoch(datetime.utcnow())) if pos else None
+
+
+def fresh_positions(driver_ids, *, now: datetime | None = None) -> dict[int, DriverPosition]:
+    """Latest non-stale position per driver, fetched in one store round trip."""
+    min_ts = to_epoch(now or datetime.utcnow()) - float(stale_after_seconds())
+    try:
+        found = get_location_store().latest_many(driver_ids)
+    except Exception:
+        return {}
+    return {driver_id: pos for driver_id, pos in found.items() if pos.ts >= min_ts}
+
+
+def prune_stale_positions(*, now: datetime | None = None) -> int:
+    now_ts = to_epoch(now or datetime.utcnow())
+    return get_location_store().prune(now_ts - float(stale_after_seconds()) * 4)
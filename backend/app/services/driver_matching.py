@@ -0,0 +1,485 @@
+"""Batch driver-order matching.
+
+One run loads a snapshot of pending orders and available drivers, with
+their live positions, current load and recent rejections, using a fixed
+number of queries. It then solves one cost-minimising assignment per city
+cell: the Hungarian method for small cells, distance-greedy for large ones.
+All offers and their notifications are written with one bulk insert each.
+
+Orders have no coordinates of their own. They are placed at their listing's
+city (``ng_locations.CITY_COORDS``). Drivers use their last fresh ping and
+fall back to their profile city.
+"""
+from __future__ import annotations
+
+import heapq
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, exists, func, insert, or_, select
+
+from app.extensions import db
+from app.models import DriverJobOffer, DriverProfile, Listing, NotificationQueue, Order, User
+from app.realtime.bus import publish as realtime_publish
+from app.realtime.rooms import driver_room
+from app.services.driver_locations import fresh_positions, haversine_km
+from app.utils.env import env_int
+from app.utils.ng_locations import get_city_coords
+
+
+PENDING_ORDER_STATUSES = ("created", "paid")
+ACTIVE_ORDER_STATUSES = ("assigned", "driver_assigned", "picked_up")
+OPEN_OFFER_STATUSES = ("offered", "accepted")
+OFFER_CHANNELS = ("in_app", "sms", "whatsapp")
+INF = float("inf")
+
+# Fallback distances (km) when either side has no coordinates.
+SAME_LOCALITY_KM = 1.0
+SAME_CITY_KM = 3.0
+SAME_STATE_KM = 15.0
+UNKNOWN_AREA_KM = 20.0
+
+
+def _env_float(name: str, default: float, *, minimum: float = 0.0, maximum: float = 1e6) -> float:
+    try:
+        value = float((os.getenv(name) or str(default)).strip() or default)
+    except Exception:
+        value = float(default)
+    return max(minimum, min(value, maximum))
+
+
+def max_orders_per_run() -> int:
+    return env_int("MATCH_MAX_ORDERS", 500, maximum=20000)
+
+
+def max_radius_km() -> float:
+    return _env_float("MATCH_MAX_RADIUS_KM", 30.0, minimum=1.0, maximum=500.0)
+
+
+def load_penalty_km() -> float:
+    return _env_float("MATCH_LOAD_PENALTY_KM", 5.0)
+
+
+def rejection_penalty_km() -> float:
+    return _env_float("MATCH_REJECTION_PENALTY_KM", 3.0)
+
+
+def locality_mismatch_km() -> float:
+    return _env_float("MATCH_LOCALITY_MISMATCH_KM", 2.0)
+
+
+def rejection_window() -> timedelta:
+    return timedelta(hours=env_int("MATCH_REJECTION_WINDOW_HOURS", 24, maximum=24 * 30))
+
+
+def offers_per_driver() -> int:
+    return env_int("MATCH_OFFERS_PER_DRIVER", 1, maximum=20)
+
+
+def hungarian_max_cell() -> int:
+    return env_int("MATCH_HUNGARIAN_MAX_CELL", 40, maximum=300)
+
+
+def _norm(value) -> str:
+    return str(value or "").strip().lower()
+
+
+@dataclass
+class MatchOrder:
+    id: int
+    state: str = ""
+    city: str = ""
+    locality: str = ""
+    lat: float | None = None
+    lng: float | None = None
+    excluded: set = field(default_factory=set)
+
+    @property
+    def cell(self) -> tuple[str, str]:
+        return (self.state, self.city)
+
+
+@dataclass
+class MatchDriver:
+    id: int
+    state: str = ""
+    city: str = ""
+    locality: str = ""
+    lat: float | None = None
+    lng: float | None = None
+    live: bool = False
+    load: int = 0
+    rejections: int = 0
+    capacity: int = 1
+
+
+@dataclass(frozen=True)
+class CostWeights:
+    max_radius_km: float
+    load_penalty_km: float
+    rejection_penalty_km: float
+    locality_mismatch_km: float
+
+    @classmethod
+    def from_env(cls) -> "CostWeights":
+        return cls(
+            max_radius_km=max_radius_km(),
+            load_penalty_km=load_penalty_km(),
+            rejection_penalty_km=rejection_penalty_km(),
+            locality_mismatch_km=locality_mismatch_km(),
+        )
+
+
+def _coords(city: str | None):
+    found = get_city_coords((city or "").strip().title()) if city else None
+    return (float(found[0]), float(found[1])) if found else (None, None)
+
+
+def load_snapshot(
+    *,
+    max_orders: int | None = None,
+    order_ids: list[int] | None = None,
+    now: datetime | None = None,
+) -> tuple[list[MatchOrder], list[MatchDriver]]:
+    """Pending orders (oldest first, optionally only ``order_ids``) and drivers with spare capacity."""
+    now = now or datetime.utcnow()
+    limit = int(max_orders or max_orders_per_run())
+    open_offer = exists().where(
+        DriverJobOffer.order_id == Order.id,
+        DriverJobOffer.status.in_(OPEN_OFFER_STATUSES),
+    )
+    query = (
+        select(Order.id, Listing.state, Listing.city, Listing.locality)
+        .select_from(Order)
+        .outerjoin(Listing, Listing.id == Order.listing_id)
+        .where(Order.driver_id.is_(None), Order.status.in_(PENDING_ORDER_STATUSES), ~open_offer)
+    )
+    if order_ids is not None:
+        if not order_ids:
+            return [], []
+        query = query.where(Order.id.in_([int(i) for i in order_ids]))
+    order_rows = db.session.execute(query.order_by(Order.created_at.asc(), Order.id.asc()).limit(limit)).all()
+    if not order_rows:
+        return [], []
+
+    orders = []
+    for oid, state, city, locality in order_rows:
+        lat, lng = _coords(city)
+        orders.append(MatchOrder(id=int(oid), state=_norm(state), city=_norm(city), locality=_norm(locality), lat=lat, lng=lng))
+    by_id = {o.id: o for o in orders}
+    for order_id, driver_id in db.session.execute(
+        select(DriverJobOffer.order_id, DriverJobOffer.driver_id).where(DriverJobOffer.order_id.in_(list(by_id)))
+    ):
+        by_id[int(order_id)].excluded.add(int(driver_id))
+
+    driver_rows = db.session.execute(
+        select(User.id, DriverProfile.state, DriverProfile.city, DriverProfile.locality)
+        .select_from(User)
+        .outerjoin(DriverProfile, DriverProfile.user_id == User.id)
+        .where(
+            User.role == "driver",
+            User.is_available.is_(True),
+            or_(DriverProfile.id.is_(None), DriverProfile.is_active.is_(True)),
+        )
+    ).all()
+    if not driver_rows:
+        return orders, []
+
+    load = dict(
+        db.session.execute(
+            select(Order.driver_id, func.count(Order.id))
+            .where(Order.driver_id.isnot(None), Order.status.in_(ACTIVE_ORDER_STATUSES))
+            .group_by(Order.driver_id)
+        ).all()
+    )
+    outstanding = dict(
+        db.session.execute(
+            select(DriverJobOffer.driver_id, func.count(DriverJobOffer.id))
+            .where(DriverJobOffer.status == "offered")
+            .group_by(DriverJobOffer.driver_id)
+        ).all()
+    )
+    rejections = dict(
+        db.session.execute(
+            select(DriverJobOffer.driver_id, func.count(DriverJobOffer.id))
+            .where(
+                DriverJobOffer.status.in_(("rejected", "expired")),
+                DriverJobOffer.decided_at >= now - rejection_window(),
+            )
+            .group_by(DriverJobOffer.driver_id)
+        ).all()
+    )
+
+    per_driver = offers_per_driver()
+    drivers = []
+    for uid, state, city, locality in driver_rows:
+        uid = int(uid)
+        capacity = per_driver - int(outstanding.get(uid) or 0)
+        if capacity <= 0:
+            continue
+        lat, lng = _coords(city)
+        drivers.append(
+            MatchDriver(
+                id=uid,
+                state=_norm(state),
+                city=_norm(city),
+                locality=_norm(locality),
+                lat=lat,
+                lng=lng,
+                load=int(load.get(uid) or 0),
+                rejections=int(rejections.get(uid) or 0),
+                capacity=capacity,
+            )
+        )
+    positions = fresh_positions([d.id for d in drivers], now=now)
+    for d in drivers:
+        pos = positions.get(d.id)
+        if pos is not None:
+            d.lat, d.lng, d.live = pos.lat, pos.lng, True
+    return orders, drivers
+
+
+def pair_cost(order: MatchOrder, driver: MatchDriver, weights: CostWeights | None = None) -> float:
+    """Pickup distance in km plus load and rejection penalties; INF if ineligible."""
+    w = weights or CostWeights.from_env()
+    if driver.id in order.excluded:
+        return INF
+    if order.state and driver.state and order.state != driver.state and not driver.live:
+        return INF
+    if order.lat is not None and driver.lat is not None:
+        distance = haversine_km(order.lat, order.lng, driver.lat, driver.lng)
+        if distance > w.max_radius_km:
+            return INF
+    elif order.city and order.city == driver.city:
+        distance = SAME_LOCALITY_KM if order.locality and order.locality == driver.locality else SAME_CITY_KM
+    elif order.state and order.state == driver.state:
+        distance = SAME_STATE_KM
+    elif order.city and driver.city:
+        return INF
+    else:
+        distance = UNKNOWN_AREA_KM
+    if order.locality and driver.locality and order.locality != driver.locality and not driver.live:
+        distance += w.locality_mismatch_km
+    return distance + driver.load * w.load_penalty_km + driver.rejections * w.rejection_penalty_km
+
+
+def hungarian(cost: list[list[float]]) -> list[int]:
+    """Minimum-cost assignment for an n x m matrix with n <= m.
+
+    Returns the chosen column for each row. Rows whose only options are INF
+    still get a column; callers drop those pairs.
+    """
+    n = len(cost)
+    m = len(cost[0]) if n else 0
+    big = 1e9
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [INF] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = cost[i0 - 1]
+            delta = INF
+            j1 = 0
+            for j in range(1, m + 1):
+                if used[j]:
+                    continue
+                c = row[j - 1]
+                cur = (big if c == INF else c) - u[i0] - v[j]
+                if cur < minv[j]:
+                    minv[j] = cur
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while True:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+            if j0 == 0:
+                break
+    out = [-1] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            out[p[j] - 1] = j - 1
+    return out
+
+
+def _solve_cell(
+    orders: list[MatchOrder], drivers: list[MatchDriver], weights: CostWeights
+) -> list[tuple[MatchOrder, MatchDriver, float]]:
+    slots = [d for d in drivers for _ in range(max(0, d.capacity))]
+    if not orders or not slots:
+        return []
+    # Orders in a cell share a position and differ only by locality and by
+    # the drivers they already had, so costs are computed once per locality.
+    by_locality: dict[str, list[float]] = {}
+    matrix = []
+    for o in orders:
+        base = by_locality.get(o.locality)
+        if base is None:
+            probe = MatchOrder(id=0, state=o.state, city=o.city, locality=o.locality, lat=o.lat, lng=o.lng)
+            base = by_locality[o.locality] = [pair_cost(probe, d, weights) for d in slots]
+        if o.excluded:
+            base = [INF if d.id in o.excluded else c for d, c in zip(slots, base)]
+        matrix.append(base)
+    pairs = []
+    if len(orders) <= hungarian_max_cell() and len(slots) <= hungarian_max_cell() * 5:
+        if len(orders) <= len(slots):
+            for row, col in enumerate(hungarian(matrix)):
+                if col >= 0 and matrix[row][col] != INF:
+                    pairs.append((row, col))
+        else:
+            transposed = [list(col) for col in zip(*matrix)]
+            for col, row in enumerate(hungarian(transposed)):
+                if row >= 0 and matrix[row][col] != INF:
+                    pairs.append((row, col))
+    else:
+        edges = sorted(
+            (c, r, s) for r, row in enumerate(matrix) for s, c in enumerate(row) if c != INF
+        )
+        taken_rows, taken_slots = set(), set()
+        for c, r, s in edges:
+            if r in taken_rows or s in taken_slots:
+                continue
+            taken_rows.add(r)
+            taken_slots.add(s)
+            pairs.append((r, s))
+    return [(orders[r], slots[s], matrix[r][s]) for r, s in pairs]
+
+
+def solve_assignment(orders: list[MatchOrder], drivers: list[MatchDriver]) -> list[tuple[MatchOrder, MatchDriver, float]]:
+    """Assign per city cell, oldest cell first, sharing driver capacity across cells."""
+    weights = CostWeights.from_env()
+    cells: dict[tuple[str, str], list[MatchOrder]] = {}
+    for o in orders:
+        cells.setdefault(o.cell, []).append(o)
+    out = []
+    for cell_orders in cells.values():
+        anchor = cell_orders[0]
+        probe = MatchOrder(id=0, state=anchor.state, city=anchor.city, lat=anchor.lat, lng=anchor.lng)
+        # Keep the cell matrix small: only the drivers cheapest for the cell itself.
+        scored = [(pair_cost(probe, d, weights), d.id, d) for d in drivers if d.capacity > 0]
+        keep = max(len(cell_orders) * 3, 50)
+        candidates = [d for c, _id, d in heapq.nsmallest(keep, scored) if c != INF]
+        for o, d, c in _solve_cell(cell_orders, candidates, weights):
+            d.capacity -= 1
+            out.append((o, d, c))
+    return out
+
+
+def _write_offers(pairs: list[tuple[MatchOrder, MatchDriver, float]], *, now: datetime) -> list[dict]:
+    """Bulk-insert offers and notifications for pairs whose order is still open."""
+    if not pairs:
+        return []
+    still_open = set(
+        db.session.execute(
+            select(Order.id).where(
+                Order.id.in_([o.id for o, _d, _c in pairs]),
+                Order.driver_id.is_(None),
+                ~exists().where(
+                    and_(DriverJobOffer.order_id == Order.id, DriverJobOffer.status.in_(OPEN_OFFER_STATUSES))
+                ),
+            )
+        ).scalars()
+    )
+    pairs = [p for p in pairs if p[0].id in still_open]
+    if not pairs:
+        return []
+    offers = db.session.execute(
+        insert(DriverJobOffer.__table__).returning(
+            DriverJobOffer.__table__.c.id,
+            DriverJobOffer.__table__.c.order_id,
+            DriverJobOffer.__table__.c.driver_id,
+        ),
+        [{"order_id": o.id, "driver_id": d.id, "status": "offered", "created_at": now} for o, d, _c in pairs],
+    ).all()
+    phones = dict(
+        db.session.execute(
+            select(User.id, User.phone).where(
+                User.id.in_({d.id for _o, d, _c in pairs}),
+                User.phone.isnot(None),
+                User.phone != "",
+            )
+        ).all()
+    )
+    notifications = []
+    for o, d, _c in pairs:
+        reference = f"order:{o.id}"
+        for channel in OFFER_CHANNELS:
+            # sms/whatsapp go to the driver's phone; drivers without one get in_app only.
+            to = str(d.id) if channel == "in_app" else phones.get(d.id)
+            if not to:
+                continue
+            message = (
+                f"New delivery offer for order #{o.id}" if channel == "in_app" else f"FlipTrybe: New delivery offer #{o.id}"
+            )
+            notifications.append(
+                {
+                    "channel": channel,
+                    "to": to,
+                    "message": message,
+                    "status": "queued",
+                    "reference": reference,
+                    "attempt_count": 0,
+                    "max_attempts": 5,
+                    "next_attempt_at": now,
+                    "created_at": now,
+                }
+            )
+    db.session.execute(insert(NotificationQueue.__table__), notifications)
+    db.session.commit()
+    written = []
+    for offer_id, order_id, driver_id in offers:
+        payload = {
+            "id": int(offer_id),
+            "order_id": int(order_id),
+            "driver_id": int(driver_id),
+            "status": "offered",
+            "created_at": now.isoformat(),
+            "decided_at": None,
+        }
+        # Core inserts skip the ORM session hooks, so publish here.
+        realtime_publish(driver_room(driver_id), "driver.offer", payload)
+        written.append(payload)
+    return written
+
+
+def match_pending_orders(
+    *,
+    max_orders: int | None = None,
+    order_ids: list[int] | None = None,
+    now: datetime | None = None,
+) -> dict:
+    now = now or datetime.utcnow()
+    orders, drivers = load_snapshot(max_orders=max_orders, order_ids=order_ids, now=now)
+    pairs = solve_assignment(orders, drivers)
+    try:
+        offers = _write_offers(pairs, now=now)
+    except Exception:
+        db.session.rollback()
+        raise
+    costs = [c for _o, _d, c in pairs]
+    return {
+        "orders": len(orders),
+        "drivers": len(drivers),
+        "offered": len(offers),
+        "unmatched": len(orders) - len(offers),
+        "avg_cost_km": round(sum(costs) / len(costs), 3) if costs else None,
+    }
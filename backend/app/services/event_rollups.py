@@ -0,0 +1,241 @@
+"""Hourly rollups for platform events.
+
+``platform_event_hourly`` holds event counts per complete UTC hour, event
+type and severity. The rollup job recomputes every hour after the last one
+it rolled, plus a short lookback for late commits, with one grouped query
+over the ``(created_at, event_type, severity)`` index. Hours without events
+get a zero row, so the last rolled hour is always ``max(hour)``.
+
+Readers combine the rollup with live grouped counts for the partial hours at
+either end of the requested range, so answers are exact to the second while
+raw events are only read for those edges.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+from app.extensions import db
+from app.models import PlatformEvent, PlatformEventHourly
+from app.utils.env import env_int
+
+
+HOUR = timedelta(hours=1)
+
+
+def hour_floor(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def hour_ceil(value: datetime) -> datetime:
+    floor = hour_floor(value)
+    return floor if floor == value else floor + HOUR
+
+
+def _as_hour(value) -> datetime | None:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return hour_floor(value)
+    try:
+        return hour_floor(datetime.fromisoformat(str(value)[:19]))
+    except Exception:
+        return None
+
+
+def _hour_bucket(column):
+    if (db.session.get_bind().dialect.name or "").lower() == "postgresql":
+        return func.date_trunc("hour", column)
+    return func.strftime("%Y-%m-%d %H:00:00", column)
+
+
+def _event_type(value) -> str:
+    return (value or "unknown").strip() or "unknown"
+
+
+def _severity(value) -> str:
+    return (value or "INFO").strip().upper() or "INFO"
+
+
+def _raw_counts(start: datetime, end: datetime, *, event_type: str | None = None, severity: str | None = None):
+    """``(hour, event_type, severity, count)`` grouped from ``platform_events`` over ``[start, end)``."""
+    bucket = _hour_bucket(PlatformEvent.created_at)
+    query = select(bucket, PlatformEvent.event_type, PlatformEvent.severity, func.count()).where(
+        PlatformEvent.created_at >= start, PlatformEvent.created_at < end
+    )
+    if event_type:
+        query = query.where(PlatformEvent.event_type == event_type)
+    if severity:
+        query = query.where(PlatformEvent.severity == severity)
+    rows = db.session.execute(query.group_by(bucket, PlatformEvent.event_type, PlatformEvent.severity))
+    return [(_as_hour(h), _event_type(t), _severity(s), int(c or 0)) for h, t, s, c in rows]
+
+
+# ---------------------------------------------------------------------------
+# Rollup
+# ---------------------------------------------------------------------------
+
+
+def rolled_through() -> datetime | None:
+    """End of the last rolled hour, or None before the first rollup."""
+    last = db.session.execute(select(func.max(PlatformEventHourly.hour))).scalar()
+    last = _as_hour(last)
+    return last + HOUR if last is not None else None
+
+
+def rollup_event_hours(start: datetime, end: datetime, *, now: datetime | None = None) -> dict:
+    """Recompute the hours in ``[start, end)``; both are hour boundaries. Does not commit."""
+    start, end = hour_floor(start), hour_floor(end)
+    if end <= start:
+        return {"hours": 0, "rows": 0}
+    now = now or datetime.utcnow()
+    counts: dict[tuple[datetime, str, str], int] = defaultdict(int)
+    for hour, event_type, severity, count in _raw_counts(start, end):
+        counts[(hour, event_type[:80], severity[:16])] += count
+    seen = {hour for hour, _, _ in counts}
+    cursor = start
+    while cursor < end:
+        if cursor not in seen:
+            counts[(cursor, "", "")] = 0
+        cursor += HOUR
+
+    table = PlatformEventHourly.__table__
+    db.session.execute(delete(table).where(table.c.hour >= start, table.c.hour < end))
+    db.session.execute(
+        insert(table),
+        [
+            {"hour": hour, "event_type": event_type, "severity": severity, "count": count, "updated_at": now}
+            for (hour, event_type, severity), count in counts.items()
+        ],
+    )
+    return {"hours": int((end - start) / HOUR), "rows": len(counts)}
+
+
+def refresh_event_rollup(
+    *,
+    lookback_hours: int = 2,
+    max_hours: int | None = None,
+    now: datetime | None = None,
+) -> dict:
+    """Roll up complete hours since the last run, re-rolling the trailing ``lookback_hours``.
+
+    The first run starts ``EVENT_ROLLUP_BACKFILL_HOURS`` back. At most
+    ``max_hours`` are rolled per call, oldest first, committing per day.
+    """
+    now = now or datetime.utcnow()
+    current = hour_floor(now)
+    limit = max_hours if max_hours is not None else env_int("EVENT_ROLLUP_MAX_HOURS_PER_RUN", 744, minimum=1)
+    through = rolled_through()
+    if through is None:
+        through = current - HOUR * env_int("EVENT_ROLLUP_BACKFILL_HOURS", 744, minimum=1)
+    start = min(through, current - HOUR * max(0, int(lookback_hours)))
+    end = min(current, start + HOUR * int(limit))
+
+    totals = {"hours": 0, "rows": 0, "pruned": 0}
+    cursor = start
+    while cursor < end:
+        stop = min(end, cursor + HOUR * 24)
+        result = rollup_event_hours(cursor, stop, now=now)
+        db.session.commit()
+        totals["hours"] += result["hours"]
+        totals["rows"] += result["rows"]
+        cursor = stop
+
+    retention_days = env_int("EVENT_ROLLUP_RETENTION_DAYS", 400, minimum=1)
+    table = PlatformEventHourly.__table__
+    totals["pruned"] = int(
+        db.session.execute(delete(table).where(table.c.hour < current - timedelta(days=retention_days))).rowcount or 0
+    )
+    db.session.commit()
+    return totals
+
+
+# ---------------------------------------------------------------------------
+# Readers
+# ---------------------------------------------------------------------------
+
+
+def event_counts(
+    start: datetime,
+    end: datetime,
+    *,
+    by_hour: bool = False,
+    event_type: str | None = None,
+    severity: str | None = None,
+) -> dict[tuple, int]:
+    """Event counts over ``[start, end)`` keyed by ``(hour, event_type, severity)``.
+
+    ``hour`` is None unless ``by_hour``. Complete hours up to the last rolled
+    hour come from the rollup; the partial first hour and everything after
+    the rollup are counted live.
+    """
+    out: dict[tuple, int] = defaultdict(int)
+    if end <= start:
+        return out
+
+    def _add(rows):
+        for hour, et, sev, count in rows:
+            if count:
+                out[(hour if by_hour else None, et, sev)] += count
+
+    lo = hour_ceil(start)
+    hi = min(hour_floor(end), rolled_through() or lo)
+    if hi <= lo:
+        _add(_raw_counts(start, end, event_type=event_type, severity=severity))
+        return out
+    if start < lo:
+        _add(_raw_counts(start, lo, event_type=event_type, severity=severity))
+    query = select(
+        PlatformEventHourly.hour,
+        PlatformEventHourly.event_type,
+        PlatformEventHourly.severity,
+        PlatformEventHourly.count,
+    ).where(PlatformEventHourly.hour >= lo, PlatformEventHourly.hour < hi)
+    if event_type:
+        query = query.where(PlatformEventHourly.event_type == event_type)
+    if severity:
+        query = query.where(PlatformEventHourly.severity == severity)
+    _add((_as_hour(h), et, sev, int(c or 0)) for h, et, sev, c in db.session.execute(query))
+    if hi < end:
+        _add(_raw_counts(hi, end, event_type=event_type, severity=severity))
+    return out
+
+
+def event_total(start: datetime, end: datetime, *, event_type: str | None = None, severity: str | None = None) -> int:
+    return int(sum(event_counts(start, end, event_type=event_type, severity=severity).values()))
+
+
+def event_summary(*, now: datetime | None = None) -> dict:
+    """Counts by type and by severity for the last 24 hours and 7 days."""
+    now = now or datetime.utcnow()
+    out = {}
+    for label, since in (("last_24h", now - timedelta(hours=24)), ("last_7d", now - timedelta(days=7))):
+        by_type: dict[str, int] = defaultdict(int)
+        by_severity: dict[str, int] = defaultdict(int)
+        for (_, et, sev), count in event_counts(since, now).items():
+            by_type[et] += count
+            by_severity[sev] += count
+        out[label] = dict(by_type)
+        out[f"severity_{label}"] = dict(by_severity)
+    return out
+
+
+def event_series(
+    hours: int,
+    *,
+    now: datetime | None = None,
+    event_type: str | None = None,
+    severity: str | None = None,
+) -> list[dict]:
+    """Zero-filled hourly counts for the last ``hours`` hours, the current partial hour last."""
+    now = now or datetime.utcnow()
+    first = hour_floor(now) - HOUR * (max(1, int(hours)) - 1)
+    counts: dict[datetime, int] = defaultdict(int)
+    for (hour, _, _), count in event_counts(first, now, by_hour=True, event_type=event_type, severity=severity).items():
+        counts[hour] += count
+    return [
+        {"hour": (first + HOUR * n).isoformat(), "count": int(counts.get(first + HOUR * n, 0))}
+        for n in range(max(1, int(hours)))
+    ]
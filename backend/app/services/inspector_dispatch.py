@@ -0,0 +1,327 @@
+"""Inspector dispatch index.
+
+``inspector_dispatch`` holds one row per inspector: eligibility (active,
+bond covers the tier requirement), normalised region, ranking fields and
+the number of open inspections. Session hooks keep it current: profile and
+bond flushes refresh eligibility, and order flushes that move an inspection
+in or out of an open status adjust ``open_load`` by +/-1. Picking an
+inspector is then an ordered index seek instead of a per-inspector scan.
+``rebuild_dispatch_index`` recomputes everything from the source tables and
+reports any drift it corrected.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import bindparam, case, delete, event, func, inspect, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import InspectorBond, InspectorDispatchEntry, InspectorProfile, Order
+from app.utils.bonding import required_amount_for_tier, reserve_for_inspection
+from app.utils.db_compat import load_previous_value
+
+
+OPEN_INSPECTION_STATUSES = ("PENDING", "ON_MY_WAY", "ARRIVED", "INSPECTED")
+TIER_RANKS = {"BRONZE": 1, "SILVER": 2, "GOLD": 3, "PLATINUM": 4}
+RANK_TIERS = {rank: tier for tier, rank in TIER_RANKS.items()}
+
+
+def tier_rank(tier: str | None) -> int:
+    return TIER_RANKS.get((tier or "BRONZE").strip().upper(), 1)
+
+
+def normalize_region(value: str | None) -> str:
+    return (value or "").strip().lower()[:64]
+
+
+def _entries():
+    return InspectorDispatchEntry.__table__
+
+
+def _eligibility(conn, user_ids=None) -> dict[int, dict]:
+    """Dispatch fields per inspector computed from profiles and bonds."""
+    query = select(
+        InspectorProfile.user_id,
+        InspectorProfile.is_active,
+        InspectorProfile.region,
+        InspectorProfile.reputation_tier,
+        InspectorProfile.reputation_score,
+        InspectorBond.bond_available_amount,
+    ).select_from(InspectorProfile).outerjoin(InspectorBond, InspectorBond.inspector_user_id == InspectorProfile.user_id)
+    if user_ids is not None:
+        query = query.where(InspectorProfile.user_id.in_([int(u) for u in user_ids]))
+    out = {}
+    for user_id, is_active, region, tier, score, available in conn.execute(query):
+        required = required_amount_for_tier(tier)
+        out[int(user_id)] = {
+            "region": normalize_region(region),
+            "eligible": bool(is_active) and available is not None and float(available or 0.0) >= required,
+            "tier_rank": tier_rank(tier),
+            "reputation_score": float(score or 0.0),
+        }
+    return out
+
+
+def _open_loads(conn, user_ids=None) -> dict[int, int]:
+    query = (
+        select(Order.inspector_id, func.count(Order.id))
+        .where(Order.inspector_id.isnot(None), Order.inspection_status.in_(OPEN_INSPECTION_STATUSES))
+        .group_by(Order.inspector_id)
+    )
+    if user_ids is not None:
+        query = query.where(Order.inspector_id.in_([int(u) for u in user_ids]))
+    return {int(k): int(v) for k, v in conn.execute(query)}
+
+
+def _refresh_entries(conn, user_ids, *, now: datetime) -> None:
+    ids = sorted({int(u) for u in user_ids if u is not None})
+    if not ids:
+        return
+    table = _entries()
+    fields = _eligibility(conn, ids)
+    existing = set(conn.execute(select(table.c.inspector_user_id).where(table.c.inspector_user_id.in_(ids))).scalars())
+    updates = [{"uid": uid, **fields.get(uid, {"eligible": False}), "now": now} for uid in ids if uid in existing]
+    for row in updates:
+        row.setdefault("region", None)
+    if updates:
+        # Profiles that disappeared keep their row (and load) but stop being eligible.
+        full = [r for r in updates if r["region"] is not None]
+        gone = [r["uid"] for r in updates if r["region"] is None]
+        if full:
+            conn.execute(
+                update(table)
+                .where(table.c.inspector_user_id == bindparam("uid"))
+                .values(
+                    region=bindparam("region"),
+                    eligible=bindparam("eligible"),
+                    tier_rank=bindparam("tier_rank"),
+                    reputation_score=bindparam("reputation_score"),
+                    updated_at=bindparam("now"),
+                ),
+                full,
+            )
+        if gone:
+            conn.execute(update(table).where(table.c.inspector_user_id.in_(gone)).values(eligible=False, updated_at=now))
+    new_ids = [uid for uid in ids if uid not in existing and uid in fields]
+    if new_ids:
+        loads = _open_loads(conn, new_ids)
+        conn.execute(
+            insert(table),
+            [
+                {"inspector_user_id": uid, **fields[uid], "open_load": loads.get(uid, 0), "updated_at": now}
+                for uid in new_ids
+            ],
+        )
+
+
+def _load_delta_stmt():
+    # CASE rather than a two-argument max()/greatest(), which only one of
+    # SQLite and Postgres has.
+    table = _entries()
+    new_load = table.c.open_load + bindparam("delta")
+    return (
+        update(table)
+        .where(table.c.inspector_user_id == bindparam("uid"))
+        .values(open_load=case((new_load < 0, 0), else_=new_load), updated_at=bindparam("now"))
+    )
+
+
+def _apply_load_deltas(conn, deltas: Counter, *, now: datetime) -> None:
+    rows = [{"uid": int(uid), "delta": int(d), "now": now} for uid, d in deltas.items() if d]
+    if rows:
+        conn.execute(_load_delta_stmt(), rows)
+
+
+for _attr in (Order.inspector_id, Order.inspection_status):
+    event.listen(_attr, "set", load_previous_value, active_history=True)
+
+
+def _previous(state, attr: str, current):
+    hist = state.attrs[attr].history
+    if hist.deleted:
+        return hist.deleted[0]
+    if hist.unchanged:
+        return hist.unchanged[0]
+    return current
+
+
+def _order_load_delta(obj, *, is_new: bool) -> dict[int, int]:
+    state = inspect(obj)
+    inspector_id = getattr(obj, "inspector_id", None)
+    status = (getattr(obj, "inspection_status", None) or "").upper()
+    if is_new:
+        old_inspector, old_status = None, ""
+    else:
+        if not (state.attrs.inspector_id.history.has_changes() or state.attrs.inspection_status.history.has_changes()):
+            return {}
+        old_inspector = _previous(state, "inspector_id", inspector_id)
+        old_status = (_previous(state, "inspection_status", status) or "").upper()
+    out: Counter = Counter()
+    if old_inspector is not None and old_status in OPEN_INSPECTION_STATUSES:
+        out[int(old_inspector)] -= 1
+    if inspector_id is not None and status in OPEN_INSPECTION_STATUSES:
+        out[int(inspector_id)] += 1
+    return {k: v for k, v in out.items() if v}
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_inspector_dispatch(session, _flush_context) -> None:
+    refresh: set[int] = set()
+    deltas: Counter = Counter()
+    for collection, is_new in ((session.new, True), (session.dirty, False), (session.deleted, False)):
+        for obj in collection:
+            table = getattr(obj, "__tablename__", "")
+            if table == "inspector_profiles":
+                refresh.add(getattr(obj, "user_id", None))
+            elif table == "inspector_bonds":
+                refresh.add(getattr(obj, "inspector_user_id", None))
+            elif table == "orders" and collection is not session.deleted:
+                deltas.update(_order_load_delta(obj, is_new=is_new))
+    refresh.discard(None)
+    if not refresh and not deltas:
+        return
+    try:
+        conn = session.connection()
+        now = datetime.utcnow()
+        with conn.begin_nested():
+            if refresh:
+                _refresh_entries(conn, refresh, now=now)
+            if deltas:
+                _apply_load_deltas(conn, deltas, now=now)
+    except Exception:
+        # Never fail the business write over the index; the rebuild job repairs drift.
+        pass
+
+
+def claim_inspector(order_id: int, inspector_user_id: int) -> bool:
+    """Atomically set the order's inspector if it has none, counting the new load."""
+    claimed = db.session.execute(
+        update(Order)
+        .where(Order.id == int(order_id), Order.inspector_id.is_(None))
+        .values(inspector_id=int(inspector_user_id))
+        .execution_options(synchronize_session="evaluate")
+    ).rowcount
+    if not claimed:
+        return False
+    status = db.session.execute(select(Order.inspection_status).where(Order.id == int(order_id))).scalar()
+    if (status or "").upper() in OPEN_INSPECTION_STATUSES:
+        # Bulk UPDATE bypasses the flush hook, so count the assignment here.
+        # Like the hook, a failed counter update must not undo the claim
+        # (its bond reserve is already committed); the rebuild repairs it.
+        try:
+            with db.session.begin_nested():
+                _apply_load_deltas(db.session.connection(), Counter({int(inspector_user_id): 1}), now=datetime.utcnow())
+        except Exception:
+            pass
+    return True
+
+
+def matching_regions(region_hint: str | None) -> list[str]:
+    """Eligible regions equal to, or contained in, the hint (e.g. the pickup address)."""
+    hint = normalize_region(region_hint) if region_hint and len(region_hint) <= 64 else (region_hint or "").strip().lower()
+    if not hint:
+        return []
+    table = _entries()
+    regions = db.session.execute(
+        select(table.c.region).where(table.c.eligible.is_(True), table.c.region != "").distinct()
+    ).scalars()
+    return [r for r in regions if r == hint or r in hint]
+
+
+def pick_candidates(region_hint: str | None, *, limit: int = 10) -> list[tuple[int, int]]:
+    """Best eligible ``(inspector_user_id, tier_rank)``: region matches first, then everyone."""
+    table = _entries()
+    order_by = (table.c.tier_rank.desc(), table.c.reputation_score.desc(), table.c.open_load.asc(), table.c.inspector_user_id.asc())
+    out: list[tuple[int, int]] = []
+    regions = matching_regions(region_hint)
+    if regions:
+        out.extend(
+            (int(uid), int(rank))
+            for uid, rank in db.session.execute(
+                select(table.c.inspector_user_id, table.c.tier_rank)
+                .where(table.c.eligible.is_(True), table.c.region.in_(regions))
+                .order_by(*order_by)
+                .limit(int(limit))
+            )
+        )
+    if len(out) < int(limit):
+        seen = [uid for uid, _ in out]
+        query = select(table.c.inspector_user_id, table.c.tier_rank).where(table.c.eligible.is_(True))
+        if seen:
+            query = query.where(table.c.inspector_user_id.notin_(seen))
+        out.extend((int(uid), int(rank)) for uid, rank in db.session.execute(query.order_by(*order_by).limit(int(limit) - len(out))))
+    return out
+
+
+def assign_inspector(order: Order) -> int | None:
+    """Reserve bond for the best available inspector and return their user id."""
+    for inspector_user_id, rank in pick_candidates(order.pickup):
+        required = required_amount_for_tier(RANK_TIERS.get(rank, "BRONZE"))
+        if reserve_for_inspection(inspector_user_id, int(order.id), required):
+            return inspector_user_id
+    return None
+
+
+def rebuild_dispatch_index(*, now: datetime | None = None) -> dict:
+    """Recompute every entry from profiles, bonds and open orders; returns what changed."""
+    now = now or datetime.utcnow()
+    conn = db.session.connection()
+    table = _entries()
+    fields = _eligibility(conn)
+    loads = _open_loads(conn)
+    existing = {
+        int(row.inspector_user_id): row
+        for row in conn.execute(
+            select(
+                table.c.inspector_user_id,
+                table.c.region,
+                table.c.eligible,
+                table.c.tier_rank,
+                table.c.reputation_score,
+                table.c.open_load,
+            )
+        )
+    }
+    inserts, updates = [], []
+    load_drift = 0
+    for uid, want in fields.items():
+        want = {**want, "open_load": loads.get(uid, 0)}
+        have = existing.get(uid)
+        if have is None:
+            inserts.append({"inspector_user_id": uid, **want, "updated_at": now})
+            continue
+        current = {k: getattr(have, k) for k in want}
+        current["eligible"] = bool(current["eligible"])
+        if current != want:
+            if int(have.open_load or 0) != want["open_load"]:
+                load_drift += 1
+            updates.append({"uid": uid, **want, "now": now})
+    orphans = [uid for uid in existing if uid not in fields]
+    if inserts:
+        conn.execute(insert(table), inserts)
+    if updates:
+        conn.execute(
+            update(table)
+            .where(table.c.inspector_user_id == bindparam("uid"))
+            .values(
+                region=bindparam("region"),
+                eligible=bindparam("eligible"),
+                tier_rank=bindparam("tier_rank"),
+                reputation_score=bindparam("reputation_score"),
+                open_load=bindparam("open_load"),
+                updated_at=bindparam("now"),
+            ),
+            updates,
+        )
+    if orphans:
+        conn.execute(delete(table).where(table.c.inspector_user_id.in_(orphans)))
+    db.session.commit()
+    return {
+        "inspectors": len(fields),
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "removed": len(orphans),
+        "load_drift": load_drift,
+    }
@@ -0,0 +1,454 @@
+"""Precomputed leaderboards.
+
+Boards are ranked sets of ``(user_id, score)``:
+
+- ``merchant`` and ``driver``: ledger earnings (``order_sale`` and
+  ``delivery_fee`` credits) over the last 7, 30 and 90 days;
+- ``merchant_score``: the merchant profile score, all-time (window 0).
+
+Every board lives in ``leaderboard_scores``. When Redis is configured, each
+board is mirrored in a sorted set, which serves top-N reads and rank
+lookups in O(log n). Ledger credits add to every earnings window as they
+post, and merchant profile flushes reset that merchant's score. Redis
+changes are applied only after the transaction commits. The nightly
+recompute rebuilds every board from the source tables; that is also when
+credits that have aged out of a window drop off.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, bindparam, case, delete, event, func, inspect, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import LeaderboardScore, MerchantProfile, User, WalletTxn
+from app.utils import commit_hooks
+from app.utils.db_compat import dialect_insert
+
+try:
+    import redis
+except Exception:  # pragma: no cover - optional dependency safety
+    redis = None
+
+
+BOARD_KINDS = {"merchant": ("order_sale",), "driver": ("delivery_fee",)}
+KIND_BOARDS = {kind: board for board, kinds in BOARD_KINDS.items() for kind in kinds}
+EARNINGS_WINDOWS = (7, 30, 90)
+SCORE_BOARD = "merchant_score"
+
+# Profile columns that feed MerchantProfile.score() or board membership.
+PROFILE_FIELDS = (
+    "user_id",
+    "total_orders",
+    "successful_deliveries",
+    "cancelled_orders",
+    "disputes",
+    "avg_rating",
+    "rating_count",
+    "is_suspended",
+)
+
+
+def board_windows(board: str) -> tuple[int, ...]:
+    if board in BOARD_KINDS:
+        return EARNINGS_WINDOWS
+    if board == SCORE_BOARD:
+        return (0,)
+    return ()
+
+
+def _table():
+    return LeaderboardScore.__table__
+
+
+# ---------------------------------------------------------------------------
+# Table writes
+# ---------------------------------------------------------------------------
+
+
+def _db_write(conn, rows: list[tuple[str, int, int, float]], *, increment: bool, now: datetime) -> None:
+    """Upsert ``(board, window, user_id, value)``; ``increment`` adds instead of replacing."""
+    if not rows:
+        return
+    table = _table()
+    payload = [
+        {"board": b, "window_days": w, "user_id": uid, "score": float(value), "updated_at": now}
+        for b, w, uid, value in rows
+    ]
+    stmt = dialect_insert(table, conn)
+    if stmt is not None:
+        score = table.c.score + stmt.excluded.score if increment else stmt.excluded.score
+        conn.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["board", "window_days", "user_id"],
+                set_={"score": score, "updated_at": stmt.excluded.updated_at},
+            ),
+            payload,
+        )
+        return
+    match = and_(
+        table.c.board == bindparam("k_board"),
+        table.c.window_days == bindparam("k_window"),
+        table.c.user_id == bindparam("k_user"),
+    )
+    value = table.c.score + bindparam("v_score") if increment else bindparam("v_score")
+    for row in payload:
+        touched = conn.execute(
+            update(table).where(match).values(score=value, updated_at=bindparam("v_now")),
+            {"k_board": row["board"], "k_window": row["window_days"], "k_user": row["user_id"], "v_score": row["score"], "v_now": now},
+        ).rowcount
+        if not touched:
+            conn.execute(insert(table), [row])
+
+
+def _db_remove(conn, rows: list[tuple[str, int, int]]) -> None:
+    table = _table()
+    for board, window, user_id in rows:
+        conn.execute(
+            delete(table).where(table.c.board == board, table.c.window_days == window, table.c.user_id == user_id)
+        )
+
+
+# ---------------------------------------------------------------------------
+# Redis mirror
+# ---------------------------------------------------------------------------
+
+
+class RedisLeaderboardStore:
+    """Sorted set per (board, window); member is the user id, score the board score."""
+
+    def __init__(self, client, prefix: str = "fliptrybe:lb:"):
+        self.client = client
+        self.prefix = prefix
+
+    def key(self, board: str, window: int) -> str:
+        return f"{self.prefix}{board}:{int(window)}"
+
+    def apply(self, ops: list[tuple]) -> None:
+        """Apply ``("incr"|"set"|"remove", board, window, user_id[, value])`` to sets that exist.
+
+        A set that is missing has not been loaded by a recompute yet; reads
+        fall back to the table until it is, so partial sets are never created.
+        """
+        keys = sorted({self.key(op[1], op[2]) for op in ops})
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.exists(key)
+        live = {key for key, exists in zip(keys, pipe.execute()) if exists}
+        pipe = self.client.pipeline(transaction=False)
+        for op in ops:
+            key = self.key(op[1], op[2])
+            if key not in live:
+                continue
+            if op[0] == "incr":
+                pipe.zincrby(key, float(op[4]), str(op[3]))
+            elif op[0] == "set":
+                pipe.zadd(key, {str(op[3]): float(op[4])})
+            else:
+                pipe.zrem(key, str(op[3]))
+        pipe.execute()
+
+    def replace(self, board: str, window: int, scores: dict[int, float]) -> None:
+        key = self.key(board, window)
+        tmp = f"{key}:loading"
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(tmp)
+        items = list(scores.items())
+        for i in range(0, len(items), 1000):
+            pipe.zadd(tmp, {str(uid): float(score) for uid, score in items[i : i + 1000]})
+        if items:
+            pipe.rename(tmp, key)
+        else:
+            pipe.delete(key)
+        pipe.execute()
+
+    def top(self, board: str, window: int, *, limit: int, offset: int = 0) -> list[tuple[int, float]] | None:
+        key = self.key(board, window)
+        if not self.client.exists(key):
+            return None
+        rows = self.client.zrevrange(key, int(offset), int(offset) + int(limit) - 1, withscores=True)
+        return [(int(member), float(score)) for member, score in rows]
+
+    def rank(self, board: str, window: int, user_id: int) -> tuple[int | None, float, int] | None:
+        key = self.key(board, window)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.exists(key)
+        pipe.zrevrank(key, str(int(user_id)))
+        pipe.zscore(key, str(int(user_id)))
+        pipe.zcard(key)
+        exists, rank, score, total = pipe.execute()
+        if not exists:
+            return None
+        return (None if rank is None else int(rank) + 1), float(score or 0.0), int(total or 0)
+
+
+_LOCK = threading.Lock()
+_STORE: RedisLeaderboardStore | None = None
+_STORE_READY = False
+
+
+def _store_redis_url() -> str:
+    return (os.getenv("LEADERBOARD_REDIS_URL") or os.getenv("REDIS_URL") or "").strip()
+
+
+def get_redis_store() -> RedisLeaderboardStore | None:
+    """The Redis mirror, or None when Redis is not configured or reachable."""
+    global _STORE, _STORE_READY
+    with _LOCK:
+        if _STORE_READY:
+            return _STORE
+        url = _store_redis_url()
+        if url and redis is not None:
+            try:
+                client = redis.Redis.from_url(url, socket_connect_timeout=0.5, socket_timeout=0.5)
+                client.ping()
+                _STORE = RedisLeaderboardStore(client, (os.getenv("LEADERBOARD_REDIS_PREFIX") or "fliptrybe:lb:").strip())
+            except Exception:
+                _STORE = None
+        _STORE_READY = True
+        return _STORE
+
+
+def _reset_store_for_tests(store=None):
+    global _STORE, _STORE_READY
+    with _LOCK:
+        _STORE = store
+        _STORE_READY = True
+    return store
+
+
+# ---------------------------------------------------------------------------
+# Incremental updates
+# ---------------------------------------------------------------------------
+
+
+def _queue_redis(session, ops: list[tuple]) -> None:
+    # Applied once the root transaction commits, never on a savepoint release.
+    commit_hooks.defer(session, "leaderboard_ops", ops)
+
+
+def _apply_leaderboard_ops(ops: list[tuple]) -> None:
+    store = get_redis_store()
+    if store is None:
+        return
+    try:
+        store.apply(ops)
+    except Exception:
+        # The nightly recompute rewrites the sets.
+        pass
+
+
+commit_hooks.register("leaderboard_ops", _apply_leaderboard_ops)
+
+
+def record_credits(conn, credits: list[dict], *, now: datetime | None = None) -> None:
+    """Add posted ledger credits (``user_id``, ``kind``, ``amount``) to every earnings window."""
+    rows = []
+    for c in credits:
+        board = KIND_BOARDS.get(c.get("kind"))
+        amount = float(c.get("amount") or 0.0)
+        if board is None or amount <= 0:
+            continue
+        rows.extend((board, window, int(c["user_id"]), amount) for window in EARNINGS_WINDOWS)
+    if not rows:
+        return
+    try:
+        with conn.begin_nested():
+            _db_write(conn, rows, increment=True, now=now or datetime.utcnow())
+    except Exception:
+        return
+    _queue_redis(db.session, [("incr", *row) for row in rows])
+
+
+def _profile_changed(obj) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[f].history.has_changes() for f in PROFILE_FIELDS if f in state.attrs)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_merchant_scores(session, _flush_context) -> None:
+    sets: list[tuple[str, int, int, float]] = []
+    removes: list[tuple[str, int, int]] = []
+    for collection, kind in ((session.new, "new"), (session.dirty, "dirty"), (session.deleted, "deleted")):
+        for obj in collection:
+            if getattr(obj, "__tablename__", "") != "merchant_profiles" or getattr(obj, "user_id", None) is None:
+                continue
+            if kind == "dirty" and not _profile_changed(obj):
+                continue
+            if kind == "deleted" or bool(obj.is_suspended):
+                removes.append((SCORE_BOARD, 0, int(obj.user_id)))
+            else:
+                sets.append((SCORE_BOARD, 0, int(obj.user_id), float(obj.score())))
+    if not sets and not removes:
+        return
+    try:
+        conn = session.connection()
+        with conn.begin_nested():
+            _db_write(conn, sets, increment=False, now=datetime.utcnow())
+            _db_remove(conn, removes)
+    except Exception:
+        # Never fail the profile write over the board; the recompute repairs it.
+        return
+    _queue_redis(session, [("set", *row) for row in sets] + [("remove", *row) for row in removes])
+
+
+# ---------------------------------------------------------------------------
+# Recompute
+# ---------------------------------------------------------------------------
+
+
+def _earnings_scores(board: str, now: datetime) -> dict[int, dict[int, float]]:
+    since = {w: now - timedelta(days=w) for w in EARNINGS_WINDOWS}
+    sums = [func.sum(case((WalletTxn.created_at >= since[w], WalletTxn.amount), else_=0.0)) for w in EARNINGS_WINDOWS]
+    out: dict[int, dict[int, float]] = {w: {} for w in EARNINGS_WINDOWS}
+    for user_id, *totals in db.session.execute(
+        select(WalletTxn.user_id, *sums)
+        .where(
+            WalletTxn.kind.in_(BOARD_KINDS[board]),
+            WalletTxn.direction == "credit",
+            WalletTxn.created_at >= since[max(EARNINGS_WINDOWS)],
+        )
+        .group_by(WalletTxn.user_id)
+    ):
+        for window, total in zip(EARNINGS_WINDOWS, totals):
+            if float(total or 0.0) > 0:
+                out[window][int(user_id)] = float(total)
+    return out
+
+
+def _profile_scores() -> dict[int, float]:
+    columns = [getattr(MerchantProfile, f) for f in PROFILE_FIELDS]
+    out = {}
+    for row in db.session.execute(select(*columns).where(MerchantProfile.is_suspended.is_(False))):
+        values = dict(zip(PROFILE_FIELDS, row))
+        if values["user_id"] is not None:
+            # Transient profile, never added to the session: reuses the model's scoring.
+            out[int(values["user_id"])] = float(MerchantProfile(**values).score())
+    return out
+
+
+def recompute_leaderboards(*, now: datetime | None = None) -> dict:
+    """Rebuild every board from the ledger and merchant profiles; returns entry and change counts."""
+    now = now or datetime.utcnow()
+    boards: dict[tuple[str, int], dict[int, float]] = {}
+    for board in BOARD_KINDS:
+        for window, scores in _earnings_scores(board, now).items():
+            boards[(board, window)] = scores
+    boards[(SCORE_BOARD, 0)] = _profile_scores()
+
+    table = _table()
+    changed = 0
+    for (board, window), scores in boards.items():
+        where = (table.c.board == board, table.c.window_days == window)
+        current = dict(db.session.execute(select(table.c.user_id, table.c.score).where(*where)).all())
+        changed += sum(
+            1 for uid in set(current) | set(scores) if abs(float(current.get(uid, 0.0)) - scores.get(uid, 0.0)) > 1e-6
+        )
+        db.session.execute(delete(table).where(*where))
+        if scores:
+            db.session.execute(
+                insert(table),
+                [
+                    {"board": board, "window_days": window, "user_id": uid, "score": score, "updated_at": now}
+                    for uid, score in scores.items()
+                ],
+            )
+    db.session.commit()
+
+    store = get_redis_store()
+    if store is not None:
+        try:
+            for (board, window), scores in boards.items():
+                store.replace(board, window, scores)
+        except Exception:
+            pass
+    return {"boards": len(boards), "entries": sum(len(s) for s in boards.values()), "changed": changed}
+
+
+# ---------------------------------------------------------------------------
+# Readers
+# ---------------------------------------------------------------------------
+
+
+def _db_top(board: str, window: int, *, limit: int, offset: int = 0) -> list[tuple[int, float]]:
+    table = _table()
+    rows = db.session.execute(
+        select(table.c.user_id, table.c.score)
+        .where(table.c.board == board, table.c.window_days == int(window))
+        .order_by(table.c.score.desc(), table.c.user_id.asc())
+        .offset(int(offset))
+        .limit(int(limit))
+    ).all()
+    return [(int(uid), float(score)) for uid, score in rows]
+
+
+def _db_rank(board: str, window: int, user_id: int) -> tuple[int | None, float, int]:
+    table = _table()
+    where = (table.c.board == board, table.c.window_days == int(window))
+    total = int(db.session.execute(select(func.count()).select_from(table).where(*where)).scalar() or 0)
+    score = db.session.execute(select(table.c.score).where(*where, table.c.user_id == int(user_id))).scalar()
+    if score is None:
+        return None, 0.0, total
+    ahead = db.session.execute(
+        select(func.count())
+        .select_from(table)
+        .where(*where, or_(table.c.score > score, and_(table.c.score == score, table.c.user_id < int(user_id))))
+    ).scalar()
+    return int(ahead or 0) + 1, float(score), total
+
+
+def top(board: str, window: int, *, limit: int = 50, offset: int = 0) -> list[tuple[int, float]]:
+    """Highest ``(user_id, score)`` pairs, from Redis when loaded, else the table."""
+    store = get_redis_store()
+    if store is not None:
+        try:
+            rows = store.top(board, window, limit=limit, offset=offset)
+            if rows is not None:
+                return rows
+        except Exception:
+            pass
+    return _db_top(board, window, limit=limit, offset=offset)
+
+
+def rank_of(board: str, window: int, user_id: int) -> dict:
+    """``{"rank", "score", "total"}`` for one user; ``rank`` is None when they are not on the board."""
+    result = None
+    store = get_redis_store()
+    if store is not None:
+        try:
+            result = store.rank(board, window, user_id)
+        except Exception:
+            result = None
+    if result is None:
+        result = _db_rank(board, window, user_id)
+    rank, score, total = result
+    return {"rank": rank, "score": score, "total": total}
+
+
+def hydrate_users(user_ids) -> dict[int, dict]:
+    """Display fields for many users in one ``IN`` query."""
+    ids = sorted({int(u) for u in user_ids if u is not None})
+    if not ids:
+        return {}
+    return {
+        int(uid): {"name": name or "", "role": role or "buyer", "profile_image_url": image or ""}
+        for uid, name, role, image in db.session.execute(
+            select(User.id, User.name, User.role, User.profile_image_url).where(User.id.in_(ids))
+        )
+    }
+
+
+def top_entries(board: str, window: int, *, limit: int = 50, offset: int = 0) -> list[dict]:
+    """Ranked, hydrated rows; users that no longer exist are skipped but keep their rank slot."""
+    rows = top(board, window, limit=limit, offset=offset)
+    users = hydrate_users(uid for uid, _ in rows)
+    out = []
+    for position, (uid, score) in enumerate(rows):
+        user = users.get(uid)
+        if user is None:
+            continue
+        out.append({"rank": int(offset) + position + 1, "user_id": uid, **user, "score": score})
+    return out
@@ -0,0 +1,551 @@
+"""Per-merchant daily KPI counters.
+
+``merchant_daily_stats`` holds counters per merchant, day, listing and
+order status. Session hooks apply deltas as events happen:
+
+- order flushes subtract the order's previous contribution and add its
+  current one;
+- listing views add a view to the listing owner's day;
+- receipts add to their owner's day.
+
+``post_txns`` reports seller credits directly, because ledger rows are
+written with Core inserts that skip the session hooks. Merchant dashboards
+then read one indexed ``(merchant_id, day)`` range instead of scanning
+orders, listings and receipts. ``rebuild_merchant_stats`` recomputes a range
+from the source tables and reports the drift it corrected.
+"""
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, bindparam, delete, event, func, inspect, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import Listing, ListingView, MerchantDailyStat, Order, Receipt, WalletTxn
+from app.services.rollups import ORDER_SUCCESS_STATUSES, _as_day, day_start
+from app.utils.db_compat import dialect_insert, load_previous_value
+from app.utils.env import env_int
+
+
+COMPLETED_STATUSES = ("delivered", "completed")
+SELLER_CREDIT_KINDS = ("order_sale",)
+SALE_FEE_FALLBACK_RATE = 0.05
+
+# Columns that decide an order's key and counters.
+ORDER_FIELDS = (
+    "merchant_id",
+    "listing_id",
+    "status",
+    "created_at",
+    "amount",
+    "delivery_fee",
+    "sale_fee_minor",
+    "sale_seller_minor",
+)
+
+COUNTER_FIELDS = (
+    "orders",
+    "amount_minor",
+    "delivery_fee_minor",
+    "sale_fee_minor",
+    "seller_minor",
+    "views",
+    "credits",
+    "credited_minor",
+    "receipt_fee_minor",
+    "receipt_total_minor",
+)
+
+Key = tuple[int, date, int, str]
+
+
+def _minor(value) -> int:
+    try:
+        return int(round(float(value or 0.0) * 100.0))
+    except Exception:
+        return 0
+
+
+def normalize_status(value: str | None) -> str:
+    return ((value or "").strip().lower() or "unknown")[:32]
+
+
+def order_contribution(values: dict) -> tuple[Key, dict] | None:
+    """Key and counters one order adds, from a dict of ``ORDER_FIELDS``."""
+    merchant_id = values.get("merchant_id")
+    day = _as_day(values.get("created_at"))
+    if merchant_id is None or day is None:
+        return None
+    amount_minor = _minor(values.get("amount"))
+    sale_fee_minor = int(values.get("sale_fee_minor") or 0)
+    seller_minor = int(values.get("sale_seller_minor") or 0)
+    if sale_fee_minor <= 0:
+        sale_fee_minor = int(round(amount_minor * SALE_FEE_FALLBACK_RATE))
+    if seller_minor <= 0:
+        seller_minor = int(round(amount_minor * (1.0 - SALE_FEE_FALLBACK_RATE)))
+    key = (int(merchant_id), day, int(values.get("listing_id") or 0), normalize_status(values.get("status")))
+    return key, {
+        "orders": 1,
+        "amount_minor": amount_minor,
+        "delivery_fee_minor": _minor(values.get("delivery_fee")),
+        "sale_fee_minor": sale_fee_minor,
+        "seller_minor": seller_minor,
+    }
+
+
+def _add(deltas: dict[Key, Counter], contribution, sign: int = 1) -> None:
+    if contribution is None:
+        return
+    key, counters = contribution
+    target = deltas[key]
+    for field, value in counters.items():
+        target[field] += sign * int(value)
+
+
+def apply_deltas(conn, deltas: dict[Key, Counter], *, now: datetime | None = None) -> int:
+    """Add counter deltas to their rows, creating rows as needed."""
+    now = now or datetime.utcnow()
+    rows = []
+    for (merchant_id, day, listing_id, status), counters in deltas.items():
+        if not any(counters.values()):
+            continue
+        rows.append(
+            {
+                "merchant_id": merchant_id,
+                "day": day,
+                "listing_id": listing_id,
+                "status": status,
+                **{f: int(counters.get(f, 0)) for f in COUNTER_FIELDS},
+                "updated_at": now,
+            }
+        )
+    if not rows:
+        return 0
+    table = MerchantDailyStat.__table__
+    stmt = dialect_insert(table, conn)
+    if stmt is not None:
+        conn.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["merchant_id", "day", "listing_id", "status"],
+                set_={
+                    **{f: table.c[f] + stmt.excluded[f] for f in COUNTER_FIELDS},
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            ),
+            rows,
+        )
+        return len(rows)
+    match = and_(
+        table.c.merchant_id == bindparam("k_merchant_id"),
+        table.c.day == bindparam("k_day"),
+        table.c.listing_id == bindparam("k_listing_id"),
+        table.c.status == bindparam("k_status"),
+    )
+    for row in rows:
+        params = {f"k_{k}": row[k] for k in ("merchant_id", "day", "listing_id", "status")}
+        params.update({f"d_{f}": row[f] for f in COUNTER_FIELDS})
+        params["d_now"] = now
+        touched = conn.execute(
+            update(table)
+            .where(match)
+            .values(
+                **{f: table.c[f] + bindparam(f"d_{f}") for f in COUNTER_FIELDS},
+                updated_at=bindparam("d_now"),
+            ),
+            params,
+        ).rowcount
+        if not touched:
+            conn.execute(insert(table), [row])
+    return len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Event hooks
+# ---------------------------------------------------------------------------
+
+
+for _field in ORDER_FIELDS:
+    event.listen(getattr(Order, _field), "set", load_previous_value, active_history=True)
+
+
+def _previous_values(obj) -> dict:
+    state = inspect(obj)
+    out = {}
+    for field in ORDER_FIELDS:
+        hist = state.attrs[field].history
+        if hist.deleted:
+            out[field] = hist.deleted[0]
+        elif hist.unchanged:
+            out[field] = hist.unchanged[0]
+        else:
+            out[field] = getattr(obj, field, None)
+    return out
+
+
+def _current_values(obj) -> dict:
+    return {field: getattr(obj, field, None) for field in ORDER_FIELDS}
+
+
+def _order_deltas(obj, deltas: dict[Key, Counter], *, kind: str) -> None:
+    if kind == "new":
+        _add(deltas, order_contribution(_current_values(obj)))
+        return
+    if kind == "deleted":
+        _add(deltas, order_contribution(_previous_values(obj)), -1)
+        return
+    state = inspect(obj)
+    if not any(state.attrs[f].history.has_changes() for f in ORDER_FIELDS):
+        return
+    _add(deltas, order_contribution(_previous_values(obj)), -1)
+    _add(deltas, order_contribution(_current_values(obj)))
+
+
+def _receipt_contribution(obj) -> tuple[Key, dict] | None:
+    day = _as_day(getattr(obj, "created_at", None))
+    if getattr(obj, "user_id", None) is None or day is None:
+        return None
+    return (int(obj.user_id), day, 0, ""), {
+        "receipt_fee_minor": _minor(getattr(obj, "fee", 0.0)),
+        "receipt_total_minor": _minor(getattr(obj, "total", 0.0)),
+    }
+
+
+def _listing_owners(conn, listing_ids) -> dict[int, int]:
+    ids = sorted({int(i) for i in listing_ids if i is not None})
+    if not ids:
+        return {}
+    return {int(lid): int(uid) for lid, uid in conn.execute(select(Listing.id, Listing.user_id).where(Listing.id.in_(ids)))}
+
+
+@event.listens_for(Session, "after_flush")
+def _track_merchant_stats(session, _flush_context) -> None:
+    deltas: dict[Key, Counter] = defaultdict(Counter)
+    views: list[tuple[int, date, int]] = []
+    for collection, kind in ((session.new, "new"), (session.dirty, "dirty"), (session.deleted, "deleted")):
+        sign = -1 if kind == "deleted" else 1
+        for obj in collection:
+            table = getattr(obj, "__tablename__", "")
+            if table == "orders":
+                _order_deltas(obj, deltas, kind=kind)
+            elif table == "receipts" and kind != "dirty":
+                _add(deltas, _receipt_contribution(obj), sign)
+            elif table == "listing_views" and kind != "dirty":
+                day = _as_day(getattr(obj, "view_date", None))
+                if day is not None and getattr(obj, "listing_id", None) is not None:
+                    views.append((int(obj.listing_id), day, sign))
+    if not deltas and not views:
+        return
+    try:
+        conn = session.connection()
+        with conn.begin_nested():
+            if views:
+                owners = _listing_owners(conn, [lid for lid, _, _ in views])
+                for listing_id, day, sign in views:
+                    if listing_id in owners:
+                        deltas[(owners[listing_id], day, listing_id, "")]["views"] += sign
+            apply_deltas(conn, deltas)
+    except Exception:
+        # Never fail the business write over the counters; the rebuild job repairs drift.
+        pass
+
+
+def _order_id_from_reference(reference: str | None) -> int | None:
+    ref = (reference or "").strip()
+    if not ref.startswith("order:"):
+        return None
+    try:
+        return int(ref.split(":", 1)[1])
+    except Exception:
+        return None
+
+
+def _order_listings(conn, order_ids) -> dict[int, int]:
+    ids = sorted({int(i) for i in order_ids if i is not None})
+    if not ids:
+        return {}
+    return {int(oid): int(lid or 0) for oid, lid in conn.execute(select(Order.id, Order.listing_id).where(Order.id.in_(ids)))}
+
+
+def record_seller_credits(conn, credits: list[dict], *, now: datetime | None = None) -> None:
+    """Count posted seller credits: dicts with ``user_id``, ``amount``, ``reference`` and ``created_at``."""
+    credits = [c for c in credits if c.get("kind") in SELLER_CREDIT_KINDS]
+    if not credits:
+        return
+    try:
+        with conn.begin_nested():
+            listings = _order_listings(conn, [_order_id_from_reference(c.get("reference")) for c in credits])
+            deltas: dict[Key, Counter] = defaultdict(Counter)
+            for c in credits:
+                day = _as_day(c.get("created_at") or now or datetime.utcnow())
+                listing_id = listings.get(_order_id_from_reference(c.get("reference")) or 0, 0)
+                target = deltas[(int(c["user_id"]), day, listing_id, "")]
+                target["credits"] += 1
+                target["credited_minor"] += _minor(c.get("amount"))
+            apply_deltas(conn, deltas, now=now)
+    except Exception:
+        pass
+
+
+def record_status_moves(conn, order_ids, *, from_status: str, now: datetime | None = None) -> None:
+    """Move orders changed by a bulk ``UPDATE`` from ``from_status`` to their current status."""
+    ids = sorted({int(i) for i in order_ids})
+    if not ids:
+        return
+    try:
+        with conn.begin_nested():
+            deltas: dict[Key, Counter] = defaultdict(Counter)
+            columns = [getattr(Order, f) for f in ORDER_FIELDS]
+            for row in conn.execute(select(*columns).where(Order.id.in_(ids))):
+                current = dict(zip(ORDER_FIELDS, row))
+                _add(deltas, order_contribution({**current, "status": from_status}), -1)
+                _add(deltas, order_contribution(current))
+            apply_deltas(conn, deltas, now=now)
+    except Exception:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Rebuild
+# ---------------------------------------------------------------------------
+
+
+def _source_counters(start: date, end: date) -> dict[Key, Counter]:
+    """Counters for ``[start, end)`` recomputed from orders, views, credits and receipts."""
+    lo, hi = day_start(start), day_start(end)
+    out: dict[Key, Counter] = defaultdict(Counter)
+
+    columns = [getattr(Order, f) for f in ORDER_FIELDS]
+    for row in db.session.execute(
+        select(*columns).where(Order.created_at >= lo, Order.created_at < hi).execution_options(yield_per=5000)
+    ):
+        _add(out, order_contribution(dict(zip(ORDER_FIELDS, row))))
+
+    for merchant_id, view_date, listing_id, n in db.session.execute(
+        select(Listing.user_id, ListingView.view_date, ListingView.listing_id, func.count(ListingView.id))
+        .join(Listing, Listing.id == ListingView.listing_id)
+        .where(ListingView.view_date >= start.isoformat(), ListingView.view_date < end.isoformat())
+        .group_by(Listing.user_id, ListingView.view_date, ListingView.listing_id)
+    ):
+        day = _as_day(view_date)
+        if merchant_id is not None and day is not None:
+            out[(int(merchant_id), day, int(listing_id), "")]["views"] += int(n or 0)
+
+    credits = db.session.execute(
+        select(WalletTxn.user_id, WalletTxn.created_at, WalletTxn.reference, WalletTxn.amount).where(
+            WalletTxn.kind.in_(SELLER_CREDIT_KINDS),
+            WalletTxn.direction == "credit",
+            WalletTxn.created_at >= lo,
+            WalletTxn.created_at < hi,
+        )
+    ).all()
+    listings = _order_listings(db.session.connection(), [_order_id_from_reference(r.reference) for r in credits])
+    for user_id, created_at, reference, amount in credits:
+        listing_id = listings.get(_order_id_from_reference(reference) or 0, 0)
+        target = out[(int(user_id), _as_day(created_at), listing_id, "")]
+        target["credits"] += 1
+        target["credited_minor"] += _minor(amount)
+
+    for user_id, created_at, fee, total in db.session.execute(
+        select(Receipt.user_id, Receipt.created_at, Receipt.fee, Receipt.total).where(
+            Receipt.created_at >= lo, Receipt.created_at < hi
+        )
+    ):
+        target = out[(int(user_id), _as_day(created_at), 0, "")]
+        target["receipt_fee_minor"] += _minor(fee)
+        target["receipt_total_minor"] += _minor(total)
+    return out
+
+
+def _rebuild_range(start: date, end: date, *, now: datetime) -> dict:
+    table = MerchantDailyStat.__table__
+    want = {key: counters for key, counters in _source_counters(start, end).items() if any(counters.values())}
+    have = {}
+    for row in db.session.execute(
+        select(table.c.id, table.c.merchant_id, table.c.day, table.c.listing_id, table.c.status, *[table.c[f] for f in COUNTER_FIELDS])
+        .where(table.c.day >= start, table.c.day < end)
+    ):
+        key = (int(row.merchant_id), _as_day(row.day), int(row.listing_id), row.status)
+        have[key] = (int(row.id), {f: int(getattr(row, f) or 0) for f in COUNTER_FIELDS})
+
+    inserts, updates, removed = [], [], []
+    for key, counters in want.items():
+        values = {f: int(counters.get(f, 0)) for f in COUNTER_FIELDS}
+        current = have.get(key)
+        if current is None:
+            merchant_id, day, listing_id, status = key
+            inserts.append(
+                {"merchant_id": merchant_id, "day": day, "listing_id": listing_id, "status": status, **values, "updated_at": now}
+            )
+        elif current[1] != values:
+            updates.append({"row_id": current[0], **{f"v_{f}": v for f, v in values.items()}, "now": now})
+    for key, (row_id, values) in have.items():
+        if key not in want:
+            removed.append(row_id)
+    if inserts:
+        db.session.execute(insert(table), inserts)
+    if updates:
+        db.session.execute(
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(**{f: bindparam(f"v_{f}") for f in COUNTER_FIELDS}, updated_at=bindparam("now")),
+            updates,
+        )
+    if removed:
+        db.session.execute(delete(table).where(table.c.id.in_(removed)))
+    # Rows that only held zeros after deltas cancelled out are cleanup, not drift.
+    drift = len(updates) + len(inserts) + sum(1 for key, (_, v) in have.items() if key not in want and any(v.values()))
+    return {"rows": len(want), "inserted": len(inserts), "updated": len(updates), "removed": len(removed), "drift": drift}
+
+
+def earliest_source_day() -> date | None:
+    candidates = [
+        db.session.execute(select(func.min(Order.created_at))).scalar(),
+        db.session.execute(select(func.min(ListingView.view_date))).scalar(),
+        db.session.execute(
+            select(func.min(WalletTxn.created_at)).where(WalletTxn.kind.in_(SELLER_CREDIT_KINDS))
+        ).scalar(),
+        db.session.execute(select(func.min(Receipt.created_at))).scalar(),
+    ]
+    days = [d for d in (_as_day(c) for c in candidates) if d is not None]
+    return min(days) if days else None
+
+
+def rebuild_merchant_stats(
+    start: date | None = None,
+    end: date | None = None,
+    *,
+    chunk_days: int = 31,
+    now: datetime | None = None,
+) -> dict:
+    """Recompute ``[start, end]`` from the source tables, committing per chunk.
+
+    ``start`` defaults to the earliest source row and ``end`` to today.
+    """
+    now = now or datetime.utcnow()
+    end = end or now.date()
+    start = start or earliest_source_day() or end
+    totals = {"days": 0, "rows": 0, "inserted": 0, "updated": 0, "removed": 0, "drift": 0}
+    cursor = start
+    while cursor <= end:
+        stop = min(end, cursor + timedelta(days=max(1, int(chunk_days)) - 1))
+        result = _rebuild_range(cursor, stop + timedelta(days=1), now=now)
+        db.session.commit()
+        totals["days"] += (stop - cursor).days + 1
+        for k in ("rows", "inserted", "updated", "removed", "drift"):
+            totals[k] += result[k]
+        cursor = stop + timedelta(days=1)
+    return totals
+
+
+def rebuild_window_days() -> int:
+    return env_int("MERCHANT_STATS_REBUILD_DAYS", 90, minimum=1, maximum=3660)
+
+
+# ---------------------------------------------------------------------------
+# Readers
+# ---------------------------------------------------------------------------
+
+
+def read_merchant_stats(
+    merchant_id: int,
+    start: date | None = None,
+    end: date | None = None,
+    *,
+    listings_since: date | None = None,
+) -> dict:
+    """One range read of a merchant's rows over ``[start, end)``, folded for dashboards.
+
+    Returns ``totals`` (all counters), ``by_status`` (orders and amounts per
+    status), ``paid`` and ``completed`` (counters for those statuses),
+    ``days`` (per-day paid orders, revenue, views and credits) and
+    ``listings`` (per-listing paid orders, revenue and views, counted from
+    ``listings_since`` when given).
+    """
+    table = MerchantDailyStat.__table__
+    query = select(table.c.day, table.c.listing_id, table.c.status, *[table.c[f] for f in COUNTER_FIELDS]).where(
+        table.c.merchant_id == int(merchant_id)
+    )
+    if start is not None:
+        query = query.where(table.c.day >= start)
+    if end is not None:
+        query = query.where(table.c.day < end)
+
+    n = len(COUNTER_FIELDS)
+    idx = {f: i for i, f in enumerate(COUNTER_FIELDS)}
+    i_orders, i_amount, i_seller = idx["orders"], idx["amount_minor"], idx["seller_minor"]
+    i_views, i_credited = idx["views"], idx["credited_minor"]
+    per_status: dict[str, list[int]] = {}
+    days: dict[date, Counter] = defaultdict(Counter)
+    listings: dict[int, Counter] = defaultdict(Counter)
+    for row_day, listing_id, status, *values in db.session.execute(query).tuples():
+        values = [int(v or 0) for v in values]
+        sums = per_status.get(status)
+        if sums is None:
+            sums = per_status[status] = [0] * n
+        for i, v in enumerate(values):
+            sums[i] += v
+        row_day = _as_day(row_day)
+        day = days[row_day]
+        in_listing_window = listings_since is None or row_day >= listings_since
+        if not status:
+            day["views"] += values[i_views]
+            day["credited_minor"] += values[i_credited]
+            if in_listing_window:
+                listings[int(listing_id)]["views"] += values[i_views]
+            continue
+        day["orders"] += values[i_orders]
+        if status in ORDER_SUCCESS_STATUSES:
+            day["paid_orders"] += values[i_orders]
+            day["paid_amount_minor"] += values[i_amount]
+            day["seller_minor"] += values[i_seller]
+            if in_listing_window:
+                listing = listings[int(listing_id)]
+                listing["paid_orders"] += values[i_orders]
+                listing["paid_amount_minor"] += values[i_amount]
+
+    def _fold(statuses) -> dict:
+        out = dict.fromkeys(COUNTER_FIELDS, 0)
+        for status in statuses:
+            for f, v in zip(COUNTER_FIELDS, per_status[status]):
+                out[f] += v
+        return out
+
+    totals = _fold(per_status)
+    paid = _fold(s for s in per_status if s in ORDER_SUCCESS_STATUSES)
+    completed = _fold(s for s in per_status if s in COMPLETED_STATUSES)
+    by_status = {
+        status: {"orders": sums[i_orders], "amount_minor": sums[i_amount]}
+        for status, sums in per_status.items()
+        if status and sums[i_orders]
+    }
+    return {
+        "totals": totals,
+        "paid": paid,
+        "completed": completed,
+        "by_status": by_status,
+        "days": {d: dict(c) for d, c in days.items()},
+        "listings": {lid: dict(c) for lid, c in listings.items()},
+    }
+
+
+def daily_series(stats: dict, start: date, end: date) -> list[dict]:
+    """Zero-filled per-day series for ``[start, end)`` from ``read_merchant_stats`` output."""
+    out = []
+    cursor = start
+    while cursor < end:
+        day = stats["days"].get(cursor) or {}
+        out.append(
+            {
+                "day": cursor.isoformat(),
+                "orders": int(day.get("orders", 0)),
+                "paid_orders": int(day.get("paid_orders", 0)),
+                "revenue_minor": int(day.get("paid_amount_minor", 0)),
+                "net_earnings_minor": int(day.get("seller_minor", 0)),
+                "credited_minor": int(day.get("credited_minor", 0)),
+                "views": int(day.get("views", 0)),
+            }
+        )
+        cursor += timedelta(days=1)
+    return out
@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.integrations.payments.base import PaymentsProvider, TransferItem, TransferRejected, TransferResult
+from app.models import PayoutBatch, PayoutRecipient, PayoutRequest, User
+from app.utils.events import log_event
+from app.utils.wallets import post_txns
+
+
+DEFAULT_BATCH_LIMIT = 200
+MAX_BATCH_LIMIT = 500
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def _payout_amounts(p: PayoutRequest, fee_rate_for: Callable[[str, str], float] | None) -> tuple[float, float]:
+    fee_amount = float(p.fee_amount or 0.0)
+    net_amount = float(p.net_amount or 0.0)
+    if fee_amount <= 0.0 and net_amount <= 0.0 and fee_rate_for is not None:
+        # Legacy requests created before fees were stored on the row.
+        user = db.session.get(User, int(p.user_id))
+        role = (getattr(user, "role", None) or "buyer").strip().lower()
+        rate = float(fee_rate_for(role, (p.speed or "standard").strip().lower()))
+        fee_amount = round(float(p.amount or 0.0) * rate, 2)
+        net_amount = round(float(p.amount or 0.0) - fee_amount, 2)
+    if net_amount <= 0.0:
+        net_amount = round(float(p.amount or 0.0) - fee_amount, 2)
+    return fee_amount, net_amount
+
+
+def _claim_approved(payout_ids: list[int] | None, limit: int) -> list[PayoutRequest]:
+    stmt = (
+        select(PayoutRequest)
+        .where(PayoutRequest.status == "approved", PayoutRequest.batch_id.is_(None))
+        .order_by(PayoutRequest.created_at.asc(), PayoutRequest.id.asc())
+        .limit(int(limit))
+    )
+    if payout_ids:
+        stmt = stmt.where(PayoutRequest.id.in_([int(pid) for pid in payout_ids]))
+    if (db.engine.dialect.name or "").lower() == "postgresql":
+        # Concurrent batch builders skip rows another builder already holds.
+        stmt = stmt.with_for_update(skip_locked=True)
+    return list(db.session.execute(stmt).scalars().all())
+
+
+def _ledger_ref(p: PayoutRequest, batch: PayoutBatch) -> str:
+    # Scoped to the batch so a payout released after a provider outage can be
+    # debited again by a later batch.
+    return f"payout:{int(p.id)}:batch:{int(batch.id)}"
+
+
+def _transfer_ref(p: PayoutRequest) -> str:
+    # One reference per payout for its whole life: if a submission's outcome
+    # is unknown, the provider rejects any second transfer under it.
+    return f"PO-{int(p.id)}"
+
+
+def _not_found_grace() -> timedelta:
+    try:
+        seconds = int((os.getenv("PAYOUT_NOT_FOUND_GRACE_SECONDS") or "3600").strip())
+    except Exception:
+        seconds = 3600
+    return timedelta(seconds=max(60, seconds))
+
+
+def _reversal_legs(p: PayoutRequest, batch: PayoutBatch, platform_user_id: int) -> list[dict]:
+    ref = _ledger_ref(p, batch)
+    legs = [
+        dict(
+            user_id=int(p.user_id),
+            direction="credit",
+            amount=float(p.amount or 0.0),
+            kind="payout_reversal",
+            reference=ref,
+            note="Payout failed, funds returned",
+            idempotency_key=f"{ref}:reversal",
+        )
+    ]
+    if float(p.fee_amount or 0.0) > 0:
+        legs.append(
+            dict(
+                user_id=int(platform_user_id),
+                direction="debit",
+                amount=float(p.fee_amount or 0.0),
+                kind="withdrawal_fee_reversal",
+                reference=ref,
+                note="Withdrawal fee reversed",
+                idempotency_key=f"{ref}:fee_reversal",
+            )
+        )
+    return legs
+
+
+def _mark_failed(p: PayoutRequest, reason: str, now: datetime) -> None:
+    p.status = "failed"
+    p.failure_reason = (reason or "failed")[:240]
+    p.updated_at = now
+
+
+def _mark_paid(p: PayoutRequest, batch: PayoutBatch, now: datetime) -> None:
+    p.status = "paid"
+    p.failure_reason = None
+    p.updated_at = now
+    log_event(
+        "payout_released",
+        actor_user_id=int(batch.created_by) if batch.created_by is not None else None,
+        subject_type="payout",
+        subject_id=int(p.id),
+        idempotency_key=f"payout_released:{int(p.id)}",
+        metadata={
+            "amount": float(p.amount or 0.0),
+            "fee_amount": float(p.fee_amount or 0.0),
+            "batch_id": int(batch.id),
+        },
+    )
+
+
+def _refresh_counts(batch: PayoutBatch, now: datetime) -> None:
+    rows = db.session.execute(
+        select(PayoutRequest.status).where(PayoutRequest.batch_id == int(batch.id))
+    ).scalars().all()
+    batch.item_count = len(rows)
+    batch.paid_count = sum(1 for s in rows if s == "paid")
+    batch.failed_count = sum(1 for s in rows if s == "failed")
+    if batch.status != "failed" and not any(s == "processing" for s in rows):
+        batch.status = "completed"
+        batch.completed_at = batch.completed_at or now
+    batch.updated_at = now
+
+
+def _apply_results(
+    batch: PayoutBatch,
+    pairs: list[tuple[PayoutRequest, TransferResult]],
+    *,
+    platform_user_id: int,
+    now: datetime,
+) -> None:
+    reversals: list[dict] = []
+    submitted_at = batch.submitted_at or batch.created_at or now
+    for p, res in pairs:
+        if res.transfer_code:
+            p.provider_reference = res.transfer_code[:120]
+        status = res.status
+        if status == "pending" and res.reason == "not_found" and now - submitted_at > _not_found_grace():
+            # The provider still has no transfer under our reference long after
+            # the submission, so it was never created.
+            status = "failed"
+        if status == "success":
+            _mark_paid(p, batch, now)
+        elif status == "failed":
+            reversals.extend(_reversal_legs(p, batch, platform_user_id))
+            _mark_failed(p, res.reason or "provider_failed", now)
+    if reversals:
+        post_txns(reversals, commit=False)
+
+
+def create_payout_batch(
+    *,
+    provider: PaymentsProvider,
+    platform_user_id: int,
+    created_by: int | None = None,
+    payout_ids: list[int] | None = None,
+    limit: int | None = None,
+    fee_rate_for: Callable[[str, str], float] | None = None,
+) -> PayoutBatch | None:
+    """Group approved payouts into a batch, debit them together and submit.
+
+    All wallet debits (and platform fee credits) for the batch are posted in a
+    single transaction before the provider is called; payouts that cannot be
+    debited fail individually. Debits are reversed only when the provider
+    provably rejected the submission; any other error leaves the batch
+    submitted with its outcome unknown. Provider outcomes are settled later
+    by reconcile_payout_batch.
+    """
+    now = _now()
+    size = max(1, min(int(limit or DEFAULT_BATCH_LIMIT), MAX_BATCH_LIMIT))
+    payouts = _claim_approved(payout_ids, size)
+    if not payouts:
+        db.session.rollback()
+        return None
+
+    batch = PayoutBatch(
+        reference=f"POB-{uuid.uuid4().hex[:16]}",
+        provider=str(getattr(provider, "name", "") or "unknown")[:32],
+        status="created",
+        created_by=int(created_by) if created_by is not None else None,
+        updated_at=now,
+    )
+    db.session.add(batch)
+    db.session.flush()
+
+    debit_legs = []
+    for p in payouts:
+        fee_amount, net_amount = _payout_amounts(p, fee_rate_for)
+        p.fee_amount = float(fee_amount)
+        p.net_amount = float(net_amount)
+        p.batch_id = int(batch.id)
+        p.provider = batch.provider
+        debit_legs.append(
+            dict(
+                user_id=int(p.user_id),
+                direction="debit",
+                amount=float(p.amount or 0.0),
+                kind="payout",
+                reference=_ledger_ref(p, batch),
+                note="Payout paid",
+                idempotency_key=f"{_ledger_ref(p, batch)}:debit",
+            )
+        )
+    debits = post_txns(debit_legs, commit=False)
+
+    fee_legs = []
+    accepted: list[PayoutRequest] = []
+    for p, txn in zip(payouts, debits):
+        if txn is None:
+            _mark_failed(p, "insufficient_balance", now)
+            continue
+        p.status = "processing"
+        p.provider_reference = _transfer_ref(p)
+        p.updated_at = now
+        accepted.append(p)
+        if float(p.fee_amount or 0.0) > 0:
+            fee_legs.append(
+                dict(
+                    user_id=int(platform_user_id),
+                    direction="credit",
+                    amount=float(p.fee_amount),
+                    kind="withdrawal_fee",
+                    reference=_ledger_ref(p, batch),
+                    note="Withdrawal fee",
+                    idempotency_key=f"{_ledger_ref(p, batch)}:fee",
+                )
+            )
+    if fee_legs:
+        post_txns(fee_legs, commit=False)
+    batch.item_count = len(payouts)
+    batch.total_amount = round(sum(float(p.amount or 0.0) for p in accepted), 2)
+    db.session.commit()
+
+    if not accepted:
+        _refresh_counts(batch, now)
+        db.session.commit()
+        return batch
+
+    recipients = {
+        int(r.user_id): r.recipient_code
+        for r in PayoutRecipient.query.filter(
+            PayoutRecipient.user_id.in_(sorted({int(p.user_id) for p in accepted}))
+        ).all()
+    }
+    items = [
+        TransferItem(
+            reference=_transfer_ref(p),
+            amount=float(p.net_amount or 0.0),
+            recipient=recipients.get(int(p.user_id), "") or "",
+            account_number=p.account_number or "",
+            bank_name=p.bank_name or "",
+            reason=f"FlipTrybe payout {int(p.id)}",
+        )
+        for p in accepted
+    ]
+    try:
+        results = provider.bulk_transfer(items, batch_reference=batch.reference)
+    except TransferRejected as exc:
+        # Nothing left the platform: undo the debits and let the payouts be
+        # picked up by a later batch.
+        now = _now()
+        reversals = []
+        for p in accepted:
+            reversals.extend(_reversal_legs(p, batch, platform_user_id))
+            p.status = "approved"
+            p.batch_id = None
+            p.provider_reference = None
+            p.updated_at = now
+        post_txns(reversals, commit=False)
+        batch.status = "failed"
+        batch.error = str(exc)[:240]
+        _refresh_counts(batch, now)
+        db.session.commit()
+        return batch
+    except Exception as exc:
+        # The provider may have accepted the batch before the error (a read
+        # timeout or 5xx). Keep the debits and the payouts in flight; the
+        # reconciler settles each one by its transfer reference.
+        now = _now()
+        batch.status = "submitted"
+        batch.submitted_at = now
+        batch.error = f"outcome_unknown:{exc}"[:240]
+        _refresh_counts(batch, now)
+        db.session.commit()
+        return batch
+
+    now = _now()
+    batch.status = "submitted"
+    batch.submitted_at = now
+    _apply_results(batch, list(zip(accepted, results)), platform_user_id=platform_user_id, now=now)
+    _refresh_counts(batch, now)
+    db.session.commit()
+    return batch
+
+
+def reconcile_payout_batch(batch_id: int, *, provider: PaymentsProvider, platform_user_id: int) -> dict:
+    """Poll the provider for every in-flight item of a batch and settle it."""
+    batch = db.session.get(PayoutBatch, int(batch_id))
+    if batch is None:
+        return {"ok": False, "error": "not_found"}
+    pending = (
+        PayoutRequest.query.filter_by(batch_id=int(batch.id), status="processing")
+        .order_by(PayoutRequest.id.asc())
+        .all()
+    )
+    pairs = []
+    errors = 0
+    for p in pending:
+        try:
+            pairs.append((p, provider.transfer_status(p.provider_reference or "")))
+        except Exception:
+            errors += 1
+    now = _now()
+    _apply_results(batch, pairs, platform_user_id=platform_user_id, now=now)
+    _refresh_counts(batch, now)
+    db.session.commit()
+    out = batch.to_dict()
+    out.update({"ok": True, "checked": len(pending), "errors": errors})
+    return out
+
+
+def reconcile_open_payout_batches(*, provider: PaymentsProvider, platform_user_id: int, limit: int = 50) -> dict:
+    """Reconcile every batch that still has payouts in ``processing``.
+
+    The per-batch task stops polling after its retries run out, which can be
+    well before ``PAYOUT_NOT_FOUND_GRACE_SECONDS`` settles a transfer the
+    provider never saw; this sweep picks those batches up again.
+    """
+    batch_ids = list(
+        db.session.execute(
+            select(PayoutRequest.batch_id)
+            .where(PayoutRequest.status == "processing", PayoutRequest.batch_id.isnot(None))
+            .group_by(PayoutRequest.batch_id)
+            .order_by(PayoutRequest.batch_id.asc())
+            .limit(max(1, int(limit)))
+        ).scalars()
+    )
+    totals = {"batches": 0, "pending": 0, "errors": 0}
+    for batch_id in batch_ids:
+        try:
+            result = reconcile_payout_batch(int(batch_id), provider=provider, platform_user_id=platform_user_id)
+        except Exception:
+            db.session.rollback()
+            totals["errors"] += 1
+            continue
+        totals["batches"] += 1
+        totals["pending"] += int(result.get("pending_count") or 0)
+        totals["errors"] += int(result.get("errors") or 0)
+    return totals
+
+
+def payout_batch_status(batch_id: int) -> dict | None:
+    batch = db.session.get(PayoutBatch, int(batch_id))
+    if batch is None:
+        return None
+    items = PayoutRequest.query.filter_by(batch_id=int(batch.id)).order_by(PayoutRequest.id.asc()).all()
+    return {"batch": batch.to_dict(), "items": [p.to_dict() for p in items]}
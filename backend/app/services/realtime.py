@@ -1,3 +1,5 @@
-from app.extensions import socketio
+from app.realtime.bus import publish
 
-def broadcast(room, event, payload): socketio.emit(event, payload, room=room)
+
+def broadcast(room, event, payload):
+    return publish(room, event, payload)
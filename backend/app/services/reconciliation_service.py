@@ -1,45 +1,100 @@
 from __future__ import annotations
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Iterator
+
+from flask import current_app
+from sqlalchemy import func, select
 
 from app.extensions import db
-from app.models import Wallet, WalletTxn, ReconciliationReport
-
-
-def _signed_amount(direction: str, amount: float) -> float:
-    if (direction or "").strip().lower() == "debit":
-        return -abs(float(amount or 0.0))
-    return abs(float(amount or 0.0))
-
-
-def recompute_wallet_balances(*, since: str | None = None, tolerance: float = 0.01) -> dict:
-    wallets = Wallet.query.order_by(Wallet.user_id.asc()).all()
-    drift_items = []
-
-    for wallet in wallets:
-        txns = WalletTxn.query.filter_by(wallet_id=int(wallet.id)).order_by(WalletTxn.created_at.asc()).all()
-        computed = 0.0
-        for txn in txns:
-            computed += _signed_amount(txn.direction, float(txn.amount or 0.0))
-        current = float(wallet.balance or 0.0)
-        drift = round(current - computed, 4)
-        if abs(drift) > float(tolerance):
-            drift_items.append(
-                {
-                    "wallet_id": int(wallet.id),
-                    "user_id": int(wallet.user_id),
-                    "stored_balance": current,
-                    "computed_balance": round(computed, 4),
-                    "drift": drift,
-                }
-            )
+from app.jobs.wallet_reconciler import scan_wallet_range, wallet_id_ranges
+from app.models import Wallet, ReconciliationReport
+
+
+DRIFT_CSV_COLUMNS = ("wallet_id", "user_id", "stored_balance", "computed_balance", "drift")
+
+
+def _drift_items(scan: dict) -> list[dict]:
+    out = []
+    for item in scan.get("items") or []:
+        if "ledger_mismatch" not in (item.get("issues") or []):
+            continue
+        out.append(
+            {
+                "wallet_id": int(item["wallet_id"]),
+                "user_id": int(item["user_id"]),
+                "stored_balance": float(item["stored_balance"]),
+                "computed_balance": float(item["computed_balance"]),
+                "drift": float(item["drift"]),
+            }
+        )
+    return out
+
+
+def _scan_range_in_context(app, id_range: tuple[int, int], tolerance: float) -> list[dict]:
+    with app.app_context():
+        try:
+            return _drift_items(scan_wallet_range(id_range[0], id_range[1], tolerance=tolerance))
+        finally:
+            db.session.remove()
+
+
+def _effective_workers(workers: int) -> int:
+    # SQLite serialises access on a single file/connection, so fanning out
+    # threads only adds contention there.
+    try:
+        if (db.engine.dialect.name or "").lower() == "sqlite":
+            return 1
+    except Exception:
+        return 1
+    return max(1, min(int(workers or 1), 32))
+
+
+def iter_wallet_drift(
+    *,
+    tolerance: float = 0.01,
+    chunk_size: int | None = None,
+    workers: int = 1,
+) -> Iterator[dict]:
+    """Yield ledger drift items range by range, in wallet id order.
+
+    Only one range worth of results per worker is held in memory, so callers
+    can stream arbitrarily large reports.
+    """
+    ranges = wallet_id_ranges(chunk_size=chunk_size)
+    pool_size = _effective_workers(workers)
+    if pool_size <= 1 or len(ranges) <= 1:
+        for id_start, id_end in ranges:
+            for item in _drift_items(scan_wallet_range(id_start, id_end, tolerance=tolerance)):
+                yield item
+        return
+
+    app = current_app._get_current_object()
+    with ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="wallet-recon") as pool:
+        for items in pool.map(lambda r: _scan_range_in_context(app, r, tolerance), ranges):
+            for item in items:
+                yield item
+
+
+def recompute_wallet_balances(
+    *,
+    since: str | None = None,
+    tolerance: float = 0.01,
+    chunk_size: int | None = None,
+    workers: int = 1,
+) -> dict:
+    wallet_count = db.session.execute(select(func.count(Wallet.id))).scalar() or 0
+    drift_items = list(
+        iter_wallet_drift(tolerance=tolerance, chunk_size=chunk_size, workers=workers)
+    )
 
     summary = {
         "ok": True,
         "scope": "wallet_ledger",
         "since": since or "",
-        "wallet_count": len(wallets),
+        "wallet_count": int(wallet_count),
         "drift_count": len(drift_items),
         "drift_items": drift_items,
         "generated_at": datetime.utcnow().isoformat(),
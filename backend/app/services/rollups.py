@@ -0,0 +1,388 @@
+"""Daily rollups for platform analytics.
+
+Writes to orders, shortlet bookings and users mark the affected UTC day in
+``rollup_dirty_days`` during the same flush. The rollup job recomputes only
+those days, plus a short lookback. Each day's rows in
+``daily_platform_metrics`` are recomputed from the source tables with
+grouped queries and replaced whole, so reruns are idempotent. Dashboards
+read the rollup, so their cost follows the requested date range rather than
+total history.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, bindparam, case, delete, event, func, inspect, insert, select, union, update
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import DailyPlatformMetric, Listing, Order, RollupDirtyDay, Shortlet, ShortletBooking, User, WalletTxn
+from app.utils.db_compat import dialect_insert
+from app.utils.env import env_int
+
+
+PLATFORM_ROLLUP = "platform_daily"
+
+ORDER_SUCCESS_STATUSES = ("paid", "merchant_accepted", "driver_assigned", "picked_up", "delivered", "completed")
+SHORTLET_COMMISSION_RATE = 0.05
+
+VERTICAL_DECLUTTER = "declutter"
+VERTICAL_SHORTLET = "shortlet"
+VERTICAL_ACCOUNTS = "accounts"
+
+# table -> (rollups fed by it, columns whose change moves a day's numbers)
+TRACKED_TABLES: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    "orders": (
+        (PLATFORM_ROLLUP,),
+        (
+            "status",
+            "amount",
+            "total_price",
+            "listing_id",
+            "created_at",
+            "sale_platform_minor",
+            "delivery_platform_minor",
+            "inspection_platform_minor",
+            "sale_seller_minor",
+        ),
+    ),
+    "shortlet_bookings": ((PLATFORM_ROLLUP,), ("payment_status", "total_amount", "shortlet_id", "created_at")),
+    "users": ((PLATFORM_ROLLUP,), ("role", "created_at")),
+}
+
+METRIC_FIELDS = (
+    "transactions",
+    "gmv_minor",
+    "commission_minor",
+    "sale_platform_minor",
+    "delivery_platform_minor",
+    "inspection_platform_minor",
+    "seller_minor",
+    "signups",
+    "merchant_signups",
+)
+
+
+def _as_day(value) -> date | None:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except Exception:
+        return None
+
+
+def day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day)
+
+
+# ---------------------------------------------------------------------------
+# Dirty-day tracking
+# ---------------------------------------------------------------------------
+
+
+def _changed_days(obj, columns: tuple[str, ...], *, is_new: bool) -> set[date]:
+    days = {_as_day(getattr(obj, "created_at", None))}
+    if not is_new:
+        state = inspect(obj)
+        if not any(state.attrs[c].history.has_changes() for c in columns if c in state.attrs):
+            return set()
+        days.update(_as_day(v) for v in state.attrs.created_at.history.deleted)
+    days.discard(None)
+    return days
+
+
+def mark_dirty(conn, rollup: str, days, *, now: datetime | None = None) -> None:
+    """Upsert dirty marks; re-marking refreshes ``marked_at`` so an in-flight run keeps it."""
+    rows = [{"rollup": rollup, "day": d, "marked_at": now or datetime.utcnow()} for d in sorted(set(days))]
+    if not rows:
+        return
+    table = RollupDirtyDay.__table__
+    stmt = dialect_insert(table, conn)
+    if stmt is not None:
+        conn.execute(
+            stmt.on_conflict_do_update(index_elements=["rollup", "day"], set_={"marked_at": stmt.excluded.marked_at}),
+            rows,
+        )
+        return
+    for row in rows:
+        touched = conn.execute(
+            update(table)
+            .where(table.c.rollup == row["rollup"], table.c.day == row["day"])
+            .values(marked_at=row["marked_at"])
+        ).rowcount
+        if not touched:
+            conn.execute(insert(table), [row])
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_rollup_days(session, _flush_context) -> None:
+    marks: dict[str, set[date]] = defaultdict(set)
+    for collection, is_new in ((session.new, True), (session.dirty, False), (session.deleted, True)):
+        for obj in collection:
+            tracked = TRACKED_TABLES.get(getattr(obj, "__tablename__", ""))
+            if tracked is None:
+                continue
+            rollups, columns = tracked
+            days = _changed_days(obj, columns, is_new=is_new)
+            for name in rollups:
+                marks[name].update(days)
+    if not any(marks.values()):
+        return
+    try:
+        conn = session.connection()
+        now = datetime.utcnow()
+        with conn.begin_nested():
+            for name, days in marks.items():
+                mark_dirty(conn, name, days, now=now)
+    except Exception:
+        # The lookback window and backfill cover any mark lost here.
+        pass
+
+
+def pending_dirty_days(rollup: str, *, limit: int) -> list[tuple[int, date, datetime]]:
+    table = RollupDirtyDay.__table__
+    rows = db.session.execute(
+        select(table.c.id, table.c.day, table.c.marked_at)
+        .where(table.c.rollup == rollup)
+        .order_by(table.c.day.asc())
+        .limit(int(limit))
+    ).all()
+    return [(int(r[0]), _as_day(r[1]), r[2]) for r in rows]
+
+
+def clear_dirty_marks(marks: list[tuple[int, date, datetime]]) -> None:
+    """Drop marks that were not re-marked while the run was computing."""
+    if not marks:
+        return
+    table = RollupDirtyDay.__table__
+    db.session.execute(
+        delete(table).where(and_(table.c.id == bindparam("mark_id"), table.c.marked_at == bindparam("seen"))),
+        [{"mark_id": mark_id, "seen": seen} for mark_id, _, seen in marks],
+    )
+
+
+def day_runs(days) -> list[tuple[date, date]]:
+    """Sorted days folded into half-open ``[start, end)`` runs of consecutive days."""
+    runs: list[list[date]] = []
+    for d in sorted(set(days)):
+        if runs and d == runs[-1][1]:
+            runs[-1][1] = d + timedelta(days=1)
+        else:
+            runs.append([d, d + timedelta(days=1)])
+    return [(a, b) for a, b in runs]
+
+
+# ---------------------------------------------------------------------------
+# Platform rollup
+# ---------------------------------------------------------------------------
+
+
+def _order_gmv_minor():
+    price = case(
+        (func.coalesce(Order.total_price, 0) != 0, Order.total_price),
+        else_=func.coalesce(Order.amount, 0),
+    )
+    return func.sum(func.round(price * 100))
+
+
+def _platform_rows_for_run(start: date, end: date) -> dict[tuple[date, str, str], dict]:
+    lo, hi = day_start(start), day_start(end)
+    out: dict[tuple[date, str, str], dict] = defaultdict(lambda: dict.fromkeys(METRIC_FIELDS, 0))
+
+    order_day = func.date(Order.created_at)
+    order_city = func.coalesce(Listing.city, "")
+    for d, city, n, gmv, sale_p, delivery_p, inspection_p, seller in db.session.execute(
+        select(
+            order_day,
+            order_city,
+            func.count(Order.id),
+            _order_gmv_minor(),
+            func.sum(func.coalesce(Order.sale_platform_minor, 0)),
+            func.sum(func.coalesce(Order.delivery_platform_minor, 0)),
+            func.sum(func.coalesce(Order.inspection_platform_minor, 0)),
+            func.sum(func.coalesce(Order.sale_seller_minor, 0)),
+        )
+        .select_from(Order)
+        .outerjoin(Listing, Listing.id == Order.listing_id)
+        .where(Order.status.in_(ORDER_SUCCESS_STATUSES), Order.created_at >= lo, Order.created_at < hi)
+        .group_by(order_day, order_city)
+    ):
+        row = out[(_as_day(d), (city or "").strip(), VERTICAL_DECLUTTER)]
+        row["transactions"] += int(n or 0)
+        row["gmv_minor"] += int(round(float(gmv or 0)))
+        row["sale_platform_minor"] += int(sale_p or 0)
+        row["delivery_platform_minor"] += int(delivery_p or 0)
+        row["inspection_platform_minor"] += int(inspection_p or 0)
+        row["commission_minor"] += int(sale_p or 0) + int(delivery_p or 0) + int(inspection_p or 0)
+        row["seller_minor"] += int(seller or 0)
+
+    booking_day = func.date(ShortletBooking.created_at)
+    booking_city = func.coalesce(Shortlet.city, "")
+    amount = func.coalesce(ShortletBooking.total_amount, 0)
+    for d, city, n, gmv, commission in db.session.execute(
+        select(
+            booking_day,
+            booking_city,
+            func.count(ShortletBooking.id),
+            func.sum(func.round(amount * 100)),
+            func.sum(func.round(amount * SHORTLET_COMMISSION_RATE * 100)),
+        )
+        .select_from(ShortletBooking)
+        .outerjoin(Shortlet, Shortlet.id == ShortletBooking.shortlet_id)
+        .where(
+            ShortletBooking.payment_status == "paid",
+            ShortletBooking.created_at >= lo,
+            ShortletBooking.created_at < hi,
+        )
+        .group_by(booking_day, booking_city)
+    ):
+        row = out[(_as_day(d), (city or "").strip(), VERTICAL_SHORTLET)]
+        row["transactions"] += int(n or 0)
+        row["gmv_minor"] += int(round(float(gmv or 0)))
+        row["commission_minor"] += int(round(float(commission or 0)))
+
+    user_day = func.date(User.created_at)
+    for d, n, merchants in db.session.execute(
+        select(user_day, func.count(User.id), func.sum(case((User.role == "merchant", 1), else_=0)))
+        .where(User.created_at >= lo, User.created_at < hi)
+        .group_by(user_day)
+    ):
+        row = out[(_as_day(d), "", VERTICAL_ACCOUNTS)]
+        row["signups"] += int(n or 0)
+        row["merchant_signups"] += int(merchants or 0)
+    return out
+
+
+def rollup_platform_days(days, *, now: datetime | None = None) -> dict:
+    """Recompute ``daily_platform_metrics`` for ``days``; does not commit."""
+    wanted = {d for d in (_as_day(x) for x in days) if d is not None}
+    if not wanted:
+        return {"days": 0, "rows": 0}
+    now = now or datetime.utcnow()
+    table = DailyPlatformMetric.__table__
+    written = 0
+    for start, end in day_runs(wanted):
+        rows = _platform_rows_for_run(start, end)
+        db.session.execute(delete(table).where(table.c.day >= start, table.c.day < end))
+        payload = [
+            {"day": d, "city": city[:64], "vertical": vertical, **metrics, "updated_at": now}
+            for (d, city, vertical), metrics in rows.items()
+            if d in wanted
+        ]
+        if payload:
+            db.session.execute(insert(table), payload)
+            written += len(payload)
+    return {"days": len(wanted), "rows": written}
+
+
+def refresh_platform_rollup(*, max_days: int | None = None, lookback_days: int = 0, now: datetime | None = None) -> dict:
+    """Roll up dirty days (oldest first, at most ``max_days``) plus the last ``lookback_days``."""
+    now = now or datetime.utcnow()
+    limit = max_days if max_days is not None else env_int("ROLLUP_MAX_DAYS_PER_RUN", 366, minimum=1)
+    marks = pending_dirty_days(PLATFORM_ROLLUP, limit=limit)
+    days = {d for _, d, _ in marks}
+    today = now.date()
+    days.update(today - timedelta(days=n) for n in range(int(lookback_days)))
+    result = rollup_platform_days(days, now=now)
+    clear_dirty_marks(marks)
+    db.session.commit()
+    result["dirty"] = len(marks)
+    return result
+
+
+def ensure_platform_rollup_fresh() -> None:
+    """Fold pending dirty days into the rollup before a dashboard read."""
+    if not pending_dirty_days(PLATFORM_ROLLUP, limit=1):
+        return
+    try:
+        refresh_platform_rollup(max_days=env_int("ROLLUP_READ_REFRESH_MAX_DAYS", 31, minimum=1))
+    except Exception:
+        db.session.rollback()
+
+
+def backfill_platform_rollup(start: date, end: date, *, chunk_days: int = 31, now: datetime | None = None) -> dict:
+    """Recompute every day in ``[start, end]``, committing per chunk."""
+    totals = {"days": 0, "rows": 0}
+    cursor = start
+    while cursor <= end:
+        stop = min(end, cursor + timedelta(days=max(1, int(chunk_days)) - 1))
+        days = [cursor + timedelta(days=n) for n in range((stop - cursor).days + 1)]
+        result = rollup_platform_days(days, now=now)
+        db.session.commit()
+        totals["days"] += result["days"]
+        totals["rows"] += result["rows"]
+        cursor = stop + timedelta(days=1)
+    return totals
+
+
+# ---------------------------------------------------------------------------
+# Readers
+# ---------------------------------------------------------------------------
+
+
+def _metric_sums():
+    return [func.coalesce(func.sum(getattr(DailyPlatformMetric, f)), 0) for f in METRIC_FIELDS]
+
+
+def _range_filter(query, start: date | None, end: date | None):
+    if start is not None:
+        query = query.where(DailyPlatformMetric.day >= start)
+    if end is not None:
+        query = query.where(DailyPlatformMetric.day < end)
+    return query
+
+
+def platform_totals(start: date | None = None, end: date | None = None) -> dict[str, dict]:
+    """Metric sums per vertical over ``[start, end)``."""
+    query = _range_filter(select(DailyPlatformMetric.vertical, *_metric_sums()), start, end)
+    out = {v: dict.fromkeys(METRIC_FIELDS, 0) for v in (VERTICAL_DECLUTTER, VERTICAL_SHORTLET, VERTICAL_ACCOUNTS)}
+    for vertical, *values in db.session.execute(query.group_by(DailyPlatformMetric.vertical)):
+        out[vertical] = {f: int(v or 0) for f, v in zip(METRIC_FIELDS, values)}
+    return out
+
+
+def platform_series(start: date, end: date, *, by: str = "day", group: str | None = None) -> list[dict]:
+    """Metric sums per day or month over ``[start, end)``, optionally split by ``city`` or ``vertical``."""
+    keys = [DailyPlatformMetric.day]
+    if group in ("city", "vertical"):
+        keys.append(getattr(DailyPlatformMetric, group))
+    query = _range_filter(select(*keys, *_metric_sums()), start, end).group_by(*keys)
+    buckets: dict[tuple, dict] = defaultdict(lambda: dict.fromkeys(METRIC_FIELDS, 0))
+    for row in db.session.execute(query):
+        d = _as_day(row[0])
+        bucket = d.strftime("%Y-%m") if by == "month" else d.isoformat()
+        key = (bucket, row[1]) if len(keys) > 1 else (bucket,)
+        target = buckets[key]
+        for f, v in zip(METRIC_FIELDS, row[len(keys):]):
+            target[f] += int(v or 0)
+    series = []
+    for key in sorted(buckets):
+        item = {"period": key[0], **buckets[key]}
+        if len(key) > 1:
+            item[group] = key[1]
+        series.append(item)
+    return series
+
+
+def active_user_count(since: datetime, *, paid_only: bool = False, include_wallet: bool = False) -> int:
+    """Distinct users with an order, booking (or wallet entry) since ``since``, counted in SQL."""
+    order_filter = [Order.created_at >= since]
+    booking_filter = [ShortletBooking.created_at >= since]
+    if paid_only:
+        order_filter.append(Order.status.in_(ORDER_SUCCESS_STATUSES))
+        booking_filter.append(ShortletBooking.payment_status == "paid")
+    parts = [
+        select(Order.buyer_id.label("uid")).where(*order_filter),
+        select(Order.merchant_id.label("uid")).where(*order_filter),
+        select(ShortletBooking.user_id.label("uid")).where(*booking_filter),
+    ]
+    if include_wallet:
+        parts.append(select(WalletTxn.user_id.label("uid")).where(WalletTxn.created_at >= since))
+    ids = union(*parts).subquery()
+    return int(db.session.execute(select(func.count()).select_from(ids).where(ids.c.uid.isnot(None))).scalar() or 0)
@@ -6,6 +6,8 @@ from typing import Any
 
 import requests
 
+from app.integrations import http as outbound
+
 
 class SearchUnavailable(RuntimeError):
     """Raised when the configured search engine is unavailable."""
@@ -61,15 +63,24 @@ class MeiliClient:
         self.host = resolved_host.rstrip("/")
         self.api_key = str(api_key if api_key is not None else (os.getenv("MEILI_API_KEY") or "")).strip()
         self.timeout = float(timeout if timeout is not None else _timeout_seconds())
-        self.session = requests.Session()
+        self.headers = {"Content-Type": "application/json"}
         if self.api_key:
-            self.session.headers.update({"Authorization": f"Bearer {self.api_key}"})
-        self.session.headers.update({"Content-Type": "application/json"})
+            self.headers["Authorization"] = f"Bearer {self.api_key}"
 
     def _request(self, method: str, path: str, *, json_body: dict | list | None = None, ok_codes: tuple[int, ...] = (200, 201, 202, 204)) -> Any:
         url = f"{self.host}{path}"
         try:
-            response = self.session.request(method=method, url=url, json=json_body, timeout=self.timeout)
+            # Search sits on the request path, so fail fast: no retries and the
+            # search timeout bounds both connect and read.
+            response = outbound.request(
+                "meilisearch",
+                method,
+                url,
+                json=json_body,
+                headers=self.headers,
+                timeout=(self.timeout, self.timeout),
+                retries=0,
+            )
         except requests.Timeout as exc:
             raise SearchUnavailable("Meilisearch request timed out") from exc
         except requests.RequestException as exc:
@@ -232,7 +232,7 @@ def process_paystack_webhook_task(
     name="app.tasks.scale_tasks.run_escrow_settlement",
     max_retries=3,
 )
-def run_escrow_settlement(self, *, trace_id: str = ""):
+def run_escrow_settlement(self, *, trace_id: str = "", fanout: bool = True):
     started = time.perf_counter()
     limit = 50
     try:
@@ -241,6 +241,16 @@ def run_escrow_settlement(self, *, trace_id: str = ""):
         limit = 50
     from app.jobs.escrow_runner import run_escrow_automation
 
+    if fanout and not int(self.request.retries or 0):
+        # Runners claim disjoint due batches, so extra copies just drain the
+        # backlog faster.
+        try:
+            parallelism = int((os.getenv("ESCROW_SETTLEMENT_WORKERS") or "1").strip() or 1)
+        except Exception:
+            parallelism = 1
+        for _ in range(max(0, min(parallelism, 16) - 1)):
+            run_escrow_settlement.delay(trace_id=trace_id, fanout=False)
+
     try:
         result = run_escrow_automation(limit=max(1, min(limit, 500)))
         _task_log(
@@ -271,3 +281,796 @@ def run_escrow_settlement(self, *, trace_id: str = ""):
             detail=str(exc),
         )
         raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.run_moneybox_maturity",
+    max_retries=3,
+)
+def run_moneybox_maturity_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.moneybox_maturity import run_moneybox_maturity
+
+    try:
+        result = run_moneybox_maturity()
+        _task_log(
+            "run_moneybox_maturity",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            processed=int(result.get("processed") or 0),
+            changed=int(result.get("changed") or 0),
+            remaining_due=int(result.get("remaining_due") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "run_moneybox_maturity",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "run_moneybox_maturity",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.reconcile_wallet_range",
+    max_retries=3,
+)
+def reconcile_wallet_range_task(
+    self,
+    *,
+    id_start: int,
+    id_end: int,
+    tolerance: float = 0.01,
+    trace_id: str = "",
+):
+    started = time.perf_counter()
+    from app.jobs.wallet_reconciler import reconcile_wallet_range
+
+    try:
+        result = reconcile_wallet_range(int(id_start), int(id_end), tolerance=float(tolerance))
+        _task_log(
+            "reconcile_wallet_range",
+            status="ok",
+            started_at=started,
+            trace_id=trace_id,
+            id_start=int(id_start),
+            id_end=int(id_end),
+            checked=int(result.get("checked") or 0),
+            anomalies=int(result.get("anomalies") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "reconcile_wallet_range",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                id_start=int(id_start),
+                id_end=int(id_end),
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "reconcile_wallet_range",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            id_start=int(id_start),
+            id_end=int(id_end),
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.run_wallet_reconciliation",
+    max_retries=0,
+)
+def run_wallet_reconciliation(self, *, chunk_size: int = 0, tolerance: float = 0.01, trace_id: str = ""):
+    """Partition the wallets id space and fan each range out to a worker."""
+    started = time.perf_counter()
+    from app.jobs.wallet_reconciler import wallet_id_ranges
+
+    ranges = wallet_id_ranges(chunk_size=int(chunk_size) if chunk_size else None)
+    for id_start, id_end in ranges:
+        reconcile_wallet_range_task.delay(
+            id_start=int(id_start),
+            id_end=int(id_end),
+            tolerance=float(tolerance),
+            trace_id=trace_id,
+        )
+    _task_log(
+        "run_wallet_reconciliation",
+        status="dispatched",
+        started_at=started,
+        trace_id=trace_id,
+        partitions=len(ranges),
+    )
+    return {"ok": True, "partitions": len(ranges)}
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.reconcile_payout_batch",
+    max_retries=8,
+)
+def reconcile_payout_batch_task(self, *, batch_id: int, platform_user_id: int, trace_id: str = ""):
+    """Settle provider results for a submitted payout batch, polling until done."""
+    started = time.perf_counter()
+    from app.integrations.payments.factory import build_payments_provider
+    from app.services.payout_batch_service import reconcile_payout_batch
+    from app.utils.autopilot import get_settings
+
+    try:
+        provider = build_payments_provider(get_settings())
+        result = reconcile_payout_batch(int(batch_id), provider=provider, platform_user_id=int(platform_user_id))
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "reconcile_payout_batch",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                batch_id=int(batch_id),
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "reconcile_payout_batch",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            batch_id=int(batch_id),
+            detail=str(exc),
+        )
+        raise
+
+    pending = int(result.get("pending_count") or 0)
+    if pending and int(self.request.retries or 0) < int(self.max_retries or 0):
+        countdown = _retry_countdown(int(self.request.retries or 0))
+        _task_log(
+            "reconcile_payout_batch",
+            status="pending",
+            started_at=started,
+            trace_id=trace_id,
+            batch_id=int(batch_id),
+            pending=pending,
+            countdown=countdown,
+        )
+        raise self.retry(exc=RuntimeError(f"payout_batch_pending:{pending}"), countdown=countdown)
+    _task_log(
+        "reconcile_payout_batch",
+        status="ok" if bool(result.get("ok")) else "failed",
+        started_at=started,
+        trace_id=trace_id,
+        batch_id=int(batch_id),
+        paid=int(result.get("paid_count") or 0),
+        failed=int(result.get("failed_count") or 0),
+        pending=pending,
+    )
+    return result
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.reconcile_open_payout_batches",
+    max_retries=3,
+)
+def reconcile_open_payout_batches_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.payout_batches import run_payout_batch_reconcile
+
+    try:
+        result = run_payout_batch_reconcile()
+        _task_log(
+            "reconcile_open_payout_batches",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            batches=int(result.get("batches") or 0),
+            pending=int(result.get("pending") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "reconcile_open_payout_batches",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "reconcile_open_payout_batches",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.compact_idempotency_keys",
+    max_retries=3,
+)
+def compact_idempotency_keys_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.idempotency_compaction import compact_idempotency_keys
+
+    try:
+        result = compact_idempotency_keys()
+        _task_log(
+            "compact_idempotency_keys",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            deleted=int(result.get("deleted") or 0),
+            batches=int(result.get("batches") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "compact_idempotency_keys",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "compact_idempotency_keys",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.deliver_notifications",
+    max_retries=3,
+)
+def deliver_notifications_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.notification_delivery import deliver_notifications
+
+    try:
+        result = deliver_notifications()
+        _task_log(
+            "deliver_notifications",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            claimed=int(result.get("claimed") or 0),
+            sent=int(result.get("sent") or 0),
+            failed=int(result.get("failed") or 0),
+            dead=int(result.get("dead") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "deliver_notifications",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "deliver_notifications",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.maintain_partitions",
+    max_retries=3,
+)
+def maintain_partitions_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.partition_maintenance import run_partition_maintenance
+
+    try:
+        result = run_partition_maintenance()
+        _task_log(
+            "maintain_partitions",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            created=len(result.get("created") or []),
+            errors=len(result.get("errors") or {}),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "maintain_partitions",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "maintain_partitions",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.drain_webhook_inbox",
+    max_retries=3,
+)
+def drain_webhook_inbox_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.webhook_inbox import drain_webhook_inbox
+
+    try:
+        result = drain_webhook_inbox()
+        _task_log(
+            "drain_webhook_inbox",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            processed=int(result.get("processed") or 0),
+            failed=int(result.get("failed") or 0),
+            batches=int(result.get("batches") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "drain_webhook_inbox",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "drain_webhook_inbox",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.fanout_notification",
+    max_retries=3,
+)
+def fanout_notification_task(self, *, event: dict, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.services.fanout_service import fanout_notification
+
+    try:
+        # Re-running after a partial failure is safe: recipients already
+        # queued for the collapse key are skipped.
+        result = fanout_notification(**dict(event or {}))
+        _task_log(
+            "fanout_notification",
+            status="ok",
+            started_at=started,
+            trace_id=trace_id,
+            audience=str(result.get("audience") or ""),
+            subject_id=int(result.get("subject_id") or 0),
+            recipients=int(result.get("recipients") or 0),
+            queued=int(result.get("queued") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "fanout_notification",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "fanout_notification",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.flush_driver_tracks",
+    max_retries=3,
+)
+def flush_driver_tracks_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.driver_tracks import flush_driver_tracks
+
+    try:
+        result = flush_driver_tracks()
+        _task_log(
+            "flush_driver_tracks",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            inserted=int(result.get("inserted") or 0),
+            batches=int(result.get("batches") or 0),
+            pruned=int(result.get("pruned") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "flush_driver_tracks",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "flush_driver_tracks",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.match_drivers",
+    max_retries=3,
+)
+def match_drivers_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.driver_matching import run_driver_matching
+
+    try:
+        result = run_driver_matching()
+        _task_log(
+            "match_drivers",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            orders=int(result.get("orders") or 0),
+            drivers=int(result.get("drivers") or 0),
+            offered=int(result.get("offered") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "match_drivers",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "match_drivers",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.sweep_dispatch",
+    max_retries=3,
+)
+def sweep_dispatch_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.dispatch_sweeper import run_dispatch_sweep
+
+    try:
+        result = run_dispatch_sweep()
+        _task_log(
+            "sweep_dispatch",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            expired=int(result.get("expired") or 0),
+            released=int(result.get("released") or 0),
+            reoffered=int(result.get("reoffered") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "sweep_dispatch",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "sweep_dispatch",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.rebuild_inspector_dispatch",
+    max_retries=3,
+)
+def rebuild_inspector_dispatch_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.inspector_dispatch import run_inspector_dispatch_rebuild
+
+    try:
+        result = run_inspector_dispatch_rebuild()
+        _task_log(
+            "rebuild_inspector_dispatch",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            inspectors=int(result.get("inspectors") or 0),
+            updated=int(result.get("updated") or 0),
+            load_drift=int(result.get("load_drift") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "rebuild_inspector_dispatch",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "rebuild_inspector_dispatch",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.rollup_platform_metrics",
+    max_retries=3,
+)
+def rollup_platform_metrics_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.platform_rollups import run_platform_rollups
+
+    try:
+        result = run_platform_rollups()
+        _task_log(
+            "rollup_platform_metrics",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            days=int(result.get("days") or 0),
+            rows=int(result.get("rows") or 0),
+            dirty=int(result.get("dirty") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "rollup_platform_metrics",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "rollup_platform_metrics",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.rebuild_merchant_stats",
+    max_retries=3,
+)
+def rebuild_merchant_stats_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.merchant_stats import run_merchant_stats_rebuild
+
+    try:
+        result = run_merchant_stats_rebuild()
+        _task_log(
+            "rebuild_merchant_stats",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            days=int(result.get("days") or 0),
+            rows=int(result.get("rows") or 0),
+            drift=int(result.get("drift") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "rebuild_merchant_stats",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "rebuild_merchant_stats",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.recompute_leaderboards",
+    max_retries=3,
+)
+def recompute_leaderboards_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.leaderboards import run_leaderboard_recompute
+
+    try:
+        result = run_leaderboard_recompute()
+        _task_log(
+            "recompute_leaderboards",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            boards=int(result.get("boards") or 0),
+            entries=int(result.get("entries") or 0),
+            changed=int(result.get("changed") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "recompute_leaderboards",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "recompute_leaderboards",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
+
+
+@shared_task(
+    bind=True,
+    name="app.tasks.scale_tasks.rollup_platform_events",
+    max_retries=3,
+)
+def rollup_platform_events_task(self, *, trace_id: str = ""):
+    started = time.perf_counter()
+    from app.jobs.event_rollups import run_event_rollups
+
+    try:
+        result = run_event_rollups()
+        _task_log(
+            "rollup_platform_events",
+            status="ok" if bool(result.get("ok")) else "failed",
+            started_at=started,
+            trace_id=trace_id,
+            hours=int(result.get("hours") or 0),
+            rows=int(result.get("rows") or 0),
+            pruned=int(result.get("pruned") or 0),
+        )
+        return result
+    except Exception as exc:
+        if int(self.request.retries or 0) < int(self.max_retries or 0):
+            countdown = _retry_countdown(int(self.request.retries or 0))
+            _task_log(
+                "rollup_platform_events",
+                status="retrying",
+                started_at=started,
+                trace_id=trace_id,
+                detail=str(exc),
+                countdown=countdown,
+            )
+            raise self.retry(exc=exc, countdown=countdown)
+        _task_log(
+            "rollup_platform_events",
+            status="failed",
+            started_at=started,
+            trace_id=trace_id,
+            detail=str(exc),
+        )
+        raise
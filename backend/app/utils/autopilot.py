@@ -6,11 +6,9 @@ import json
 from sqlalchemy import text
 
 from app.extensions import db
-from app.models import AutopilotSettings, PayoutRequest, NotificationQueue, User, Order, DriverJobOffer, PayoutRecipient
+from app.models import AutopilotSettings, PayoutRequest, PayoutRecipient
 from app.utils.wallets import post_txn, release_reserved
 from app.utils.paystack_client import initiate_transfer
-from app.integrations.common import IntegrationDisabledError, IntegrationMisconfiguredError
-from app.integrations.messaging.factory import build_messaging_provider
 
 
 def get_settings() -> AutopilotSettings:
@@ -231,174 +229,42 @@ def process_notification_queue(max_items: int = 80) -> dict:
     """Send queued notifications with retries + dead-letter.
 
     Status flow:
-      queued -> sent
-      queued -> failed (transient) -> queued (scheduled) -> ...
-      queued -> dead (after max attempts)
+      queued -> sending (claimed) -> sent
+      queued -> sending -> queued (scheduled with jittered backoff) -> ...
+      queued -> sending -> dead (after max attempts)
 
     Channels:
       - sms/whatsapp: Termii (when TERMII_API_KEY configured)
       - in_app: marked sent (frontend pulls)
-    """
-
-    from datetime import datetime
-
-    sent = 0
-    failed = 0
-    dead = 0
-    now = datetime.utcnow()
-
-    rows = (
-        NotificationQueue.query
-        .filter(NotificationQueue.status == "queued")
-        .filter((NotificationQueue.next_attempt_at.is_(None)) | (NotificationQueue.next_attempt_at <= now))
-        .order_by(NotificationQueue.created_at.asc())
-        .limit(max_items)
-        .all()
-    )
 
-    for r in rows:
-        try:
-            ch = (r.channel or "").strip().lower()
-            ok = True
-            detail = ""
-            error_code = ""
+    Delivery itself lives in app.jobs.notification_delivery; this runs a
+    single claimed batch of up to ``max_items``.
+    """
+    from app.jobs.notification_delivery import deliver_notifications
 
-            if ch in ("sms", "whatsapp"):
-                settings = get_settings()
-                try:
-                    provider = build_messaging_provider(settings, channel=ch)
-                    if ch == "sms":
-                        result = provider.send_sms(to=r.to, message=r.message, reference=f"notif:{int(r.id)}")
-                    else:
-                        result = provider.send_whatsapp(to=r.to, message=r.message, reference=f"notif:{int(r.id)}")
-                    ok = bool(result.ok)
-                    error_code = (result.code or "").strip().upper()
-                    detail = (result.message or "").strip()
-                except IntegrationDisabledError as e:
-                    ok = False
-                    error_code = "INTEGRATION_DISABLED"
-                    detail = str(e)
-                    # keep queued and do not consume attempts
-                    r.status = "queued"
-                    r.last_error = f"{error_code}:{detail}"[:240]
-                    r.next_attempt_at = now + timedelta(minutes=5)
-                    db.session.add(r)
-                    db.session.commit()
-                    failed += 1
-                    continue
-                except IntegrationMisconfiguredError as e:
-                    ok = False
-                    error_code = "INTEGRATION_MISCONFIGURED"
-                    detail = str(e)
-                    r.status = "queued"
-                    r.last_error = f"{error_code}:{detail}"[:240]
-                    r.next_attempt_at = now + timedelta(minutes=5)
-                    db.session.add(r)
-                    db.session.commit()
-                    failed += 1
-                    continue
-            elif ch == "in_app":
-                ok = True
-            else:
-                ok = False
-                error_code = "UNSUPPORTED_CHANNEL"
-                detail = f"Unsupported channel: {ch}"
-
-            if ok:
-                r.status = "sent"
-                r.sent_at = now
-                r.last_error = None
-                db.session.add(r)
-                db.session.commit()
-                sent += 1
-                continue
+    result = deliver_notifications(batch_size=max_items, max_batches=1)
+    return {
+        "sent": int(result.get("sent") or 0),
+        "failed": int(result.get("failed") or 0),
+        "dead": int(result.get("dead") or 0),
+    }
 
-            # Failure path
-            r.attempt_count = int(r.attempt_count or 0) + 1
-            normalized = error_code or "SEND_FAILED"
-            r.last_error = f"{normalized}:{(detail or 'send_failed')}"[:240]
-            max_attempts = int(r.max_attempts or 5)
-            immediate_dead = normalized in (
-                "TERMII_INVALID_RECIPIENT",
-                "TERMII_INVALID_SENDER",
-                "TERMII_AUTH_FAILED",
-            )
-            if immediate_dead or int(r.attempt_count) >= max_attempts:
-                r.status = "dead"
-                r.dead_lettered_at = now
-                r.next_attempt_at = None
-                db.session.add(r)
-                db.session.commit()
-                dead += 1
-            else:
-                r.schedule_next_attempt(base_seconds=15, max_seconds=3600)
-                # keep status queued so it will retry later
-                db.session.add(r)
-                db.session.commit()
-                failed += 1
+def auto_assign_drivers(max_items: int = 30) -> dict:
+    """Offer pending orders to drivers via the batch matching engine."""
+    from app.services.driver_matching import match_pending_orders
 
-        except Exception as e:
-            db.session.rollback()
-            try:
-                r.attempt_count = int(r.attempt_count or 0) + 1
-                r.last_error = ("TERMII_PROVIDER_DOWN:" + (str(e) or "exception"))[:240]
-                max_attempts = int(r.max_attempts or 5)
-                if int(r.attempt_count) >= max_attempts:
-                    r.status = "dead"
-                    r.dead_lettered_at = datetime.utcnow()
-                    r.next_attempt_at = None
-                    db.session.add(r)
-                    db.session.commit()
-                    dead += 1
-                else:
-                    r.status = "queued"
-                    r.schedule_next_attempt(base_seconds=15, max_seconds=3600)
-                    db.session.add(r)
-                    db.session.commit()
-                    failed += 1
-            except Exception:
-                db.session.rollback()
-                failed += 1
+    try:
+        result = match_pending_orders(max_orders=max_items)
+    except Exception:
+        db.session.rollback()
+        return {"assigned": 0}
+    return {"assigned": int(result.get("offered") or 0)}
 
-    return {"sent": sent, "failed": failed, "dead": dead}
 
-def auto_assign_drivers(max_items: int = 30) -> dict:
-    """Assign available driver to orders that need a driver."""
-    assigned = 0
-    # Find orders that are created/paid and not assigned
-    rows = (
-        Order.query
-        .filter(Order.driver_id.is_(None))
-        .filter(Order.status.in_(["created", "paid"]))
-        .order_by(Order.created_at.asc())
-        .limit(max_items)
-        .all()
-    )
-    for o in rows:
-        try:
-            # Try match drivers by city/state in order meta if available
-            state = getattr(o, "state", None)
-            city = getattr(o, "city", None)
-
-            q = User.query.filter(User.role == "driver").filter(getattr(User, 'is_available', True) == True)
-            if state:
-                q = q.filter(User.state == state) if hasattr(User, "state") else q
-            if city:
-                q = q.filter(User.city == city) if hasattr(User, "city") else q
-
-            driver = q.order_by(User.id.asc()).first()
-            if not driver:
-                continue
-            offer = DriverJobOffer(order_id=int(o.id), driver_id=int(driver.id), status='offered')
-            db.session.add(offer)
-            # Driver must accept; do not set driver_id yet
-            o.status = getattr(o, 'status', 'created')
-            db.session.add(o)
-            db.session.commit()
-            assigned += 1
-        except Exception:
-            db.session.rollback()
-    return {"assigned": assigned}
+def _dispatch_scheduled() -> bool:
+    # With a broker, the driver-matching and dispatch-sweep beat tasks own
+    # dispatch and the per-request tick stays out of their way.
+    return bool((os.getenv("CELERY_BROKER_URL") or "").strip() or (os.getenv("REDIS_URL") or "").strip())
 
 
 def tick() -> dict:
@@ -408,7 +274,19 @@ def tick() -> dict:
 
     payouts = process_payouts()
     queue = process_notification_queue()
-    drivers = auto_assign_drivers()
+    if _dispatch_scheduled():
+        dispatch = {"scheduled": True}
+        drivers = {"assigned": 0, "scheduled": True}
+        webhooks = {"scheduled": True}
+    else:
+        from app.jobs.dispatch_sweeper import run_dispatch_sweep
+        from app.jobs.webhook_inbox import drain_webhook_inbox
+
+        dispatch = run_dispatch_sweep(max_chunks=1)
+        drivers = auto_assign_drivers()
+        # Webhook requests only apply their own event inline; the backlog
+        # (retries, events parked behind them) drains here one batch a tick.
+        webhooks = drain_webhook_inbox(max_batches=1)
 
     # Nightly wallet reconciliation (UTC)
     wallet_reconcile = {"skipped": True}
@@ -434,118 +312,52 @@ def tick() -> dict:
         "payouts": payouts,
         "queue": queue,
         "drivers": drivers,
+        "dispatch": dispatch,
+        "webhooks": webhooks,
         "wallet_reconcile": wallet_reconcile,
     }
 
 
-def auto_reassign_stale(max_items: int = 30, stale_minutes: int = 10) -> dict:
-    """If an order was assigned but not progressed, reassign."""
-    from datetime import datetime, timedelta
-    from app.models import Order
-
-    reassigned = 0
-    cutoff = datetime.utcnow() - timedelta(minutes=stale_minutes)
-    # If Order has assigned_at, use it; else use updated_at
-    q = Order.query
-    if hasattr(Order, "assigned_at"):
-        q = q.filter(Order.assigned_at.isnot(None)).filter(Order.assigned_at <= cutoff)
-    elif hasattr(Order, "updated_at"):
-        q = q.filter(Order.updated_at <= cutoff)
-    # statuses eligible
-    if hasattr(Order, "status"):
-        q = q.filter(Order.status.in_(["assigned"]))
-    rows = q.limit(max_items).all()
-    for o in rows:
-        try:
-            o.driver_id = None
-            if hasattr(o, "status"):
-                o.status = "paid" if getattr(o, "status", "") == "assigned" else getattr(o, "status", "created")
-            db.session.add(o)
-            db.session.commit()
-            reassigned += 1
-        except Exception:
-            db.session.rollback()
-    return {"reassigned": reassigned}
+def auto_reassign_stale(max_items: int = 30, stale_minutes: int | None = None) -> dict:
+    """If an order was assigned but not progressed, reassign.
 
+    One chunked bulk release; see app.jobs.dispatch_sweeper. Without
+    ``stale_minutes`` this follows DISPATCH_STALE_ASSIGNMENT_MINUTES, which
+    is off by default.
+    """
+    from app.jobs.dispatch_sweeper import release_stale_assignments
 
-def expire_offers(max_items: int = 60, expiry_minutes: int = 6) -> dict:
-    from datetime import datetime, timedelta
-    expired = 0
-    cutoff = datetime.utcnow() - timedelta(minutes=expiry_minutes)
-    rows = (
-        DriverJobOffer.query
-        .filter(DriverJobOffer.status == "offered")
-        .filter(DriverJobOffer.created_at <= cutoff)
-        .order_by(DriverJobOffer.created_at.asc())
-        .limit(max_items)
-        .all()
-    )
-    for off in rows:
-        try:
-            off.status = "expired"
-            off.decided_at = datetime.utcnow()
-            db.session.add(off)
-            db.session.commit()
-            expired += 1
-        except Exception:
-            db.session.rollback()
-    return {"expired": expired}
+    stale_after = timedelta(minutes=stale_minutes) if stale_minutes else None
+    try:
+        released = release_stale_assignments(stale_after=stale_after, chunk_size=max_items, max_chunks=1)
+    except Exception:
+        db.session.rollback()
+        return {"reassigned": 0}
+    return {"reassigned": len(released)}
 
 
-def offer_next_driver(max_items: int = 60) -> dict:
-    """Escalation: for orders that have only expired/rejected offers, offer next eligible driver."""
-    offered = 0
-    # Find orders that are paid/created but not assigned
-    orders = (
-        Order.query
-        .filter(Order.status.in_(["paid", "created"]))
-        .order_by(Order.created_at.desc())
-        .limit(max_items)
-        .all()
-    )
-    for o in orders:
-        try:
-            # skip if already assigned
-            if getattr(o, "driver_id", None):
-                continue
+def expire_offers(max_items: int = 60, expiry_minutes: int = 6) -> dict:
+    from app.jobs.dispatch_sweeper import expire_stale_offers
 
-            # drivers already offered
-            prev = DriverJobOffer.query.filter_by(order_id=int(o.id)).all()
-            prev_driver_ids = set(int(x.driver_id) for x in prev)
-
-            # pick available drivers by locality if possible
-            qs = User.query.filter_by(role="driver")
-            qs = qs.filter(getattr(User, "is_available") == True) if hasattr(User, "is_available") else qs
-
-            # locality filter if fields exist
-            loc = (getattr(o, "delivery_locality", None) or getattr(o, "locality", None) or "").strip()
-            if loc and hasattr(User, "locality"):
-                qs = qs.filter(User.locality == loc)
-
-            drivers = qs.limit(30).all()
-            chosen = None
-            for d in drivers:
-                if int(d.id) in prev_driver_ids:
-                    continue
-                chosen = d
-                break
-            if not chosen:
-                continue
+    try:
+        expired = expire_stale_offers(expiry=timedelta(minutes=expiry_minutes), chunk_size=max_items, max_chunks=1)
+    except Exception:
+        db.session.rollback()
+        return {"expired": 0}
+    return {"expired": len(expired)}
 
-            off = DriverJobOffer(order_id=int(o.id), driver_id=int(chosen.id), status="offered")
-            db.session.add(off)
-            db.session.commit()
-            offered += 1
 
-            try:
-                from app.utils.messaging import enqueue_in_app, enqueue_sms, enqueue_whatsapp
-                enqueue_in_app(int(chosen.id), f"New delivery offer for order #{o.id}", reference=f"order:{o.id}")
-                enqueue_sms(str(chosen.id), f"FlipTrybe: New delivery offer #{o.id}", reference=f"order:{o.id}")
-                enqueue_whatsapp(str(chosen.id), f"FlipTrybe: New delivery offer #{o.id}", reference=f"order:{o.id}")
-            except Exception:
-                pass
-        except Exception:
-            db.session.rollback()
-            continue
+def offer_next_driver(max_items: int = 60) -> dict:
+    """Escalation: orders whose offers were all expired/rejected go back through matching.
 
-    return {"offered_next": offered}
+    The engine skips drivers an order was already offered to, so this is the
+    same batch pass as ``auto_assign_drivers``.
+    """
+    from app.services.driver_matching import match_pending_orders
+
+    try:
+        result = match_pending_orders(max_orders=max_items)
+    except Exception:
+        db.session.rollback()
+        return {"offered_next": 0}
+    return {"offered_next": int(result.get("offered") or 0)}
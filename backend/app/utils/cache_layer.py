@@ -6,6 +6,8 @@ import os
 import threading
 from typing import Any
 
+from app.utils.env import env_int
+
 try:
     import redis
 except Exception:  # pragma: no cover - optional dependency safety
@@ -32,28 +34,12 @@ def _env_bool(name: str, default: bool) -> bool:
     return raw in ("1", "true", "yes", "on")
 
 
-def _env_int(name: str, default: int, *, minimum: int = 1, maximum: int = 86400) -> int:
-    raw = (os.getenv(name) or "").strip()
-    if not raw:
-        value = int(default)
-    else:
-        try:
-            value = int(raw)
-        except Exception:
-            value = int(default)
-    if value < minimum:
-        value = minimum
-    if value > maximum:
-        value = maximum
-    return value
-
-
 def cache_enabled(default: bool = False) -> bool:
     return _env_bool("ENABLE_CACHE", default)
 
 
 def cache_ttl_seconds(env_name: str, default: int) -> int:
-    return _env_int(env_name, default, minimum=1, maximum=86400)
+    return env_int(env_name, default, minimum=1, maximum=86400)
 
 
 def default_cache_ttl_seconds() -> int:
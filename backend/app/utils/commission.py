@@ -72,6 +72,7 @@ def compute_order_commissions_minor(
     is_top_tier: bool,
     seller_type: str = "all",
     city: str = "",
+    policy_resolution=None,
 ) -> dict:
     kind = (sale_kind or "declutter").strip().lower()
     if kind not in ("declutter", "shortlet"):
@@ -96,14 +97,22 @@ def compute_order_commissions_minor(
         "source": "default",
     }
     try:
-        from app.services.commission_policy_service import compute_fee_minor
+        if policy_resolution is None:
+            from app.services.commission_policy_service import compute_fee_minor
+
+            resolved = compute_fee_minor(
+                amount_minor=int(sale_charge_minor),
+                applies_to=kind,
+                seller_type=(seller_type or "all"),
+                city=(city or ""),
+            )
+        else:
+            from app.services.commission_policy_service import fee_minor_for_resolution
 
-        resolved = compute_fee_minor(
-            amount_minor=int(sale_charge_minor),
-            applies_to=kind,
-            seller_type=(seller_type or "all"),
-            city=(city or ""),
-        )
+            resolved = {
+                "fee_minor": fee_minor_for_resolution(int(sale_charge_minor), policy_resolution),
+                "policy": policy_resolution.to_dict(),
+            }
         sale_fee_minor = int(resolved.get("fee_minor") or 0)
         p = resolved.get("policy")
         if isinstance(p, dict):
@@ -188,6 +197,54 @@ def compute_order_commissions_minor(
     }
 
 
+def compute_order_commissions_minor_batch(items: list[dict], *, at_time=None) -> list[dict]:
+    """Commission snapshots for many quotes, resolving policy once per group.
+
+    Each item takes the keyword arguments of compute_order_commissions_minor.
+    Items sharing (sale_kind, seller_type, city) share one resolution; the
+    snapshots come back in input order.
+    """
+    resolutions: dict[tuple[str, str, str], object] = {}
+    try:
+        from app.services.commission_policy_service import resolve_commission_policy
+
+        for item in items:
+            key = _batch_group_key(item)
+            if key not in resolutions:
+                resolutions[key] = resolve_commission_policy(
+                    applies_to=key[0],
+                    seller_type=key[1],
+                    city=key[2],
+                    at_time=at_time,
+                )
+    except Exception:
+        resolutions = {}
+
+    out = []
+    for item in items:
+        out.append(
+            compute_order_commissions_minor(
+                sale_kind=item.get("sale_kind") or "declutter",
+                sale_charge_minor=item.get("sale_charge_minor") or 0,
+                delivery_minor=item.get("delivery_minor") or 0,
+                inspection_minor=item.get("inspection_minor") or 0,
+                is_top_tier=bool(item.get("is_top_tier")),
+                seller_type=item.get("seller_type") or "all",
+                city=item.get("city") or "",
+                policy_resolution=resolutions.get(_batch_group_key(item)),
+            )
+        )
+    return out
+
+
+def _batch_group_key(item: dict) -> tuple[str, str, str]:
+    kind = str(item.get("sale_kind") or "declutter").strip().lower()
+    if kind not in ("declutter", "shortlet"):
+        kind = "declutter"
+    seller_type = str(item.get("seller_type") or "all").strip().lower()
+    return kind, seller_type, str(item.get("city") or "").strip().lower()
+
+
 def snapshot_to_order_columns(snapshot: dict | None) -> dict:
     data = snapshot if isinstance(snapshot, dict) else {}
     sale = data.get("sale") if isinstance(data.get("sale"), dict) else {}
@@ -250,32 +307,11 @@ def resolve_rate(kind: str, state: str = "", category: str = "") -> float:
         except Exception:
             pass
     try:
-        from app.models import CommissionRule  # lazy import
-
-        k = (kind or "").strip()
-        s = (state or "").strip()
-        c = (category or "").strip()
-
-        q = CommissionRule.query.filter_by(kind=k, is_active=True)
-
-        if s and c:
-            r = q.filter(CommissionRule.state.ilike(s), CommissionRule.category.ilike(c)).first()
-            if r:
-                return float(r.rate or 0.0)
-
-        if s:
-            r = q.filter(CommissionRule.state.ilike(s), (CommissionRule.category.is_(None) | (CommissionRule.category == ""))).first()
-            if r:
-                return float(r.rate or 0.0)
-
-        if c:
-            r = q.filter(CommissionRule.category.ilike(c), (CommissionRule.state.is_(None) | (CommissionRule.state == ""))).first()
-            if r:
-                return float(r.rate or 0.0)
+        from app.services.commission_policy_service import compiled_legacy_rate
 
-        r = q.filter((CommissionRule.state.is_(None) | (CommissionRule.state == "")), (CommissionRule.category.is_(None) | (CommissionRule.category == ""))).first()
-        if r:
-            return float(r.rate or 0.0)
+        rate = compiled_legacy_rate(kind, state=state, category=category)
+        if rate is not None:
+            return float(rate)
     except Exception:
         pass
 
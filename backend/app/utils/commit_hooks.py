@@ -0,0 +1,85 @@
+"""Side effects that must wait for the outermost commit.
+
+SQLAlchemy fires ``after_commit`` when a SAVEPOINT is released and
+``after_rollback`` when one is rolled back, so hooks that publish on
+``after_commit`` leak work from transactions that later roll back, and
+hooks that clear on ``after_rollback`` lose work the outer transaction had
+already queued. ``defer`` records items against the innermost open
+transaction; they run through the registered handler once the root
+transaction commits and are dropped when that transaction, or any
+savepoint enclosing it, rolls back.
+"""
+from __future__ import annotations
+
+from typing import Callable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, scoped_session
+
+
+_INFO_KEY = "deferred_until_commit"
+_HANDLERS: dict[str, Callable[[list], None]] = {}
+
+
+def register(kind: str, handler: Callable[[list], None]) -> None:
+    """Run ``handler(items)`` with everything deferred under ``kind`` at each root commit."""
+    _HANDLERS[str(kind)] = handler
+
+
+def defer(session, kind: str, items: Iterable) -> None:
+    items = list(items)
+    if not items:
+        return
+    if isinstance(session, scoped_session):
+        session = session()
+    owner = session.get_nested_transaction() or session.get_transaction()
+    session.info.setdefault(_INFO_KEY, []).append((owner, str(kind), items))
+
+
+def _within(owner, transaction) -> bool:
+    while owner is not None:
+        if owner is transaction:
+            return True
+        owner = owner.parent
+    return False
+
+
+@event.listens_for(Session, "after_commit")
+def _run_deferred(session) -> None:
+    if session.in_nested_transaction():
+        # A released savepoint: its items now ride on the enclosing transaction.
+        return
+    pending = session.info.pop(_INFO_KEY, None)
+    if not pending:
+        return
+    grouped: dict[str, list] = {}
+    for _owner, kind, items in pending:
+        grouped.setdefault(kind, []).extend(items)
+    for kind, items in grouped.items():
+        handler = _HANDLERS.get(kind)
+        if handler is None:
+            continue
+        try:
+            handler(items)
+        except Exception:
+            pass
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_deferred(session, previous_transaction) -> None:
+    pending = session.info.get(_INFO_KEY)
+    if not pending:
+        return
+    kept = [entry for entry in pending if not _within(entry[0], previous_transaction)]
+    if kept:
+        session.info[_INFO_KEY] = kept
+    else:
+        session.info.pop(_INFO_KEY, None)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear_deferred(session, transaction) -> None:
+    # Covers a root transaction closed without commit or rollback events
+    # (Session.close()); anything still queued belonged to it.
+    if transaction.parent is None and not transaction.nested:
+        session.info.pop(_INFO_KEY, None)
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from app.extensions import db
+
+
+def dialect_insert(table, bind=None):
+    """INSERT with ``ON CONFLICT`` support for the current dialect, or None.
+
+    ``bind`` is the connection the statement will run on; it defaults to the
+    session engine. Callers fall back to plain ORM writes when this is None.
+    """
+    name = ((bind if bind is not None else db.engine).dialect.name or "").lower()
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        return pg_insert(table)
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert(table)
+    return None
+
+
+def load_previous_value(target, value, oldvalue, initiator):
+    """No-op ``set`` listener; register it with ``active_history=True``.
+
+    SQLAlchemy then loads the old value on assignment, so before/after history
+    stays exact even when the object was expired by an earlier commit.
+    """
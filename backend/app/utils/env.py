@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import os
+
+
+def env_int(name: str, default: int, *, minimum: int = 1, maximum: int | None = 100000) -> int:
+    """Read an integer setting, falling back to ``default`` and clamping to the bounds."""
+    raw = (os.getenv(name) or "").strip()
+    try:
+        value = int(raw) if raw else int(default)
+    except Exception:
+        value = int(default)
+    value = max(int(minimum), value)
+    if maximum is not None:
+        value = min(value, int(maximum))
+    return value
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Iterator
+
+from flask import Response, stream_with_context
+from sqlalchemy import Select
+
+from app.extensions import db
+
+
+EXPORT_FORMATS = ("csv", "ndjson")
+DEFAULT_CHUNK_ROWS = 1000
+MAX_CHUNK_ROWS = 10000
+
+
+class ExportFilterError(ValueError):
+    pass
+
+
+def export_chunk_rows(raw=None) -> int:
+    value = raw if raw not in (None, "") else os.getenv("EXPORT_STREAM_CHUNK_ROWS")
+    try:
+        size = int(value) if value not in (None, "") else DEFAULT_CHUNK_ROWS
+    except Exception:
+        size = DEFAULT_CHUNK_ROWS
+    return max(1, min(size, MAX_CHUNK_ROWS))
+
+
+def export_format(args) -> str:
+    fmt = (args.get("format") or "csv").strip().lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ExportFilterError("format must be csv or ndjson")
+    return fmt
+
+
+def _parse_bound(raw: str, name: str) -> tuple[datetime, bool]:
+    value = (raw or "").strip()
+    try:
+        if len(value) == 10:
+            return datetime.combine(date.fromisoformat(value), datetime.min.time()), True
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except Exception:
+        raise ExportFilterError(f"{name} must be an ISO date or datetime")
+    if parsed.tzinfo is not None:
+        parsed = parsed.replace(tzinfo=None) - (parsed.utcoffset() or timedelta(0))
+    return parsed, False
+
+
+def export_date_range(args) -> tuple[datetime | None, datetime | None]:
+    """Return a half-open [start, end) window from ``from``/``to`` query args.
+
+    A bare date in ``to`` includes that whole day.
+    """
+    start = end = None
+    if (args.get("from") or "").strip():
+        start, _ = _parse_bound(args.get("from"), "from")
+    if (args.get("to") or "").strip():
+        end, date_only = _parse_bound(args.get("to"), "to")
+        if date_only:
+            end = end + timedelta(days=1)
+    if start is not None and end is not None and end <= start:
+        raise ExportFilterError("to must be after from")
+    return start, end
+
+
+def export_int_arg(args, name: str) -> int | None:
+    raw = (args.get(name) or "").strip()
+    if not raw:
+        return None
+    try:
+        return int(raw)
+    except Exception:
+        raise ExportFilterError(f"{name} must be an integer")
+
+
+def export_list_arg(args, name: str) -> list[str]:
+    return [part.strip() for part in (args.get(name) or "").split(",") if part.strip()]
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_export_rows(stmt: Select, *, chunk_rows: int | None = None) -> Iterator[list]:
+    """Yield lists of result rows read through a server-side cursor.
+
+    Only one partition of ``chunk_rows`` rows is held at a time, so memory
+    stays flat however many rows match.
+    """
+    size = export_chunk_rows(chunk_rows)
+    result = db.session.execute(stmt.execution_options(stream_results=True, yield_per=size))
+    try:
+        for partition in result.partitions(size):
+            yield partition
+    finally:
+        result.close()
+
+
+def iter_csv(stmt: Select, *, chunk_rows: int | None = None) -> Iterator[str]:
+    columns = list(stmt.selected_columns.keys())
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    yield buf.getvalue()
+    for partition in iter_export_rows(stmt, chunk_rows=chunk_rows):
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerows([_cell(v) for v in row] for row in partition)
+        yield buf.getvalue()
+
+
+def iter_ndjson(stmt: Select, *, chunk_rows: int | None = None) -> Iterator[str]:
+    columns = list(stmt.selected_columns.keys())
+    for partition in iter_export_rows(stmt, chunk_rows=chunk_rows):
+        yield "".join(
+            json.dumps({col: _cell(v) for col, v in zip(columns, row)}, separators=(",", ":")) + "\n"
+            for row in partition
+        )
+
+
+def export_response(stmt: Select, *, fmt: str, filename: str, chunk_rows: int | None = None) -> Response:
+    body = iter_csv(stmt, chunk_rows=chunk_rows) if fmt == "csv" else iter_ndjson(stmt, chunk_rows=chunk_rows)
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{fmt}"',
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -3,13 +3,28 @@ from __future__ import annotations
 import hashlib
 import json
 import os
-from datetime import datetime
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from typing import Any
 
 from flask import has_request_context, request
 
 from app.extensions import db
 from app.models import IdempotencyKey
+from app.utils.env import env_int
+
+try:
+    import redis
+except Exception:  # pragma: no cover - optional dependency safety
+    redis = None
+
+
+_REDIS_LOCK = threading.Lock()
+_REDIS_CLIENT = None
+_REDIS_RETRY_AT = 0.0
+_REDIS_RETRY_SECONDS = 30.0
 
 
 def _env_bool(name: str, default: bool) -> bool:
@@ -23,6 +38,21 @@ def idempotency_enforced() -> bool:
     return _env_bool("ENABLE_IDEMPOTENCY_ENFORCEMENT", False)
 
 
+def idempotency_ttl_seconds() -> int:
+    """Lifetime of a completed non-durable entry (Redis key or fallback row)."""
+    return env_int("IDEMPOTENCY_TTL_SECONDS", 86400, maximum=31536000)
+
+
+def idempotency_inflight_ttl_seconds() -> int:
+    """Lifetime of a claim whose response was never stored."""
+    return env_int("IDEMPOTENCY_INFLIGHT_TTL_SECONDS", 900, maximum=31536000)
+
+
+def idempotency_retention_days() -> int:
+    """Retention of legacy rows saved without an expiry outside money-moving scopes."""
+    return env_int("IDEMPOTENCY_DB_RETENTION_DAYS", 30, maximum=3650)
+
+
 def _canonical_json(payload: Any) -> str:
     try:
         return json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
@@ -84,6 +114,95 @@ def _scope_requires_header(scope: str) -> bool:
     return False
 
 
+def durable_scope_prefixes() -> list[str]:
+    raw = (os.getenv("IDEMPOTENCY_DURABLE_SCOPES") or "").strip()
+    if raw:
+        out = [s.strip() for s in raw.split(",") if s.strip()]
+        if out:
+            return out
+    return [
+        "/api/orders",
+        "/api/payments/webhook",
+        "/api/webhooks/paystack",
+        "/api/wallet",
+        "webhook:paystack",
+        "wallet",
+        "escrow",
+        "payout",
+    ]
+
+
+def scope_is_durable(scope: str) -> bool:
+    """Money-moving scopes keep their keys on the primary database, with no expiry."""
+    normalized = str(scope or "").strip()
+    if not normalized:
+        return False
+    return any(normalized.startswith(prefix) for prefix in durable_scope_prefixes())
+
+
+def _redis_url() -> str:
+    return (os.getenv("IDEMPOTENCY_REDIS_URL") or os.getenv("REDIS_URL") or "").strip()
+
+
+def _redis_client():
+    global _REDIS_CLIENT, _REDIS_RETRY_AT
+    if redis is None or not _env_bool("IDEMPOTENCY_REDIS_ENABLED", True):
+        return None
+    url = _redis_url()
+    if not url:
+        return None
+    with _REDIS_LOCK:
+        if _REDIS_CLIENT is not None:
+            return _REDIS_CLIENT
+        if time.monotonic() < _REDIS_RETRY_AT:
+            return None
+        _REDIS_RETRY_AT = time.monotonic() + _REDIS_RETRY_SECONDS
+    try:
+        client = redis.Redis.from_url(
+            url,
+            decode_responses=True,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5,
+            health_check_interval=30,
+        )
+        client.ping()
+    except Exception:
+        return None
+    with _REDIS_LOCK:
+        _REDIS_CLIENT = client
+    return client
+
+
+def _drop_redis_client() -> None:
+    global _REDIS_CLIENT, _REDIS_RETRY_AT
+    with _REDIS_LOCK:
+        _REDIS_CLIENT = None
+        _REDIS_RETRY_AT = time.monotonic() + _REDIS_RETRY_SECONDS
+
+
+def _reset_idempotency_state_for_tests() -> None:
+    global _REDIS_CLIENT, _REDIS_RETRY_AT
+    with _REDIS_LOCK:
+        _REDIS_CLIENT = None
+        _REDIS_RETRY_AT = 0.0
+
+
+@dataclass
+class RedisIdempotencyClaim:
+    """Handle returned on a Redis-tier miss; pass it back to store_response."""
+
+    redis_key: str
+    key: str
+    scope: str
+    user_id: int | None
+    route: str
+    request_hash: str
+
+
+def _redis_key(scope: str, key: str) -> str:
+    return f"idem:v1:{scope}:{key}"
+
+
 def get_idempotency_key() -> str | None:
     # Common header pattern
     if not has_request_context():
@@ -146,6 +265,55 @@ def lookup_response(
         path=_request_path(scope_key or route),
         payload=payload,
     )
+    if not scope_is_durable(scope_key):
+        client = _redis_client()
+        if client is not None:
+            try:
+                return _redis_lookup(client, user_id, route, scope_key, k, req_hash)
+            except Exception:
+                _drop_redis_client()
+    return _db_lookup(user_id, route, scope_key, k, req_hash)
+
+
+def _redis_lookup(client, user_id: int | None, route: str, scope_key: str, k: str, req_hash: str):
+    rkey = _redis_key(scope_key, k)
+    claim = json.dumps({"h": req_hash, "s": "inflight"}, separators=(",", ":"))
+    for _ in range(2):
+        if client.set(rkey, claim, nx=True, ex=idempotency_inflight_ttl_seconds()):
+            return (
+                "miss",
+                RedisIdempotencyClaim(
+                    redis_key=rkey,
+                    key=k,
+                    scope=scope_key,
+                    user_id=int(user_id) if user_id is not None else None,
+                    route=str(route or ""),
+                    request_hash=req_hash,
+                ),
+                0,
+            )
+        raw = client.get(rkey)
+        if raw is None:
+            # Expired between SET NX and GET; claim again.
+            continue
+        entry = json.loads(raw)
+        if str(entry.get("h") or "").strip() and str(entry.get("h")).strip() != req_hash:
+            return _reuse_conflict_response()
+        body = entry.get("b")
+        return ("hit", body if body is not None else {"ok": True}, int(entry.get("c") or 200))
+    raise RuntimeError("idempotency_claim_unstable")
+
+
+def _row_expiry(scope_key: str, now: datetime) -> datetime | None:
+    if scope_is_durable(scope_key):
+        # A replayed checkout, payout or webhook must never debit twice, however
+        # late the retry arrives, so these keys are kept for good.
+        return None
+    return now + timedelta(seconds=idempotency_ttl_seconds())
+
+
+def _db_lookup(user_id: int | None, route: str, scope_key: str, k: str, req_hash: str):
+    now = datetime.utcnow()
     row = (
         IdempotencyKey.query
         .filter_by(scope=scope_key, key=k)
@@ -160,6 +328,23 @@ def lookup_response(
             .order_by(IdempotencyKey.id.asc())
             .first()
         )
+    if row is not None and row.expires_at is not None and row.expires_at <= now and row.scope != scope_key:
+        row = None
+    if row is not None and row.expires_at is not None and row.expires_at <= now:
+        # Expired but not compacted yet: reclaim the row for this request.
+        row.user_id = int(user_id) if user_id is not None else None
+        row.route = str(route or "")
+        row.request_hash = req_hash
+        row.response_json = None
+        row.response_body_json = None
+        row.status_code = 200
+        row.response_code = 200
+        row.created_at = now
+        row.updated_at = now
+        row.expires_at = _row_expiry(scope_key, now)
+        db.session.add(row)
+        db.session.commit()
+        return ("miss", row, 0)
     if row:
         # If same key but different payload, treat as conflict.
         if (row.request_hash or "").strip() and str(row.request_hash).strip() != req_hash:
@@ -182,25 +367,65 @@ def lookup_response(
         response_body_json=None,
         status_code=200,
         response_code=200,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),
+        created_at=now,
+        updated_at=now,
+        expires_at=_row_expiry(scope_key, now),
     )
     db.session.add(row)
     db.session.commit()
     return ("miss", row, 0)
 
 
-def store_response(row: IdempotencyKey, response_json: Any, status_code: int):
+def _encode_response(response_json: Any) -> str:
     try:
-        encoded = json.dumps(response_json, separators=(",", ":"), default=str)
-        row.response_json = encoded
-        row.response_body_json = encoded
+        return json.dumps(response_json, separators=(",", ":"), default=str)
     except Exception:
-        fallback = json.dumps({"ok": True})
-        row.response_json = fallback
-        row.response_body_json = fallback
+        return json.dumps({"ok": True})
+
+
+def store_response(row: IdempotencyKey | RedisIdempotencyClaim, response_json: Any, status_code: int):
+    encoded = _encode_response(response_json)
+    if isinstance(row, RedisIdempotencyClaim):
+        _store_redis_response(row, encoded, int(status_code or 200))
+        return
+    row.response_json = encoded
+    row.response_body_json = encoded
     row.status_code = int(status_code or 200)
     row.response_code = int(status_code or 200)
     row.updated_at = datetime.utcnow()
     db.session.add(row)
     db.session.commit()
+
+
+def _store_redis_response(claim: RedisIdempotencyClaim, encoded: str, status_code: int) -> None:
+    entry = '{"h":%s,"s":"done","c":%d,"b":%s}' % (json.dumps(claim.request_hash), int(status_code), encoded)
+    client = _redis_client()
+    if client is not None:
+        try:
+            client.set(claim.redis_key, entry, ex=idempotency_ttl_seconds())
+            return
+        except Exception:
+            _drop_redis_client()
+    # Redis went away mid-request: keep the response replayable from the DB
+    # tier, which lookups fall back to while Redis is unavailable.
+    now = datetime.utcnow()
+    try:
+        db.session.add(
+            IdempotencyKey(
+                key=claim.key,
+                scope=claim.scope,
+                user_id=claim.user_id,
+                route=claim.route,
+                request_hash=claim.request_hash,
+                response_json=encoded,
+                response_body_json=encoded,
+                status_code=int(status_code),
+                response_code=int(status_code),
+                created_at=now,
+                updated_at=now,
+                expires_at=_row_expiry(claim.scope, now),
+            )
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
@@ -0,0 +1,238 @@
+"""Wake-ups for live notification and support-chat streams.
+
+Nothing publishes here: new ``notifications`` and ``support_messages`` rows
+already reach the realtime bus through the publish-on-commit hooks in
+``app.realtime.events``, and stream channels are the same ``user:<id>`` and
+``thread:<id>`` rooms. Every process keeps a local hub that stream handlers
+block on, fed by a subscription to that bus.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Callable, Iterable
+
+from flask import Response, jsonify, request, stream_with_context
+
+from app.extensions import db
+from app.realtime.bus import MemoryBus, channel_prefix, get_bus, realtime_redis_url
+from app.realtime.rooms import thread_room, user_room
+from app.utils.env import env_int
+
+try:
+    import redis
+except Exception:  # pragma: no cover - optional dependency safety
+    redis = None
+
+
+def long_poll_timeout_seconds() -> int:
+    return env_int("LIVE_LONG_POLL_TIMEOUT_SECONDS", 25, maximum=120)
+
+
+def stream_max_seconds() -> int:
+    return env_int("LIVE_STREAM_MAX_SECONDS", 300, maximum=3600)
+
+
+def heartbeat_seconds() -> int:
+    return env_int("LIVE_STREAM_HEARTBEAT_SECONDS", 15, maximum=300)
+
+
+def user_channel(user_id: int) -> str:
+    return user_room(user_id)
+
+
+def support_thread_channel(thread_user_id: int) -> str:
+    return thread_room(thread_user_id)
+
+
+class _Hub:
+    """Per-channel version counters behind one condition variable."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._versions: dict[str, int] = {}
+
+    def snapshot(self, channels: Iterable[str]) -> dict[str, int]:
+        with self._cond:
+            return {ch: self._versions.get(ch, 0) for ch in channels}
+
+    def notify(self, channels: Iterable[str]) -> None:
+        with self._cond:
+            for ch in channels:
+                self._versions[ch] = self._versions.get(ch, 0) + 1
+            self._cond.notify_all()
+
+    def wait(self, snapshot: dict[str, int], timeout: float) -> bool:
+        def _changed() -> bool:
+            return any(self._versions.get(ch, 0) != seen for ch, seen in snapshot.items())
+
+        with self._cond:
+            return bool(self._cond.wait_for(_changed, timeout=max(0.0, float(timeout))))
+
+    def reset(self) -> None:
+        with self._cond:
+            self._versions.clear()
+            self._cond.notify_all()
+
+
+_HUB = _Hub()
+_LOCK = threading.Lock()
+_SUBSCRIBED_BUS = None
+_LISTENER: threading.Thread | None = None
+_STATS = {"relayed": 0, "redis_errors": 0}
+
+
+def _relay(room: str, _message: str = "") -> None:
+    _HUB.notify([str(room)])
+    with _LOCK:
+        _STATS["relayed"] += 1
+
+
+def _listen_forever(url: str, prefix: str) -> None:
+    while True:
+        try:
+            # No socket timeout: the subscriber blocks until a message arrives.
+            client = redis.Redis.from_url(url, socket_connect_timeout=2.0)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(f"{prefix}*")
+            for message in pubsub.listen():
+                channel = message.get("channel")
+                if isinstance(channel, bytes):
+                    channel = channel.decode("utf-8", "replace")
+                if channel and str(channel).startswith(prefix):
+                    _relay(str(channel)[len(prefix):])
+        except Exception:
+            with _LOCK:
+                _STATS["redis_errors"] += 1
+            time.sleep(1.0)
+
+
+def _ensure_listener() -> None:
+    """Wake this process's waiters from the realtime bus (after any fork).
+
+    The in-process bus calls us synchronously on publish; with Redis one
+    subscriber thread per process relays every room published anywhere.
+    """
+    global _SUBSCRIBED_BUS, _LISTENER
+    bus = get_bus()
+    with _LOCK:
+        if isinstance(bus, MemoryBus):
+            if _SUBSCRIBED_BUS is not bus:
+                bus.subscribe(_relay)
+                _SUBSCRIBED_BUS = bus
+            return
+        if _LISTENER is not None and _LISTENER.is_alive():
+            return
+        _LISTENER = threading.Thread(
+            target=_listen_forever,
+            args=(realtime_redis_url(), channel_prefix()),
+            name="live-events-listener",
+            daemon=True,
+        )
+        _LISTENER.start()
+
+
+def watch(channels: Iterable[str]) -> dict[str, int]:
+    """Start listening and return the current versions of ``channels``."""
+    _ensure_listener()
+    return _HUB.snapshot(channels)
+
+
+def live_stats() -> dict:
+    with _LOCK:
+        out = dict(_STATS)
+    out["backend"] = getattr(get_bus(), "backend", "memory")
+    out["listener_alive"] = bool(_LISTENER is not None and _LISTENER.is_alive())
+    return out
+
+
+def _reset_live_events_for_tests() -> None:
+    global _SUBSCRIBED_BUS
+    with _LOCK:
+        _SUBSCRIBED_BUS = None
+        for key in _STATS:
+            _STATS[key] = 0
+    _HUB.reset()
+
+
+def since_id_arg(args=None) -> int:
+    """Cursor from ``?since_id=`` or the SSE ``Last-Event-ID`` header; 0 means from the start."""
+    raw = (args if args is not None else request.args).get("since_id")
+    if raw in (None, ""):
+        raw = request.headers.get("Last-Event-ID")
+    try:
+        return max(0, int(str(raw or "0").strip()))
+    except Exception:
+        return 0
+
+
+def _wants_event_stream() -> bool:
+    mode = (request.args.get("mode") or "").strip().lower()
+    if mode in ("poll", "long-poll", "longpoll"):
+        return False
+    if mode in ("sse", "stream"):
+        return True
+    return "text/event-stream" in (request.headers.get("Accept") or "")
+
+
+def _sse_frame(event_name: str, item_id: int, item: dict) -> str:
+    return f"id: {int(item_id)}\nevent: {event_name}\ndata: {json.dumps(item, default=str)}\n\n"
+
+
+def live_response(
+    *,
+    channels: Iterable[str],
+    fetch: Callable[[int], list[tuple[int, dict]]],
+    since_id: int,
+    event_name: str,
+) -> Response:
+    """Serve new rows after ``since_id`` as an SSE stream or a long-poll.
+
+    ``fetch(after_id)`` returns ``(id, payload)`` pairs in id order. The handler
+    re-queries only when one of ``channels`` is published, so an idle client
+    costs one blocked wait rather than a query per poll interval. The session
+    is released before every wait so open streams do not hold pool
+    connections.
+    """
+    names = [str(ch) for ch in channels]
+    _ensure_listener()
+
+    if not _wants_event_stream():
+        deadline = time.monotonic() + float(long_poll_timeout_seconds())
+        cursor = int(since_id)
+        snapshot = _HUB.snapshot(names)
+        rows = fetch(cursor)
+        db.session.remove()
+        while not rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not _HUB.wait(snapshot, remaining):
+                break
+            snapshot = _HUB.snapshot(names)
+            rows = fetch(cursor)
+            db.session.remove()
+        if rows:
+            cursor = int(rows[-1][0])
+        return jsonify({"ok": True, "items": [item for _, item in rows], "cursor": cursor})
+
+    def _generate():
+        cursor = int(since_id)
+        deadline = time.monotonic() + float(stream_max_seconds())
+        beat = float(heartbeat_seconds())
+        yield f"retry: 2000\n: cursor {cursor}\n\n"
+        while time.monotonic() < deadline:
+            snapshot = _HUB.snapshot(names)
+            rows = fetch(cursor)
+            db.session.remove()
+            for item_id, item in rows:
+                cursor = int(item_id)
+                yield _sse_frame(event_name, item_id, item)
+            if rows:
+                continue
+            if not _HUB.wait(snapshot, min(beat, max(0.0, deadline - time.monotonic()))):
+                yield ": keep-alive\n\n"
+
+    response = Response(stream_with_context(_generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-store"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -167,7 +167,12 @@ def maybe_award_bonus(acct: MoneyBoxAccount) -> float:
     return bonus
 
 
-def autosave_from_commission(*, user_id: int, amount: float, kind: str, reference: str) -> float:
+def autosave_from_commission(*, user_id: int, amount: float, kind: str, reference: str, commit: bool = True) -> float:
+    """Sweep the configured autosave share of an eligible credit into MoneyBox.
+
+    With commit=False the sweep joins the caller's transaction (used by
+    wallets.post_txns so a settlement and its autosave commit together).
+    """
     try:
         amt = float(amount or 0.0)
     except Exception:
@@ -182,7 +187,14 @@ def autosave_from_commission(*, user_id: int, amount: float, kind: str, referenc
     if not _is_allowed_role(u):
         return 0.0
 
-    acct = get_or_create_account(int(user_id))
+    if commit:
+        acct = get_or_create_account(int(user_id))
+    else:
+        # A freshly created account never has autosave enabled, so there is
+        # nothing to sweep and no reason to commit mid-transaction.
+        acct = MoneyBoxAccount.query.filter_by(user_id=int(user_id)).first()
+        if not acct:
+            return 0.0
     if not bool(acct.autosave_enabled) or float(acct.autosave_percent or 0.0) <= 0.0:
         return 0.0
 
@@ -212,12 +224,16 @@ def autosave_from_commission(*, user_id: int, amount: float, kind: str, referenc
     acct.updated_at = _now()
     record_ledger(acct, "AUTOSAVE", sweep, reference=reference, meta={"kind": kind, "percent": percent}, idempotency_key=idem_key)
 
-    try:
-        db.session.add(acct)
-        db.session.commit()
-    except Exception:
-        db.session.rollback()
-        return 0.0
+    db.session.add(acct)
+    if not commit:
+        # Failures propagate so the caller can abandon its whole transaction.
+        db.session.flush()
+    else:
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            return 0.0
 
     log_event(
         "moneybox_autosave",
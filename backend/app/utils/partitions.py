@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import os
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from app.extensions import db
+
+
+# Append-heavy tables that are range partitioned by month on Postgres. The
+# value is the partition key; listing_views uses its YYYY-MM-DD view_date so
+# the daily dedupe constraint can still be enforced per partition.
+PARTITIONED_TABLES: dict[str, str] = {
+    "wallet_txns": "created_at",
+    "platform_events": "created_at",
+    "listing_views": "view_date",
+    "notification_queue": "created_at",
+    "audit_logs": "created_at",
+}
+
+# Columns that must stay unique across every partition. Postgres only allows
+# unique indexes that include the partition key, so these are enforced through
+# the partition_unique_keys guard table (see the partitioning migration).
+GLOBAL_UNIQUE_KEYS: dict[str, str] = {
+    "wallet_txns": "idempotency_key",
+    "platform_events": "idempotency_key",
+}
+
+_PARTITIONED_CACHE: dict[str, bool] = {}
+
+
+def partitioning_supported() -> bool:
+    return (db.engine.dialect.name or "").lower() == "postgresql"
+
+
+def partition_months_ahead() -> int:
+    try:
+        value = int((os.getenv("PARTITION_MONTHS_AHEAD") or "3").strip() or 3)
+    except Exception:
+        value = 3
+    return max(1, min(value, 24))
+
+
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + (value.month - 1) + int(months)
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+
+def _bound(table: str, month: date) -> str:
+    if PARTITIONED_TABLES.get(table) == "view_date":
+        return month.isoformat()
+    return f"{month.isoformat()} 00:00:00"
+
+
+def table_is_partitioned(table: str) -> bool:
+    """Whether ``table`` is a partitioned parent in the current database.
+
+    Cached per process; SQLite and unconverted Postgres tables return False.
+    """
+    if table in _PARTITIONED_CACHE:
+        return _PARTITIONED_CACHE[table]
+    result = False
+    if partitioning_supported():
+        try:
+            result = bool(
+                db.session.execute(
+                    text(
+                        "SELECT 1 FROM pg_partitioned_table pt "
+                        "JOIN pg_class c ON c.oid = pt.partrelid "
+                        "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+                    ),
+                    {"name": table},
+                ).scalar()
+            )
+        except Exception:
+            result = False
+    _PARTITIONED_CACHE[table] = result
+    return result
+
+
+def _existing_partitions(table: str) -> set[str]:
+    rows = db.session.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = :name"
+        ),
+        {"name": table},
+    ).scalars()
+    return set(rows)
+
+
+def ensure_partitions(*, now: datetime | None = None, months_ahead: int | None = None) -> dict:
+    """Create monthly partitions from the current month through ``months_ahead``.
+
+    Each partition is created in its own transaction so one failure (for
+    example rows for that month already sitting in the default partition)
+    does not block the others. A no-op outside Postgres.
+    """
+    out = {"ok": True, "supported": partitioning_supported(), "created": [], "errors": {}}
+    if not out["supported"]:
+        return out
+    current = month_start(now or datetime.utcnow())
+    ahead = int(months_ahead if months_ahead is not None else partition_months_ahead())
+    for table in PARTITIONED_TABLES:
+        if not table_is_partitioned(table):
+            continue
+        existing = _existing_partitions(table)
+        for offset in range(0, ahead + 1):
+            month = add_months(current, offset)
+            name = partition_name(table, month)
+            if name in existing:
+                continue
+            try:
+                db.session.execute(
+                    text(
+                        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                        f"FOR VALUES FROM ('{_bound(table, month)}') TO ('{_bound(table, add_months(month, 1))}')"
+                    )
+                )
+                db.session.commit()
+                out["created"].append(name)
+            except Exception as exc:
+                db.session.rollback()
+                out["errors"][name] = str(exc)[:240]
+    out["ok"] = not out["errors"]
+    return out
+
+
+def _reset_partition_cache_for_tests() -> None:
+    _PARTITIONED_CACHE.clear()
@@ -3,7 +3,8 @@ from __future__ import annotations
 import hmac
 import hashlib
 import os
-import requests
+
+from app.integrations import http as outbound
 
 
 def _secret() -> str:
@@ -28,7 +29,7 @@ def initialize_transaction(email: str, amount_ngn: float, reference: str, callba
     if callback_url:
         payload["callback_url"] = callback_url
     try:
-        r = requests.post(url, headers=headers, json=payload, timeout=20)
+        r = outbound.post("paystack", url, headers=headers, json=payload, timeout=20)
         j = r.json() if r.content else {}
         if 200 <= r.status_code < 300 and j.get("status") is True:
             data = j.get("data") or {}
@@ -46,7 +47,7 @@ def initiate_transfer(amount_ngn: float, recipient_code: str, reference: str) ->
     headers = {"Authorization": f"Bearer {secret}", "Content-Type": "application/json"}
     payload = {"source": "balance", "amount": int(round(float(amount_ngn) * 100)), "recipient": recipient_code, "reference": reference}
     try:
-        r = requests.post(url, headers=headers, json=payload, timeout=20)
+        r = outbound.post("paystack", url, headers=headers, json=payload, timeout=20)
         j = r.json() if r.content else {}
         if 200 <= r.status_code < 300 and j.get("status") is True:
             data = j.get("data") or {}
@@ -7,6 +7,8 @@ from functools import wraps
 
 from flask import jsonify, request, g
 
+from app.utils.env import env_int
+
 try:
     import redis
 except Exception:  # pragma: no cover - optional dependency fallback
@@ -72,22 +74,6 @@ def _env_bool(name: str, default: bool) -> bool:
     return raw in ("1", "true", "yes", "on")
 
 
-def _env_int(name: str, default: int, *, minimum: int = 1, maximum: int | None = None) -> int:
-    raw = (os.getenv(name) or "").strip()
-    if not raw:
-        value = int(default)
-    else:
-        try:
-            value = int(raw)
-        except Exception:
-            value = int(default)
-    if value < minimum:
-        value = minimum
-    if maximum is not None and value > maximum:
-        value = maximum
-    return value
-
-
 def rate_limit_enabled(default: bool = True) -> bool:
     if (os.getenv("ENABLE_RATE_LIMIT") or "").strip():
         return _env_bool("ENABLE_RATE_LIMIT", default)
@@ -95,11 +81,11 @@ def rate_limit_enabled(default: bool = True) -> bool:
 
 
 def _rate_limit_burst_value(default: int) -> int:
-    return _env_int("RATE_LIMIT_BURST", default, minimum=1, maximum=10000)
+    return env_int("RATE_LIMIT_BURST", default, minimum=1, maximum=10000)
 
 
 def rate_limit_window_sec(default: int) -> int:
-    return _env_int("RATE_LIMIT_WINDOW_SEC", default, minimum=1, maximum=86400)
+    return env_int("RATE_LIMIT_WINDOW_SEC", default, minimum=1, maximum=86400)
 
 
 def trust_proxy_headers(default: bool = False) -> bool:
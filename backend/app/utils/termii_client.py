@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import os
-import requests
+
+from app.integrations import http as outbound
 
 TERMII_BASE = "https://api.ng.termii.com/api"
 
@@ -34,7 +35,7 @@ def send_termii_message(*, channel: str, to: str, message: str) -> tuple[bool, s
     }
 
     try:
-        r = requests.post(f"{TERMII_BASE}/sms/send", json=payload, timeout=10)
+        r = outbound.post("termii", f"{TERMII_BASE}/sms/send", json=payload, timeout=10)
         if 200 <= r.status_code < 300:
             return True, "sent"
         return False, f"termii_http_{r.status_code}"
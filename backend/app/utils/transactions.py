@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+
+from flask_sqlalchemy.session import Session as _FlaskSession
+from sqlalchemy.orm import sessionmaker
+
+from app.extensions import db
+
+
+class _ConnectionBoundSession(_FlaskSession):
+    # Flask-SQLAlchemy resolves binds per model; route everything through the
+    # connection that owns the outer transaction instead.
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        return bind if bind is not None else self.bind
+
+
+@contextmanager
+def batch_transaction():
+    """Run existing db.session code inside one outer database transaction.
+
+    For the duration of the block the current scope's ``db.session`` is bound
+    to a single connection and every ``commit()``/``rollback()`` issued by the
+    code inside only releases or rolls back a savepoint. The outer transaction
+    commits once when the block exits cleanly and rolls back otherwise.
+    """
+    conn = db.engine.connect()
+    outer = conn.begin()
+    if conn.dialect.name == "sqlite" and not conn.connection.dbapi_connection.in_transaction:
+        # pysqlite defers BEGIN until the first DML, so a released savepoint
+        # would otherwise commit on its own.
+        conn.exec_driver_sql("BEGIN")
+    options = dict(db.session.session_factory.kw)
+    options.update(bind=conn, join_transaction_mode="create_savepoint")
+    session = sessionmaker(class_=_ConnectionBoundSession, **options)()
+    previous = db.session.registry() if db.session.registry.has() else None
+    db.session.registry.set(session)
+    try:
+        yield session
+        session.flush()
+        outer.commit()
+    except Exception:
+        outer.rollback()
+        raise
+    finally:
+        session.close()
+        conn.close()
+        if previous is not None:
+            db.session.registry.set(previous)
+            previous.expire_all()
+        else:
+            db.session.registry.clear()
@@ -4,6 +4,9 @@ from datetime import datetime
 
 from app.extensions import db
 from app.models import Wallet, WalletTxn
+from app.utils.db_compat import dialect_insert
+from app.utils.partitions import table_is_partitioned
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.exc import IntegrityError
 
 
@@ -24,6 +27,247 @@ def get_or_create_wallet(user_id: int) -> Wallet:
         raise
 
 
+def _ensure_wallet_ids(user_ids: list[int]) -> dict[int, int]:
+    """Map user_id -> wallet id, creating missing wallets without committing."""
+    wanted = sorted({int(uid) for uid in user_ids})
+    if not wanted:
+        return {}
+    found = dict(
+        db.session.execute(
+            select(Wallet.user_id, Wallet.id).where(Wallet.user_id.in_(wanted))
+        ).all()
+    )
+    missing = [uid for uid in wanted if uid not in found]
+    if missing:
+        now = datetime.utcnow()
+        rows = [
+            {"user_id": uid, "balance": 0.0, "reserved_balance": 0.0, "currency": "NGN", "created_at": now, "updated_at": now}
+            for uid in missing
+        ]
+        stmt = dialect_insert(Wallet.__table__)
+        if stmt is not None:
+            db.session.execute(stmt.on_conflict_do_nothing(index_elements=["user_id"]), rows)
+        else:
+            for row in rows:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(insert(Wallet.__table__), [row])
+                except IntegrityError:
+                    pass
+        found.update(
+            dict(
+                db.session.execute(
+                    select(Wallet.user_id, Wallet.id).where(Wallet.user_id.in_(missing))
+                ).all()
+            )
+        )
+    return {int(k): int(v) for k, v in found.items()}
+
+
+def _insert_txn_row(row: dict) -> int | None:
+    """Insert a ledger row, returning its id or None when the idempotency key already exists."""
+    stmt = dialect_insert(WalletTxn.__table__)
+    if stmt is not None and table_is_partitioned(WalletTxn.__tablename__):
+        # A partitioned ledger has no unique index on idempotency_key for ON
+        # CONFLICT to target; the key guard raises IntegrityError instead.
+        stmt = None
+    if stmt is not None:
+        stmt = stmt.values(**row).on_conflict_do_nothing(index_elements=["idempotency_key"]).returning(WalletTxn.id)
+        return db.session.execute(stmt).scalar()
+    try:
+        with db.session.begin_nested():
+            return db.session.execute(insert(WalletTxn.__table__).values(**row).returning(WalletTxn.id)).scalar()
+    except IntegrityError:
+        return None
+
+
+def _expire_cached_wallets(wallet_ids: set[int]) -> None:
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, Wallet) and int(getattr(obj, "id", 0) or 0) in wallet_ids:
+            db.session.expire(obj)
+
+
+def _autosave_sweep(leg: dict, amount: float) -> float:
+    """MoneyBox autosave for a posted credit, in its own savepoint.
+
+    A failed sweep (including a lost race on its idempotency key) is rolled
+    back on its own and never fails the posting, as with post_txn before.
+    """
+    from app.utils.moneybox import autosave_from_commission
+
+    try:
+        with db.session.begin_nested():
+            sweep = autosave_from_commission(
+                user_id=leg["user_id"],
+                amount=float(amount),
+                kind=leg["kind"],
+                reference=leg["reference"],
+                commit=False,
+            )
+    except Exception:
+        return 0.0
+    return float(sweep or 0.0)
+
+
+def post_txns(legs: list[dict], *, all_or_nothing: bool = False, commit: bool = True) -> list[WalletTxn | None]:
+    """Apply several wallet postings in one transaction.
+
+    Each leg takes the post_txn keyword arguments. Balances move with atomic
+    `UPDATE ... SET balance = balance + :delta` statements (debits guarded on
+    available funds), idempotency is enforced by the unique idempotency_key
+    insert, and wallets are touched in ascending id order so concurrent
+    settlements against the same hot wallet (platform fees) cannot deadlock
+    or lose updates.
+
+    Returns one entry per leg, in input order: the posted (or previously
+    posted) WalletTxn, or None for non-positive amounts and debits without
+    sufficient available balance. With all_or_nothing=True any failed debit
+    rolls back every leg of the batch (the caller's other pending changes are
+    kept) and every entry is None.
+    """
+    if not legs:
+        return []
+    db.session.flush()
+    now = datetime.utcnow()
+
+    normalized = []
+    for idx, leg in enumerate(legs):
+        user_id = int(leg["user_id"])
+        direction = str(leg.get("direction") or "").strip().lower()
+        kind = str(leg.get("kind") or "misc")
+        reference = str(leg.get("reference") or "")
+        key = (leg.get("idempotency_key") or f"{user_id}:{kind}:{direction}:{reference}")[:160]
+        normalized.append(
+            {
+                "idx": idx,
+                "user_id": user_id,
+                "direction": direction,
+                "amount": float(leg.get("amount") or 0.0),
+                "kind": kind,
+                "reference": reference,
+                "note": str(leg.get("note") or "")[:240],
+                "key": key,
+            }
+        )
+
+    wallet_ids = _ensure_wallet_ids([leg["user_id"] for leg in normalized])
+
+    keys = [leg["key"] for leg in normalized]
+    existing_ids: dict[int, int] = {}
+    by_key = dict(db.session.execute(select(WalletTxn.idempotency_key, WalletTxn.id).where(WalletTxn.idempotency_key.in_(keys))).all())
+    natural = {}
+    refs = sorted({leg["reference"] for leg in normalized})
+    users = sorted({leg["user_id"] for leg in normalized})
+    for row in db.session.execute(
+        select(WalletTxn.id, WalletTxn.user_id, WalletTxn.kind, WalletTxn.reference, WalletTxn.direction)
+        .where(WalletTxn.user_id.in_(users), WalletTxn.reference.in_(refs))
+        .order_by(WalletTxn.id.asc())
+    ):
+        natural.setdefault((int(row.user_id), row.kind, row.reference, row.direction), int(row.id))
+    for leg in normalized:
+        txn_id = by_key.get(leg["key"]) or natural.get((leg["user_id"], leg["kind"], leg["reference"], leg["direction"]))
+        if txn_id:
+            existing_ids[leg["idx"]] = int(txn_id)
+
+    posted_ids: dict[int, int] = {}
+    posted_credits: list[dict] = []
+    failed = False
+    touched: set[int] = set()
+    ordered = sorted(normalized, key=lambda leg: (wallet_ids[leg["user_id"]], leg["key"]))
+    # The legs share one savepoint so all_or_nothing can undo them without
+    # discarding the rest of the caller's transaction.
+    legs_savepoint = db.session.begin_nested()
+    try:
+        for leg in ordered:
+            if leg["idx"] in existing_ids:
+                continue
+            amt = leg["amount"]
+            if amt <= 0 or leg["direction"] not in ("credit", "debit"):
+                continue
+
+            wallet_id = wallet_ids[leg["user_id"]]
+            txn_id = _insert_txn_row(
+                {
+                    "wallet_id": wallet_id,
+                    "user_id": leg["user_id"],
+                    "direction": leg["direction"],
+                    "amount": amt,
+                    "kind": leg["kind"],
+                    "reference": leg["reference"],
+                    "idempotency_key": leg["key"],
+                    "note": leg["note"],
+                    "created_at": now,
+                }
+            )
+            if txn_id is None:
+                # Lost a race with a concurrent posting of the same key.
+                raced = db.session.execute(select(WalletTxn.id).where(WalletTxn.idempotency_key == leg["key"])).scalar()
+                if raced:
+                    existing_ids[leg["idx"]] = int(raced)
+                continue
+
+            if leg["direction"] == "credit" and leg["reference"]:
+                sweep = _autosave_sweep(leg, amt)
+                if sweep > 0:
+                    amt = max(0.0, float(amt) - sweep)
+                    db.session.execute(
+                        update(WalletTxn.__table__).where(WalletTxn.id == int(txn_id)).values(amount=amt)
+                    )
+
+            stmt = update(Wallet.__table__).where(Wallet.id == wallet_id)
+            if leg["direction"] == "credit":
+                stmt = stmt.values(balance=Wallet.balance + amt, updated_at=now)
+            else:
+                # Enforce non-negative and respect reserved balance.
+                stmt = stmt.where(Wallet.balance - func.coalesce(Wallet.reserved_balance, 0.0) >= amt).values(
+                    balance=Wallet.balance - amt,
+                    updated_at=now,
+                )
+            applied = db.session.execute(stmt.returning(Wallet.id)).scalar()
+            if applied is None:
+                # Insufficient available funds: drop the ledger row again.
+                db.session.execute(delete(WalletTxn.__table__).where(WalletTxn.id == int(txn_id)))
+                failed = True
+                if all_or_nothing:
+                    break
+                continue
+            touched.add(wallet_id)
+            posted_ids[leg["idx"]] = int(txn_id)
+            if leg["direction"] == "credit":
+                posted_credits.append({**leg, "amount": amt, "created_at": now})
+    except Exception:
+        legs_savepoint.rollback()
+        _expire_cached_wallets(touched)
+        raise
+
+    if failed and all_or_nothing:
+        legs_savepoint.rollback()
+        _expire_cached_wallets(touched)
+        if commit:
+            db.session.commit()
+        return [None] * len(normalized)
+    legs_savepoint.commit()
+
+    if posted_credits:
+        # Ledger rows skip the ORM session hooks, so report credits here.
+        from app.services import leaderboards, merchant_stats
+        merchant_stats.record_seller_credits(db.session.connection(), posted_credits, now=now)
+        leaderboards.record_credits(db.session.connection(), posted_credits, now=now)
+
+    if commit:
+        db.session.commit()
+    else:
+        _expire_cached_wallets(touched)
+
+    ids = set(existing_ids.values()) | set(posted_ids.values())
+    rows = {int(t.id): t for t in WalletTxn.query.filter(WalletTxn.id.in_(ids)).all()} if ids else {}
+    out: list[WalletTxn | None] = []
+    for leg in normalized:
+        txn_id = existing_ids.get(leg["idx"]) or posted_ids.get(leg["idx"])
+        out.append(rows.get(int(txn_id)) if txn_id else None)
+    return out
+
+
 def post_txn(
     *,
     user_id: int,
@@ -35,58 +279,20 @@ def post_txn(
     idempotency_key: str | None = None,
 ) -> WalletTxn | None:
     """Idempotent wallet posting: one txn per idempotency_key (or per user/kind/reference/direction)."""
-    w = get_or_create_wallet(user_id)
-    key = (idempotency_key or f"{int(user_id)}:{kind}:{direction}:{reference}")[:160]
-    existing = WalletTxn.query.filter_by(idempotency_key=key).first()
-    if not existing:
-        existing = WalletTxn.query.filter_by(user_id=user_id, kind=kind, reference=reference, direction=direction).first()
-    if existing:
-        return existing
-
-    amt = float(amount or 0.0)
-    if amt <= 0:
-        return None
-
-    if direction == "credit" and reference:
-        try:
-            from app.utils.moneybox import autosave_from_commission
-            sweep = autosave_from_commission(user_id=int(user_id), amount=float(amt), kind=str(kind), reference=str(reference))
-            if sweep and sweep > 0:
-                amt = max(0.0, float(amt) - float(sweep))
-        except Exception:
-            pass
-
-    txn = WalletTxn(
-        wallet_id=w.id,
-        user_id=user_id,
-        direction=direction,
-        amount=amt,
-        kind=kind,
-        reference=reference,
-        idempotency_key=key,
-        note=(note or "")[:240],
-    )
-
-    if direction == "credit":
-        w.balance = float(w.balance or 0.0) + amt
-    elif direction == "debit":
-        # Enforce non-negative and respect reserved balance.
-        current = float(w.balance or 0.0)
-        reserved = float(getattr(w, "reserved_balance", 0.0) or 0.0)
-        available = current - reserved
-        if amt > available:
-            # Insufficient available funds: do not create txn.
-            return None
-        w.balance = current - amt
-    w.updated_at = datetime.utcnow()
-
+    leg = {
+        "user_id": user_id,
+        "direction": direction,
+        "amount": amount,
+        "kind": kind,
+        "reference": reference,
+        "note": note,
+        "idempotency_key": idempotency_key,
+    }
     try:
-        db.session.add(txn)
-        db.session.add(w)
-        db.session.commit()
-        return txn
+        return post_txns([leg])[0]
     except Exception:
         db.session.rollback()
+        key = (idempotency_key or f"{int(user_id)}:{kind}:{direction}:{reference}")[:160]
         existing = WalletTxn.query.filter_by(idempotency_key=key).first()
         if existing:
             return existing
@@ -0,0 +1,66 @@
+"""escrow due-time scheduler column
+
+Revision ID: ab20c3d4e5f6
+Revises: aa19b2c3d4e5
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "ab20c3d4e5f6"
+down_revision = "aa19b2c3d4e5"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _column_names(insp, table_name: str) -> set[str]:
+    try:
+        return {str(c.get("name") or "") for c in insp.get_columns(table_name)}
+    except Exception:
+        return set()
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "orders"):
+        return
+    if "next_escrow_check_at" not in _column_names(insp, "orders"):
+        with op.batch_alter_table("orders") as batch:
+            batch.add_column(sa.Column("next_escrow_check_at", sa.DateTime(), nullable=True))
+    insp = inspect(bind)
+    if not _index_exists(insp, "orders", "ix_orders_escrow_due"):
+        op.create_index("ix_orders_escrow_due", "orders", ["escrow_status", "next_escrow_check_at"], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "orders"):
+        return
+    if _index_exists(insp, "orders", "ix_orders_escrow_due"):
+        op.drop_index("ix_orders_escrow_due", table_name="orders")
+    if "next_escrow_check_at" in _column_names(insp, "orders"):
+        with op.batch_alter_table("orders") as batch:
+            batch.drop_column("next_escrow_check_at")
@@ -0,0 +1,75 @@
+"""moneybox maturity due column
+
+Revision ID: ac21d4e5f6a7
+Revises: ab20c3d4e5f6
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "ac21d4e5f6a7"
+down_revision = "ab20c3d4e5f6"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _column_names(insp, table_name: str) -> set[str]:
+    try:
+        return {str(c.get("name") or "") for c in insp.get_columns(table_name)}
+    except Exception:
+        return set()
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "moneybox_accounts"):
+        return
+    if "next_maturity_check_at" not in _column_names(insp, "moneybox_accounts"):
+        with op.batch_alter_table("moneybox_accounts") as batch:
+            batch.add_column(sa.Column("next_maturity_check_at", sa.DateTime(), nullable=True))
+        op.execute(
+            "UPDATE moneybox_accounts SET next_maturity_check_at = CURRENT_TIMESTAMP "
+            "WHERE status IS NULL OR status != 'CLOSED'"
+        )
+    insp = inspect(bind)
+    if not _index_exists(insp, "moneybox_accounts", "ix_moneybox_accounts_next_maturity_check_at"):
+        op.create_index(
+            "ix_moneybox_accounts_next_maturity_check_at",
+            "moneybox_accounts",
+            ["next_maturity_check_at"],
+            unique=False,
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "moneybox_accounts"):
+        return
+    if _index_exists(insp, "moneybox_accounts", "ix_moneybox_accounts_next_maturity_check_at"):
+        op.drop_index("ix_moneybox_accounts_next_maturity_check_at", table_name="moneybox_accounts")
+    if "next_maturity_check_at" in _column_names(insp, "moneybox_accounts"):
+        with op.batch_alter_table("moneybox_accounts") as batch:
+            batch.drop_column("next_maturity_check_at")
@@ -0,0 +1,108 @@
+"""payout batches and batch columns on payout requests
+
+Revision ID: ad22e5f6a7b8
+Revises: ac21d4e5f6a7
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "ad22e5f6a7b8"
+down_revision = "ac21d4e5f6a7"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _column_names(insp, table_name: str) -> set[str]:
+    try:
+        return {str(c.get("name") or "") for c in insp.get_columns(table_name)}
+    except Exception:
+        return set()
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "payout_batches"):
+        op.create_table(
+            "payout_batches",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("reference", sa.String(length=80), nullable=False),
+            sa.Column("provider", sa.String(length=32), nullable=False, server_default="mock"),
+            sa.Column("status", sa.String(length=24), nullable=False, server_default="created"),
+            sa.Column("item_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("total_amount", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("paid_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("failed_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("error", sa.String(length=240), nullable=True),
+            sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.Column("submitted_at", sa.DateTime(), nullable=True),
+            sa.Column("completed_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        )
+        op.create_index("ix_payout_batches_reference", "payout_batches", ["reference"], unique=True)
+        op.create_index("ix_payout_batches_status", "payout_batches", ["status"], unique=False)
+
+    insp = inspect(bind)
+    if not _table_exists(insp, "payout_requests"):
+        return
+    cols = _column_names(insp, "payout_requests")
+    with op.batch_alter_table("payout_requests") as batch:
+        if "batch_id" not in cols:
+            batch.add_column(sa.Column("batch_id", sa.Integer(), nullable=True))
+        if "provider" not in cols:
+            batch.add_column(sa.Column("provider", sa.String(length=32), nullable=True))
+        if "provider_reference" not in cols:
+            batch.add_column(sa.Column("provider_reference", sa.String(length=120), nullable=True))
+        if "failure_reason" not in cols:
+            batch.add_column(sa.Column("failure_reason", sa.String(length=240), nullable=True))
+    insp = inspect(bind)
+    if not _index_exists(insp, "payout_requests", "ix_payout_requests_batch_id"):
+        op.create_index("ix_payout_requests_batch_id", "payout_requests", ["batch_id"], unique=False)
+    if not _index_exists(insp, "payout_requests", "ix_payout_requests_provider_reference"):
+        op.create_index(
+            "ix_payout_requests_provider_reference",
+            "payout_requests",
+            ["provider_reference"],
+            unique=False,
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if _table_exists(insp, "payout_requests"):
+        if _index_exists(insp, "payout_requests", "ix_payout_requests_provider_reference"):
+            op.drop_index("ix_payout_requests_provider_reference", table_name="payout_requests")
+        if _index_exists(insp, "payout_requests", "ix_payout_requests_batch_id"):
+            op.drop_index("ix_payout_requests_batch_id", table_name="payout_requests")
+        cols = _column_names(insp, "payout_requests")
+        with op.batch_alter_table("payout_requests") as batch:
+            for name in ("failure_reason", "provider_reference", "provider", "batch_id"):
+                if name in cols:
+                    batch.drop_column(name)
+    insp = inspect(bind)
+    if _table_exists(insp, "payout_batches"):
+        op.drop_table("payout_batches")
@@ -0,0 +1,66 @@
+"""idempotency key expiry
+
+Revision ID: ae23f6a7b8c9
+Revises: ad22e5f6a7b8
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "ae23f6a7b8c9"
+down_revision = "ad22e5f6a7b8"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _column_names(insp, table_name: str) -> set[str]:
+    try:
+        return {str(c.get("name") or "") for c in insp.get_columns(table_name)}
+    except Exception:
+        return set()
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "idempotency_keys"):
+        return
+    if "expires_at" not in _column_names(insp, "idempotency_keys"):
+        with op.batch_alter_table("idempotency_keys") as batch:
+            batch.add_column(sa.Column("expires_at", sa.DateTime(), nullable=True))
+    insp = inspect(bind)
+    if not _index_exists(insp, "idempotency_keys", "ix_idempotency_keys_expires_at"):
+        op.create_index("ix_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "idempotency_keys"):
+        return
+    if _index_exists(insp, "idempotency_keys", "ix_idempotency_keys_expires_at"):
+        op.drop_index("ix_idempotency_keys_expires_at", table_name="idempotency_keys")
+    if "expires_at" in _column_names(insp, "idempotency_keys"):
+        with op.batch_alter_table("idempotency_keys") as batch:
+            batch.drop_column("expires_at")
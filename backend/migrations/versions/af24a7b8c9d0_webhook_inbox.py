@@ -0,0 +1,63 @@
+"""webhook inbox
+
+Revision ID: af24a7b8c9d0
+Revises: ae23f6a7b8c9
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "af24a7b8c9d0"
+down_revision = "ae23f6a7b8c9"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if _table_exists(insp, "webhook_inbox"):
+        return
+    op.create_table(
+        "webhook_inbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("provider", sa.String(length=32), nullable=False, server_default="paystack"),
+        sa.Column("event_id", sa.String(length=128), nullable=False),
+        sa.Column("event_type", sa.String(length=64), nullable=False, server_default=""),
+        sa.Column("reference", sa.String(length=128), nullable=True),
+        sa.Column("source", sa.String(length=80), nullable=False, server_default=""),
+        sa.Column("signature", sa.String(length=256), nullable=True),
+        sa.Column("payload_json", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(length=24), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("result_code", sa.Integer(), nullable=True),
+        sa.Column("result_json", sa.Text(), nullable=True),
+        sa.Column("error", sa.String(length=500), nullable=True),
+        sa.Column("received_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("available_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("claimed_at", sa.DateTime(), nullable=True),
+        sa.Column("processed_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("provider", "event_id", name="uq_webhook_inbox_provider_event"),
+    )
+    op.create_index("ix_webhook_inbox_status_id", "webhook_inbox", ["status", "id"], unique=False)
+    op.create_index("ix_webhook_inbox_reference", "webhook_inbox", ["reference"], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if _table_exists(insp, "webhook_inbox"):
+        op.drop_table("webhook_inbox")
@@ -0,0 +1,260 @@
+"""monthly range partitions for append-heavy tables (postgres only)
+
+Revision ID: ag25b8c9d0e1
+Revises: af24a7b8c9d0
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "ag25b8c9d0e1"
+down_revision = "af24a7b8c9d0"
+branch_labels = None
+depends_on = None
+
+
+# Kept in step with app.utils.partitions.
+PARTITIONED_TABLES = {
+    "wallet_txns": "created_at",
+    "platform_events": "created_at",
+    "listing_views": "view_date",
+    "notification_queue": "created_at",
+    "audit_logs": "created_at",
+}
+GLOBAL_UNIQUE_KEYS = {
+    "wallet_txns": "idempotency_key",
+    "platform_events": "idempotency_key",
+}
+MONTHS_AHEAD = 3
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _is_postgres(bind) -> bool:
+    return (bind.dialect.name or "").lower() == "postgresql"
+
+
+def _is_partitioned(bind, table: str) -> bool:
+    return bool(
+        bind.execute(
+            sa.text(
+                "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+                "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+            ),
+            {"name": table},
+        ).scalar()
+    )
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + (value.month - 1) + int(months)
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(column: str, month: date) -> str:
+    if column == "view_date":
+        return month.isoformat()
+    return f"{month.isoformat()} 00:00:00"
+
+
+def _first_month(bind, table: str, column: str) -> date:
+    today = datetime.utcnow().date()
+    current = date(today.year, today.month, 1)
+    raw = bind.execute(sa.text(f'SELECT MIN("{column}") FROM "{table}"')).scalar()
+    if raw is None:
+        return current
+    try:
+        value = date.fromisoformat(raw[:10]) if isinstance(raw, str) else raw
+        return min(current, date(value.year, value.month, 1))
+    except Exception:
+        return current
+
+
+def _serial_sequence(bind, table: str) -> str | None:
+    return bind.execute(sa.text("SELECT pg_get_serial_sequence(:t, 'id')"), {"t": table}).scalar()
+
+
+def _install_unique_key_guard():
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS partition_unique_keys ("
+        "table_name VARCHAR(64) NOT NULL, "
+        "unique_key VARCHAR(200) NOT NULL, "
+        "PRIMARY KEY (table_name, unique_key))"
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION partition_unique_key_guard() RETURNS trigger AS $$
+        DECLARE
+            k text;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                -- Release the key so a later row (a retry, or after retention) can claim it.
+                k := to_jsonb(OLD) ->> TG_ARGV[1];
+                IF k IS NOT NULL THEN
+                    DELETE FROM partition_unique_keys WHERE table_name = TG_ARGV[0] AND unique_key = k;
+                END IF;
+                RETURN NULL;
+            END IF;
+            k := to_jsonb(NEW) ->> TG_ARGV[1];
+            IF k IS NOT NULL THEN
+                INSERT INTO partition_unique_keys (table_name, unique_key) VALUES (TG_ARGV[0], k);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+
+def _recreate_foreign_keys(table: str, foreign_keys: list[dict]) -> None:
+    # CREATE TABLE ... (LIKE ...) copies no foreign keys, so re-add them on
+    # the new table under their original names.
+    for fk in foreign_keys:
+        options = fk.get("options") or {}
+        op.create_foreign_key(
+            fk.get("name") or f"{table}_{'_'.join(fk['constrained_columns'])}_fkey",
+            table,
+            fk["referred_table"],
+            list(fk["constrained_columns"]),
+            list(fk["referred_columns"]),
+            referent_schema=fk.get("referred_schema"),
+            ondelete=options.get("ondelete"),
+            onupdate=options.get("onupdate"),
+        )
+
+
+def _partition_table(bind, insp, table: str, column: str):
+    tmp = f"{table}_partitioned"
+    guard_col = GLOBAL_UNIQUE_KEYS.get(table)
+    indexes = insp.get_indexes(table)
+    uniques = insp.get_unique_constraints(table)
+    foreign_keys = insp.get_foreign_keys(table)
+    first = _first_month(bind, table, column)
+    today = datetime.utcnow().date()
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    seq = _serial_sequence(bind, table)
+
+    op.execute(f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE')
+    if seq:
+        # Keep the id sequence alive when the old heap is dropped.
+        op.execute(f"ALTER SEQUENCE {seq} OWNED BY NONE")
+    op.execute(
+        f'CREATE TABLE "{tmp}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY RANGE ("{column}")'
+    )
+    month = first
+    while month <= last:
+        name = f"{table}_p{month.year:04d}{month.month:02d}"
+        op.execute(
+            f'CREATE TABLE "{name}" PARTITION OF "{tmp}" '
+            f"FOR VALUES FROM ('{_bound(column, month)}') TO ('{_bound(column, _add_months(month, 1))}')"
+        )
+        month = _add_months(month, 1)
+    op.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{tmp}" DEFAULT')
+    op.execute(f'INSERT INTO "{tmp}" SELECT * FROM "{table}"')
+    if guard_col:
+        op.execute(
+            f"INSERT INTO partition_unique_keys (table_name, unique_key) "
+            f"SELECT '{table}', \"{guard_col}\" FROM \"{table}\" WHERE \"{guard_col}\" IS NOT NULL "
+            f"ON CONFLICT DO NOTHING"
+        )
+    op.execute(f'DROP TABLE "{table}"')
+    op.execute(f'ALTER TABLE "{tmp}" RENAME TO "{table}"')
+    if seq:
+        op.execute(f'ALTER SEQUENCE {seq} OWNED BY "{table}".id')
+
+    # Unique indexes must carry the partition key; the global idempotency key
+    # is enforced by the guard trigger and keeps a plain lookup index.
+    op.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY (id, "{column}")')
+    for uq in uniques:
+        cols = list(uq["column_names"])
+        if cols == [guard_col]:
+            continue
+        if column not in cols:
+            cols.append(column)
+        op.create_unique_constraint(uq["name"], table, cols)
+    unique_names = {uq["name"] for uq in uniques}
+    for ix in indexes:
+        if ix["name"] in unique_names:
+            continue
+        cols = list(ix["column_names"])
+        unique = bool(ix.get("unique"))
+        if cols == [guard_col]:
+            unique = False
+        elif unique and column not in cols:
+            cols.append(column)
+        op.create_index(ix["name"], table, cols, unique=unique)
+    _recreate_foreign_keys(table, foreign_keys)
+    if guard_col:
+        op.execute(
+            f'CREATE TRIGGER "{table}_unique_key_guard" AFTER INSERT OR DELETE ON "{table}" '
+            f"FOR EACH ROW EXECUTE FUNCTION partition_unique_key_guard('{table}', '{guard_col}')"
+        )
+
+
+def _unpartition_table(bind, insp, table: str, column: str):
+    tmp = f"{table}_unpartitioned"
+    guard_col = GLOBAL_UNIQUE_KEYS.get(table)
+    indexes = insp.get_indexes(table)
+    uniques = insp.get_unique_constraints(table)
+    foreign_keys = insp.get_foreign_keys(table)
+    seq = _serial_sequence(bind, table)
+
+    op.execute(f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE')
+    if seq:
+        op.execute(f"ALTER SEQUENCE {seq} OWNED BY NONE")
+    op.execute(f'CREATE TABLE "{tmp}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    op.execute(f'INSERT INTO "{tmp}" SELECT * FROM "{table}"')
+    op.execute(f'DROP TABLE "{table}" CASCADE')
+    op.execute(f'ALTER TABLE "{tmp}" RENAME TO "{table}"')
+    if seq:
+        op.execute(f'ALTER SEQUENCE {seq} OWNED BY "{table}".id')
+    op.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY (id)')
+    for uq in uniques:
+        op.create_unique_constraint(uq["name"], table, list(uq["column_names"]))
+    unique_names = {uq["name"] for uq in uniques}
+    for ix in indexes:
+        if ix["name"] in unique_names:
+            continue
+        cols = list(ix["column_names"])
+        op.create_index(ix["name"], table, cols, unique=bool(ix.get("unique")) or cols == [guard_col])
+    _recreate_foreign_keys(table, foreign_keys)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not _is_postgres(bind):
+        # SQLite (tests, local dev) keeps plain single tables.
+        return
+    _install_unique_key_guard()
+    for table, column in PARTITIONED_TABLES.items():
+        insp = inspect(bind)
+        if not _table_exists(insp, table) or _is_partitioned(bind, table):
+            continue
+        _partition_table(bind, insp, table, column)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if not _is_postgres(bind):
+        return
+    for table, column in PARTITIONED_TABLES.items():
+        insp = inspect(bind)
+        if not _table_exists(insp, table) or not _is_partitioned(bind, table):
+            continue
+        _unpartition_table(bind, insp, table, column)
+    op.execute("DROP FUNCTION IF EXISTS partition_unique_key_guard() CASCADE")
+    op.execute("DROP TABLE IF EXISTS partition_unique_keys")
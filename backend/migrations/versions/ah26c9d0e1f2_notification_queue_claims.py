@@ -0,0 +1,77 @@
+"""notification queue claim lease
+
+Revision ID: ah26c9d0e1f2
+Revises: ag25b8c9d0e1
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "ah26c9d0e1f2"
+down_revision = "ag25b8c9d0e1"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _column_names(insp, table_name: str) -> set[str]:
+    try:
+        return {str(c.get("name") or "") for c in insp.get_columns(table_name)}
+    except Exception:
+        return set()
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "notification_queue"):
+        return
+    cols = _column_names(insp, "notification_queue")
+    with op.batch_alter_table("notification_queue") as batch:
+        if "claim_token" not in cols:
+            batch.add_column(sa.Column("claim_token", sa.String(length=32), nullable=True))
+        if "lease_expires_at" not in cols:
+            batch.add_column(sa.Column("lease_expires_at", sa.DateTime(), nullable=True))
+    insp = inspect(bind)
+    if not _index_exists(insp, "notification_queue", "ix_notification_queue_status_next_attempt"):
+        op.create_index(
+            "ix_notification_queue_status_next_attempt",
+            "notification_queue",
+            ["status", "next_attempt_at"],
+            unique=False,
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "notification_queue"):
+        return
+    if _index_exists(insp, "notification_queue", "ix_notification_queue_status_next_attempt"):
+        op.drop_index("ix_notification_queue_status_next_attempt", table_name="notification_queue")
+    cols = _column_names(insp, "notification_queue")
+    with op.batch_alter_table("notification_queue") as batch:
+        if "lease_expires_at" in cols:
+            batch.drop_column("lease_expires_at")
+        if "claim_token" in cols:
+            batch.drop_column("claim_token")
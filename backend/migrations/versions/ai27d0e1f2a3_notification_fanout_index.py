@@ -0,0 +1,56 @@
+"""notification queue fan-out collapse index
+
+Revision ID: ai27d0e1f2a3
+Revises: ah26c9d0e1f2
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "ai27d0e1f2a3"
+down_revision = "ah26c9d0e1f2"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "notification_queue"):
+        return
+    if not _index_exists(insp, "notification_queue", "ix_notification_queue_reference_to"):
+        op.create_index(
+            "ix_notification_queue_reference_to",
+            "notification_queue",
+            ["reference", "to", "created_at"],
+            unique=False,
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "notification_queue"):
+        return
+    if _index_exists(insp, "notification_queue", "ix_notification_queue_reference_to"):
+        op.drop_index("ix_notification_queue_reference_to", table_name="notification_queue")
@@ -0,0 +1,51 @@
+"""notifications since_id cursor index
+
+Revision ID: aj28e1f2a3b4
+Revises: ai27d0e1f2a3
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "aj28e1f2a3b4"
+down_revision = "ai27d0e1f2a3"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "notifications"):
+        return
+    if not _index_exists(insp, "notifications", "ix_notifications_user_id_id"):
+        op.create_index("ix_notifications_user_id_id", "notifications", ["user_id", "id"], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "notifications"):
+        return
+    if _index_exists(insp, "notifications", "ix_notifications_user_id_id"):
+        op.drop_index("ix_notifications_user_id_id", table_name="notifications")
@@ -0,0 +1,69 @@
+"""driver location pings track table
+
+Revision ID: ak29f2a3b4c5
+Revises: aj28e1f2a3b4
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "ak29f2a3b4c5"
+down_revision = "aj28e1f2a3b4"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "driver_location_pings"):
+        op.create_table(
+            "driver_location_pings",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("driver_id", sa.Integer(), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=True),
+            sa.Column("lat", sa.Float(), nullable=False),
+            sa.Column("lng", sa.Float(), nullable=False),
+            sa.Column("accuracy_m", sa.Float(), nullable=True),
+            sa.Column("speed_mps", sa.Float(), nullable=True),
+            sa.Column("recorded_at", sa.DateTime(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        )
+        insp = inspect(bind)
+    if not _index_exists(insp, "driver_location_pings", "ix_driver_location_pings_driver_recorded"):
+        op.create_index(
+            "ix_driver_location_pings_driver_recorded",
+            "driver_location_pings",
+            ["driver_id", "recorded_at"],
+            unique=False,
+        )
+    if not _index_exists(insp, "driver_location_pings", "ix_driver_location_pings_order_id"):
+        op.create_index("ix_driver_location_pings_order_id", "driver_location_pings", ["order_id"], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if _table_exists(insp, "driver_location_pings"):
+        op.drop_table("driver_location_pings")
@@ -0,0 +1,59 @@
+"""driver job offer lookup indexes
+
+Revision ID: al30a3b4c5d6
+Revises: ak29f2a3b4c5
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "al30a3b4c5d6"
+down_revision = "ak29f2a3b4c5"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ("ix_driver_job_offers_order_status", ["order_id", "status"]),
+    ("ix_driver_job_offers_driver_status", ["driver_id", "status"]),
+)
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "driver_job_offers"):
+        return
+    for name, columns in INDEXES:
+        if not _index_exists(insp, "driver_job_offers", name):
+            op.create_index(name, "driver_job_offers", columns, unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "driver_job_offers"):
+        return
+    for name, _columns in INDEXES:
+        if _index_exists(insp, "driver_job_offers", name):
+            op.drop_index(name, table_name="driver_job_offers")
@@ -0,0 +1,72 @@
+"""dispatch sweep: orders.assigned_at and status/time indexes
+
+Revision ID: am31b4c5d6e7
+Revises: al30a3b4c5d6
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "am31b4c5d6e7"
+down_revision = "al30a3b4c5d6"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _column_names(insp, table_name: str) -> set[str]:
+    try:
+        return {str(c.get("name") or "") for c in insp.get_columns(table_name)}
+    except Exception:
+        return set()
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if _table_exists(insp, "orders"):
+        if "assigned_at" not in _column_names(insp, "orders"):
+            with op.batch_alter_table("orders") as batch:
+                batch.add_column(sa.Column("assigned_at", sa.DateTime(), nullable=True))
+        insp = inspect(bind)
+        if not _index_exists(insp, "orders", "ix_orders_status_assigned_at"):
+            op.create_index("ix_orders_status_assigned_at", "orders", ["status", "assigned_at"], unique=False)
+    if _table_exists(insp, "driver_job_offers"):
+        if not _index_exists(insp, "driver_job_offers", "ix_driver_job_offers_status_created"):
+            op.create_index(
+                "ix_driver_job_offers_status_created", "driver_job_offers", ["status", "created_at"], unique=False
+            )
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if _table_exists(insp, "driver_job_offers"):
+        if _index_exists(insp, "driver_job_offers", "ix_driver_job_offers_status_created"):
+            op.drop_index("ix_driver_job_offers_status_created", table_name="driver_job_offers")
+    if _table_exists(insp, "orders"):
+        if _index_exists(insp, "orders", "ix_orders_status_assigned_at"):
+            op.drop_index("ix_orders_status_assigned_at", table_name="orders")
+        if "assigned_at" in _column_names(insp, "orders"):
+            with op.batch_alter_table("orders") as batch:
+                batch.drop_column("assigned_at")
@@ -0,0 +1,78 @@
+"""inspector dispatch: precomputed eligibility and open load per inspector
+
+Revision ID: an32c5d6e7f8
+Revises: am31b4c5d6e7
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "an32c5d6e7f8"
+down_revision = "am31b4c5d6e7"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "inspector_dispatch"):
+        # Rows are seeded by `flask inspector-dispatch-rebuild` or the hourly beat rebuild.
+        op.create_table(
+            "inspector_dispatch",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("inspector_user_id", sa.Integer(), nullable=False),
+            sa.Column("region", sa.String(length=64), nullable=False, server_default=""),
+            sa.Column("eligible", sa.Boolean(), nullable=False, server_default=sa.false()),
+            sa.Column("tier_rank", sa.Integer(), nullable=False, server_default="1"),
+            sa.Column("reputation_score", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("open_load", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        )
+    insp = inspect(bind)
+    if not _index_exists(insp, "inspector_dispatch", "ix_inspector_dispatch_inspector_user_id"):
+        op.create_index(
+            "ix_inspector_dispatch_inspector_user_id", "inspector_dispatch", ["inspector_user_id"], unique=True
+        )
+    if not _index_exists(insp, "inspector_dispatch", "ix_inspector_dispatch_pick"):
+        op.create_index(
+            "ix_inspector_dispatch_pick",
+            "inspector_dispatch",
+            ["eligible", "region", sa.text("tier_rank DESC"), sa.text("reputation_score DESC"), "open_load"],
+            unique=False,
+        )
+    if not _index_exists(insp, "inspector_dispatch", "ix_inspector_dispatch_rank"):
+        op.create_index(
+            "ix_inspector_dispatch_rank",
+            "inspector_dispatch",
+            ["eligible", sa.text("tier_rank DESC"), sa.text("reputation_score DESC"), "open_load"],
+            unique=False,
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if _table_exists(insp, "inspector_dispatch"):
+        op.drop_table("inspector_dispatch")
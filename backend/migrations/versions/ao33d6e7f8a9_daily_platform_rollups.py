@@ -0,0 +1,81 @@
+"""daily platform rollups: daily_platform_metrics and rollup_dirty_days
+
+Revision ID: ao33d6e7f8a9
+Revises: an32c5d6e7f8
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "ao33d6e7f8a9"
+down_revision = "an32c5d6e7f8"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "daily_platform_metrics"):
+        # Historical days are queued on app startup and filled by the rollup job
+        # (or `flask rollup-backfill --start YYYY-MM-DD`).
+        op.create_table(
+            "daily_platform_metrics",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("city", sa.String(length=64), nullable=False, server_default=""),
+            sa.Column("vertical", sa.String(length=16), nullable=False),
+            sa.Column("transactions", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("gmv_minor", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("commission_minor", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("sale_platform_minor", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("delivery_platform_minor", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("inspection_platform_minor", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("seller_minor", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("signups", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("merchant_signups", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.UniqueConstraint("day", "city", "vertical", name="uq_daily_platform_metrics_day_city_vertical"),
+        )
+    insp = inspect(bind)
+    if not _index_exists(insp, "daily_platform_metrics", "ix_daily_platform_metrics_day"):
+        op.create_index("ix_daily_platform_metrics_day", "daily_platform_metrics", ["day"], unique=False)
+    if not _table_exists(insp, "rollup_dirty_days"):
+        op.create_table(
+            "rollup_dirty_days",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("rollup", sa.String(length=32), nullable=False),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("marked_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.UniqueConstraint("rollup", "day", name="uq_rollup_dirty_days_rollup_day"),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if _table_exists(insp, "rollup_dirty_days"):
+        op.drop_table("rollup_dirty_days")
+    if _table_exists(insp, "daily_platform_metrics"):
+        op.drop_table("daily_platform_metrics")
@@ -0,0 +1,61 @@
+"""leaderboard scores
+
+Revision ID: aq35f8a9b0c1
+Revises: ap34e7f8a9b0
+Create Date: 2026-10-19 23:30:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "aq35f8a9b0c1"
+down_revision = "ap34e7f8a9b0"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if not _table_exists(insp, "leaderboard_scores"):
+        # Filled on app startup or by the leaderboard-recompute task.
+        op.create_table(
+            "leaderboard_scores",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("board", sa.String(length=32), nullable=False),
+            sa.Column("window_days", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("score", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.UniqueConstraint("board", "window_days", "user_id", name="uq_leaderboard_scores_entry"),
+        )
+    insp = inspect(bind)
+    if not _index_exists(insp, "leaderboard_scores", "ix_leaderboard_scores_rank"):
+        op.create_index("ix_leaderboard_scores_rank", "leaderboard_scores", ["board", "window_days", "score"], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if _table_exists(insp, "leaderboard_scores"):
+        op.drop_table("leaderboard_scores")
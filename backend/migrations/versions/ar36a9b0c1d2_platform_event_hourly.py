@@ -0,0 +1,71 @@
+"""platform event hourly rollup
+
+Revision ID: ar36a9b0c1d2
+Revises: aq35f8a9b0c1
+Create Date: 2026-10-20 01:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "ar36a9b0c1d2"
+down_revision = "aq35f8a9b0c1"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(insp, table_name: str) -> bool:
+    try:
+        return table_name in set(insp.get_table_names())
+    except Exception:
+        return False
+
+
+def _index_exists(insp, table_name: str, index_name: str) -> bool:
+    try:
+        indexes = insp.get_indexes(table_name) or []
+        return any(str(idx.get("name") or "") == str(index_name) for idx in indexes)
+    except Exception:
+        return False
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    # Created on the parent, so a partitioned platform_events table gets it
+    # on every monthly partition.
+    if _table_exists(insp, "platform_events") and not _index_exists(
+        insp, "platform_events", "ix_platform_events_created_at_type"
+    ):
+        op.create_index(
+            "ix_platform_events_created_at_type",
+            "platform_events",
+            ["created_at", "event_type", "severity"],
+            unique=False,
+        )
+    if not _table_exists(insp, "platform_event_hourly"):
+        # Filled on app startup or by the event-rollups task.
+        op.create_table(
+            "platform_event_hourly",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("hour", sa.DateTime(), nullable=False),
+            sa.Column("event_type", sa.String(length=80), nullable=False),
+            sa.Column("severity", sa.String(length=16), nullable=False, server_default="INFO"),
+            sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.UniqueConstraint("hour", "event_type", "severity", name="uq_platform_event_hourly_key"),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+    if _table_exists(insp, "platform_event_hourly"):
+        op.drop_table("platform_event_hourly")
+    if _index_exists(insp, "platform_events", "ix_platform_events_created_at_type"):
+        op.drop_index("ix_platform_events_created_at_type", table_name="platform_events")
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+
+CITIES = ("Lagos", "Abuja", "Ibadan", "Port Harcourt", "Kano", "Enugu", "Benin", "Jos")
+
+
+def _bootstrap_app(use_configured_db: bool):
+    if not use_configured_db:
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    app.app_context().push()
+    if not use_configured_db:
+        db.create_all()
+    return app
+
+
+def _seed_policy(rule_count: int) -> int:
+    from datetime import datetime, timedelta
+
+    from app.services.commission_policy_service import activate_policy, add_policy_rule, create_policy
+
+    policy = create_policy(name="bench", created_by_admin_id=None)
+    now = datetime.utcnow()
+    rng = random.Random(7)
+    for idx in range(max(0, int(rule_count))):
+        timed = idx % 5 == 0
+        add_policy_rule(
+            policy_id=int(policy.id),
+            applies_to=rng.choice(("all", "declutter", "shortlet")),
+            seller_type=rng.choice(("all", "user", "merchant")),
+            city=rng.choice(CITIES + ("",)),
+            base_rate_bps=rng.randint(200, 900),
+            promo_discount_bps=rng.choice((None, 50, 100)),
+            starts_at=(now - timedelta(days=1)) if timed else None,
+            ends_at=(now + timedelta(days=1)) if timed else None,
+        )
+    activate_policy(int(policy.id))
+    return int(policy.id)
+
+
+def _time_quotes(resolver, quotes: list[tuple[str, str, str]]) -> float:
+    started = time.perf_counter()
+    for applies_to, seller_type, city in quotes:
+        resolver(applies_to=applies_to, seller_type=seller_type, city=city)
+    return (time.perf_counter() - started) / max(1, len(quotes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-quote commission policy resolution cost.")
+    parser.add_argument("--rules", type=int, default=60, help="Synthetic policy rules to seed.")
+    parser.add_argument("--quotes", type=int, default=2000, help="Quotes to resolve per resolver.")
+    parser.add_argument(
+        "--use-configured-db",
+        action="store_true",
+        help="Benchmark the configured database and its active policy instead of a seeded in-memory one.",
+    )
+    args = parser.parse_args()
+
+    _bootstrap_app(bool(args.use_configured_db))
+    from app.services.commission_policy_service import (
+        _resolve_commission_policy_via_queries,
+        policy_cache_stats,
+        resolve_commission_policy,
+    )
+
+    if not args.use_configured_db:
+        _seed_policy(args.rules)
+
+    rng = random.Random(11)
+    quotes = [
+        (
+            rng.choice(("declutter", "shortlet")),
+            rng.choice(("user", "merchant", "all")),
+            rng.choice(CITIES),
+        )
+        for _ in range(max(1, int(args.quotes)))
+    ]
+    mismatches = sum(
+        1
+        for applies_to, seller_type, city in quotes[:200]
+        if resolve_commission_policy(applies_to=applies_to, seller_type=seller_type, city=city)
+        != _resolve_commission_policy_via_queries(applies_to=applies_to, seller_type=seller_type, city=city)
+    )
+    queried = _time_quotes(_resolve_commission_policy_via_queries, quotes)
+    compiled = _time_quotes(resolve_commission_policy, quotes)
+    result = {
+        "quotes": len(quotes),
+        "queried_us_per_quote": round(queried * 1e6, 2),
+        "compiled_us_per_quote": round(compiled * 1e6, 2),
+        "speedup": round(queried / compiled, 1) if compiled > 0 else None,
+        "parity_mismatches": int(mismatches),
+        "cache": policy_cache_stats(),
+    }
+    print(json.dumps(result, indent=2))
+    return 0 if mismatches == 0 else 2
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("FLASK_APP", "main.py")
+    sys.exit(main())
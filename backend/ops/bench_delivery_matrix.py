@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from app.segments.segment_market import _haversine_km
+from app.utils.ng_locations import get_city_coords
+
+
+def _trig_quote(origin: str, destination: str, bands, intracity: float):
+    """The per-call path: two coordinate lookups, haversine, then a band scan."""
+    a, b = get_city_coords(origin), get_city_coords(destination)
+    if not a or not b:
+        return None
+    km = intracity if origin == destination else max(intracity, _haversine_km(a[0], a[1], b[0], b[1]))
+    return next(fee for max_km, fee in bands if km <= max_km)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call haversine vs precomputed matrix delivery quotes.")
+    parser.add_argument("--quotes", type=int, default=200000, help="City-pair quotes to time with each method.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    from app.services import delivery_matrix
+    from app.utils.ng_locations import CITY_COORDS
+
+    rng = random.Random(args.seed)
+    cities = list(CITY_COORDS)
+    pairs = [(rng.choice(cities), rng.choice(cities)) for _ in range(int(args.quotes))]
+    bands = delivery_matrix.fee_bands()
+    intracity = 8.0
+
+    started = time.perf_counter()
+    build = delivery_matrix.refresh_matrix()
+    build_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    trig = [_trig_quote(a, b, bands, intracity) for a, b in pairs]
+    trig_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matrix = delivery_matrix.get_matrix()
+    index = matrix.index
+    norm = delivery_matrix.normalize_place
+    fast = [matrix.fee(index[norm(a)], index[norm(b)]) for a, b in pairs]
+    matrix_s = time.perf_counter() - started
+
+    requests = [({"city": a}, {"city": b}) for a, b in pairs]
+    started = time.perf_counter()
+    full = delivery_matrix.quote_many(requests)
+    quote_s = time.perf_counter() - started
+
+    result = {
+        "quotes": int(args.quotes),
+        "places": int(build.size),
+        "matrix_bytes": int(build.distances.itemsize * len(build.distances) + len(build.bands)),
+        "build_ms": round(1000.0 * build_s, 3),
+        "trig_us_per_quote": round(1e6 * trig_s / len(pairs), 3),
+        "matrix_us_per_quote": round(1e6 * matrix_s / len(pairs), 3),
+        "quote_many_us_per_quote": round(1e6 * quote_s / len(pairs), 3),
+        "speedup": round(trig_s / matrix_s, 1) if matrix_s > 0 else None,
+        "same_fees": trig == fast == [q["fee"] for q in full],
+    }
+    print(json.dumps(result, indent=2))
+    return 0 if result["same_fees"] else 2
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("FLASK_APP", "main.py")
+    sys.exit(main())
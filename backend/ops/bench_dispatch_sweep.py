@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+def _bootstrap_app():
+    os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    app.app_context().push()
+    db.create_all()
+    return app
+
+
+def _seed_offers(count: int, now: datetime) -> None:
+    from app.extensions import db
+    from app.models import DriverJobOffer
+
+    db.session.execute(DriverJobOffer.__table__.delete())
+    db.session.execute(
+        DriverJobOffer.__table__.insert(),
+        [
+            {
+                "order_id": 1 + idx,
+                "driver_id": 1 + idx % 500,
+                "status": "offered",
+                "created_at": now - timedelta(minutes=30 if idx % 4 else 1),
+            }
+            for idx in range(int(count))
+        ],
+    )
+    db.session.commit()
+
+
+def _per_row_expire(now: datetime, cutoff: datetime, max_items: int) -> int:
+    """The previous loop: load a page of overdue offers, update and commit each."""
+    from app.extensions import db
+    from app.models import DriverJobOffer
+
+    expired = 0
+    while True:
+        rows = (
+            DriverJobOffer.query.filter(DriverJobOffer.status == "offered")
+            .filter(DriverJobOffer.created_at <= cutoff)
+            .order_by(DriverJobOffer.created_at.asc())
+            .limit(max_items)
+            .all()
+        )
+        if not rows:
+            return expired
+        for off in rows:
+            off.status = "expired"
+            off.decided_at = now
+            db.session.add(off)
+            db.session.commit()
+            expired += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row vs set-based expiry of overdue driver offers.")
+    parser.add_argument("--offers", type=int, default=40000, help="Offers to seed; three in four are overdue.")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Rows per bulk UPDATE ... RETURNING.")
+    args = parser.parse_args()
+
+    _bootstrap_app()
+    from app.jobs.dispatch_sweeper import expire_stale_offers
+
+    now = datetime.utcnow()
+    expiry = timedelta(minutes=6)
+
+    _seed_offers(args.offers, now)
+    started = time.perf_counter()
+    legacy = _per_row_expire(now, now - expiry, 60)
+    legacy_s = time.perf_counter() - started
+
+    _seed_offers(args.offers, now)
+    started = time.perf_counter()
+    bulk = expire_stale_offers(expiry=expiry, chunk_size=args.chunk_size, max_chunks=100000, now=now)
+    bulk_s = time.perf_counter() - started
+
+    result = {
+        "offers": int(args.offers),
+        "overdue": legacy,
+        "per_row_s": round(legacy_s, 3),
+        "per_row_rows_per_s": round(legacy / legacy_s) if legacy_s > 0 else None,
+        "bulk_s": round(bulk_s, 3),
+        "bulk_rows_per_s": round(len(bulk) / bulk_s) if bulk_s > 0 else None,
+        "speedup": round(legacy_s / bulk_s, 1) if bulk_s > 0 else None,
+    }
+    print(json.dumps(result, indent=2))
+    return 0 if len(bulk) == legacy else 2
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("FLASK_APP", "main.py")
+    sys.exit(main())
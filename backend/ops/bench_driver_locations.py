@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+
+def _bootstrap_app():
+    os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    app.app_context().push()
+    db.create_all()
+    return app
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Driver ping ingestion and nearby-driver query throughput.")
+    parser.add_argument("--drivers", type=int, default=5000, help="Active drivers reporting positions.")
+    parser.add_argument("--batches", type=int, default=20, help="Ping batches uploaded per driver.")
+    parser.add_argument("--batch-size", type=int, default=5, help="Pings per batch (one per second).")
+    parser.add_argument("--queries", type=int, default=2000, help="Nearby-driver queries to time.")
+    parser.add_argument("--radius-km", type=float, default=3.0)
+    args = parser.parse_args()
+
+    _bootstrap_app()
+    from app.models import DriverLocationPing
+    from app.services.driver_locations import (
+        MemoryLocationStore,
+        _reset_location_store_for_tests,
+        cell_precision,
+        drivers_within,
+        flush_track_buffer,
+        ingest_pings,
+        to_epoch,
+    )
+
+    _reset_location_store_for_tests(MemoryLocationStore(cell_precision()))
+    os.environ["DRIVER_TRACK_FLUSH_MAX_AGE_SECONDS"] = "3600"
+    rng = random.Random(42)
+    # Lagos-sized box.
+    lat0, lng0, span = 6.45, 3.35, 0.3
+    positions = {d: [lat0 + rng.random() * span, lng0 + rng.random() * span] for d in range(1, args.drivers + 1)}
+    now = datetime.utcnow()
+    start_ts = to_epoch(now) - args.batches * args.batch_size
+
+    pings_total = 0
+    started = time.perf_counter()
+    for b in range(args.batches):
+        for driver_id, pos in positions.items():
+            batch = []
+            for i in range(args.batch_size):
+                pos[0] += rng.uniform(-0.00005, 0.00005)
+                pos[1] += rng.uniform(-0.00005, 0.00005)
+                batch.append({"lat": pos[0], "lng": pos[1], "ts": start_ts + b * args.batch_size + i})
+            ingest_pings(driver_id, batch, now=now)
+            pings_total += len(batch)
+    ingest_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    flushed = flush_track_buffer()
+    flush_s = time.perf_counter() - started
+
+    latencies = []
+    hits = 0
+    for _ in range(args.queries):
+        lat, lng = lat0 + rng.random() * span, lng0 + rng.random() * span
+        t0 = time.perf_counter()
+        hits += len(drivers_within(lat, lng, args.radius_km, limit=20, now=now))
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    stored = DriverLocationPing.query.count()
+    result = {
+        "drivers": int(args.drivers),
+        "pings": pings_total,
+        "ingest_s": round(ingest_s, 3),
+        "pings_per_s": round(pings_total / ingest_s) if ingest_s > 0 else None,
+        "track_rows_stored": stored,
+        "track_rows_kept_pct": round(100.0 * stored / pings_total, 1) if pings_total else None,
+        "final_flush_rows": int(flushed["inserted"]),
+        "final_flush_s": round(flush_s, 3),
+        "nearby_p50_ms": round(_percentile(latencies, 0.5), 3),
+        "nearby_p99_ms": round(_percentile(latencies, 0.99), 3),
+        "nearby_avg_hits": round(hits / max(1, args.queries), 1),
+    }
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("FLASK_APP", "main.py")
+    sys.exit(main())
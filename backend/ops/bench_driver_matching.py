@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+
+CITIES = ("Ikeja", "Lagos", "Ikorodu", "Lekki", "Victoria Island")
+
+
+def _bootstrap_app():
+    os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    app.app_context().push()
+    db.create_all()
+    return app
+
+
+def _seed_city(drivers: int, orders: int, rng: random.Random) -> tuple[list[int], dict[int, tuple[float, float]]]:
+    """Drivers with live pings scattered over Lagos; paid orders spread over its cities."""
+    from app.extensions import db
+    from app.models import DriverProfile, Listing, Order, User
+    from app.services.driver_locations import ingest_pings
+    from app.utils.ng_locations import get_city_coords
+
+    users = [
+        {"name": "Merchant", "email": "bench-merchant@fliptrybe.test", "role": "merchant", "password_hash": "x"},
+        {"name": "Buyer", "email": "bench-buyer@fliptrybe.test", "role": "buyer", "password_hash": "x"},
+    ]
+    users += [
+        {"name": f"Driver {i}", "email": f"bench-driver-{i}@fliptrybe.test", "role": "driver", "password_hash": "x"}
+        for i in range(drivers)
+    ]
+    db.session.execute(User.__table__.insert(), users)
+    db.session.commit()
+    merchant_id, buyer_id = 1, 2
+    driver_ids = list(range(3, 3 + drivers))
+    db.session.execute(
+        DriverProfile.__table__.insert(),
+        [{"user_id": d, "state": "Lagos", "city": rng.choice(CITIES)} for d in driver_ids],
+    )
+    for d in driver_ids:
+        ingest_pings(d, [{"lat": 6.42 + rng.random() * 0.2, "lng": 3.33 + rng.random() * 0.27}])
+
+    db.session.execute(
+        Listing.__table__.insert(),
+        [{"user_id": merchant_id, "title": f"Item {i}", "state": "Lagos", "city": rng.choice(CITIES)} for i in range(orders)],
+    )
+    db.session.commit()
+    listings = db.session.execute(Listing.__table__.select()).mappings().all()
+    db.session.execute(
+        Order.__table__.insert(),
+        [
+            {
+                "buyer_id": buyer_id,
+                "merchant_id": merchant_id,
+                "listing_id": int(row["id"]),
+                "amount": 100.0,
+                "total_price": 100.0,
+                "status": "paid",
+            }
+            for row in listings
+        ],
+    )
+    db.session.commit()
+    order_coords = {}
+    for order_id, city in db.session.execute(
+        db.select(Order.id, Listing.city).join(Listing, Listing.id == Order.listing_id)
+    ).all():
+        order_coords[int(order_id)] = get_city_coords(city)
+    return driver_ids, order_coords
+
+
+def _legacy_assign(max_items: int) -> int:
+    """The previous per-order loop: lowest-id available driver, one commit per offer."""
+    from app.extensions import db
+    from app.models import DriverJobOffer, Order, User
+
+    assigned = 0
+    rows = (
+        Order.query.filter(Order.driver_id.is_(None))
+        .filter(Order.status.in_(["created", "paid"]))
+        .order_by(Order.created_at.asc())
+        .limit(max_items)
+        .all()
+    )
+    for o in rows:
+        driver = User.query.filter(User.role == "driver").filter(User.is_available == True).order_by(User.id.asc()).first()  # noqa: E712
+        if not driver:
+            continue
+        db.session.add(DriverJobOffer(order_id=int(o.id), driver_id=int(driver.id), status="offered"))
+        db.session.commit()
+        assigned += 1
+    return assigned
+
+
+def _quality(order_coords) -> dict:
+    from app.models import DriverJobOffer
+    from app.services.driver_locations import haversine_km, latest_position
+
+    distances = []
+    drivers = set()
+    for offer in DriverJobOffer.query.filter_by(status="offered").all():
+        drivers.add(int(offer.driver_id))
+        pos = latest_position(int(offer.driver_id))
+        origin = order_coords.get(int(offer.order_id))
+        if pos and origin:
+            distances.append(haversine_km(origin[0], origin[1], pos["lat"], pos["lng"]))
+    distances.sort()
+    return {
+        "offers": len(distances),
+        "distinct_drivers": len(drivers),
+        "mean_pickup_km": round(sum(distances) / len(distances), 2) if distances else None,
+        "p90_pickup_km": round(distances[int(len(distances) * 0.9)], 2) if distances else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-order greedy vs batch driver matching on a synthetic city.")
+    parser.add_argument("--drivers", type=int, default=2000, help="Available drivers with live positions.")
+    parser.add_argument("--orders", type=int, default=500, help="Paid orders waiting for a driver.")
+    args = parser.parse_args()
+
+    _bootstrap_app()
+    from app.extensions import db
+    from app.models import DriverJobOffer
+    from app.services.driver_matching import match_pending_orders
+
+    _driver_ids, order_coords = _seed_city(args.drivers, args.orders, random.Random(7))
+
+    started = time.perf_counter()
+    legacy_offers = _legacy_assign(args.orders)
+    legacy_s = time.perf_counter() - started
+    legacy_quality = _quality(order_coords)
+    DriverJobOffer.query.delete()
+    db.session.commit()
+
+    started = time.perf_counter()
+    result = match_pending_orders(max_orders=args.orders)
+    batch_s = time.perf_counter() - started
+    batch_quality = _quality(order_coords)
+
+    report = {
+        "drivers": int(args.drivers),
+        "orders": int(args.orders),
+        "legacy_s": round(legacy_s, 3),
+        "legacy_orders_per_s": round(legacy_offers / legacy_s) if legacy_s > 0 else None,
+        "legacy": legacy_quality,
+        "batch_s": round(batch_s, 3),
+        "batch_orders_per_s": round(result["offered"] / batch_s) if batch_s > 0 else None,
+        "batch": batch_quality,
+        "speedup": round(legacy_s / batch_s, 1) if batch_s > 0 else None,
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if result["offered"] == min(args.orders, args.drivers) else 2
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("FLASK_APP", "main.py")
+    sys.exit(main())
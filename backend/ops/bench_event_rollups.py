@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+def _bootstrap_app():
+    os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    app.app_context().push()
+    db.create_all()
+    return app
+
+
+def _seed(events: int, types: int, days: int, now: datetime) -> None:
+    from app.extensions import db
+    from app.models import PlatformEvent
+
+    severities = ("INFO", "INFO", "INFO", "WARN", "ERROR")
+    span = int(days) * 86400
+    batch = 50000
+    for offset in range(0, int(events), batch):
+        db.session.execute(
+            PlatformEvent.__table__.insert(),
+            [
+                {
+                    "event_type": f"event_{idx % int(types)}",
+                    "severity": severities[idx % len(severities)],
+                    "created_at": now - timedelta(seconds=(idx * 7919) % span),
+                }
+                for idx in range(offset, min(int(events), offset + batch))
+            ],
+        )
+    db.session.commit()
+
+
+def _legacy_summary(now: datetime) -> dict:
+    """The previous per-request path: load the week's events and count them in Python."""
+    from app.models import PlatformEvent
+
+    cutoff_24h = now - timedelta(hours=24)
+    out = {"last_24h": {}, "last_7d": {}}
+    for event in PlatformEvent.query.filter(PlatformEvent.created_at >= now - timedelta(days=7), PlatformEvent.created_at < now):
+        key = (event.event_type or "unknown").strip() or "unknown"
+        out["last_7d"][key] = out["last_7d"].get(key, 0) + 1
+        if event.created_at >= cutoff_24h:
+            out["last_24h"][key] = out["last_24h"].get(key, 0) + 1
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request event scans vs hourly event rollup reads.")
+    parser.add_argument("--events", type=int, default=500000, help="Platform events to seed.")
+    parser.add_argument("--types", type=int, default=40, help="Distinct event types.")
+    parser.add_argument("--days", type=int, default=10, help="Days of history the events span.")
+    parser.add_argument("--repeat", type=int, default=3, help="Summary reads to time with each method.")
+    args = parser.parse_args()
+
+    _bootstrap_app()
+    from app.extensions import db
+    from app.services import event_rollups
+
+    now = datetime.utcnow()
+    _seed(args.events, args.types, args.days, now)
+
+    started = time.perf_counter()
+    rolled = event_rollups.refresh_event_rollup(now=now)
+    rollup_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(int(args.repeat)):
+        db.session.expunge_all()
+        legacy = _legacy_summary(now)
+    legacy_s = (time.perf_counter() - started) / int(args.repeat)
+
+    started = time.perf_counter()
+    for _ in range(int(args.repeat)):
+        for hours in (24, 24 * 7):
+            event_rollups._raw_counts(now - timedelta(hours=hours), now)
+    grouped_s = (time.perf_counter() - started) / int(args.repeat)
+
+    started = time.perf_counter()
+    for _ in range(int(args.repeat)):
+        summary = event_rollups.event_summary(now=now)
+    summary_s = (time.perf_counter() - started) / int(args.repeat)
+
+    started = time.perf_counter()
+    for _ in range(int(args.repeat)):
+        event_rollups.event_series(24 * 7, now=now, severity="ERROR")
+    series_s = (time.perf_counter() - started) / int(args.repeat)
+
+    result = {
+        "events": int(args.events),
+        "rollup_rows": int(rolled["rows"]),
+        "rollup_s": round(rollup_s, 3),
+        "legacy_summary_ms": round(1000.0 * legacy_s, 2),
+        "grouped_raw_summary_ms": round(1000.0 * grouped_s, 2),
+        "rollup_summary_ms": round(1000.0 * summary_s, 2),
+        "series_7d_ms": round(1000.0 * series_s, 2),
+        "speedup": round(legacy_s / summary_s, 1) if summary_s > 0 else None,
+        "same_counts": legacy["last_24h"] == summary["last_24h"] and legacy["last_7d"] == summary["last_7d"],
+    }
+    print(json.dumps(result, indent=2))
+    return 0 if result["same_counts"] else 2
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("FLASK_APP", "main.py")
+    sys.exit(main())
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def _bootstrap_app():
+    os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    app.app_context().push()
+    db.create_all()
+    return app
+
+
+def _seed_followers(merchant_id: int, followers: int) -> None:
+    from app.extensions import db
+    from app.models import MerchantFollow
+
+    rows = [{"follower_id": 1000 + idx, "merchant_id": int(merchant_id)} for idx in range(int(followers))]
+    db.session.execute(MerchantFollow.__table__.insert(), rows)
+    db.session.commit()
+
+
+def _per_row_fanout(merchant_id: int, reference: str) -> int:
+    """The pre-fan-out pattern: load every follower, add one ORM row each."""
+    from app.extensions import db
+    from app.models import MerchantFollow, NotificationQueue
+
+    count = 0
+    for follow in MerchantFollow.query.filter_by(merchant_id=int(merchant_id)).all():
+        db.session.add(
+            NotificationQueue(
+                channel="in_app",
+                to=str(follow.follower_id),
+                message="New listing just dropped!",
+                status="queued",
+                reference=reference,
+            )
+        )
+        count += 1
+    db.session.commit()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-row and chunked INSERT ... SELECT notification fan-out.")
+    parser.add_argument("--followers", type=int, default=50000, help="Followers to seed for the merchant.")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Recipients per INSERT ... SELECT chunk.")
+    args = parser.parse_args()
+
+    _bootstrap_app()
+    from app.extensions import db
+    from app.models import NotificationQueue
+    from app.services.fanout_service import fanout_notification
+
+    merchant_id = 7
+    _seed_followers(merchant_id, args.followers)
+
+    started = time.perf_counter()
+    legacy_rows = _per_row_fanout(merchant_id, "bench:legacy")
+    legacy_s = time.perf_counter() - started
+    NotificationQueue.query.delete()
+    db.session.commit()
+
+    event = {
+        "audience": "merchant_followers",
+        "subject_id": merchant_id,
+        "message": "New listing just dropped!",
+        "collapse_key": "bench:fanout",
+        "chunk_size": int(args.chunk_size),
+    }
+    started = time.perf_counter()
+    first = fanout_notification(**event)
+    bulk_s = time.perf_counter() - started
+    repeat = fanout_notification(**event)
+
+    result = {
+        "followers": int(args.followers),
+        "per_row_s": round(legacy_s, 3),
+        "per_row_rows_per_s": round(legacy_rows / legacy_s) if legacy_s > 0 else None,
+        "bulk_s": round(bulk_s, 3),
+        "bulk_rows_per_s": round(first["queued"] / bulk_s) if bulk_s > 0 else None,
+        "bulk_chunks": first["chunks"],
+        "speedup": round(legacy_s / bulk_s, 1) if bulk_s > 0 else None,
+        "repeat_event_queued": repeat["queued"],
+        "repeat_event_ms": repeat["elapsed_ms"],
+    }
+    print(json.dumps(result, indent=2))
+    ok = first["queued"] == int(args.followers) and repeat["queued"] == 0
+    return 0 if ok else 2
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("FLASK_APP", "main.py")
+    sys.exit(main())
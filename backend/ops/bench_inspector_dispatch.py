@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+
+REGIONS = ("ikeja", "lekki", "yaba", "wuse", "garki", "gwarinpa", "bodija", "trans-amadi")
+TIERS = ("BRONZE", "SILVER", "GOLD", "PLATINUM")
+
+
+def _bootstrap_app():
+    os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    app.app_context().push()
+    db.create_all()
+    return app
+
+
+def _seed(inspectors: int, open_orders: int, now: datetime) -> None:
+    """Bulk rows bypass the session hooks; the dispatch index is rebuilt afterwards."""
+    from app.extensions import db
+    from app.models import InspectorBond, InspectorProfile, Order, User
+
+    db.session.execute(
+        User.__table__.insert(),
+        [
+            {"id": 1 + idx, "name": f"Inspector {idx}", "email": f"bench-insp-{idx}@fliptrybe.test", "role": "inspector", "password_hash": "x"}
+            for idx in range(int(inspectors))
+        ],
+    )
+    db.session.execute(
+        InspectorProfile.__table__.insert(),
+        [
+            {
+                "user_id": 1 + idx,
+                "region": REGIONS[idx % len(REGIONS)],
+                "reputation_tier": TIERS[idx % len(TIERS)],
+                "reputation_score": float(40 + (idx * 37) % 60),
+                "is_active": idx % 10 != 0,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for idx in range(int(inspectors))
+        ],
+    )
+    db.session.execute(
+        InspectorBond.__table__.insert(),
+        [
+            {
+                "inspector_user_id": 1 + idx,
+                "bond_currency": "NGN",
+                "bond_required_amount": 5000.0,
+                "bond_available_amount": 0.0 if idx % 7 == 0 else 6000.0,
+                "bond_reserved_amount": 0.0,
+                "status": "UNDERFUNDED" if idx % 7 == 0 else "ACTIVE",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for idx in range(int(inspectors))
+        ],
+    )
+    db.session.execute(
+        Order.__table__.insert(),
+        [
+            {
+                "buyer_id": 1,
+                "merchant_id": 1,
+                "amount": 100.0,
+                "total_price": 100.0,
+                "inspector_id": 1 + (idx * 13) % int(inspectors),
+                "inspection_status": "PENDING",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for idx in range(int(open_orders))
+        ],
+    )
+    db.session.commit()
+
+
+def _scan_pick(region_hint: str) -> int | None:
+    """The previous ranking: per active profile, read its bond and count its open inspections."""
+    from app.models import InspectorBond, InspectorProfile, Order
+    from app.utils.bonding import required_amount_for_tier
+
+    ranks = {"BRONZE": 1, "SILVER": 2, "GOLD": 3, "PLATINUM": 4}
+    scored = []
+    for prof in InspectorProfile.query.filter_by(is_active=True).all():
+        bond = InspectorBond.query.filter_by(inspector_user_id=int(prof.user_id)).first()
+        if bond is None or float(bond.bond_available_amount or 0.0) < required_amount_for_tier(prof.reputation_tier):
+            continue
+        region = (prof.region or "").strip().lower()
+        load = (
+            Order.query.filter(Order.inspector_id == int(prof.user_id))
+            .filter(Order.inspection_status.in_(["PENDING", "ON_MY_WAY", "ARRIVED", "INSPECTED"]))
+            .count()
+        )
+        scored.append(
+            (
+                1 if region and (region == region_hint or region in region_hint) else 0,
+                ranks.get((prof.reputation_tier or "BRONZE").upper(), 1),
+                float(prof.reputation_score or 0.0),
+                -int(load),
+                -int(prof.user_id),
+            )
+        )
+    if not scored:
+        return None
+    return -max(scored)[4]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-inspector scan vs dispatch index pick.")
+    parser.add_argument("--inspectors", type=int, default=2000, help="Inspector profiles to seed.")
+    parser.add_argument("--open-orders", type=int, default=5000, help="Open inspections spread over inspectors.")
+    parser.add_argument("--picks", type=int, default=20, help="Assignments to time with each method.")
+    args = parser.parse_args()
+
+    _bootstrap_app()
+    from app.services.inspector_dispatch import pick_candidates, rebuild_dispatch_index
+
+    now = datetime.utcnow()
+    _seed(args.inspectors, args.open_orders, now)
+
+    started = time.perf_counter()
+    rebuilt = rebuild_dispatch_index(now=now)
+    rebuild_s = time.perf_counter() - started
+
+    hints = [f"{n} main road, {REGIONS[n % len(REGIONS)]}" for n in range(int(args.picks))]
+
+    started = time.perf_counter()
+    legacy = [_scan_pick(hint) for hint in hints]
+    scan_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    indexed = [next(iter(pick_candidates(hint, limit=1)), (None, None))[0] for hint in hints]
+    index_s = time.perf_counter() - started
+
+    result = {
+        "inspectors": int(args.inspectors),
+        "open_orders": int(args.open_orders),
+        "picks": int(args.picks),
+        "rebuild_s": round(rebuild_s, 3),
+        "rebuilt_entries": int(rebuilt["inserted"]),
+        "scan_ms_per_pick": round(1000.0 * scan_s / len(hints), 2),
+        "index_ms_per_pick": round(1000.0 * index_s / len(hints), 3),
+        "speedup": round(scan_s / index_s, 1) if index_s > 0 else None,
+        "same_picks": legacy == indexed,
+    }
+    print(json.dumps(result, indent=2))
+    return 0 if legacy == indexed else 2
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("FLASK_APP", "main.py")
+    sys.exit(main())
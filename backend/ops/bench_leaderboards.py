@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+def _bootstrap_app():
+    os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    app.app_context().push()
+    db.create_all()
+    return app
+
+
+def _seed(users: int, credits: int, days: int, now: datetime) -> None:
+    from app.extensions import db
+    from app.models import User, WalletTxn
+
+    db.session.execute(
+        User.__table__.insert(),
+        [
+            {"id": 1 + i, "name": f"Merchant {i}", "email": f"bench-lb-{i}@fliptrybe.test", "role": "merchant", "password_hash": "x"}
+            for i in range(int(users))
+        ],
+    )
+    db.session.execute(
+        WalletTxn.__table__.insert(),
+        [
+            {
+                "wallet_id": 1 + idx % int(users),
+                "user_id": 1 + idx % int(users),
+                "direction": "credit",
+                "amount": float(100 + idx % 5000),
+                "kind": "order_sale",
+                "reference": f"order:{idx}",
+                "created_at": now - timedelta(days=idx % days, minutes=idx % 1440),
+            }
+            for idx in range(int(credits))
+        ],
+    )
+    db.session.commit()
+
+
+def _legacy_top(since: datetime, limit: int) -> list[tuple[int, float]]:
+    """The previous per-request path: group the ledger, then load each user."""
+    from sqlalchemy import func
+
+    from app.extensions import db
+    from app.models import User, WalletTxn
+
+    rows = (
+        db.session.query(WalletTxn.user_id, func.sum(WalletTxn.amount).label("total"))
+        .filter(WalletTxn.kind == "order_sale", WalletTxn.direction == "credit", WalletTxn.created_at >= since)
+        .group_by(WalletTxn.user_id)
+        .order_by(func.sum(WalletTxn.amount).desc(), WalletTxn.user_id.asc())
+        .limit(limit)
+        .all()
+    )
+    out = []
+    for user_id, total in rows:
+        db.session.get(User, int(user_id))
+        out.append((int(user_id), float(total)))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request ledger grouping vs precomputed leaderboard reads.")
+    parser.add_argument("--users", type=int, default=5000, help="Merchants to seed.")
+    parser.add_argument("--credits", type=int, default=300000, help="Ledger credits to seed.")
+    parser.add_argument("--days", type=int, default=120, help="Days of history the credits span.")
+    parser.add_argument("--limit", type=int, default=50, help="Board size to read.")
+    parser.add_argument("--repeat", type=int, default=5, help="Reads to time with each method.")
+    args = parser.parse_args()
+
+    _bootstrap_app()
+    from app.extensions import db
+    from app.services import leaderboards
+
+    now = datetime.utcnow()
+    _seed(args.users, args.credits, args.days, now)
+
+    started = time.perf_counter()
+    recomputed = leaderboards.recompute_leaderboards(now=now)
+    recompute_s = time.perf_counter() - started
+
+    since = now - timedelta(days=30)
+    started = time.perf_counter()
+    for _ in range(int(args.repeat)):
+        db.session.expunge_all()
+        legacy = _legacy_top(since, args.limit)
+    legacy_s = (time.perf_counter() - started) / int(args.repeat)
+
+    started = time.perf_counter()
+    for _ in range(int(args.repeat)):
+        entries = leaderboards.top_entries("merchant", 30, limit=args.limit)
+        leaderboards.rank_of("merchant", 30, args.users // 2)
+    board_s = (time.perf_counter() - started) / int(args.repeat)
+
+    precomputed = [(row["user_id"], row["score"]) for row in entries]
+    result = {
+        "users": int(args.users),
+        "credits": int(args.credits),
+        "entries": int(recomputed["entries"]),
+        "recompute_s": round(recompute_s, 3),
+        "legacy_top_ms": round(1000.0 * legacy_s, 2),
+        "board_top_and_rank_ms": round(1000.0 * board_s, 2),
+        "speedup": round(legacy_s / board_s, 1) if board_s > 0 else None,
+        "same_ranking": [uid for uid, _ in legacy] == [uid for uid, _ in precomputed]
+        and all(abs(a - b) < 1e-6 for (_, a), (_, b) in zip(legacy, precomputed)),
+    }
+    print(json.dumps(result, indent=2))
+    return 0 if result["same_ranking"] else 2
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("FLASK_APP", "main.py")
+    sys.exit(main())
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+def _bootstrap_app():
+    os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    app.app_context().push()
+    db.create_all()
+    return app
+
+
+def _seed(merchants: int, orders: int, listings_per_merchant: int, days: int, now: datetime) -> None:
+    from app.extensions import db
+    from app.models import Listing, Order
+
+    db.session.execute(
+        Listing.__table__.insert(),
+        [
+            {"id": 1 + m * listings_per_merchant + i, "user_id": 1 + m, "title": f"Item {i}", "state": "Lagos", "city": "Ikeja"}
+            for m in range(int(merchants))
+            for i in range(int(listings_per_merchant))
+        ],
+    )
+    statuses = ("paid", "completed", "delivered", "cancelled", "created")
+    db.session.execute(
+        Order.__table__.insert(),
+        [
+            {
+                "buyer_id": 10000 + idx % 500,
+                "merchant_id": 1 + idx % int(merchants),
+                "listing_id": 1 + (idx % int(merchants)) * listings_per_merchant + (idx // int(merchants)) % listings_per_merchant,
+                "amount": float(1000 + idx % 9000),
+                "delivery_fee": float(idx % 500),
+                "status": statuses[idx % len(statuses)],
+                "created_at": now - timedelta(days=idx % days, minutes=idx % 1440),
+                "updated_at": now,
+            }
+            for idx in range(int(orders))
+        ],
+    )
+    db.session.commit()
+
+
+def _legacy_dashboard(merchant_id: int) -> tuple[int, int]:
+    """The previous per-request path: load the merchant's orders and fold them in Python."""
+    from app.models import Order
+    from app.services.rollups import ORDER_SUCCESS_STATUSES
+
+    orders = Order.query.filter_by(merchant_id=merchant_id).all()
+    paid = [o for o in orders if (o.status or "").lower() in ORDER_SUCCESS_STATUSES]
+    revenue_minor = sum(int(round(float(o.amount or 0.0) * 100.0)) for o in orders)
+    return len(paid), revenue_minor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request merchant order scans vs merchant_daily_stats reads.")
+    parser.add_argument("--merchants", type=int, default=20, help="Merchants to seed.")
+    parser.add_argument("--orders", type=int, default=200000, help="Orders to seed across all merchants.")
+    parser.add_argument("--listings", type=int, default=25, help="Listings per merchant.")
+    parser.add_argument("--days", type=int, default=365, help="Days of history the orders span.")
+    parser.add_argument("--repeat", type=int, default=5, help="Dashboard reads to time with each method.")
+    args = parser.parse_args()
+
+    _bootstrap_app()
+    from app.extensions import db
+    from app.services import merchant_stats
+
+    now = datetime.utcnow()
+    _seed(args.merchants, args.orders, args.listings, args.days, now)
+
+    started = time.perf_counter()
+    rebuilt = merchant_stats.rebuild_merchant_stats(now=now)
+    rebuild_s = time.perf_counter() - started
+
+    merchant_id = 1
+    started = time.perf_counter()
+    for _ in range(int(args.repeat)):
+        db.session.expunge_all()
+        legacy = _legacy_dashboard(merchant_id)
+    legacy_s = (time.perf_counter() - started) / int(args.repeat)
+
+    started = time.perf_counter()
+    for _ in range(int(args.repeat)):
+        stats = merchant_stats.read_merchant_stats(merchant_id, listings_since=now.date() - timedelta(days=29))
+        merchant_stats.daily_series(stats, now.date() - timedelta(days=29), now.date() + timedelta(days=1))
+    stats_s = (time.perf_counter() - started) / int(args.repeat)
+
+    result = {
+        "merchants": int(args.merchants),
+        "orders": int(args.orders),
+        "stat_rows": int(rebuilt["rows"]),
+        "rebuild_s": round(rebuild_s, 3),
+        "legacy_dashboard_ms": round(1000.0 * legacy_s, 2),
+        "stats_dashboard_ms": round(1000.0 * stats_s, 2),
+        "speedup": round(legacy_s / stats_s, 1) if stats_s > 0 else None,
+        "same_totals": legacy == (int(stats["paid"].get("orders", 0)), int(stats["totals"].get("amount_minor", 0))),
+    }
+    print(json.dumps(result, indent=2))
+    return 0 if result["same_totals"] else 2
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("FLASK_APP", "main.py")
+    sys.exit(main())
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+def _bootstrap_app():
+    os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    app.app_context().push()
+    db.create_all()
+    return app
+
+
+def _seed(orders: int, days: int, now: datetime) -> None:
+    from app.extensions import db
+    from app.models import Listing, Order
+
+    cities = ("Ikeja", "Lekki", "Abuja", "Ibadan", "Kano", "Port Harcourt")
+    db.session.execute(
+        Listing.__table__.insert(),
+        [{"id": 1 + i, "user_id": 1, "title": "Item", "state": "Lagos", "city": c} for i, c in enumerate(cities)],
+    )
+    statuses = ("paid", "completed", "delivered", "cancelled")
+    db.session.execute(
+        Order.__table__.insert(),
+        [
+            {
+                "buyer_id": 2 + idx % 300,
+                "merchant_id": 1,
+                "listing_id": 1 + idx % len(cities),
+                "amount": float(1000 + idx % 9000),
+                "total_price": float(1000 + idx % 9000),
+                "status": statuses[idx % len(statuses)],
+                "sale_platform_minor": 500,
+                "created_at": now - timedelta(days=idx % days, minutes=idx % 1440),
+                "updated_at": now,
+            }
+            for idx in range(int(orders))
+        ],
+    )
+    db.session.commit()
+
+
+def _legacy_totals() -> tuple[int, int]:
+    """The previous dashboard path: load every paid order and sum in Python."""
+    from app.models import Order
+    from app.services.rollups import ORDER_SUCCESS_STATUSES
+
+    orders = Order.query.filter(Order.status.in_(ORDER_SUCCESS_STATUSES)).all()
+    gmv = sum(int(round(float(o.total_price or o.amount or 0.0) * 100.0)) for o in orders)
+    return len(orders), gmv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whole-table dashboard scan vs daily rollup reads.")
+    parser.add_argument("--orders", type=int, default=100000, help="Orders to seed.")
+    parser.add_argument("--days", type=int, default=730, help="Days of history the orders span.")
+    parser.add_argument("--repeat", type=int, default=5, help="Dashboard reads to time with each method.")
+    args = parser.parse_args()
+
+    _bootstrap_app()
+    from app.extensions import db
+    from app.services import rollups
+
+    now = datetime.utcnow()
+    _seed(args.orders, args.days, now)
+
+    started = time.perf_counter()
+    backfill = rollups.backfill_platform_rollup((now - timedelta(days=args.days)).date(), now.date())
+    backfill_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    refreshed = rollups.refresh_platform_rollup(lookback_days=2, now=now)
+    incremental_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(int(args.repeat)):
+        db.session.expunge_all()
+        legacy = _legacy_totals()
+    legacy_s = (time.perf_counter() - started) / int(args.repeat)
+
+    started = time.perf_counter()
+    for _ in range(int(args.repeat)):
+        totals = rollups.platform_totals()["declutter"]
+    rollup_s = (time.perf_counter() - started) / int(args.repeat)
+
+    started = time.perf_counter()
+    for _ in range(int(args.repeat)):
+        rollups.platform_series(now.date() - timedelta(days=29), now.date() + timedelta(days=1))
+    window_s = (time.perf_counter() - started) / int(args.repeat)
+
+    result = {
+        "orders": int(args.orders),
+        "days": int(args.days),
+        "rollup_rows": int(backfill["rows"]),
+        "backfill_s": round(backfill_s, 3),
+        "incremental_run_s": round(incremental_s, 4),
+        "incremental_days": int(refreshed["days"]),
+        "legacy_all_time_ms": round(1000.0 * legacy_s, 2),
+        "rollup_all_time_ms": round(1000.0 * rollup_s, 2),
+        "rollup_30_day_series_ms": round(1000.0 * window_s, 2),
+        "speedup_all_time": round(legacy_s / rollup_s, 1) if rollup_s > 0 else None,
+        "same_totals": legacy == (totals["transactions"], totals["gmv_minor"]),
+    }
+    print(json.dumps(result, indent=2))
+    return 0 if result["same_totals"] else 2
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("FLASK_APP", "main.py")
+    sys.exit(main())
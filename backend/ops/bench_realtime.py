@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+
+def _pct(samples: list[float], q: float):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 2)
+
+
+def _start_gateway(queue_size: int):
+    from app.realtime import bus as realtime_bus
+    from app.realtime.gateway import Gateway
+
+    bus = realtime_bus._reset_bus_for_tests(realtime_bus.MemoryBus())
+
+    async def _allow_all(user_id, rooms):
+        return True
+
+    gateway = Gateway(authorize=_allow_all, queue_size=queue_size)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    box = {}
+
+    def _run():
+        asyncio.set_event_loop(loop)
+        box["port"] = loop.run_until_complete(gateway.start("127.0.0.1", 0, bus=bus))
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=_run, daemon=True).start()
+    ready.wait(10)
+    return gateway, box["port"]
+
+
+async def _client(port: int, token: str, room: str, expected: int, latencies: list[float], ready) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /sse?rooms={room}&token={token} HTTP/1.1\r\nHost: bench\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    await reader.readuntil(b"retry: 2000\n\n")
+    ready()
+    received = 0
+    while received < expected:
+        frame = await reader.readuntil(b"\n\n")
+        if not frame.startswith(b"event: "):
+            continue
+        envelope = json.loads(frame.split(b"data: ", 1)[1])
+        latencies.append((time.time() - float(envelope["ts"])) * 1000.0)
+        received += 1
+    writer.close()
+
+
+def _client_process(port: int, token: str, connections: int, messages: int, connected, results) -> None:
+    """Idle subscribers live in their own process so they do not compete with the gateway."""
+    latencies: list[float] = []
+    count = {"n": 0}
+
+    def _ready():
+        count["n"] += 1
+        if count["n"] >= connections:
+            connected.set()
+
+    async def _main():
+        await asyncio.gather(
+            *(_client(port, token, "order:1", messages, latencies, _ready) for _ in range(connections))
+        )
+
+    asyncio.run(_main())
+    results.put(latencies)
+
+
+def _run(args) -> dict:
+    import multiprocessing
+
+    from app.realtime.bus import publish
+    from app.utils.jwt_utils import create_token
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    gateway, port = _start_gateway(args.queue_size)
+    ctx = multiprocessing.get_context("fork")
+    connected = ctx.Event()
+    results = ctx.Queue()
+    clients = ctx.Process(
+        target=_client_process,
+        args=(port, create_token(1), int(args.connections), int(args.messages), connected, results),
+        daemon=True,
+    )
+    clients.start()
+    if not connected.wait(120):
+        raise SystemExit("clients did not connect")
+    idle_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started = time.perf_counter()
+    for idx in range(int(args.messages)):
+        publish("order:1", "order.status", {"seq": idx})
+        time.sleep(float(args.interval_ms) / 1000.0)
+    latencies = results.get(timeout=300)
+    elapsed = time.perf_counter() - started
+    clients.join(10)
+
+    return {
+        "connections": int(args.connections),
+        "messages": int(args.messages),
+        "deliveries": len(latencies),
+        "deliveries_per_s": round(len(latencies) / elapsed) if elapsed > 0 else None,
+        "fanout_latency_p50_ms": _pct(latencies, 0.50),
+        "fanout_latency_p95_ms": _pct(latencies, 0.95),
+        "fanout_latency_p99_ms": _pct(latencies, 0.99),
+        "fanout_latency_max_ms": round(max(latencies), 2) if latencies else None,
+        "gateway_idle_kib_per_connection": round((idle_rss - rss_before) / max(1, int(args.connections)), 1),
+        "gateway": gateway.snapshot(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure realtime gateway fan-out latency to idle SSE connections.")
+    parser.add_argument("--connections", type=int, default=1000, help="Idle SSE subscribers on one room.")
+    parser.add_argument("--messages", type=int, default=50, help="Events published to the room.")
+    parser.add_argument("--interval-ms", type=float, default=20.0, help="Pause between publishes.")
+    parser.add_argument("--queue-size", type=int, default=256, help="Per-connection send queue size.")
+    args = parser.parse_args()
+
+    result = _run(args)
+    print(json.dumps(result, indent=2))
+    return 0 if result["deliveries"] == result["connections"] * result["messages"] else 2
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("REALTIME_BUS", "memory")
+    sys.exit(main())
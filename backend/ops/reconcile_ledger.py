@@ -18,12 +18,20 @@ def main():
     parser = argparse.ArgumentParser(description="Recompute wallet balances from ledger and report drift.")
     parser.add_argument("--since", default="", help="Optional since marker for report metadata.")
     parser.add_argument("--persist", action="store_true", help="Persist report row in reconciliation_reports.")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel range scanners (ignored on SQLite).")
+    parser.add_argument("--chunk-size", type=int, default=0, help="Wallet ids per range (default WALLET_RECONCILE_CHUNK_SIZE or 2000).")
+    parser.add_argument("--tolerance", type=float, default=0.01, help="Allowed drift before a wallet is reported.")
     args = parser.parse_args()
 
     _bootstrap_app()
     from app.services.reconciliation_service import recompute_wallet_balances, persist_report
 
-    summary = recompute_wallet_balances(since=(args.since or None))
+    summary = recompute_wallet_balances(
+        since=(args.since or None),
+        tolerance=float(args.tolerance),
+        chunk_size=(int(args.chunk_size) if args.chunk_size and args.chunk_size > 0 else None),
+        workers=max(1, int(args.workers or 1)),
+    )
     if args.persist:
         row = persist_report(summary, created_by=None)
         summary["report_id"] = int(row.id)
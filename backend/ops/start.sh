@@ -4,6 +4,7 @@ set -euo pipefail
 FLASK_APP_TARGET="${FLASK_APP_TARGET:-main:app}"
 WEB_CONCURRENCY="${WEB_CONCURRENCY:-3}"
 THREADS="${THREADS:-2}"
+WORKER_CLASS="${WORKER_CLASS:-gthread}"
 TIMEOUT="${TIMEOUT:-60}"
 KEEPALIVE="${KEEPALIVE:-5}"
 PORT="${PORT:-5000}"
@@ -16,6 +17,7 @@ echo "Starting gunicorn..."
 exec gunicorn "${GUNICORN_APP}" \
   --bind "0.0.0.0:${PORT}" \
   --workers "${WEB_CONCURRENCY}" \
+  --worker-class "${WORKER_CLASS}" \
   --threads "${THREADS}" \
   --timeout "${TIMEOUT}" \
   --keep-alive "${KEEPALIVE}"
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import os
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.models import CommissionRule
+from app.services.commission_policy_service import (
+    _resolve_commission_policy_via_queries,
+    activate_policy,
+    add_policy_rule,
+    archive_policy,
+    create_policy,
+    resolve_commission_policy,
+)
+from app.utils.commission import resolve_rate
+
+
+class CompiledCommissionPolicyTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            "SQLALCHEMY_DATABASE_URI": os.getenv("SQLALCHEMY_DATABASE_URI"),
+            "DATABASE_URL": os.getenv("DATABASE_URL"),
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+
+    def _seed_policy(self) -> int:
+        now = datetime.utcnow()
+        policy = create_policy(name="Compiled", created_by_admin_id=None)
+        pid = int(policy.id)
+        add_policy_rule(policy_id=pid, applies_to="all", seller_type="all", base_rate_bps=450)
+        add_policy_rule(policy_id=pid, applies_to="declutter", seller_type="merchant", city="Lagos", base_rate_bps=700)
+        add_policy_rule(policy_id=pid, applies_to="declutter", seller_type="all", city="lagos", base_rate_bps=650)
+        add_policy_rule(
+            policy_id=pid,
+            applies_to="shortlet",
+            seller_type="user",
+            base_rate_bps=600,
+            promo_discount_bps=100,
+            starts_at=now - timedelta(hours=1),
+            ends_at=now + timedelta(hours=1),
+        )
+        add_policy_rule(
+            policy_id=pid,
+            applies_to="shortlet",
+            seller_type="user",
+            base_rate_bps=900,
+            starts_at=now + timedelta(days=2),
+        )
+        activate_policy(pid)
+        return pid
+
+    def test_compiled_resolution_matches_query_resolver(self):
+        with self.app.app_context():
+            self._seed_policy()
+            later = datetime.utcnow() + timedelta(days=3)
+            for applies_to in ("declutter", "shortlet", "all"):
+                for seller_type in ("user", "merchant", "all"):
+                    for city in ("Lagos", "LAGOS", "Abuja", ""):
+                        for at_time in (None, later):
+                            kwargs = dict(applies_to=applies_to, seller_type=seller_type, city=city, at_time=at_time)
+                            self.assertEqual(
+                                resolve_commission_policy(**kwargs),
+                                _resolve_commission_policy_via_queries(**kwargs),
+                                kwargs,
+                            )
+            promo = resolve_commission_policy(applies_to="shortlet", seller_type="user")
+            self.assertEqual(promo.effective_rate_bps, 500)
+
+    def test_warm_lookups_issue_no_queries(self):
+        with self.app.app_context():
+            self._seed_policy()
+            resolve_commission_policy(applies_to="declutter", seller_type="merchant", city="Lagos")
+            statements = []
+
+            def _count(*_args, **_kwargs):
+                statements.append(1)
+
+            event.listen(db.engine, "before_cursor_execute", _count)
+            try:
+                for _ in range(25):
+                    res = resolve_commission_policy(applies_to="declutter", seller_type="merchant", city="Lagos")
+                    resolve_rate("listing_sale", state="Lagos", category="merchant")
+            finally:
+                event.remove(db.engine, "before_cursor_execute", _count)
+            self.assertEqual(res.effective_rate_bps, 700)
+            self.assertEqual(statements, [])
+
+    def test_policy_changes_invalidate_compiled_table(self):
+        with self.app.app_context():
+            pid = self._seed_policy()
+            self.assertEqual(resolve_commission_policy(applies_to="declutter", city="Abuja").effective_rate_bps, 450)
+            add_policy_rule(policy_id=pid, applies_to="declutter", seller_type="all", city="Abuja", base_rate_bps=300)
+            self.assertEqual(resolve_commission_policy(applies_to="declutter", city="Abuja").effective_rate_bps, 300)
+            archive_policy(pid)
+            fallback = resolve_commission_policy(applies_to="declutter", city="Abuja")
+            self.assertEqual((fallback.source, fallback.effective_rate_bps), ("default", 500))
+
+    def test_legacy_rules_resolve_case_insensitively(self):
+        with self.app.app_context():
+            db.session.add_all(
+                [
+                    CommissionRule(kind="delivery", state="Lagos", category=None, rate=0.12),
+                    CommissionRule(kind="delivery", state=None, category=None, rate=0.08),
+                    CommissionRule(kind="inspection", state="Lagos", category="cars", rate=0.2, is_active=False),
+                ]
+            )
+            db.session.commit()
+            self.assertAlmostEqual(resolve_rate("delivery", state="lagos"), 0.12)
+            self.assertAlmostEqual(resolve_rate("delivery", state="Abuja"), 0.08)
+            self.assertAlmostEqual(resolve_rate("inspection", state="Lagos", category="cars"), 0.10)
+            self.assertEqual(resolve_rate("withdrawal"), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+import unittest
+from unittest import mock
+
+from app import create_app
+from app.services import delivery_matrix
+from app.services.driver_locations import haversine_km
+from app.utils import ng_locations
+
+
+class DeliveryMatrixTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            key: os.getenv(key)
+            for key in ("SQLALCHEMY_DATABASE_URI", "DATABASE_URL", "DELIVERY_FEE_BANDS", "DELIVERY_MATRIX_CHECK_SECONDS")
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        os.environ.pop("DELIVERY_FEE_BANDS", None)
+        os.environ["DELIVERY_MATRIX_CHECK_SECONDS"] = "0"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        delivery_matrix._reset_matrix_for_tests()
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        delivery_matrix._reset_matrix_for_tests()
+
+    def test_matrix_matches_direct_distance(self):
+        matrix = delivery_matrix.get_matrix()
+        for a, b in (("Ikeja", "Lekki"), ("Abuja", "Kano"), ("Ibadan", "Port Harcourt")):
+            (lat1, lng1), (lat2, lng2) = ng_locations.CITY_COORDS[a], ng_locations.CITY_COORDS[b]
+            quote = delivery_matrix.quote({"city": a}, {"city": b}, matrix=matrix)
+            self.assertAlmostEqual(quote["distance_km"], haversine_km(lat1, lng1, lat2, lng2), delta=0.1)
+            self.assertEqual(quote, delivery_matrix.quote({"city": b}, {"city": a}, matrix=matrix))
+            self.assertFalse(quote["approximate"])
+
+    def test_resolution_prefers_locality_then_city_then_state(self):
+        local = delivery_matrix.quote({"city": "Lagos", "locality": "Lekki"}, {"city": "lekki"})
+        self.assertEqual(local["band"], 0)
+        fallback = delivery_matrix.quote({"state": "Lagos", "city": "Epe"}, {"city": "Abuja"})
+        self.assertTrue(fallback["approximate"])
+        self.assertGreater(fallback["distance_km"], 400)
+        self.assertIsNone(delivery_matrix.quote({"state": "Sokoto"}, {"city": "Abuja"}))
+
+    def test_rebuilds_when_bands_or_locations_change(self):
+        first = delivery_matrix.quote({"city": "Ikeja"}, {"city": "Ibadan"})
+        with mock.patch.dict(os.environ, {"DELIVERY_FEE_BANDS": "5:100,1000:999"}):
+            self.assertEqual(delivery_matrix.quote({"city": "Ikeja"}, {"city": "Ibadan"})["fee"], 999.0)
+        coords = dict(ng_locations.CITY_COORDS, Enugu=(6.4584, 7.5464))
+        with mock.patch.object(ng_locations, "CITY_COORDS", coords):
+            self.assertIsNotNone(delivery_matrix.quote({"city": "Enugu"}, {"city": "Abuja"}))
+        self.assertEqual(delivery_matrix.quote({"city": "Ikeja"}, {"city": "Ibadan"}), first)
+
+    def test_quote_endpoints(self):
+        client = self.app.test_client()
+        res = client.get("/api/delivery/quote?from_city=Ikeja&to_city=Victoria%20Island")
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("fee", res.get_json()["quote"])
+        self.assertEqual(client.get("/api/delivery/quote?from_city=Nowhere&to_city=Ikeja").status_code, 404)
+
+        res = client.post(
+            "/api/delivery/quotes",
+            json={"pairs": [{"from": "Ikeja", "to": "Abuja"}, {"from": {"state": "Oyo"}, "to": "Kano"}, {"from": "X", "to": "Y"}]},
+        )
+        body = res.get_json()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(body["quotes"]), 3)
+        self.assertTrue(body["quotes"][1]["approximate"])
+        self.assertEqual(body["unknown"], 1)
+        self.assertEqual(client.post("/api/delivery/quotes", json={"pairs": []}).status_code, 400)
+
+        snapshot = client.get("/api/delivery/matrix").get_json()
+        n = len(snapshot["places"])
+        self.assertEqual(len(snapshot["distances_km"]), n)
+        self.assertIsNone(snapshot["bands"][-1]["max_km"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.extensions import db
+from app.jobs.dispatch_sweeper import expire_stale_offers, release_stale_assignments, run_dispatch_sweep
+from app.models import DriverJobOffer, DriverProfile, Listing, Order, User
+from app.realtime import bus as realtime_bus
+from app.services import driver_locations
+from app.services.driver_locations import MemoryLocationStore
+from app.utils.autopilot import auto_reassign_stale, expire_offers
+
+
+class DispatchSweeperTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            key: os.getenv(key)
+            for key in ("SQLALCHEMY_DATABASE_URI", "DATABASE_URL", "CELERY_BROKER_URL", "REDIS_URL")
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        os.environ.pop("CELERY_BROKER_URL", None)
+        os.environ.pop("REDIS_URL", None)
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        driver_locations._reset_location_store_for_tests()
+        realtime_bus._reset_bus_for_tests()
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        driver_locations._reset_location_store_for_tests(MemoryLocationStore(5))
+        realtime_bus._reset_bus_for_tests(realtime_bus.MemoryBus())
+        self.now = datetime(2026, 3, 1, 12, 0, 0)
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            buyer = self._user("buyer")
+            merchant = self._user("merchant")
+            db.session.commit()
+            self.buyer_id, self.merchant_id = int(buyer.id), int(merchant.id)
+
+    def _user(self, role: str) -> User:
+        user = User(name=role.title(), email=f"sweep-{role}-{time.time_ns()}@fliptrybe.test", role=role)
+        user.set_password("Passw0rd!")
+        db.session.add(user)
+        db.session.flush()
+        return user
+
+    def _driver(self) -> int:
+        user = self._user("driver")
+        db.session.add(DriverProfile(user_id=int(user.id), state="Lagos", city="Ikeja"))
+        db.session.commit()
+        return int(user.id)
+
+    def _order(self, **fields) -> int:
+        listing = Listing(user_id=self.merchant_id, title="Chair", state="Lagos", city="Ikeja")
+        db.session.add(listing)
+        db.session.flush()
+        order = Order(
+            buyer_id=self.buyer_id,
+            merchant_id=self.merchant_id,
+            listing_id=int(listing.id),
+            amount=100.0,
+            total_price=100.0,
+            **fields,
+        )
+        db.session.add(order)
+        db.session.commit()
+        return int(order.id)
+
+    def _offer(self, order_id: int, driver_id: int, *, age_minutes: int, status: str = "offered") -> int:
+        offer = DriverJobOffer(
+            order_id=order_id,
+            driver_id=driver_id,
+            status=status,
+            created_at=self.now - timedelta(minutes=age_minutes),
+        )
+        db.session.add(offer)
+        db.session.commit()
+        return int(offer.id)
+
+    def test_expiry_runs_in_chunks_and_only_touches_overdue_offers(self):
+        with self.app.app_context():
+            driver = self._driver()
+            overdue = [self._offer(self._order(status="paid"), driver, age_minutes=30) for _ in range(5)]
+            fresh = self._offer(self._order(status="paid"), driver, age_minutes=1)
+
+            expired = expire_stale_offers(chunk_size=2, max_chunks=10, now=self.now)
+
+            self.assertEqual(sorted(offer_id for offer_id, _o, _d in expired), sorted(overdue))
+            self.assertEqual(db.session.get(DriverJobOffer, fresh).status, "offered")
+            self.assertEqual(DriverJobOffer.query.filter_by(status="expired").count(), 5)
+            self.assertEqual(expire_stale_offers(chunk_size=2, now=self.now), [])
+
+    def test_stale_assignment_is_released_and_offer_closed(self):
+        with self.app.app_context():
+            driver = self._driver()
+            stale = self._order(status="assigned", driver_id=driver, assigned_at=self.now - timedelta(hours=1))
+            recent = self._order(status="assigned", driver_id=driver, assigned_at=self.now - timedelta(minutes=2))
+            picked = self._order(status="picked_up", driver_id=driver, assigned_at=self.now - timedelta(hours=1))
+            self._offer(stale, driver, age_minutes=70, status="accepted")
+            legacy = self._order(status="assigned", driver_id=driver)
+
+            # Off unless configured.
+            self.assertEqual(release_stale_assignments(now=self.now), [])
+            released = release_stale_assignments(stale_after=timedelta(minutes=10), now=self.now)
+
+            self.assertEqual(released, [(stale, driver)])
+            order = db.session.get(Order, stale)
+            self.assertEqual((order.status, order.driver_id, order.assigned_at), ("paid", None, None))
+            self.assertEqual(db.session.get(Order, recent).status, "assigned")
+            self.assertEqual(db.session.get(Order, picked).status, "picked_up")
+            # Assigned before assigned_at existed: never released.
+            self.assertEqual(db.session.get(Order, legacy).status, "assigned")
+            self.assertEqual(DriverJobOffer.query.filter_by(order_id=stale).one().status, "expired")
+
+    def test_sweep_reoffers_only_affected_orders_to_a_new_driver(self):
+        with self.app.app_context():
+            first = self._driver()
+            second = self._driver()
+            expired_order = self._order(status="paid", created_at=self.now - timedelta(hours=3))
+            self._offer(expired_order, first, age_minutes=30)
+            # Pending and never offered: left for the regular matching pass.
+            untouched = self._order(status="paid", created_at=self.now - timedelta(hours=4))
+
+            result = run_dispatch_sweep(now=self.now)
+
+            self.assertTrue(result["ok"])
+            self.assertEqual((result["expired"], result["released"], result["reoffered"]), (1, 0, 1))
+            open_offers = DriverJobOffer.query.filter_by(status="offered").all()
+            self.assertEqual([(o.order_id, o.driver_id) for o in open_offers], [(expired_order, second)])
+            self.assertEqual(DriverJobOffer.query.filter_by(order_id=untouched).count(), 0)
+
+    def test_autopilot_wrappers_use_bulk_sweeps(self):
+        with self.app.app_context():
+            driver = self._driver()
+            for _ in range(3):
+                self._offer(self._order(status="paid"), driver, age_minutes=24 * 60)
+            self._order(status="assigned", driver_id=driver, assigned_at=datetime.utcnow() - timedelta(hours=2))
+
+            self.assertEqual(expire_offers(max_items=2), {"expired": 2})
+            self.assertEqual(auto_reassign_stale(), {"reassigned": 0})
+            self.assertEqual(auto_reassign_stale(stale_minutes=60), {"reassigned": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
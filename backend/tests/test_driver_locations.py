@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from app import create_app
+from app.extensions import db
+from app.jobs.driver_tracks import flush_driver_tracks
+from app.models import DriverLocationPing, Order, User
+from app.realtime import bus as realtime_bus
+from app.services import driver_locations
+from app.services.driver_locations import (
+    DriverPosition,
+    LocationStoreUnavailable,
+    MemoryLocationStore,
+    RedisLocationStore,
+    cells_covering,
+    drivers_within,
+    geohash,
+    haversine_km,
+    ingest_pings,
+    to_epoch,
+)
+from app.utils.jwt_utils import create_token
+
+
+class DriverLocationsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            key: os.getenv(key)
+            for key in (
+                "SQLALCHEMY_DATABASE_URI",
+                "DATABASE_URL",
+                "CELERY_BROKER_URL",
+                "REDIS_URL",
+                "DRIVER_TRACK_FLUSH_BATCH",
+            )
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        os.environ.pop("CELERY_BROKER_URL", None)
+        os.environ.pop("REDIS_URL", None)
+        os.environ["DRIVER_TRACK_FLUSH_BATCH"] = "1000"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        driver_locations._reset_location_store_for_tests()
+        realtime_bus._reset_bus_for_tests()
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        self.store = driver_locations._reset_location_store_for_tests(MemoryLocationStore(5))
+        self.bus = realtime_bus._reset_bus_for_tests(realtime_bus.MemoryBus())
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            stamp = time.time_ns()
+            driver = User(name="Driver", email=f"loc-driver-{stamp}@fliptrybe.test", role="driver")
+            admin = User(name="Admin", email=f"loc-admin-{stamp}@fliptrybe.test", role="admin")
+            buyer = User(name="Buyer", email=f"loc-buyer-{stamp}@fliptrybe.test", role="buyer")
+            for user in (driver, admin, buyer):
+                user.set_password("Passw0rd!")
+            db.session.add_all([driver, admin, buyer])
+            db.session.commit()
+            order = Order(
+                buyer_id=buyer.id,
+                merchant_id=admin.id,
+                driver_id=driver.id,
+                amount=100.0,
+                total_price=100.0,
+                status="driver_assigned",
+            )
+            db.session.add(order)
+            db.session.commit()
+            self.driver_id, self.admin_id, self.buyer_id = int(driver.id), int(admin.id), int(buyer.id)
+            self.order_id = int(order.id)
+        self.client = self.app.test_client()
+
+    def _headers(self, user_id: int) -> dict:
+        return {"Authorization": f"Bearer {create_token(int(user_id))}"}
+
+    def test_geohash_and_cell_cover(self):
+        self.assertEqual(geohash(57.64911, 10.40744, 8), "u4pruydq")
+        cells = cells_covering(6.5244, 3.3792, 3.0, 5)
+        self.assertIn(geohash(6.5244, 3.3792, 5), cells)
+        self.assertIn(geohash(6.5244 + 0.026, 3.3792 + 0.026, 5), cells)
+
+    def test_only_newer_ping_moves_latest_position(self):
+        now = datetime(2026, 1, 1, 12, 0, 0)
+        with self.app.app_context():
+            ingest_pings(9, [{"lat": 6.50, "lng": 3.30, "ts": to_epoch(now)}], now=now)
+            result = ingest_pings(9, [{"lat": 6.90, "lng": 3.90, "ts": to_epoch(now - timedelta(seconds=30))}], now=now)
+        self.assertFalse(result["latest_updated"])
+        self.assertEqual(self.store.latest(9).lat, 6.50)
+
+    def test_batch_is_downsampled_and_flushed_in_bulk(self):
+        now = datetime(2026, 1, 1, 12, 0, 0)
+        base = to_epoch(now) - 300
+        # One ping per second, barely moving: 300 points collapse to one per 15s.
+        pings = [{"lat": 6.5 + i * 1e-6, "lng": 3.3, "ts": base + i} for i in range(300)]
+        pings.append({"lat": 200, "lng": 3.3})
+        with self.app.app_context():
+            result = ingest_pings(self.driver_id, pings, now=now)
+            self.assertEqual(result["accepted"], 300)
+            self.assertEqual(result["rejected"], 1)
+            self.assertEqual(result["track_points"], 20)
+            self.assertEqual(DriverLocationPing.query.count(), 0)
+
+            flushed = flush_driver_tracks(now=now)
+            self.assertTrue(flushed["ok"])
+            self.assertEqual(flushed["inserted"], 20)
+            self.assertEqual(DriverLocationPing.query.count(), 20)
+
+            # The next batch continues from the last kept point.
+            again = ingest_pings(self.driver_id, [{"lat": 6.5003, "lng": 3.3, "ts": base + 300}], now=now)
+            self.assertEqual(again["track_points"], 1)
+
+    def test_drivers_within_radius_nearest_first(self):
+        now = datetime(2026, 1, 1, 12, 0, 0)
+        ts = to_epoch(now)
+        with self.app.app_context():
+            ingest_pings(1, [{"lat": 6.5244, "lng": 3.3792, "ts": ts}], now=now)
+            ingest_pings(2, [{"lat": 6.5400, "lng": 3.3792, "ts": ts}], now=now)
+            ingest_pings(3, [{"lat": 6.7000, "lng": 3.3792, "ts": ts}], now=now)
+            ingest_pings(4, [{"lat": 6.5250, "lng": 3.3800, "ts": ts - 3600}], now=now)
+        items = drivers_within(6.5244, 3.3792, 5.0, now=now)
+        self.assertEqual([item["driver_id"] for item in items], [1, 2])
+        self.assertAlmostEqual(items[1]["distance_km"], haversine_km(6.5244, 3.3792, 6.54, 3.3792), places=2)
+
+    def test_store_outage_returns_503_and_retry_is_safe(self):
+        now = datetime(2026, 1, 1, 12, 0, 0)
+        ping = {"lat": 6.52, "lng": 3.37, "ts": to_epoch(now)}
+        with mock.patch.object(self.store, "push_track", side_effect=ConnectionError("redis down")):
+            with self.app.app_context():
+                with self.assertRaises(LocationStoreUnavailable):
+                    ingest_pings(self.driver_id, [ping], now=now)
+            res = self.client.post("/api/driver/location", json={"pings": [{"lat": 6.52, "lng": 3.37}]}, headers=self._headers(self.driver_id))
+            self.assertEqual(res.status_code, 503)
+            self.assertEqual(res.headers.get("Retry-After"), "5")
+        with self.app.app_context():
+            again = ingest_pings(self.driver_id, [ping], now=now)
+        self.assertEqual(again["accepted"], 1)
+        self.assertEqual(self.store.latest(self.driver_id).lat, 6.52)
+
+    def test_inline_flush_failure_keeps_rows_buffered(self):
+        now = datetime.utcnow()
+        pings = [{"lat": 6.52, "lng": 3.37, "ts": to_epoch(now)}]
+        with self.app.app_context():
+            with mock.patch.dict(os.environ, {"DRIVER_TRACK_FLUSH_BATCH": "1"}), mock.patch.object(
+                driver_locations.db.session, "execute", side_effect=RuntimeError("db down")
+            ):
+                result = ingest_pings(self.driver_id, pings, now=now)
+            self.assertEqual((result["accepted"], result["flushed"]), (1, 0))
+            self.assertEqual(self.store.buffer_state()[0], 1)
+            self.assertEqual(flush_driver_tracks(now=now)["inserted"], 1)
+            self.assertEqual(DriverLocationPing.query.count(), 1)
+
+    def test_redis_latest_update_is_one_atomic_script(self):
+        client = mock.Mock()
+        script = client.register_script.return_value
+        script.return_value = 0
+        store = RedisLocationStore(client, "t:")
+        pos = DriverPosition(driver_id=7, lat=6.5, lng=3.3, ts=1700000000.5, order_id=None)
+        self.assertFalse(store.update_latest(pos))
+        script.assert_called_once_with(keys=["t:pos:7", "t:geo", "t:seen"], args=["6.5", "3.3", "1700000000.5", "", "7"])
+        self.assertFalse(client.pipeline.called)
+        self.assertFalse(client.hget.called)
+
+    def test_endpoint_ingests_and_publishes_to_order_room(self):
+        received = []
+        self.bus.subscribe(lambda room, message: received.append((room, json.loads(message))))
+        res = self.client.post(
+            "/api/driver/location",
+            json={"pings": [{"lat": 6.52, "lng": 3.37, "order_id": self.order_id}, {"lat": 6.51, "lng": 3.36, "ts": time.time() - 20}]},
+            headers=self._headers(self.driver_id),
+        )
+        self.assertEqual(res.status_code, 200)
+        body = res.get_json()
+        self.assertEqual(body["accepted"], 2)
+        self.assertTrue(body["latest_updated"])
+        events = [payload for room, payload in received if room == f"order:{self.order_id}"]
+        self.assertEqual(events[-1]["event"], "driver.location")
+        self.assertEqual(events[-1]["payload"]["lat"], 6.52)
+
+        self.assertEqual(
+            self.client.post("/api/driver/location", json={"lat": 1, "lng": 1}, headers=self._headers(self.buyer_id)).status_code,
+            403,
+        )
+        self.assertEqual(
+            self.client.post("/api/driver/location", json={"pings": []}, headers=self._headers(self.driver_id)).status_code,
+            400,
+        )
+
+        nearby = self.client.get(
+            "/api/driver/locations/nearby?lat=6.52&lng=3.37&radius_km=2", headers=self._headers(self.admin_id)
+        )
+        self.assertEqual(nearby.status_code, 200)
+        self.assertEqual([item["driver_id"] for item in nearby.get_json()["items"]], [self.driver_id])
+        self.assertEqual(
+            self.client.get("/api/driver/locations/nearby?lat=6.52&lng=3.37", headers=self._headers(self.driver_id)).status_code,
+            403,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
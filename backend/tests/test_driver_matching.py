@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.extensions import db
+from app.models import DriverJobOffer, DriverProfile, Listing, NotificationQueue, Order, User
+from app.realtime import bus as realtime_bus
+from app.services import driver_locations
+from app.services.driver_locations import MemoryLocationStore, ingest_pings
+from app.services.driver_matching import hungarian, match_pending_orders
+from app.utils.autopilot import auto_assign_drivers
+
+
+class DriverMatchingTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            key: os.getenv(key)
+            for key in ("SQLALCHEMY_DATABASE_URI", "DATABASE_URL", "CELERY_BROKER_URL", "REDIS_URL")
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        os.environ.pop("CELERY_BROKER_URL", None)
+        os.environ.pop("REDIS_URL", None)
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        driver_locations._reset_location_store_for_tests()
+        realtime_bus._reset_bus_for_tests()
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        driver_locations._reset_location_store_for_tests(MemoryLocationStore(5))
+        self.bus = realtime_bus._reset_bus_for_tests(realtime_bus.MemoryBus())
+        self.stamp = time.time_ns()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            buyer = self._user("buyer")
+            merchant = self._user("merchant")
+            db.session.commit()
+            self.buyer_id, self.merchant_id = int(buyer.id), int(merchant.id)
+
+    def _user(self, role: str, **fields) -> User:
+        user = User(name=role.title(), email=f"match-{role}-{time.time_ns()}@fliptrybe.test", role=role, **fields)
+        user.set_password("Passw0rd!")
+        db.session.add(user)
+        db.session.flush()
+        return user
+
+    def _driver(self, city: str, *, state: str = "Lagos", locality: str | None = None, phone: str | None = None) -> int:
+        user = self._user("driver", phone=phone)
+        db.session.add(DriverProfile(user_id=int(user.id), state=state, city=city, locality=locality))
+        db.session.commit()
+        return int(user.id)
+
+    def _order(self, city: str, *, state: str = "Lagos", status: str = "paid") -> int:
+        listing = Listing(user_id=self.merchant_id, title="Chair", state=state, city=city)
+        db.session.add(listing)
+        db.session.flush()
+        order = Order(
+            buyer_id=self.buyer_id,
+            merchant_id=self.merchant_id,
+            listing_id=int(listing.id),
+            amount=100.0,
+            total_price=100.0,
+            status=status,
+        )
+        db.session.add(order)
+        db.session.commit()
+        return int(order.id)
+
+    def _offers(self) -> dict[int, int]:
+        return {int(o.order_id): int(o.driver_id) for o in DriverJobOffer.query.filter_by(status="offered").all()}
+
+    def test_hungarian_beats_greedy_on_crossed_costs(self):
+        # Greedy takes the 1 first and is left with 100; the optimum is 2 + 2.
+        self.assertEqual(hungarian([[1, 2], [2, 100]]), [1, 0])
+        inf = float("inf")
+        self.assertEqual(hungarian([[inf, 3, 1], [2, inf, 5]]), [2, 0])
+
+    def test_orders_spread_across_drivers_in_one_pass(self):
+        with self.app.app_context():
+            reachable = self._driver("Ikeja", phone="+2348000000001")
+            drivers = {reachable, self._driver("Ikeja"), self._driver("Ikeja")}
+            orders = [self._order("Ikeja") for _ in range(3)]
+
+            result = match_pending_orders()
+
+            self.assertEqual(result["offered"], 3)
+            offers = self._offers()
+            self.assertEqual(set(offers), set(orders))
+            self.assertEqual(set(offers.values()), drivers)
+            # Every driver gets in_app; sms/whatsapp only reach a driver with a phone.
+            self.assertEqual(NotificationQueue.query.filter_by(channel="in_app").count(), 3)
+            self.assertEqual(
+                {(row.channel, row.to) for row in NotificationQueue.query.filter(NotificationQueue.channel != "in_app")},
+                {("sms", "+2348000000001"), ("whatsapp", "+2348000000001")},
+            )
+
+            # Orders with an open offer are not offered again.
+            self.assertEqual(match_pending_orders()["offered"], 0)
+
+    def test_prefers_nearest_then_least_loaded_driver(self):
+        with self.app.app_context():
+            far = self._driver("Ikorodu")
+            near_busy = self._driver("Lekki")
+            near_idle = self._driver("Lekki")
+            busy_order = Order(
+                buyer_id=self.buyer_id,
+                merchant_id=self.merchant_id,
+                driver_id=near_busy,
+                amount=1.0,
+                total_price=1.0,
+                status="picked_up",
+            )
+            db.session.add(busy_order)
+            db.session.commit()
+            order_id = self._order("Lekki")
+
+            match_pending_orders()
+            self.assertEqual(self._offers()[order_id], near_idle)
+
+            # A live ping moves the far driver right next to the next order.
+            next_order = self._order("Victoria Island")
+            ingest_pings(far, [{"lat": 6.4285, "lng": 3.4220}])
+            match_pending_orders()
+            self.assertEqual(self._offers()[next_order], far)
+
+    def test_rejected_driver_is_skipped_and_other_state_is_ineligible(self):
+        with self.app.app_context():
+            rejected = self._driver("Ikeja")
+            other = self._driver("Ikeja")
+            self._driver("Abuja", state="FCT")
+            order_id = self._order("Ikeja")
+            db.session.add(
+                DriverJobOffer(
+                    order_id=order_id,
+                    driver_id=rejected,
+                    status="rejected",
+                    decided_at=datetime.utcnow() - timedelta(minutes=1),
+                )
+            )
+            db.session.commit()
+            abuja_order = self._order("Abuja", state="FCT")
+            lone_order = self._order("Kano", state="Kano")
+
+            result = match_pending_orders()
+
+            offers = self._offers()
+            self.assertEqual(offers[order_id], other)
+            self.assertIn(abuja_order, offers)
+            self.assertNotIn(lone_order, offers)
+            self.assertEqual(result["unmatched"], 1)
+
+    def test_autopilot_delegates_and_publishes_offer_events(self):
+        received = []
+        self.bus.subscribe(lambda room, message: received.append((room, json.loads(message))))
+        with self.app.app_context():
+            driver_id = self._driver("Ikeja")
+            order_id = self._order("Ikeja")
+
+            self.assertEqual(auto_assign_drivers(), {"assigned": 1})
+
+        events = [payload for room, payload in received if room == f"driver:{driver_id}"]
+        self.assertEqual(events[-1]["event"], "driver.offer")
+        self.assertEqual(events[-1]["payload"]["order_id"], order_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
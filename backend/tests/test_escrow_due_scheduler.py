@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app import create_app
+from app.extensions import db
+from app.jobs import escrow_runner
+from app.jobs.escrow_runner import claim_due_escrow_orders, run_escrow_automation
+from app.models import Order, User
+
+
+class EscrowDueSchedulerTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            "SQLALCHEMY_DATABASE_URI": os.getenv("SQLALCHEMY_DATABASE_URI"),
+            "DATABASE_URL": os.getenv("DATABASE_URL"),
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            stamp = str(time.time_ns())
+            users = []
+            for role in ("admin", "merchant", "buyer"):
+                u = User(name=role.title(), email=f"escrow-{role}-{stamp}@fliptrybe.test", role=role)
+                u.set_password("Passw0rd!")
+                db.session.add(u)
+                users.append(u)
+            db.session.commit()
+            self.merchant_id = int(users[1].id)
+            self.buyer_id = int(users[2].id)
+
+    def _held_order(self, *, outcome: str = "NONE", condition: str = "BUYER_CONFIRM") -> int:
+        order = Order(
+            buyer_id=self.buyer_id,
+            merchant_id=self.merchant_id,
+            amount=1000.0,
+            delivery_fee=0.0,
+            inspection_fee=0.0,
+            status="paid",
+            escrow_status="HELD",
+            escrow_hold_amount=1000.0,
+            escrow_held_at=datetime.utcnow(),
+            release_condition=condition,
+            inspection_outcome=outcome,
+        )
+        db.session.add(order)
+        db.session.commit()
+        return int(order.id)
+
+    def test_waiting_orders_do_not_starve_newer_releasable_ones(self):
+        with self.app.app_context():
+            waiting = [self._held_order() for _ in range(4)]
+            failing = self._held_order(outcome="FAIL", condition="INSPECTION_PASS")
+
+            first = run_escrow_automation(limit=2)
+            self.assertEqual((first["processed"], first["skipped"]), (2, 2))
+            second = run_escrow_automation(limit=2)
+            third = run_escrow_automation(limit=2)
+            self.assertEqual(second["skipped"] + third["skipped"], 2)
+            self.assertEqual(third["refunded"], 1)
+            self.assertEqual(db.session.get(Order, failing).escrow_status, "REFUNDED")
+
+            idle = run_escrow_automation(limit=2)
+            self.assertEqual(idle["processed"], 0)
+            for oid in waiting:
+                self.assertGreater(db.session.get(Order, oid).next_escrow_check_at, datetime.utcnow())
+
+    def test_outcome_change_pulls_check_forward(self):
+        with self.app.app_context():
+            oid = self._held_order()
+            run_escrow_automation(limit=10)
+            order = db.session.get(Order, oid)
+            self.assertGreater(order.next_escrow_check_at, datetime.utcnow() + timedelta(minutes=30))
+            order.inspection_outcome = "FRAUD"
+            db.session.commit()
+            self.assertLessEqual(db.session.get(Order, oid).next_escrow_check_at, datetime.utcnow())
+            res = run_escrow_automation(limit=10)
+            self.assertEqual(res["refunded"], 1)
+            self.assertIsNone(db.session.get(Order, oid).next_escrow_check_at)
+
+    def test_timeout_orders_wake_at_deadline(self):
+        with self.app.app_context():
+            oid = self._held_order(outcome="PASS", condition="TIMEOUT")
+            run_escrow_automation(limit=10)
+            order = db.session.get(Order, oid)
+            self.assertEqual(order.escrow_status, "HELD")
+            self.assertAlmostEqual(
+                (order.next_escrow_check_at - order.escrow_held_at).total_seconds(),
+                timedelta(hours=48).total_seconds(),
+                delta=5,
+            )
+
+    def test_claims_are_disjoint(self):
+        with self.app.app_context():
+            ids = [self._held_order() for _ in range(5)]
+            first = claim_due_escrow_orders(limit=3)
+            second = claim_due_escrow_orders(limit=3)
+            self.assertEqual(len(first), 3)
+            self.assertEqual(sorted(first + second), ids)
+            self.assertEqual(claim_due_escrow_orders(limit=3), [])
+
+    def test_one_failing_order_does_not_roll_back_the_batch(self):
+        with self.app.app_context():
+            bad = self._held_order(outcome="FAIL", condition="INSPECTION_PASS")
+            good = self._held_order(outcome="FAIL", condition="INSPECTION_PASS")
+            original = escrow_runner._refund_escrow
+
+            def _flaky_refund(order, *, commit=True):
+                if int(order.id) == bad:
+                    raise RuntimeError("boom")
+                return original(order, commit=commit)
+
+            with patch.object(escrow_runner, "_refund_escrow", _flaky_refund):
+                res = run_escrow_automation(limit=10)
+            self.assertEqual((res["refunded"], res["errors"]), (1, 1))
+            self.assertEqual(db.session.get(Order, good).escrow_status, "REFUNDED")
+            failed = db.session.get(Order, bad)
+            self.assertEqual(failed.escrow_status, "HELD")
+            self.assertGreater(failed.next_escrow_check_at, datetime.utcnow())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.extensions import db
+from app.jobs.event_rollups import run_event_rollups
+from app.models import PlatformEvent, PlatformEventHourly, User
+from app.services import event_rollups
+from app.utils.jwt_utils import create_token
+
+
+class EventRollupsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {key: os.getenv(key) for key in ("SQLALCHEMY_DATABASE_URI", "DATABASE_URL")}
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+        cls.client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        self.now = datetime.utcnow().replace(microsecond=0)
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            admin = User(name="Admin", email=f"events-admin-{time.time_ns()}@fliptrybe.test", role="admin")
+            admin.set_password("Passw0rd!")
+            db.session.add(admin)
+            db.session.commit()
+            self.headers = {"Authorization": f"Bearer {create_token(int(admin.id))}"}
+
+    def _events(self, *specs, anchor: datetime | None = None) -> None:
+        anchor = anchor or self.now
+        db.session.add_all(
+            PlatformEvent(event_type=event_type, severity=severity, created_at=anchor - age)
+            for event_type, severity, age in specs
+        )
+        db.session.commit()
+
+    def test_rollup_counts_complete_hours_and_marks_empty_ones(self):
+        with self.app.app_context():
+            now = event_rollups.hour_floor(self.now) - timedelta(minutes=30)
+            self._events(
+                ("order_created", "INFO", timedelta(hours=3)),
+                ("order_created", "INFO", timedelta(hours=3, minutes=1)),
+                ("payout_failed", "ERROR", timedelta(hours=3)),
+                ("order_created", "INFO", timedelta(minutes=1)),
+                anchor=now,
+            )
+            result = run_event_rollups(now=now)
+            self.assertTrue(result["ok"])
+            current = event_rollups.hour_floor(now)
+            self.assertEqual(event_rollups.rolled_through(), current)
+
+            rows = {
+                (r.event_type, r.severity): r.count
+                for r in PlatformEventHourly.query.filter(PlatformEventHourly.hour == current - timedelta(hours=3))
+            }
+            self.assertEqual(rows, {("order_created", "INFO"): 2, ("payout_failed", "ERROR"): 1})
+            # The current partial hour is never rolled up.
+            self.assertEqual(PlatformEventHourly.query.filter(PlatformEventHourly.hour >= current).count(), 0)
+            # Hours without events get a zero row so the watermark keeps moving.
+            empty = PlatformEventHourly.query.filter_by(hour=current - timedelta(hours=1)).all()
+            self.assertEqual([(r.event_type, r.count) for r in empty], [("", 0)])
+
+            # Reruns over the same hours replace rather than add.
+            run_event_rollups(now=now)
+            self.assertEqual(event_rollups.event_total(now - timedelta(hours=4), now, event_type="order_created"), 3)
+
+    def test_reads_combine_rollup_with_live_edges(self):
+        with self.app.app_context():
+            now = event_rollups.hour_floor(self.now) - timedelta(minutes=30)
+            self._events(("order_created", "INFO", timedelta(hours=5)), anchor=now)
+            run_event_rollups(now=now)
+            # Lands after the rollup ran, in the partial current hour.
+            self._events(
+                ("order_created", "INFO", timedelta(minutes=2)),
+                ("login_failed", "WARN", timedelta(seconds=30)),
+                anchor=now,
+            )
+            counts = event_rollups.event_counts(now - timedelta(hours=6), now)
+            self.assertEqual(counts[(None, "order_created", "INFO")], 2)
+            self.assertEqual(counts[(None, "login_failed", "WARN")], 1)
+
+            # A window starting mid-hour counts its partial first hour exactly.
+            start = now - timedelta(hours=5) + timedelta(seconds=1)
+            self.assertEqual(event_rollups.event_total(start, now, event_type="order_created"), 1)
+
+            # Hours the rollup has not reached are taken live until the next run.
+            db.session.query(PlatformEventHourly).filter(
+                PlatformEventHourly.hour >= event_rollups.hour_floor(now) - timedelta(hours=2)
+            ).delete()
+            db.session.commit()
+            self._events(("order_created", "INFO", timedelta(hours=1, minutes=15)), anchor=now)
+            self.assertEqual(event_rollups.event_total(now - timedelta(hours=6), now, event_type="order_created"), 3)
+            self.assertEqual(run_event_rollups(now=now)["hours"], 2)
+            self.assertEqual(event_rollups.event_total(now - timedelta(hours=6), now, event_type="order_created"), 3)
+
+    def test_summary_and_series_endpoints(self):
+        with self.app.app_context():
+            self._events(
+                ("order_created", "INFO", timedelta(hours=1)),
+                ("order_created", "INFO", timedelta(days=3)),
+                ("payout_released", "INFO", timedelta(days=2)),
+                ("payout_failed", "ERROR", timedelta(hours=2)),
+                ("order_created", "INFO", timedelta(days=10)),
+            )
+            run_event_rollups(now=self.now)
+            self._events(("payout_failed", "ERROR", timedelta(seconds=10)))
+
+        body = self.client.get("/api/admin/events/summary", headers=self.headers).get_json()
+        self.assertEqual(body["last_24h"], {"order_created": 1, "payout_failed": 2})
+        self.assertEqual(body["last_7d"], {"order_created": 2, "payout_released": 1, "payout_failed": 2})
+        self.assertEqual(body["severity_last_24h"], {"INFO": 1, "ERROR": 2})
+
+        series = self.client.get("/api/admin/events/series?hours=3&severity=error", headers=self.headers).get_json()
+        self.assertEqual(series["severity"], "ERROR")
+        self.assertEqual(len(series["points"]), 3)
+        current = event_rollups.hour_floor(self.now)
+        self.assertEqual(series["points"][-1]["hour"], current.isoformat())
+        expected = {event_rollups.hour_floor(self.now - timedelta(hours=2)).isoformat(): 1}
+        latest = event_rollups.hour_floor(self.now - timedelta(seconds=10)).isoformat()
+        expected[latest] = expected.get(latest, 0) + 1
+        self.assertEqual({p["hour"]: p["count"] for p in series["points"] if p["count"]}, expected)
+
+        health = self.client.get("/api/admin/health/summary", headers=self.headers).get_json()
+        self.assertEqual(health["events_last_24h_errors"], 2)
+        self.assertEqual(self.client.get("/api/admin/events/series").status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
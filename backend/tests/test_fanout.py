@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import os
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.extensions import db
+from app.models import Listing, ListingFavorite, MerchantFollow, NotificationQueue, User
+from app.services.discovery_service import queue_item_unavailable_notifications
+from app.services.fanout_service import fanout_notification, notify_followers_new_listing
+from app.utils.autopilot import get_settings
+
+
+class FanoutTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            key: os.getenv(key)
+            for key in ("SQLALCHEMY_DATABASE_URI", "DATABASE_URL", "CELERY_BROKER_URL", "REDIS_URL")
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        os.environ.pop("CELERY_BROKER_URL", None)
+        os.environ.pop("REDIS_URL", None)
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+
+    def _follow(self, merchant_id: int, follower_ids) -> None:
+        db.session.execute(
+            MerchantFollow.__table__.insert(),
+            [{"follower_id": int(fid), "merchant_id": int(merchant_id)} for fid in follower_ids],
+        )
+        db.session.commit()
+
+    def test_chunks_cover_every_follower_once(self):
+        with self.app.app_context():
+            self._follow(7, range(100, 125))
+            self._follow(8, range(100, 110))
+
+            result = fanout_notification(
+                audience="merchant_followers",
+                subject_id=7,
+                message="New drop",
+                collapse_key="followers:7:new_listing",
+                chunk_size=10,
+            )
+
+            self.assertEqual((result["recipients"], result["queued"], result["chunks"]), (25, 25, 3))
+            rows = NotificationQueue.query.filter_by(reference="followers:7:new_listing").all()
+            self.assertEqual(sorted(int(r.to) for r in rows), list(range(100, 125)))
+            self.assertTrue(all(r.channel == "in_app" and r.status == "queued" for r in rows))
+            self.assertTrue(all(r.created_at is not None and r.attempt_count == 0 for r in rows))
+
+    def test_repeat_events_collapse_within_window(self):
+        with self.app.app_context():
+            self._follow(7, range(1, 6))
+            event = dict(audience="merchant_followers", subject_id=7, message="m", collapse_key="k", collapse_seconds=3600)
+            now = datetime.utcnow()
+            self.assertEqual(fanout_notification(now=now, **event)["queued"], 5)
+
+            self._follow(7, [6])
+            again = fanout_notification(now=now + timedelta(minutes=5), **event)
+            self.assertEqual((again["queued"], again["collapsed_or_skipped"]), (1, 5))
+
+            later = fanout_notification(now=now + timedelta(hours=2), **event)
+            self.assertEqual(later["queued"], 6)
+            self.assertEqual(NotificationQueue.query.count(), 12)
+
+    def test_phone_channels_join_users_and_skip_missing_numbers(self):
+        with self.app.app_context():
+            with_phone = User(name="a", email="a@fliptrybe.test", phone="+2348011111111")
+            without_phone = User(name="b", email="b@fliptrybe.test")
+            for user in (with_phone, without_phone):
+                user.set_password("Passw0rd!")
+            db.session.add_all([with_phone, without_phone])
+            db.session.commit()
+            self._follow(7, [with_phone.id, without_phone.id])
+
+            result = fanout_notification(
+                audience="merchant_followers",
+                subject_id=7,
+                message="m",
+                collapse_key="k",
+                channels=("in_app", "sms"),
+            )
+
+            self.assertEqual(result["queued"], 3)
+            sms = NotificationQueue.query.filter_by(channel="sms").all()
+            self.assertEqual([r.to for r in sms], ["+2348011111111"])
+
+    def test_new_listing_and_unavailable_events_use_fanout(self):
+        with self.app.app_context():
+            settings = get_settings()
+            settings.watcher_notifications_v1 = True
+            db.session.commit()
+            listing = Listing(user_id=7, title="Blue Sofa", price=100.0, is_active=True)
+            db.session.add(listing)
+            db.session.commit()
+            self._follow(7, [11, 12])
+            db.session.add_all([ListingFavorite(user_id=21, listing_id=listing.id), ListingFavorite(user_id=22, listing_id=listing.id)])
+            db.session.commit()
+
+            result = notify_followers_new_listing(listing)
+            self.assertEqual((result["queued"], result["enqueued"]), (2, False))
+            queue_item_unavailable_notifications(entity="listing", entity_id=int(listing.id), title="Blue Sofa")
+            queue_item_unavailable_notifications(entity="listing", entity_id=int(listing.id), title="Blue Sofa")
+
+            ref = f"watchers:listing:{int(listing.id)}:unavailable"
+            rows = NotificationQueue.query.filter_by(reference=ref).all()
+            self.assertEqual(sorted(r.to for r in rows), ["21", "22"])
+            self.assertEqual(rows[0].message, "Blue Sofa is no longer available.")
+
+
+if __name__ == "__main__":
+    unittest.main()
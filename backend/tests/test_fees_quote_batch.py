@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+
+from app import create_app
+from app.extensions import db
+from app.models import Listing, MerchantProfile, Order, User
+from app.segments.segment_orders_api import _ensure_order_commission_snapshot, _ensure_order_commission_snapshots
+from app.services.commission_policy_service import activate_policy, add_policy_rule, create_policy
+from app.utils.commission import compute_order_commissions_minor
+
+
+class FeesQuoteBatchTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            "SQLALCHEMY_DATABASE_URI": os.getenv("SQLALCHEMY_DATABASE_URI"),
+            "DATABASE_URL": os.getenv("DATABASE_URL"),
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+        cls.client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            policy = create_policy(name="Batch", created_by_admin_id=None)
+            add_policy_rule(policy_id=int(policy.id), applies_to="declutter", seller_type="merchant", city="Lagos", base_rate_bps=800, min_fee_minor=2000)
+            add_policy_rule(policy_id=int(policy.id), applies_to="shortlet", seller_type="all", base_rate_bps=300)
+            activate_policy(int(policy.id))
+
+    def test_batch_quotes_match_single_computation_in_input_order(self):
+        items = [
+            {"amount": 100.0, "listing_type": "declutter", "seller_type": "merchant", "city": "Lagos"},
+            {"amount": 5000.0, "listing_type": "shortlet", "seller_type": "user", "city": "Abuja"},
+            {"amount": 1000.0, "listing_type": "declutter", "seller_type": "buyer", "city": "Kano", "delivery_fee": 500},
+            {"amount_minor": 300000, "listing_type": "declutter", "seller_type": "merchant", "city": "lagos", "is_top_tier": True},
+        ]
+        res = self.client.post("/api/fees/quote/batch", json={"items": items})
+        self.assertEqual(res.status_code, 200)
+        body = res.get_json()
+        self.assertEqual([q["index"] for q in body["items"]], [0, 1, 2, 3])
+        self.assertEqual(sum(g["count"] for g in body["groups"]), 4)
+
+        expected_inputs = [
+            ("declutter", 10000, 0, False, "merchant", "Lagos"),
+            ("shortlet", 500000, 0, False, "user", "Abuja"),
+            ("declutter", 100000, 50000, False, "user", "Kano"),
+            ("declutter", 300000, 0, True, "merchant", "lagos"),
+        ]
+        with self.app.app_context():
+            for quote, (kind, amount, delivery, top, seller, city) in zip(body["items"], expected_inputs):
+                single = compute_order_commissions_minor(
+                    sale_kind=kind,
+                    sale_charge_minor=amount,
+                    delivery_minor=delivery,
+                    inspection_minor=0,
+                    is_top_tier=top,
+                    seller_type=seller,
+                    city=city,
+                )
+                self.assertEqual(quote["fee_minor"], single["sale"]["fee_minor"])
+                self.assertEqual(quote["platform_minor"], single["sale"]["platform_minor"])
+                self.assertEqual(quote["delivery"], single["delivery"])
+                self.assertEqual(quote["rule"], single["rules"]["sale"])
+        self.assertEqual(body["items"][0]["fee_minor"], 2000)
+        self.assertEqual(body["items"][1]["effective_rate_bps"], 300)
+
+    def test_batch_rejects_bad_payloads(self):
+        self.assertEqual(self.client.post("/api/fees/quote/batch", json={"items": []}).status_code, 400)
+        res = self.client.post("/api/fees/quote/batch", json={"items": [{"amount": 10}, {"amount": "abc"}]})
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.get_json()["index"], 1)
+        too_many = [{"amount": 10}] * 301
+        self.assertEqual(self.client.post("/api/fees/quote/batch", json={"items": too_many}).status_code, 400)
+
+    def test_checkout_batch_snapshots_match_per_order_path(self):
+        with self.app.app_context():
+            stamp = str(time.time_ns())
+            merchant = User(name="M", email=f"m-{stamp}@fliptrybe.test", role="merchant")
+            seller = User(name="S", email=f"s-{stamp}@fliptrybe.test", role="buyer")
+            buyer = User(name="B", email=f"b-{stamp}@fliptrybe.test", role="buyer")
+            for u in (merchant, seller, buyer):
+                u.set_password("Passw0rd!")
+            db.session.add_all([merchant, seller, buyer])
+            db.session.flush()
+            db.session.add(MerchantProfile(user_id=int(merchant.id), is_top_tier=True))
+            listings = [
+                Listing(user_id=int(merchant.id), title="Chair", price=450.0, city="Lagos"),
+                Listing(user_id=int(seller.id), title="Lamp", price=1200.0, city="Lagos"),
+                Listing(user_id=int(merchant.id), title="Flat", price=9000.0, city="Abuja", listing_type="shortlet"),
+            ]
+            db.session.add_all(listings)
+            db.session.commit()
+
+            def _orders():
+                return [
+                    (
+                        Order(buyer_id=int(buyer.id), merchant_id=int(l.user_id), listing_id=int(l.id), amount=float(l.price)),
+                        l,
+                    )
+                    for l in listings
+                ]
+
+            batched = _ensure_order_commission_snapshots(_orders())
+            single = [_ensure_order_commission_snapshot(o, l) for o, l in _orders()]
+            self.assertEqual(batched, single)
+            self.assertEqual(batched[0]["sale"]["fee_minor"], 3600)
+            self.assertGreater(batched[0]["sale"]["top_tier_incentive_minor"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
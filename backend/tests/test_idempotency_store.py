@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app import create_app
+from app.extensions import db
+from app.jobs.idempotency_compaction import compact_idempotency_keys
+from app.models import IdempotencyKey
+from app.utils import idempotency as idem_module
+from app.utils.idempotency import RedisIdempotencyClaim, lookup_response, store_response
+
+
+class _FakeRedis:
+    """Just enough of the redis client for SET NX/EX claims."""
+
+    def __init__(self):
+        self.data: dict[str, tuple[str, float]] = {}
+
+    def _live(self, key):
+        item = self.data.get(key)
+        if item is None or item[1] <= time.monotonic():
+            self.data.pop(key, None)
+            return None
+        return item[0]
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and self._live(key) is not None:
+            return None
+        self.data[key] = (value, time.monotonic() + float(ex or 3600))
+        return True
+
+    def get(self, key):
+        return self._live(key)
+
+
+class _BrokenRedis:
+    def set(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+
+    def get(self, key):
+        raise ConnectionError("redis down")
+
+
+class IdempotencyStoreTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            "SQLALCHEMY_DATABASE_URI": os.getenv("SQLALCHEMY_DATABASE_URI"),
+            "DATABASE_URL": os.getenv("DATABASE_URL"),
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+        idem_module._reset_idempotency_state_for_tests()
+        self.redis = _FakeRedis()
+
+    def test_redis_tier_claims_replays_and_detects_reuse(self):
+        with self.app.app_context(), patch.object(idem_module, "_redis_client", return_value=self.redis):
+            kind, claim, _ = lookup_response(7, "/api/listings", {"listing_id": 1}, scope="/api/listings", idempotency_key="k1")
+            self.assertEqual(kind, "miss")
+            self.assertIsInstance(claim, RedisIdempotencyClaim)
+            self.assertEqual(IdempotencyKey.query.count(), 0)
+
+            self.assertEqual(
+                lookup_response(7, "/api/listings", {"listing_id": 1}, scope="/api/listings", idempotency_key="k1"),
+                ("hit", {"ok": True}, 200),
+            )
+            store_response(claim, {"ok": True, "order": {"id": 5}}, 201)
+            self.assertEqual(
+                lookup_response(7, "/api/listings", {"listing_id": 1}, scope="/api/listings", idempotency_key="k1"),
+                ("hit", {"ok": True, "order": {"id": 5}}, 201),
+            )
+            conflict = lookup_response(7, "/api/listings", {"listing_id": 2}, scope="/api/listings", idempotency_key="k1")
+            self.assertEqual((conflict[0], conflict[2]), ("conflict", 409))
+            self.assertEqual(IdempotencyKey.query.count(), 0)
+
+    def test_money_moving_scopes_stay_durable(self):
+        with self.app.app_context(), patch.object(idem_module, "_redis_client", return_value=self.redis):
+            kind, row, _ = lookup_response(None, "/api/payments/webhook/paystack", {"id": 9}, scope="webhook:paystack", idempotency_key="evt-9")
+            self.assertEqual(kind, "miss")
+            self.assertIsInstance(row, IdempotencyKey)
+            self.assertIsNone(row.expires_at)
+            store_response(row, {"ok": True}, 200)
+            self.assertEqual(self.redis.data, {})
+            again = lookup_response(None, "/api/payments/webhook/paystack", {"id": 10}, scope="webhook:paystack", idempotency_key="evt-9")
+            self.assertEqual(again[0], "conflict")
+
+            # Wallet-funded checkout moves money too.
+            kind, order_row, _ = lookup_response(7, "/api/orders", {"listing_id": 1}, scope="/api/orders", idempotency_key="k9")
+            self.assertIsInstance(order_row, IdempotencyKey)
+            self.assertIsNone(order_row.expires_at)
+            self.assertEqual(self.redis.data, {})
+
+    def test_redis_outage_falls_back_to_database(self):
+        with self.app.app_context(), patch.object(idem_module, "_redis_client", return_value=_BrokenRedis()):
+            kind, row, _ = lookup_response(7, "/api/listings", {"a": 1}, scope="/api/listings", idempotency_key="k2")
+            self.assertEqual(kind, "miss")
+            self.assertIsInstance(row, IdempotencyKey)
+            self.assertLess(row.expires_at, datetime.utcnow() + timedelta(days=2))
+            store_response(row, {"ok": True, "id": 3}, 201)
+            self.assertEqual(
+                lookup_response(7, "/api/listings", {"a": 1}, scope="/api/listings", idempotency_key="k2"),
+                ("hit", {"ok": True, "id": 3}, 201),
+            )
+
+    def test_expired_row_is_reclaimed_before_compaction(self):
+        with self.app.app_context():
+            _, row, _ = lookup_response(7, "/api/listings", {"a": 1}, scope="/api/listings", idempotency_key="k3")
+            store_response(row, {"ok": True}, 201)
+            row.expires_at = datetime.utcnow() - timedelta(seconds=1)
+            db.session.commit()
+            kind, reclaimed, _ = lookup_response(7, "/api/listings", {"a": 2}, scope="/api/listings", idempotency_key="k3")
+            self.assertEqual(kind, "miss")
+            self.assertEqual(int(reclaimed.id), int(row.id))
+            self.assertIsNone(reclaimed.response_json)
+
+    def test_compaction_prunes_expired_and_aged_legacy_rows_in_batches(self):
+        with self.app.app_context():
+            now = datetime.utcnow()
+            for i in range(5):
+                db.session.add(IdempotencyKey(key=f"old-{i}", scope="s", request_hash="h", expires_at=now - timedelta(minutes=1)))
+            db.session.add(IdempotencyKey(key="legacy-old", scope="s", request_hash="h", created_at=now - timedelta(days=90)))
+            db.session.add(IdempotencyKey(key="legacy-new", scope="s", request_hash="h", created_at=now - timedelta(days=1)))
+            db.session.add(IdempotencyKey(key="live", scope="s", request_hash="h", expires_at=now + timedelta(hours=1)))
+            old = now - timedelta(days=400)
+            db.session.add(IdempotencyKey(key="payout", scope="wallet:payout", request_hash="h", created_at=old))
+            db.session.add(IdempotencyKey(key="checkout", scope="", route="/api/orders", request_hash="h", created_at=old))
+            db.session.commit()
+
+            result = compact_idempotency_keys(batch_size=2, now=now)
+            self.assertTrue(result["ok"])
+            self.assertEqual(result["deleted"], 6)
+            self.assertEqual(result["batches"], 3)
+            self.assertEqual(
+                sorted(r.key for r in IdempotencyKey.query.all()), ["checkout", "legacy-new", "live", "payout"]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql
+
+from app import create_app
+from app.extensions import db
+from app.jobs.inspector_dispatch import run_inspector_dispatch_rebuild
+from app.models import InspectorDispatchEntry, InspectorProfile, Listing, Order, User
+from app.services.inspector_dispatch import _apply_load_deltas, _load_delta_stmt, assign_inspector, claim_inspector, pick_candidates
+from app.utils.bonding import topup_bond
+
+
+class InspectorDispatchTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {key: os.getenv(key) for key in ("SQLALCHEMY_DATABASE_URI", "DATABASE_URL")}
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            buyer = self._user("buyer")
+            merchant = self._user("merchant")
+            db.session.commit()
+            self.buyer_id, self.merchant_id = int(buyer.id), int(merchant.id)
+
+    def _user(self, role: str) -> User:
+        user = User(name=role.title(), email=f"insp-{role}-{time.time_ns()}@fliptrybe.test", role=role)
+        user.set_password("Passw0rd!")
+        db.session.add(user)
+        db.session.flush()
+        return user
+
+    def _inspector(self, *, region="ikeja", tier="GOLD", score=80.0, bond=10000.0, active=True) -> int:
+        user = self._user("inspector")
+        db.session.add(
+            InspectorProfile(
+                user_id=int(user.id),
+                region=region,
+                reputation_tier=tier,
+                reputation_score=score,
+                is_active=active,
+            )
+        )
+        db.session.commit()
+        if bond:
+            topup_bond(int(user.id), bond)
+        return int(user.id)
+
+    def _order(self, pickup="12 Allen Avenue, Ikeja", **fields) -> Order:
+        listing = Listing(user_id=self.merchant_id, title="Phone", state="Lagos", city="Ikeja")
+        db.session.add(listing)
+        db.session.flush()
+        order = Order(
+            buyer_id=self.buyer_id,
+            merchant_id=self.merchant_id,
+            listing_id=int(listing.id),
+            amount=100.0,
+            total_price=100.0,
+            pickup=pickup,
+            **fields,
+        )
+        db.session.add(order)
+        db.session.commit()
+        return order
+
+    def _entry(self, user_id: int) -> InspectorDispatchEntry:
+        db.session.expire_all()
+        return InspectorDispatchEntry.query.filter_by(inspector_user_id=int(user_id)).first()
+
+    def test_profile_and_bond_writes_maintain_eligibility(self):
+        with self.app.app_context():
+            funded = self._inspector(region="Ikeja ", tier="GOLD", bond=2000.0)
+            unfunded = self._inspector(tier="BRONZE", bond=1000.0)
+
+            entry = self._entry(funded)
+            self.assertTrue(entry.eligible)
+            self.assertEqual(entry.region, "ikeja")
+            self.assertEqual(entry.tier_rank, 3)
+            self.assertFalse(self._entry(unfunded).eligible)
+
+            topup_bond(unfunded, 4000.0)
+            self.assertTrue(self._entry(unfunded).eligible)
+
+            prof = InspectorProfile.query.filter_by(user_id=funded).first()
+            prof.is_active = False
+            db.session.commit()
+            self.assertFalse(self._entry(funded).eligible)
+
+    def test_open_load_follows_inspection_status(self):
+        with self.app.app_context():
+            inspector = self._inspector()
+            order = self._order(inspection_status="PENDING")
+            self.assertTrue(claim_inspector(int(order.id), inspector))
+            db.session.commit()
+            self.assertEqual(self._entry(inspector).open_load, 1)
+            self.assertFalse(claim_inspector(int(order.id), inspector))
+
+            order = db.session.get(Order, int(order.id))
+            order.inspection_status = "ARRIVED"
+            db.session.commit()
+            self.assertEqual(self._entry(inspector).open_load, 1)
+
+            order.inspection_status = "CLOSED"
+            db.session.commit()
+            self.assertEqual(self._entry(inspector).open_load, 0)
+
+            self._order(inspection_status="ON_MY_WAY", inspector_id=inspector)
+            self.assertEqual(self._entry(inspector).open_load, 1)
+
+    def test_load_delta_statement_is_portable_and_floors_at_zero(self):
+        sql = str(_load_delta_stmt().compile(dialect=postgresql.dialect())).lower()
+        self.assertIn("case when", sql)
+        self.assertNotIn("max(", sql)
+        with self.app.app_context():
+            inspector = self._inspector()
+            _apply_load_deltas(db.session.connection(), Counter({inspector: -3}), now=datetime.utcnow())
+            db.session.commit()
+            self.assertEqual(self._entry(inspector).open_load, 0)
+
+    def test_pick_prefers_region_then_tier_score_and_load(self):
+        with self.app.app_context():
+            lagos_gold = self._inspector(region="ikeja", tier="GOLD", score=75.0)
+            lagos_gold_busy = self._inspector(region="ikeja", tier="GOLD", score=75.0)
+            lagos_silver = self._inspector(region="ikeja", tier="SILVER", score=60.0)
+            abuja_platinum = self._inspector(region="wuse", tier="PLATINUM", score=95.0)
+            self._inspector(region="ikeja", tier="PLATINUM", score=99.0, active=False)
+            self._order(inspection_status="PENDING", inspector_id=lagos_gold_busy)
+
+            picked = [uid for uid, _ in pick_candidates("12 allen avenue, ikeja")]
+            self.assertEqual(picked, [lagos_gold, lagos_gold_busy, lagos_silver, abuja_platinum])
+
+            order = self._order(pickup="Plot 4, Wuse 2")
+            self.assertEqual(assign_inspector(order), abuja_platinum)
+
+    def test_rebuild_repairs_drift(self):
+        with self.app.app_context():
+            inspector = self._inspector()
+            self._order(inspection_status="PENDING", inspector_id=inspector)
+            table = InspectorDispatchEntry.__table__
+            db.session.execute(table.update().values(open_load=7, eligible=False))
+            db.session.commit()
+
+            result = run_inspector_dispatch_rebuild()
+            self.assertTrue(result["ok"])
+            self.assertEqual(result["updated"], 1)
+            self.assertEqual(result["load_drift"], 1)
+            entry = self._entry(inspector)
+            self.assertEqual(entry.open_load, 1)
+            self.assertTrue(entry.eligible)
+
+    def test_request_inspection_assigns_via_index(self):
+        from app.models import AvailabilityConfirmation
+        from app.utils.jwt_utils import create_token
+
+        with self.app.app_context():
+            inspector = self._inspector(region="ikeja")
+            order = self._order(payment_reference="ref-1", fulfillment_mode="inspection")
+            db.session.add(
+                AvailabilityConfirmation(
+                    order_id=int(order.id),
+                    listing_id=int(order.listing_id),
+                    seller_id=self.merchant_id,
+                    status="yes",
+                    response_token=f"tok-{time.time_ns()}",
+                )
+            )
+            db.session.commit()
+            token = create_token(self.buyer_id)
+            order_id = int(order.id)
+
+        client = self.app.test_client()
+        res = client.post(
+            f"/api/orders/{order_id}/inspection/request",
+            json={},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        self.assertIn(res.status_code, (200, 201), res.get_data(as_text=True))
+        with self.app.app_context():
+            self.assertEqual(int(db.session.get(Order, order_id).inspector_id), inspector)
+            self.assertEqual(self._entry(inspector).open_load, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
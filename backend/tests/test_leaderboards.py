@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app import create_app
+from app.extensions import db
+from app.jobs.leaderboards import run_leaderboard_recompute
+from app.models import LeaderboardScore, MerchantProfile, User, WalletTxn
+from app.services import leaderboards
+from app.utils.jwt_utils import create_token
+from app.utils.wallets import post_txn, post_txns
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.sets: dict[str, dict[str, float]] = {}
+
+    def exists(self, key):
+        return int(key in self.sets)
+
+    def delete(self, key):
+        self.sets.pop(key, None)
+
+    def rename(self, src, dst):
+        self.sets[dst] = self.sets.pop(src)
+
+    def zadd(self, key, mapping):
+        self.sets.setdefault(key, {}).update({m: float(s) for m, s in mapping.items()})
+
+    def zincrby(self, key, amount, member):
+        zset = self.sets.setdefault(key, {})
+        zset[member] = zset.get(member, 0.0) + float(amount)
+
+    def zrem(self, key, member):
+        self.sets.get(key, {}).pop(member, None)
+
+    def _ordered(self, key):
+        return sorted(self.sets.get(key, {}).items(), key=lambda item: (-item[1], int(item[0])))
+
+    def zrevrange(self, key, start, stop, withscores=False):
+        return [(m.encode(), s) for m, s in self._ordered(key)[start : stop + 1]]
+
+    def zrevrank(self, key, member):
+        for position, (m, _) in enumerate(self._ordered(key)):
+            if m == member:
+                return position
+        return None
+
+    def zscore(self, key, member):
+        return self.sets.get(key, {}).get(member)
+
+    def zcard(self, key):
+        return len(self.sets.get(key, {}))
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def _queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return _queue
+
+    def execute(self):
+        calls, self.calls = self.calls, []
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+class LeaderboardsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {key: os.getenv(key) for key in ("SQLALCHEMY_DATABASE_URI", "DATABASE_URL")}
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+        cls.client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        leaderboards._reset_store_for_tests(None)
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        leaderboards._reset_store_for_tests(None)
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+
+    def _user(self, role: str, name: str) -> int:
+        user = User(name=name, email=f"lb-{role}-{time.time_ns()}@fliptrybe.test", role=role, profile_image_url=f"/img/{name}.png")
+        user.set_password("Passw0rd!")
+        db.session.add(user)
+        db.session.commit()
+        return int(user.id)
+
+    def _credit(self, user_id: int, amount: float, kind: str = "order_sale", *, ref: str | None = None) -> None:
+        post_txn(
+            user_id=user_id,
+            direction="credit",
+            amount=amount,
+            kind=kind,
+            reference=ref or f"order:{time.time_ns()}",
+            note="test",
+        )
+
+    def _profile(self, user_id: int, *, state: str, orders: int, deliveries: int, **fields) -> None:
+        db.session.add(
+            MerchantProfile(
+                user_id=user_id,
+                shop_name=f"Shop {user_id}",
+                state=state,
+                city="Ikeja" if state == "Lagos" else "Garki",
+                total_orders=orders,
+                successful_deliveries=deliveries,
+                **fields,
+            )
+        )
+        db.session.commit()
+
+    def test_ledger_credits_update_every_window_and_rank(self):
+        with self.app.app_context():
+            ada = self._user("merchant", "Ada")
+            bola = self._user("merchant", "Bola")
+            driver = self._user("driver", "Dayo")
+            self._credit(ada, 500.0)
+            self._credit(bola, 800.0)
+            self._credit(ada, 400.0)
+            self._credit(driver, 150.0, kind="delivery_fee")
+            self._credit(bola, 999.0, kind="topup")
+            for window in leaderboards.EARNINGS_WINDOWS:
+                self.assertEqual(leaderboards.top("merchant", window), [(ada, 900.0), (bola, 800.0)])
+            token = create_token(bola)
+
+        res = self.client.get("/api/leaderboard/merchants?days=7").get_json()
+        self.assertEqual([(r["rank"], r["name"], r["earnings"]) for r in res], [(1, "Ada", 900.0), (2, "Bola", 800.0)])
+        drivers = self.client.get("/api/leaderboard/drivers").get_json()
+        self.assertEqual([(r["name"], r["earnings"]) for r in drivers], [("Dayo", 150.0)])
+        # Windows without a precomputed board still answer from the ledger.
+        adhoc = self.client.get("/api/leaderboard/merchants?days=14").get_json()
+        self.assertEqual([r["name"] for r in adhoc], ["Ada", "Bola"])
+
+        me = self.client.get("/api/leaderboard/me?board=merchant&days=30", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(me.get_json()["rank"], 2)
+        self.assertEqual(me.get_json()["total"], 2)
+        self.assertEqual(self.client.get("/api/leaderboard/me").status_code, 401)
+        bad = self.client.get("/api/leaderboard/me?days=14", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_recompute_drops_credits_outside_the_window(self):
+        with self.app.app_context():
+            ada = self._user("merchant", "Ada")
+            bola = self._user("merchant", "Bola")
+            self._credit(ada, 500.0, ref="order:1")
+            self._credit(bola, 300.0, ref="order:2")
+            db.session.execute(
+                update(WalletTxn)
+                .where(WalletTxn.reference == "order:1")
+                .values(created_at=datetime.utcnow() - timedelta(days=10))
+            )
+            db.session.commit()
+            self.assertEqual(leaderboards.top("merchant", 7)[0], (ada, 500.0))
+
+            result = run_leaderboard_recompute()
+            self.assertTrue(result["ok"])
+            self.assertEqual(result["changed"], 1)
+            self.assertEqual(leaderboards.top("merchant", 7), [(bola, 300.0)])
+            self.assertEqual(leaderboards.top("merchant", 30), [(ada, 500.0), (bola, 300.0)])
+            self.assertEqual(run_leaderboard_recompute()["changed"], 0)
+
+    def test_redis_mirror_applies_committed_changes_only(self):
+        fake = _FakeRedis()
+        store = leaderboards._reset_store_for_tests(leaderboards.RedisLeaderboardStore(fake, "t:"))
+        with self.app.app_context():
+            ada = self._user("merchant", "Ada")
+            bola = self._user("merchant", "Bola")
+            # Sets are not created by increments before a recompute has loaded them.
+            self._credit(ada, 100.0)
+            self.assertEqual(fake.sets, {})
+            run_leaderboard_recompute()
+            self.assertEqual(fake.sets["t:merchant:30"], {str(ada): 100.0})
+
+            self._credit(bola, 250.0)
+            self.assertEqual(fake.sets["t:merchant:7"][str(bola)], 250.0)
+            post_txn(user_id=ada, direction="credit", amount=50.0, kind="order_sale", reference="order:9", note="x")
+            db.session.rollback()
+            self.assertEqual(fake.sets["t:merchant:7"][str(ada)], 150.0)
+
+            # A savepoint released after the credit does not apply it; the outer rollback wins.
+            post_txns([dict(user_id=bola, direction="credit", amount=75.0, kind="order_sale", reference="order:10", note="x")], commit=False)
+            with db.session.begin_nested():
+                pass
+            self.assertEqual(fake.sets["t:merchant:7"][str(bola)], 250.0)
+            db.session.rollback()
+            self.assertEqual(fake.sets["t:merchant:7"][str(bola)], 250.0)
+
+            # Reads come from the sorted set, even where the table differs.
+            db.session.query(LeaderboardScore).delete()
+            db.session.commit()
+            self.assertEqual(leaderboards.top("merchant", 7), [(bola, 250.0), (ada, 150.0)])
+            self.assertEqual(leaderboards.rank_of("merchant", 7, ada), {"rank": 2, "score": 150.0, "total": 2})
+            self.assertEqual(store.key("merchant", 7), "t:merchant:7")
+
+    def test_profile_scores_rank_merchants_and_groups(self):
+        with self.app.app_context():
+            a = self._user("merchant", "A")
+            b = self._user("merchant", "B")
+            c = self._user("merchant", "C")
+            d = self._user("merchant", "D")
+            self._profile(a, state="Lagos", orders=10, deliveries=10, is_featured=True)
+            self._profile(b, state="Lagos", orders=10, deliveries=5)
+            self._profile(c, state="FCT", orders=10, deliveries=8, is_featured=True)
+            self._profile(d, state="FCT", orders=10, deliveries=9)
+            self.assertEqual([uid for uid, _ in leaderboards.top(leaderboards.SCORE_BOARD, 0)], [a, d, c, b])
+
+            profile = MerchantProfile.query.filter_by(user_id=d).first()
+            profile.is_suspended = True
+            db.session.commit()
+            self.assertEqual([uid for uid, _ in leaderboards.top(leaderboards.SCORE_BOARD, 0)], [a, c, b])
+
+        ranked = self.client.get("/api/leaderboards?limit=2").get_json()["items"]
+        self.assertEqual([(r["rank"], r["user_id"]) for r in ranked], [(1, a), (2, c)])
+        self.assertEqual(ranked[0]["profile_image_url"], "/img/A.png")
+        lagos = self.client.get("/api/leaderboards?state=lagos").get_json()["items"]
+        self.assertEqual([r["user_id"] for r in lagos], [a, b])
+        states = self.client.get("/api/leaderboards/states?limit=1").get_json()["items"]
+        self.assertEqual({k: [r["user_id"] for r in v] for k, v in states.items()}, {"Lagos": [a], "FCT": [c]})
+        cities = self.client.get("/api/leaderboards/cities").get_json()["items"]
+        self.assertEqual([r["user_id"] for r in cities["Lagos|Ikeja"]], [a, b])
+        featured = self.client.get("/api/leaderboards/featured").get_json()["items"]
+        self.assertEqual([r["user_id"] for r in featured], [a, c])
+
+
+if __name__ == "__main__":
+    unittest.main()
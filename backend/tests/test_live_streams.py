@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import unittest
+
+from app import create_app
+from app.extensions import db
+from app.models import Notification, SupportMessage, User
+from app.realtime import bus as realtime_bus
+from app.utils import live_events
+from app.utils.jwt_utils import create_token
+
+
+class LiveStreamsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            key: os.getenv(key)
+            for key in (
+                "SQLALCHEMY_DATABASE_URI",
+                "DATABASE_URL",
+                "REDIS_URL",
+                "REALTIME_REDIS_URL",
+                "LIVE_LONG_POLL_TIMEOUT_SECONDS",
+                "LIVE_STREAM_MAX_SECONDS",
+            )
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        os.environ.pop("REDIS_URL", None)
+        os.environ.pop("REALTIME_REDIS_URL", None)
+        os.environ["LIVE_LONG_POLL_TIMEOUT_SECONDS"] = "5"
+        os.environ["LIVE_STREAM_MAX_SECONDS"] = "1"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+        cls.client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        live_events._reset_live_events_for_tests()
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        realtime_bus._reset_bus_for_tests(realtime_bus.MemoryBus())
+        live_events._reset_live_events_for_tests()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            stamp = time.time_ns()
+            user = User(name="Buyer", email=f"live-{stamp}@fliptrybe.test", role="buyer")
+            user.set_password("Passw0rd!")
+            admin = User(name="Admin", email=f"live-admin-{stamp}@fliptrybe.test", role="admin")
+            admin.set_password("Passw0rd!")
+            db.session.add_all([user, admin])
+            db.session.commit()
+            self.user_id = int(user.id)
+            self.admin_id = int(admin.id)
+
+    def _headers(self, user_id: int, **extra) -> dict:
+        headers = {"Authorization": f"Bearer {create_token(user_id)}"}
+        headers.update(extra)
+        return headers
+
+    def _notify(self, message: str) -> int:
+        row = Notification(user_id=self.user_id, channel="in_app", title="t", message=message)
+        db.session.add(row)
+        db.session.commit()
+        return int(row.id)
+
+    def test_since_id_returns_only_newer_rows(self):
+        with self.app.app_context():
+            first = self._notify("one")
+            second = self._notify("two")
+        res = self.client.get("/api/notifications", headers=self._headers(self.user_id))
+        self.assertEqual(res.get_json()["cursor"], second)
+
+        res = self.client.get(f"/api/notifications?since_id={first}", headers=self._headers(self.user_id))
+        body = res.get_json()
+        self.assertEqual([item["id"] for item in body["items"]], [second])
+        self.assertEqual(body["cursor"], second)
+
+        res = self.client.get(f"/api/notifications?since_id={second}", headers=self._headers(self.user_id))
+        self.assertEqual((res.get_json()["items"], res.get_json()["cursor"]), ([], second))
+
+    def test_long_poll_wakes_on_commit(self):
+        def _write_later():
+            time.sleep(0.3)
+            with self.app.app_context():
+                self._notify("fresh")
+
+        writer = threading.Thread(target=_write_later)
+        started = time.perf_counter()
+        writer.start()
+        res = self.client.get("/api/notifications/stream?since_id=0&mode=poll", headers=self._headers(self.user_id))
+        elapsed = time.perf_counter() - started
+        writer.join()
+
+        body = res.get_json()
+        self.assertEqual([item["message"] for item in body["items"]], ["fresh"])
+        self.assertEqual(body["cursor"], body["items"][0]["id"])
+        self.assertLess(elapsed, 3.0)
+
+    def test_rolled_back_rows_do_not_wake_waiters(self):
+        with self.app.app_context():
+            channel = live_events.user_channel(self.user_id)
+            snapshot = live_events.watch([channel])
+            db.session.add(Notification(user_id=self.user_id, channel="in_app", title="t", message="x"))
+            db.session.flush()
+            db.session.rollback()
+            self.assertFalse(live_events._HUB.wait(snapshot, 0.05))
+            self._notify("kept")
+            self.assertTrue(live_events._HUB.wait(snapshot, 0.05))
+
+    def test_each_commit_publishes_once_on_the_realtime_bus(self):
+        with self.app.app_context():
+            bus = realtime_bus.get_bus()
+            snapshot = live_events.watch([live_events.user_channel(self.user_id)])
+            self._notify("once")
+            self.assertEqual(bus.published, 1)
+            self.assertEqual(live_events._HUB.snapshot(snapshot), {live_events.user_channel(self.user_id): 1})
+
+    def test_sse_stream_emits_rows_with_event_ids(self):
+        with self.app.app_context():
+            first = self._notify("one")
+            second = self._notify("two")
+        res = self.client.get(
+            "/api/notifications/stream",
+            headers=self._headers(self.user_id, Accept="text/event-stream", **{"Last-Event-ID": str(first)}),
+        )
+        self.assertEqual(res.mimetype, "text/event-stream")
+        text = res.get_data(as_text=True)
+        self.assertIn(f"id: {second}\nevent: notification\n", text)
+        self.assertNotIn(f"id: {first}\n", text)
+
+    def test_support_thread_cursor_and_wakeup(self):
+        with self.app.app_context():
+            snapshot = live_events.watch([live_events.support_thread_channel(self.user_id)])
+        res = self.client.post("/api/support/messages", json={"body": "Need help"}, headers=self._headers(self.user_id))
+        self.assertEqual(res.status_code, 201)
+        first = res.get_json()["message"]["id"]
+        self.assertTrue(live_events._HUB.wait(snapshot, 0.05))
+
+        res = self.client.post(
+            f"/api/admin/support/threads/{self.user_id}/messages",
+            json={"body": "On it"},
+            headers=self._headers(self.admin_id),
+        )
+        self.assertEqual(res.status_code, 201)
+
+        res = self.client.get(
+            f"/api/admin/support/threads/{self.user_id}/messages?since_id={first}",
+            headers=self._headers(self.admin_id),
+        )
+        self.assertEqual([m["body"] for m in res.get_json()["items"]], ["On it"])
+        res = self.client.get(f"/api/support/messages/stream?since_id={first}&mode=poll", headers=self._headers(self.user_id))
+        self.assertEqual([m["body"] for m in res.get_json()["items"]], ["On it"])
+        with self.app.app_context():
+            self.assertEqual(SupportMessage.query.count(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
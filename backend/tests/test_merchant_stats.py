@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app import create_app
+from app.extensions import db
+from app.jobs.dispatch_sweeper import release_stale_assignments
+from app.jobs.merchant_stats import run_merchant_stats_rebuild
+from app.models import Listing, ListingView, MerchantDailyStat, Order, User
+from app.utils.jwt_utils import create_token
+from app.utils.receipts import create_receipt
+from app.utils.wallets import post_txn
+
+
+class MerchantStatsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {key: os.getenv(key) for key in ("SQLALCHEMY_DATABASE_URI", "DATABASE_URL")}
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+        cls.client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.today = self.now.date()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            self.merchant_id = self._user("merchant")
+            self.buyer_id = self._user("buyer")
+            self.phone = self._listing("Phone")
+            self.lamp = self._listing("Lamp")
+
+    def _user(self, role: str) -> int:
+        user = User(name=role.title(), email=f"mstats-{role}-{time.time_ns()}@fliptrybe.test", role=role)
+        user.set_password("Passw0rd!")
+        db.session.add(user)
+        db.session.commit()
+        return int(user.id)
+
+    def _listing(self, title: str) -> int:
+        listing = Listing(user_id=self.merchant_id, title=title, state="Lagos", city="Ikeja")
+        db.session.add(listing)
+        db.session.commit()
+        return int(listing.id)
+
+    def _order(self, listing_id: int, amount: float, *, status: str = "paid", days_ago: int = 0, **fields) -> int:
+        order = Order(
+            buyer_id=self.buyer_id,
+            merchant_id=self.merchant_id,
+            listing_id=listing_id,
+            amount=amount,
+            total_price=amount,
+            status=status,
+            created_at=self.now - timedelta(days=days_ago),
+            **fields,
+        )
+        db.session.add(order)
+        db.session.commit()
+        return int(order.id)
+
+    def _row(self, listing_id: int, status: str, day=None):
+        return MerchantDailyStat.query.filter_by(
+            merchant_id=self.merchant_id, day=day or self.today, listing_id=listing_id, status=status
+        ).first()
+
+    def test_order_flushes_move_counters_between_statuses(self):
+        with self.app.app_context():
+            order_id = self._order(self.phone, 1000.0, delivery_fee=200.0, sale_fee_minor=5000, sale_seller_minor=95000)
+            row = self._row(self.phone, "paid")
+            self.assertEqual((row.orders, row.amount_minor, row.delivery_fee_minor), (1, 100000, 20000))
+            self.assertEqual((row.sale_fee_minor, row.seller_minor), (5000, 95000))
+
+            db.session.expire_all()
+            order = db.session.get(Order, order_id)
+            order.status = "completed"
+            order.amount = 1200.0
+            db.session.commit()
+            db.session.expire_all()
+            self.assertEqual(self._row(self.phone, "paid").orders, 0)
+            completed = self._row(self.phone, "completed")
+            self.assertEqual((completed.orders, completed.amount_minor), (1, 120000))
+
+            # Orders without stored splits fall back to the 5% sale fee.
+            self._order(self.lamp, 100.0, status="delivered")
+            self.assertEqual(self._row(self.lamp, "delivered").sale_fee_minor, 500)
+            self.assertEqual(self._row(self.lamp, "delivered").seller_minor, 9500)
+
+            db.session.delete(db.session.get(Order, order_id))
+            db.session.commit()
+            db.session.expire_all()
+            self.assertEqual(self._row(self.phone, "completed").orders, 0)
+            self.assertEqual(run_merchant_stats_rebuild()["drift"], 0)
+
+    def test_views_credits_and_receipts_are_counted(self):
+        with self.app.app_context():
+            order_id = self._order(self.phone, 1000.0)
+            db.session.add(ListingView(listing_id=self.phone, session_key="a", view_date=self.today.isoformat()))
+            db.session.add(ListingView(listing_id=self.phone, session_key="b", view_date=self.today.isoformat()))
+            db.session.commit()
+            post_txn(
+                user_id=self.merchant_id,
+                direction="credit",
+                amount=950.0,
+                kind="order_sale",
+                reference=f"order:{order_id}",
+                note="sale",
+            )
+            post_txn(user_id=self.merchant_id, direction="credit", amount=50.0, kind="topup", reference="t-1", note="topup")
+            create_receipt(user_id=self.merchant_id, kind="listing_sale", reference="r-1", amount=1000.0, fee=50.0, total=1050.0)
+            db.session.commit()
+            db.session.expire_all()
+
+            extra = self._row(self.phone, "")
+            self.assertEqual((extra.views, extra.credits, extra.credited_minor), (2, 1, 95000))
+            receipt_row = self._row(0, "")
+            self.assertEqual((receipt_row.receipt_fee_minor, receipt_row.receipt_total_minor), (5000, 105000))
+            self.assertEqual(run_merchant_stats_rebuild()["drift"], 0)
+
+    def test_rebuild_corrects_drift_from_bulk_writes(self):
+        with self.app.app_context():
+            order_id = self._order(self.phone, 1000.0, days_ago=3)
+            db.session.execute(update(Order).where(Order.id == order_id).values(status="completed"))
+            db.session.commit()
+            day = self.today - timedelta(days=3)
+            self.assertEqual(self._row(self.phone, "paid", day).orders, 1)
+
+            result = run_merchant_stats_rebuild()
+            self.assertTrue(result["ok"])
+            self.assertEqual(result["drift"], 2)
+            self.assertIsNone(self._row(self.phone, "paid", day))
+            self.assertEqual(self._row(self.phone, "completed", day).orders, 1)
+            self.assertEqual(run_merchant_stats_rebuild()["drift"], 0)
+
+    def test_dispatch_release_moves_assigned_orders_back_to_paid(self):
+        with self.app.app_context():
+            self._order(self.phone, 1000.0, status="assigned", assigned_at=self.now - timedelta(hours=2))
+            released = release_stale_assignments(stale_after=timedelta(minutes=10), now=self.now)
+            self.assertEqual(len(released), 1)
+            db.session.expire_all()
+            self.assertEqual(self._row(self.phone, "assigned").orders, 0)
+            self.assertEqual(self._row(self.phone, "paid").orders, 1)
+
+    def test_dashboards_read_the_stats(self):
+        with self.app.app_context():
+            self._order(self.phone, 1000.0, status="completed", delivery_fee=100.0)
+            self._order(self.phone, 1000.0, days_ago=10)
+            self._order(self.lamp, 300.0, days_ago=40)
+            self._order(self.lamp, 50.0, status="cancelled")
+            db.session.add(ListingView(listing_id=self.phone, session_key="a", view_date=self.today.isoformat()))
+            db.session.commit()
+            create_receipt(user_id=self.merchant_id, kind="listing_sale", reference="r-1", amount=1000.0, fee=50.0, total=1050.0)
+            db.session.commit()
+            headers = {"Authorization": f"Bearer {create_token(self.merchant_id)}"}
+
+        kpis = self.client.get("/api/merchant/kpis", headers=headers).get_json()["kpis"]
+        self.assertEqual(kpis["orders_count"], 4)
+        self.assertEqual(kpis["orders_by_status"], {"completed": 1, "paid": 2, "cancelled": 1})
+        self.assertEqual(kpis["revenue_gross"], 2350.0)
+        self.assertEqual(kpis["delivery_fees_gross"], 100.0)
+        self.assertEqual(kpis["commission_total"], 50.0)
+        self.assertEqual(kpis["listings_count"], 2)
+
+        analytics = self.client.get("/api/merchant/analytics", headers=headers).get_json()
+        self.assertEqual(analytics["total_sales"], 3)
+        self.assertEqual(analytics["paid_last_7"], 1)
+        self.assertEqual(analytics["paid_last_30"], 2)
+        self.assertEqual(analytics["conversion_rate"], 300.0)
+        self.assertEqual(len(analytics["revenue_series"]), 30)
+        self.assertEqual(analytics["revenue_series"][-1]["revenue_minor"], 100000)
+        self.assertEqual(analytics["revenue_series"][-1]["views"], 1)
+        self.assertEqual([row["title"] for row in analytics["top_listings"]], ["Phone"])
+        self.assertEqual(analytics["top_listings"][0]["revenue_minor"], 200000)
+        self.assertEqual(len(analytics["recent_paid"]), 3)
+
+        wide = self.client.get("/api/merchant/analytics?days=60", headers=headers).get_json()
+        self.assertEqual([row["title"] for row in wide["top_listings"]], ["Phone", "Lamp"])
+
+        legacy = self.client.get("/api/kpis/merchant", headers=headers).get_json()["kpis"]
+        self.assertEqual(legacy["total_orders"], 4)
+        self.assertEqual(legacy["completed_orders"], 1)
+        self.assertEqual(legacy["gross_revenue"], 1000.0)
+        self.assertEqual(legacy["platform_fees"], 50.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.extensions import db
+from app.jobs.moneybox_maturity import count_due_accounts, run_moneybox_maturity
+from app.models import MoneyBoxAccount, MoneyBoxLedger, User
+from app.utils.jwt_utils import create_token
+
+
+class MoneyBoxMaturityProcessorTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            "SQLALCHEMY_DATABASE_URI": os.getenv("SQLALCHEMY_DATABASE_URI"),
+            "DATABASE_URL": os.getenv("DATABASE_URL"),
+            "CELERY_BROKER_URL": os.getenv("CELERY_BROKER_URL"),
+            "REDIS_URL": os.getenv("REDIS_URL"),
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        os.environ["CELERY_BROKER_URL"] = ""
+        os.environ["REDIS_URL"] = ""
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+        cls.client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            admin = User(name="Admin", email=f"mb-admin-{time.time_ns()}@fliptrybe.test", role="admin")
+            admin.set_password("Passw0rd!")
+            db.session.add(admin)
+            db.session.commit()
+            self.admin_id = int(admin.id)
+
+    def _account(self, *, status="ACTIVE", tier=2, principal=1000.0, auto_open_in=None, matures_in=None) -> int:
+        u = User(name="Merchant", email=f"mb-{time.time_ns()}@fliptrybe.test", role="merchant")
+        u.set_password("Passw0rd!")
+        db.session.add(u)
+        db.session.flush()
+        now = datetime.utcnow()
+        acct = MoneyBoxAccount(
+            user_id=int(u.id),
+            tier=tier,
+            status=status,
+            principal_balance=principal,
+            lock_days=120,
+            lock_start_at=now - timedelta(days=100),
+            auto_open_at=(now + auto_open_in) if auto_open_in is not None else None,
+            maturity_at=(now + matures_in) if matures_in is not None else None,
+            updated_at=now - timedelta(days=1),
+        )
+        db.session.add(acct)
+        db.session.commit()
+        return int(acct.id)
+
+    def test_only_due_accounts_are_processed_and_rescheduled(self):
+        with self.app.app_context():
+            opening = self._account(auto_open_in=timedelta(hours=-1), matures_in=timedelta(days=1))
+            maturing = self._account(auto_open_in=timedelta(days=-1), matures_in=timedelta(minutes=-5))
+            waiting = self._account(auto_open_in=timedelta(days=5), matures_in=timedelta(days=6))
+            closed = self._account(status="CLOSED", auto_open_in=timedelta(days=-5), matures_in=timedelta(days=-1))
+            self.assertEqual(count_due_accounts(), 2)
+
+            res = run_moneybox_maturity()
+            self.assertEqual((res["processed"], res["auto_opened"], res["bonuses"]), (2, 2, 1))
+            self.assertEqual(res["remaining_due"], 0)
+
+            a = db.session.get(MoneyBoxAccount, opening)
+            self.assertEqual(a.status, "OPEN")
+            self.assertEqual(a.next_maturity_check_at, a.maturity_at)
+            b = db.session.get(MoneyBoxAccount, maturing)
+            self.assertEqual(b.status, "MATURED")
+            self.assertAlmostEqual(float(b.bonus_balance), 30.0)
+            self.assertIsNone(b.next_maturity_check_at)
+            c = db.session.get(MoneyBoxAccount, waiting)
+            self.assertEqual(c.next_maturity_check_at, c.auto_open_at)
+            self.assertLess(c.updated_at, datetime.utcnow() - timedelta(hours=12))
+            self.assertEqual(db.session.get(MoneyBoxAccount, closed).status, "CLOSED")
+
+            again = run_moneybox_maturity()
+            self.assertEqual(again["processed"], 0)
+            self.assertEqual(MoneyBoxLedger.query.filter_by(entry_type="BONUS").count(), 1)
+
+    def test_chunked_runs_resume_where_they_stopped(self):
+        with self.app.app_context():
+            ids = [self._account(auto_open_in=timedelta(hours=-1), matures_in=timedelta(days=2)) for _ in range(5)]
+            first = run_moneybox_maturity(chunk_size=2, max_chunks=1)
+            self.assertEqual((first["processed"], first["remaining_due"]), (2, 3))
+            self.assertEqual([db.session.get(MoneyBoxAccount, i).status for i in ids[:2]], ["OPEN", "OPEN"])
+            rest = run_moneybox_maturity(chunk_size=2)
+            self.assertEqual((rest["processed"], rest["chunks"], rest["remaining_due"]), (3, 2, 0))
+            self.assertEqual(MoneyBoxLedger.query.filter_by(entry_type="AUTO_OPEN").count(), 5)
+
+    def test_principal_change_after_maturity_reschedules_bonus(self):
+        with self.app.app_context():
+            acct_id = self._account(principal=0.0, auto_open_in=timedelta(days=-2), matures_in=timedelta(hours=-1))
+            run_moneybox_maturity()
+            acct = db.session.get(MoneyBoxAccount, acct_id)
+            self.assertEqual(acct.status, "MATURED")
+            self.assertIsNone(acct.next_maturity_check_at)
+            acct.principal_balance = 500.0
+            db.session.commit()
+            self.assertEqual(count_due_accounts(), 1)
+            self.assertEqual(run_moneybox_maturity()["bonuses"], 1)
+
+    def test_endpoint_runs_inline_without_broker_and_reports_progress(self):
+        with self.app.app_context():
+            self._account(auto_open_in=timedelta(hours=-1), matures_in=timedelta(days=2))
+        headers = {"Authorization": f"Bearer {create_token(self.admin_id)}"}
+        res = self.client.post("/api/system/moneybox/process-maturity", headers=headers)
+        self.assertEqual(res.status_code, 200)
+        body = res.get_json()
+        self.assertFalse(body["queued"])
+        self.assertEqual((body["processed"], body["auto_opened"], body["remaining_due"]), (1, 1, 0))
+        status = self.client.get("/api/system/moneybox/process-maturity/status", headers=headers).get_json()
+        self.assertEqual(status["progress"]["due"], 0)
+        self.assertTrue(status["progress"]["last_run"]["ok"])
+        self.assertEqual(self.client.post("/api/system/moneybox/process-maturity").status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from app import create_app
+from app.extensions import db
+from app.integrations.common import IntegrationDisabledError
+from app.integrations.messaging.base import MessageResult, MessagingProvider
+from app.jobs import notification_delivery
+from app.jobs.notification_delivery import _claim_batch, _lease, deliver_notifications, retry_delay
+from app.models import NotificationQueue
+
+
+class _FakeProvider(MessagingProvider):
+    name = "fake"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls: list[str] = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _send(self, to, message, reference):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.calls.append(reference)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if "[invalid]" in message:
+                return MessageResult(ok=False, code="TERMII_INVALID_RECIPIENT", message="bad number")
+            if "[fail]" in message:
+                return MessageResult(ok=False, code="TERMII_PROVIDER_DOWN", message="down")
+            return MessageResult(ok=True, code="OK")
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def send_sms(self, *, to: str, message: str, reference: str = "") -> MessageResult:
+        return self._send(to, message, reference)
+
+    def send_whatsapp(self, *, to: str, message: str, reference: str = "") -> MessageResult:
+        return self._send(to, message, reference)
+
+
+class NotificationDeliveryTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            "SQLALCHEMY_DATABASE_URI": os.getenv("SQLALCHEMY_DATABASE_URI"),
+            "DATABASE_URL": os.getenv("DATABASE_URL"),
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+
+    def _queue(self, message: str = "hello", *, channel: str = "sms", attempts: int = 0) -> int:
+        row = NotificationQueue(channel=channel, to="+2348000000000", message=message, status="queued", attempt_count=attempts)
+        db.session.add(row)
+        db.session.commit()
+        return int(row.id)
+
+    def test_outcomes_written_back_per_row(self):
+        with self.app.app_context():
+            ok_id = self._queue("hello")
+            app_id = self._queue("in app", channel="in_app")
+            retry_id = self._queue("[fail] try again")
+            dead_id = self._queue("[invalid] nope")
+            last_id = self._queue("[fail] last try", attempts=4)
+            provider = _FakeProvider()
+
+            result = deliver_notifications(batch_size=10, provider_factory=lambda settings, channel: provider)
+
+            self.assertEqual((result["claimed"], result["sent"], result["failed"], result["dead"]), (5, 2, 1, 2))
+            rows = {r.id: r for r in NotificationQueue.query.all()}
+            self.assertEqual(rows[ok_id].status, "sent")
+            self.assertEqual(rows[app_id].status, "sent")
+            self.assertEqual(rows[retry_id].status, "queued")
+            self.assertEqual(rows[retry_id].attempt_count, 1)
+            self.assertGreater(rows[retry_id].next_attempt_at, datetime.utcnow())
+            self.assertTrue(rows[retry_id].last_error.startswith("TERMII_PROVIDER_DOWN"))
+            self.assertEqual(rows[dead_id].status, "dead")
+            self.assertEqual(rows[last_id].status, "dead")
+            self.assertTrue(all(r.claim_token is None for r in rows.values()))
+            self.assertEqual(len(provider.calls), 4)
+
+            again = deliver_notifications(batch_size=10, provider_factory=lambda settings, channel: provider)
+            self.assertEqual(again["claimed"], 0)
+
+    def test_disabled_integration_defers_without_consuming_attempts(self):
+        def _disabled(settings, channel):
+            raise IntegrationDisabledError("INTEGRATION_DISABLED:termii")
+
+        with self.app.app_context():
+            nid = self._queue("hello")
+            result = deliver_notifications(batch_size=10, provider_factory=_disabled)
+            self.assertEqual(result["deferred"], 1)
+            row = db.session.get(NotificationQueue, nid)
+            self.assertEqual(row.status, "queued")
+            self.assertEqual(row.attempt_count, 0)
+            self.assertTrue(row.last_error.startswith("INTEGRATION_DISABLED"))
+
+    def test_claims_are_exclusive_until_lease_expires(self):
+        with self.app.app_context():
+            ids = [self._queue(f"m{i}") for i in range(4)]
+            now = datetime.utcnow()
+            first = _claim_batch(3, now, "worker-a")
+            second = _claim_batch(3, now, "worker-b")
+            self.assertEqual([c.id for c in first], ids[:3])
+            self.assertEqual([c.id for c in second], ids[3:])
+            self.assertEqual(_claim_batch(3, now, "worker-c"), [])
+
+            later = now + timedelta(hours=1)
+            reclaimed = _claim_batch(10, later, "worker-d")
+            self.assertEqual([c.id for c in reclaimed], ids)
+
+    def test_pool_sends_concurrently(self):
+        with self.app.app_context():
+            for i in range(16):
+                self._queue(f"m{i}")
+            provider = _FakeProvider(delay=0.05)
+            started = time.perf_counter()
+            result = deliver_notifications(batch_size=16, pool_size=8, provider_factory=lambda settings, channel: provider)
+            elapsed = time.perf_counter() - started
+            self.assertEqual(result["sent"], 16)
+            self.assertGreaterEqual(provider.peak, 4)
+            # Serial sending would take 16 * 50ms.
+            self.assertLess(elapsed, 0.6)
+
+    def test_outcomes_written_per_chunk_and_lease_renewed(self):
+        with self.app.app_context():
+            for i in range(5):
+                self._queue(f"m{i}")
+            provider = _FakeProvider()
+            written = mock.Mock(wraps=notification_delivery._write_statuses)
+            renewed = mock.Mock(wraps=notification_delivery._renew_lease)
+            with mock.patch.object(notification_delivery, "_write_statuses", written), mock.patch.object(
+                notification_delivery, "_renew_lease", renewed
+            ):
+                result = deliver_notifications(batch_size=5, pool_size=2, provider_factory=lambda settings, channel: provider)
+            self.assertEqual(result["sent"], 5)
+            self.assertEqual([len(call.args[0]) for call in written.call_args_list], [2, 2, 1])
+            self.assertEqual(renewed.call_count, 2)
+            self.assertEqual(NotificationQueue.query.filter_by(status="sent").count(), 5)
+
+    def test_lease_outlasts_provider_timeouts(self):
+        with mock.patch.dict(os.environ, {"NOTIFY_DELIVERY_LEASE_SECONDS": "10", "NOTIFY_SEND_TIMEOUT_SECONDS": "12"}):
+            self.assertEqual(_lease(), timedelta(seconds=66))
+
+    def test_retry_delay_is_jittered_and_capped(self):
+        delays = {retry_delay(3).total_seconds() for _ in range(20)}
+        self.assertTrue(all(30.0 <= d <= 60.0 for d in delays))
+        self.assertGreater(len(delays), 1)
+        self.assertLessEqual(retry_delay(50).total_seconds(), 3600.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
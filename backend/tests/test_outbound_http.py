@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from app.integrations import http as outbound
+from app.integrations.http import CircuitBreaker, CircuitOpenError
+from app.integrations.messaging import termii_provider
+from app.integrations.messaging.termii_provider import TermiiMessagingProvider
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        with server.lock:
+            server.hits.append((self.command, self.path))
+            server.client_ports.add(self.client_address[1])
+            status = server.statuses.pop(0) if server.statuses else 200
+        body = json.dumps({"status": status < 400, "message": f"stub {status}"}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+
+class OutboundHttpTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            key: os.getenv(key)
+            for key in ("HTTP_RETRY_BACKOFF_SECONDS", "HTTP_BREAKER_FAILURES", "HTTP_BREAKER_RESET_SECONDS")
+        }
+        os.environ["HTTP_RETRY_BACKOFF_SECONDS"] = "0.01"
+        os.environ["HTTP_BREAKER_FAILURES"] = "3"
+        os.environ["HTTP_BREAKER_RESET_SECONDS"] = "0.2"
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        cls.server.daemon_threads = True
+        cls.server.lock = threading.Lock()
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        outbound._reset_http_state_for_tests()
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        outbound._reset_http_state_for_tests()
+        self.server.hits = []
+        self.server.client_ports = set()
+        self.server.statuses = []
+
+    def test_keep_alive_reuses_pooled_connection(self):
+        for _ in range(5):
+            res = outbound.get("stub", f"{self.base}/ping", timeout=2)
+            self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(self.server.hits), 5)
+        self.assertEqual(len(self.server.client_ports), 1)
+        metrics = outbound.http_metrics()["hosts"][self.base]
+        self.assertEqual(metrics["requests"], 5)
+        self.assertEqual(metrics["errors"], 0)
+        self.assertIsNotNone(metrics["p95_ms"])
+
+    def test_idempotent_calls_retry_on_5xx_but_posts_do_not(self):
+        self.server.statuses = [503, 502, 200]
+        res = outbound.get("stub", f"{self.base}/verify", timeout=2)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(self.server.hits), 3)
+        self.assertEqual(outbound.http_metrics()["hosts"][self.base]["retries"], 2)
+
+        self.server.hits = []
+        self.server.statuses = [503, 200]
+        res = outbound.post("stub-post", f"{self.base}/transfer", json={"amount": 1}, timeout=2)
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(len(self.server.hits), 1)
+
+    def test_breaker_opens_fails_fast_and_half_open_probe_closes_it(self):
+        self.server.statuses = [500, 500, 500]
+        for _ in range(3):
+            outbound.post("flaky", f"{self.base}/send", timeout=2)
+        self.assertEqual(outbound.http_metrics()["breakers"]["flaky"]["state"], "open")
+
+        with self.assertRaises(CircuitOpenError):
+            outbound.post("flaky", f"{self.base}/send", timeout=2)
+        self.assertEqual(len(self.server.hits), 3)
+        self.assertEqual(outbound.http_metrics()["hosts"][self.base]["short_circuited"], 1)
+
+        time.sleep(0.25)
+        res = outbound.post("flaky", f"{self.base}/send", timeout=2)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(outbound.http_metrics()["breakers"]["flaky"]["state"], "closed")
+
+    def test_half_open_allows_a_single_probe(self):
+        breaker = CircuitBreaker(provider="p", failure_threshold=1, reset_seconds=0.0)
+        breaker.record_failure()
+        breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+    def test_connection_refused_counts_as_failure(self):
+        with self.assertRaises(requests.ConnectionError):
+            outbound.get("down", "http://127.0.0.1:9/", timeout=0.5, retries=1)
+        stats = outbound.http_metrics()["hosts"]["http://127.0.0.1:9"]
+        self.assertEqual(stats["errors"], 2)
+        self.assertEqual(stats["retries"], 1)
+
+    def test_termii_provider_maps_open_circuit_to_provider_down(self):
+        saved = termii_provider.TERMII_BASE
+        termii_provider.TERMII_BASE = self.base
+        try:
+            provider = TermiiMessagingProvider(api_key="k", sender_id="FlipTrybe", whatsapp_sender="")
+            self.assertTrue(provider.send_sms(to="+2348000000000", message="hi").ok)
+            self.server.statuses = [500, 500, 500]
+            for _ in range(3):
+                self.assertEqual(provider.send_sms(to="+2348000000000", message="hi").code, "TERMII_PROVIDER_DOWN")
+            result = provider.send_sms(to="+2348000000000", message="hi")
+            self.assertEqual(result.code, "TERMII_PROVIDER_DOWN")
+            self.assertIn("CIRCUIT_OPEN", result.message)
+            self.assertEqual(len(self.server.hits), 4)
+        finally:
+            termii_provider.TERMII_BASE = saved
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from app import create_app
+from app.extensions import db
+from app.integrations.payments.base import TransferItem, TransferRejected, TransferResult
+from app.integrations.payments.mock_provider import MockPaymentsProvider
+from app.integrations.payments.paystack_provider import PaystackPaymentsProvider
+from app.models import PayoutBatch, PayoutRequest, User, Wallet, WalletTxn
+from app.services.payout_batch_service import (
+    create_payout_batch,
+    reconcile_open_payout_batches,
+    reconcile_payout_batch,
+)
+from app.utils.jwt_utils import create_token
+from app.utils.wallets import post_txn
+
+
+class _ExplodingProvider(MockPaymentsProvider):
+    def bulk_transfer(self, items, *, batch_reference):
+        raise TransferRejected("provider_unreachable")
+
+
+class _TimeoutProvider(MockPaymentsProvider):
+    """Accepts the batch, but the response never arrives."""
+
+    def __init__(self):
+        self.submitted: list[str] = []
+        self.found: dict[str, str] = {}
+
+    def bulk_transfer(self, items, *, batch_reference):
+        self.submitted.extend(item.reference for item in items)
+        raise RuntimeError("read timed out")
+
+    def transfer_status(self, transfer_code):
+        status = self.found.get(transfer_code)
+        if status is None:
+            return TransferResult(reference=transfer_code, status="pending", reason="not_found")
+        return TransferResult(reference=transfer_code, status=status, transfer_code=f"TRF_{transfer_code}")
+
+
+class _Response:
+    def __init__(self, status_code: int, body: dict):
+        self.status_code = status_code
+        self._body = body
+        self.content = b"x"
+
+    def json(self):
+        return self._body
+
+
+class PayoutBatchTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            "SQLALCHEMY_DATABASE_URI": os.getenv("SQLALCHEMY_DATABASE_URI"),
+            "DATABASE_URL": os.getenv("DATABASE_URL"),
+            "CELERY_BROKER_URL": os.getenv("CELERY_BROKER_URL"),
+            "REDIS_URL": os.getenv("REDIS_URL"),
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        os.environ["CELERY_BROKER_URL"] = ""
+        os.environ["REDIS_URL"] = ""
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+        cls.client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            admin = User(name="Admin", email=f"payout-admin-{time.time_ns()}@fliptrybe.test", role="admin")
+            admin.set_password("Passw0rd!")
+            db.session.add(admin)
+            db.session.commit()
+            self.admin_id = int(admin.id)
+
+    def _payout(self, *, balance: float, amount: float = 1000.0, account: str = "0123456789") -> int:
+        u = User(name="Buyer", email=f"payout-{time.time_ns()}@fliptrybe.test", role="buyer")
+        u.set_password("Passw0rd!")
+        db.session.add(u)
+        db.session.commit()
+        if balance > 0:
+            post_txn(user_id=int(u.id), direction="credit", amount=balance, kind="topup", reference=f"seed:{u.id}", note="")
+        p = PayoutRequest(
+            user_id=int(u.id),
+            amount=amount,
+            fee_amount=round(amount * 0.015, 2),
+            net_amount=round(amount * 0.985, 2),
+            status="approved",
+            bank_name="Test Bank",
+            account_number=account,
+            account_name="Buyer",
+        )
+        db.session.add(p)
+        db.session.commit()
+        return int(p.id)
+
+    def _balance(self, user_id: int) -> float:
+        row = Wallet.query.filter_by(user_id=int(user_id)).first()
+        return float(row.balance or 0.0) if row else 0.0
+
+    def test_batch_debits_together_and_reconciles_per_item(self):
+        with self.app.app_context():
+            ok_id = self._payout(balance=1000.0)
+            declined_id = self._payout(balance=1000.0, account="1234560000")
+            broke_id = self._payout(balance=100.0)
+
+            batch = create_payout_batch(provider=MockPaymentsProvider(), platform_user_id=self.admin_id, created_by=self.admin_id)
+            self.assertEqual(batch.status, "submitted")
+            self.assertEqual(batch.item_count, 3)
+            self.assertEqual(batch.failed_count, 1)
+            self.assertAlmostEqual(batch.total_amount, 2000.0)
+
+            ok = db.session.get(PayoutRequest, ok_id)
+            self.assertEqual(ok.status, "processing")
+            self.assertTrue(ok.provider_reference.startswith("MOCKTRF-S-"))
+            self.assertAlmostEqual(self._balance(ok.user_id), 0.0)
+            broke = db.session.get(PayoutRequest, broke_id)
+            self.assertEqual((broke.status, broke.failure_reason), ("failed", "insufficient_balance"))
+            self.assertAlmostEqual(self._balance(broke.user_id), 100.0)
+            self.assertAlmostEqual(self._balance(self.admin_id), 30.0)
+
+            result = reconcile_payout_batch(int(batch.id), provider=MockPaymentsProvider(), platform_user_id=self.admin_id)
+            self.assertEqual(result["status"], "completed")
+            self.assertEqual((result["paid_count"], result["failed_count"], result["pending_count"]), (1, 2, 0))
+
+            self.assertEqual(db.session.get(PayoutRequest, ok_id).status, "paid")
+            declined = db.session.get(PayoutRequest, declined_id)
+            self.assertEqual((declined.status, declined.failure_reason), ("failed", "mock_declined"))
+            self.assertAlmostEqual(self._balance(declined.user_id), 1000.0)
+            self.assertAlmostEqual(self._balance(self.admin_id), 15.0)
+
+            again = reconcile_payout_batch(int(batch.id), provider=MockPaymentsProvider(), platform_user_id=self.admin_id)
+            self.assertEqual(again["checked"], 0)
+            self.assertEqual(WalletTxn.query.filter_by(kind="payout_reversal").count(), 1)
+
+    def test_provider_outage_reverses_debits_and_releases_payouts(self):
+        with self.app.app_context():
+            pid = self._payout(balance=1000.0)
+            batch = create_payout_batch(provider=_ExplodingProvider(), platform_user_id=self.admin_id)
+            self.assertEqual(batch.status, "failed")
+            p = db.session.get(PayoutRequest, pid)
+            self.assertEqual((p.status, p.batch_id), ("approved", None))
+            self.assertAlmostEqual(self._balance(p.user_id), 1000.0)
+            self.assertAlmostEqual(self._balance(self.admin_id), 0.0)
+
+            retry = create_payout_batch(provider=MockPaymentsProvider(), platform_user_id=self.admin_id)
+            self.assertEqual(retry.status, "submitted")
+            self.assertAlmostEqual(self._balance(p.user_id), 0.0)
+
+    def test_unknown_submission_outcome_keeps_debits_and_reconciles_by_reference(self):
+        with self.app.app_context():
+            paid_id = self._payout(balance=1000.0)
+            missing_id = self._payout(balance=1000.0)
+            provider = _TimeoutProvider()
+            batch = create_payout_batch(provider=provider, platform_user_id=self.admin_id)
+            self.assertEqual(batch.status, "submitted")
+            self.assertTrue(batch.error.startswith("outcome_unknown:"))
+            self.assertEqual(provider.submitted, [f"PO-{paid_id}", f"PO-{missing_id}"])
+            paid = db.session.get(PayoutRequest, paid_id)
+            self.assertEqual((paid.status, paid.provider_reference), ("processing", f"PO-{paid_id}"))
+            self.assertAlmostEqual(self._balance(paid.user_id), 0.0)
+            # In-flight payouts are never picked up by another batch.
+            self.assertIsNone(create_payout_batch(provider=MockPaymentsProvider(), platform_user_id=self.admin_id))
+
+            provider.found[f"PO-{paid_id}"] = "success"
+            result = reconcile_payout_batch(int(batch.id), provider=provider, platform_user_id=self.admin_id)
+            self.assertEqual((result["paid_count"], result["pending_count"]), (1, 1))
+            self.assertEqual(db.session.get(PayoutRequest, paid_id).provider_reference, f"TRF_PO-{paid_id}")
+            self.assertEqual(db.session.get(PayoutRequest, missing_id).status, "processing")
+
+            # Still unknown to the provider past the grace period: never created.
+            batch.submitted_at = batch.submitted_at - timedelta(hours=2)
+            db.session.commit()
+            result = reconcile_payout_batch(int(batch.id), provider=provider, platform_user_id=self.admin_id)
+            self.assertEqual(result["status"], "completed")
+            missing = db.session.get(PayoutRequest, missing_id)
+            self.assertEqual((missing.status, missing.failure_reason), ("failed", "not_found"))
+            self.assertAlmostEqual(self._balance(missing.user_id), 1000.0)
+
+    def test_open_batch_sweep_settles_payouts_after_task_retries_end(self):
+        with self.app.app_context():
+            missing_id = self._payout(balance=1000.0)
+            provider = _TimeoutProvider()
+            batch = create_payout_batch(provider=provider, platform_user_id=self.admin_id)
+            batch_id = int(batch.id)
+
+            swept = reconcile_open_payout_batches(provider=provider, platform_user_id=self.admin_id)
+            self.assertEqual((swept["batches"], swept["pending"]), (1, 1))
+
+            batch.submitted_at = batch.submitted_at - timedelta(hours=2)
+            db.session.commit()
+            swept = reconcile_open_payout_batches(provider=provider, platform_user_id=self.admin_id)
+            self.assertEqual((swept["batches"], swept["pending"]), (1, 0))
+            self.assertEqual(db.session.get(PayoutBatch, batch_id).status, "completed")
+            self.assertEqual(db.session.get(PayoutRequest, missing_id).status, "failed")
+            self.assertEqual(reconcile_open_payout_batches(provider=provider, platform_user_id=self.admin_id)["batches"], 0)
+
+    def test_paystack_bulk_transfer_separates_rejections_from_unknown_outcomes(self):
+        provider = PaystackPaymentsProvider("sk_test")
+        items = [TransferItem(reference="PO-1", amount=10.0, recipient="RCP_1"), TransferItem(reference="PO-2", amount=5.0, recipient="RCP_2")]
+        target = "app.integrations.payments.paystack_provider.outbound.post"
+
+        with mock.patch(target, return_value=_Response(400, {"status": False, "message": "Insufficient balance"})):
+            with self.assertRaises(TransferRejected):
+                provider.bulk_transfer(items, batch_reference="POB-1")
+        with mock.patch(target, return_value=_Response(502, {})):
+            with self.assertRaises(RuntimeError) as ctx:
+                provider.bulk_transfer(items, batch_reference="POB-1")
+            self.assertNotIsInstance(ctx.exception, TransferRejected)
+
+        accepted = {"status": True, "data": [{"reference": "PO-1", "status": "pending", "transfer_code": "TRF_1"}]}
+        with mock.patch(target, return_value=_Response(200, accepted)):
+            results = provider.bulk_transfer(items, batch_reference="POB-1")
+        self.assertEqual([(r.status, r.transfer_code) for r in results], [("pending", "TRF_1"), ("pending", "")])
+        self.assertEqual(results[1].reason, "not_acknowledged")
+
+    def test_admin_actions_refuse_payouts_in_flight(self):
+        with self.app.app_context():
+            declined = self._payout(balance=1000.0, account="1234560000")
+            batch = create_payout_batch(provider=MockPaymentsProvider(), platform_user_id=self.admin_id)
+            reconcile_payout_batch(int(batch.id), provider=MockPaymentsProvider(), platform_user_id=self.admin_id)
+            inflight = self._payout(balance=1000.0)
+            create_payout_batch(provider=_TimeoutProvider(), platform_user_id=self.admin_id)
+            user_id = int(db.session.get(PayoutRequest, inflight).user_id)
+        headers = {"Authorization": f"Bearer {create_token(self.admin_id)}"}
+
+        for action in ("approve", "reject", "mark-paid"):
+            res = self.client.post(f"/api/wallet/payouts/{inflight}/admin/{action}", headers=headers)
+            self.assertEqual(res.status_code, 409, action)
+        res = self.client.post(f"/api/wallet/payouts/{declined}/admin/approve", headers=headers)
+        self.assertEqual(res.status_code, 200)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(PayoutRequest, inflight).status, "processing")
+            self.assertAlmostEqual(self._balance(user_id), 0.0)
+            again = db.session.get(PayoutRequest, declined)
+            self.assertEqual((again.status, again.batch_id), ("approved", None))
+
+    def test_admin_endpoints_create_and_report_batch(self):
+        with self.app.app_context():
+            pid = self._payout(balance=1000.0)
+            self._payout(balance=1000.0)
+        headers = {"Authorization": f"Bearer {create_token(self.admin_id)}"}
+
+        res = self.client.post("/api/wallet/admin/payout-batches", json={"payout_ids": [pid]}, headers=headers)
+        self.assertEqual(res.status_code, 201)
+        body = res.get_json()
+        self.assertFalse(body["reconcile_queued"])
+        self.assertEqual([item["id"] for item in body["items"]], [pid])
+        batch_id = body["batch"]["id"]
+
+        res = self.client.post(f"/api/wallet/admin/payout-batches/{batch_id}/reconcile", headers=headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.get_json()["paid_count"], 1)
+
+        res = self.client.get(f"/api/wallet/admin/payout-batches/{batch_id}", headers=headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.get_json()["batch"]["status"], "completed")
+        self.assertEqual(res.get_json()["items"][0]["status"], "paid")
+
+        self.assertEqual(self.client.get("/api/wallet/admin/payout-batches/999", headers=headers).status_code, 404)
+        with self.app.app_context():
+            self.assertEqual(PayoutBatch.query.count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
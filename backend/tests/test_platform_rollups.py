@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.extensions import db
+from app.jobs.platform_rollups import run_platform_rollup_backfill, run_platform_rollups
+from app.models import DailyPlatformMetric, Listing, Order, RollupDirtyDay, Shortlet, ShortletBooking, User
+from app.services import rollups
+from app.utils.jwt_utils import create_token
+
+
+class PlatformRollupsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {key: os.getenv(key) for key in ("SQLALCHEMY_DATABASE_URI", "DATABASE_URL")}
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        self.now = datetime.utcnow().replace(microsecond=0)
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            self.admin_id = self._user("admin")
+            self.merchant_id = self._user("merchant")
+            self.buyer_id = self._user("buyer")
+            self.ikeja = self._listing("Ikeja")
+            self.abuja = self._listing("Abuja")
+            shortlet = Shortlet(owner_id=self.merchant_id, title="Flat", state="Lagos", city="Lekki", nightly_price=100.0)
+            db.session.add(shortlet)
+            db.session.commit()
+            self.shortlet_id = int(shortlet.id)
+
+    def _user(self, role: str, **fields) -> int:
+        user = User(name=role.title(), email=f"rollup-{role}-{time.time_ns()}@fliptrybe.test", role=role, **fields)
+        user.set_password("Passw0rd!")
+        db.session.add(user)
+        db.session.commit()
+        return int(user.id)
+
+    def _listing(self, city: str) -> int:
+        listing = Listing(user_id=self.merchant_id, title="Item", state="Lagos", city=city)
+        db.session.add(listing)
+        db.session.commit()
+        return int(listing.id)
+
+    def _order(self, listing_id: int, price: float, *, days_ago: int = 0, status: str = "paid", **fields) -> int:
+        order = Order(
+            buyer_id=self.buyer_id,
+            merchant_id=self.merchant_id,
+            listing_id=listing_id,
+            amount=price,
+            total_price=price,
+            status=status,
+            created_at=self.now - timedelta(days=days_ago),
+            **fields,
+        )
+        db.session.add(order)
+        db.session.commit()
+        return int(order.id)
+
+    def _rows(self, day) -> dict:
+        return {
+            (r.city, r.vertical): r
+            for r in DailyPlatformMetric.query.filter_by(day=day).all()
+        }
+
+    def test_dirty_days_roll_up_by_city_and_vertical(self):
+        with self.app.app_context():
+            self._order(self.ikeja, 100.0, sale_platform_minor=500, delivery_platform_minor=100)
+            self._order(self.ikeja, 50.5)
+            self._order(self.abuja, 20.0, days_ago=3)
+            self._order(self.abuja, 999.0, status="cancelled")
+            db.session.add(
+                ShortletBooking(
+                    shortlet_id=self.shortlet_id,
+                    user_id=self.buyer_id,
+                    payment_status="paid",
+                    total_amount=300.0,
+                    check_in=self.now.date(),
+                    check_out=(self.now + timedelta(days=3)).date(),
+                    nights=3,
+                    created_at=self.now,
+                )
+            )
+            db.session.commit()
+            dirty = {r.day for r in RollupDirtyDay.query.all()}
+            self.assertEqual(dirty, {self.now.date(), (self.now - timedelta(days=3)).date()})
+
+            result = run_platform_rollups()
+            self.assertTrue(result["ok"])
+            self.assertEqual(RollupDirtyDay.query.count(), 0)
+            today = self._rows(self.now.date())
+            ikeja = today[("Ikeja", "declutter")]
+            self.assertEqual((ikeja.transactions, ikeja.gmv_minor, ikeja.commission_minor), (2, 15050, 600))
+            self.assertEqual(today[("Lekki", "shortlet")].commission_minor, 1500)
+            self.assertEqual(today[("", "accounts")].signups, 3)
+            self.assertEqual(today[("", "accounts")].merchant_signups, 1)
+            self.assertNotIn(("Abuja", "declutter"), today)
+            self.assertEqual(self._rows((self.now - timedelta(days=3)).date())[("Abuja", "declutter")].gmv_minor, 2000)
+
+            count = DailyPlatformMetric.query.count()
+            rollups.rollup_platform_days([self.now.date()])
+            db.session.commit()
+            self.assertEqual(DailyPlatformMetric.query.count(), count)
+
+    def test_status_change_on_old_order_recomputes_that_day(self):
+        with self.app.app_context():
+            order_id = self._order(self.ikeja, 80.0, days_ago=40)
+            run_platform_rollups()
+            old_day = (self.now - timedelta(days=40)).date()
+            self.assertEqual(self._rows(old_day)[("Ikeja", "declutter")].transactions, 1)
+
+            order = db.session.get(Order, order_id)
+            order.status = "cancelled"
+            db.session.commit()
+            self.assertEqual([r.day for r in RollupDirtyDay.query.all()], [old_day])
+            run_platform_rollups()
+            self.assertNotIn(("Ikeja", "declutter"), self._rows(old_day))
+
+    def test_remark_during_run_is_kept(self):
+        with self.app.app_context():
+            self._order(self.ikeja, 10.0)
+            marks = rollups.pending_dirty_days(rollups.PLATFORM_ROLLUP, limit=10)
+            rollups.mark_dirty(db.session.connection(), rollups.PLATFORM_ROLLUP, [self.now.date()], now=self.now + timedelta(seconds=5))
+            rollups.clear_dirty_marks(marks)
+            db.session.commit()
+            self.assertEqual(RollupDirtyDay.query.count(), 1)
+
+    def test_backfill_covers_rows_written_outside_the_orm(self):
+        with self.app.app_context():
+            day = self.now - timedelta(days=100)
+            db.session.execute(
+                Order.__table__.insert(),
+                [
+                    {
+                        "buyer_id": self.buyer_id,
+                        "merchant_id": self.merchant_id,
+                        "listing_id": self.abuja,
+                        "amount": 10.0,
+                        "total_price": 0.0,
+                        "status": "completed",
+                        "created_at": day,
+                        "updated_at": day,
+                    }
+                ],
+            )
+            db.session.commit()
+            self.assertIsNone(RollupDirtyDay.query.filter_by(day=day.date()).first())
+            result = run_platform_rollup_backfill(day.date() - timedelta(days=5), self.now.date(), chunk_days=30)
+            self.assertTrue(result["ok"])
+            self.assertEqual(result["days"], 106)
+            self.assertEqual(self._rows(day.date())[("Abuja", "declutter")].gmv_minor, 1000)
+
+    def test_dashboards_read_from_rollup(self):
+        with self.app.app_context():
+            self._order(self.ikeja, 100.0, sale_platform_minor=700)
+            self._order(self.abuja, 40.0, days_ago=45)
+            token = create_token(self.admin_id)
+        client = self.app.test_client()
+        headers = {"Authorization": f"Bearer {token}"}
+
+        overview = client.get("/api/admin/analytics/overview", headers=headers).get_json()
+        self.assertEqual(overview["total_gmv_minor"], 14000)
+        self.assertEqual(overview["total_orders"], 2)
+        self.assertEqual(overview["total_commission_minor"], 700)
+        self.assertEqual(overview["monthly_growth_rate"], 0.0)
+        self.assertEqual(overview["active_users_last_30_days"], 2)
+
+        res = client.get("/api/admin/analytics/daily?group=city", headers=headers)
+        body = res.get_json()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([(r["city"], r["gmv_minor"]) for r in body["series"] if r["city"]], [("Ikeja", 10000)])
+        self.assertEqual(body["totals"]["declutter"]["transactions"], 1)
+        self.assertEqual(client.get("/api/admin/analytics/daily?from=2026-02-01&to=2026-01-01", headers=headers).status_code, 400)
+
+        investor = client.get("/api/investor/analytics", headers=headers).get_json()
+        self.assertEqual(sum(m["gmv_minor"] for m in investor["gmv_trend"]), 14000)
+        self.assertEqual(investor["commission_revenue_minor"], 700)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import socket
+import struct
+import threading
+import time
+import unittest
+
+from app import create_app
+from app.extensions import db
+from app.models import Notification, Order, OrderEvent, User
+from app.realtime import bus as realtime_bus
+from app.realtime.gateway import Connection, Gateway, app_authorizer
+from app.utils.jwt_utils import create_token
+
+
+def _ws_client_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    mask = b"\x01\x02\x03\x04"
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return struct.pack("!BB", 0x80 | opcode, 0x80 | len(payload)) + mask + masked
+
+
+def _read_ws_text(sock: socket.socket) -> dict:
+    head = sock.recv(2)
+    size = head[1] & 0x7F
+    if size == 126:
+        size = struct.unpack("!H", sock.recv(2))[0]
+    data = b""
+    while len(data) < size:
+        data += sock.recv(size - len(data))
+    return json.loads(data.decode("utf-8"))
+
+
+class RealtimeGatewayTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            key: os.getenv(key)
+            for key in ("SQLALCHEMY_DATABASE_URI", "DATABASE_URL", "REALTIME_BUS")
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        os.environ["REALTIME_BUS"] = "memory"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        realtime_bus._reset_bus_for_tests()
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        self.bus = realtime_bus._reset_bus_for_tests(realtime_bus.MemoryBus())
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            stamp = time.time_ns()
+            buyer = User(name="Buyer", email=f"rt-buyer-{stamp}@fliptrybe.test", role="buyer")
+            merchant = User(name="Merchant", email=f"rt-merchant-{stamp}@fliptrybe.test", role="merchant")
+            stranger = User(name="Other", email=f"rt-other-{stamp}@fliptrybe.test", role="buyer")
+            for user in (buyer, merchant, stranger):
+                user.set_password("Passw0rd!")
+            db.session.add_all([buyer, merchant, stranger])
+            db.session.commit()
+            order = Order(buyer_id=buyer.id, merchant_id=merchant.id, amount=100.0, total_price=100.0)
+            db.session.add(order)
+            db.session.commit()
+            self.buyer_id, self.stranger_id, self.order_id = int(buyer.id), int(stranger.id), int(order.id)
+
+        self.loop = asyncio.new_event_loop()
+        self.gateway = Gateway(authorize=app_authorizer(self.app), queue_size=8, max_dropped=4)
+        ready = threading.Event()
+
+        def _run():
+            asyncio.set_event_loop(self.loop)
+            self.port = self.loop.run_until_complete(self.gateway.start("127.0.0.1", 0, bus=self.bus))
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=_run, daemon=True)
+        self.thread.start()
+        ready.wait(5)
+
+    def tearDown(self):
+        asyncio.run_coroutine_threadsafe(self.gateway.stop(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+
+    def _connect(self, request: str) -> socket.socket:
+        sock = socket.create_connection(("127.0.0.1", self.port), timeout=5)
+        sock.sendall(request.encode("latin-1"))
+        return sock
+
+    def _read_until(self, sock: socket.socket, marker: bytes) -> bytes:
+        data = b""
+        while marker not in data:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def _wait_for_members(self, room: str, count: int = 1) -> None:
+        deadline = time.time() + 5
+        while len(self.gateway.rooms.get(room, ())) < count and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_sse_receives_committed_order_events(self):
+        token = create_token(self.buyer_id)
+        room = f"order:{self.order_id}"
+        sock = self._connect(f"GET /sse?rooms={room}&token={token} HTTP/1.1\r\nHost: x\r\n\r\n")
+        try:
+            self.assertIn(b"200 OK", self._read_until(sock, b"retry: 2000\n\n"))
+            self._wait_for_members(room)
+            with self.app.app_context():
+                db.session.add(OrderEvent(order_id=self.order_id, actor_user_id=self.buyer_id, event="paid"))
+                db.session.flush()
+                db.session.rollback()
+                db.session.add(OrderEvent(order_id=self.order_id, actor_user_id=self.buyer_id, event="shipped"))
+                db.session.commit()
+            frame = self._read_until(sock, b"\n\n").decode("utf-8")
+            self.assertTrue(frame.startswith("event: order.event\n"))
+            envelope = json.loads(frame.split("data: ", 1)[1])
+            self.assertEqual((envelope["room"], envelope["payload"]["event"]), (room, "shipped"))
+            self.assertEqual(self.bus.published, 1)
+        finally:
+            sock.close()
+
+    def test_savepoints_do_not_publish_or_drop_outer_events(self):
+        received = []
+        self.bus.subscribe(lambda room, message: received.append(json.loads(message)["payload"].get("title")))
+        with self.app.app_context():
+            # Released savepoint, then the outer transaction rolls back.
+            db.session.add(Notification(user_id=self.buyer_id, channel="in_app", title="outer", message="x"))
+            db.session.flush()
+            with db.session.begin_nested():
+                db.session.add(Notification(user_id=self.buyer_id, channel="in_app", title="inner", message="x"))
+            self.assertEqual(received, [])
+            db.session.rollback()
+            self.assertEqual(Notification.query.count(), 0)
+
+            # A rolled-back savepoint drops only its own events.
+            db.session.add(Notification(user_id=self.buyer_id, channel="in_app", title="kept", message="x"))
+            db.session.flush()
+            savepoint = db.session.begin_nested()
+            db.session.add(Notification(user_id=self.buyer_id, channel="in_app", title="undone", message="x"))
+            db.session.flush()
+            savepoint.rollback()
+            db.session.commit()
+        self.assertEqual(received, ["kept"])
+
+    def test_rejects_missing_token_and_foreign_rooms(self):
+        sock = self._connect(f"GET /sse?rooms=order:{self.order_id} HTTP/1.1\r\n\r\n")
+        self.assertIn(b"401", self._read_until(sock, b"\r\n\r\n"))
+        sock.close()
+        token = create_token(self.stranger_id)
+        sock = self._connect(f"GET /sse?rooms=order:{self.order_id}&token={token} HTTP/1.1\r\n\r\n")
+        self.assertIn(b"403", self._read_until(sock, b"\r\n\r\n"))
+        sock.close()
+
+    def test_websocket_subscribe_and_receive(self):
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        token = create_token(self.buyer_id)
+        sock = self._connect(
+            "GET /ws HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\nAuthorization: Bearer {token}\r\n\r\n"
+        )
+        try:
+            self.assertIn(b"101 Switching Protocols", self._read_until(sock, b"\r\n\r\n"))
+            sock.sendall(_ws_client_frame(json.dumps({"action": "subscribe", "room": f"user:{self.stranger_id}"}).encode()))
+            self.assertEqual(_read_ws_text(sock)["error"], "ROOM_FORBIDDEN")
+            sock.sendall(_ws_client_frame(json.dumps({"action": "subscribe", "room": f"user:{self.buyer_id}"}).encode()))
+            self.assertEqual(_read_ws_text(sock)["event"], "subscribed")
+
+            realtime_bus.publish(f"user:{self.buyer_id}", "notification", {"id": 5})
+            envelope = _read_ws_text(sock)
+            self.assertEqual((envelope["event"], envelope["payload"]), ("notification", {"id": 5}))
+            self.assertIsNotNone(self.gateway.snapshot()["publish_to_dispatch_p50_ms"])
+        finally:
+            sock.close()
+
+    def test_slow_connection_drops_oldest_then_disconnects(self):
+        async def _scenario():
+            conn = Connection(writer=None, user_id=1, kind="sse", queue_size=2, max_dropped=3)
+            results = [conn.offer(f"m{i}".encode()) for i in range(4)]
+            queued = [conn.queue.get_nowait() for _ in range(conn.queue.qsize())]
+            more = [conn.offer(f"m{i}".encode()) for i in range(4, 7)]
+            return results, queued, more, conn.closed.is_set(), conn.dropped
+
+        results, queued, more, closed, dropped = asyncio.run(_scenario())
+        self.assertEqual(results, [True, True, True, True])
+        self.assertEqual(queued, [b"m2", b"m3"])
+        self.assertEqual((more, closed, dropped), ([True, True, False], True, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
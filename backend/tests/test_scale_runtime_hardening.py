@@ -23,6 +23,7 @@ class ScaleRuntimeHardeningTestCase(unittest.TestCase):
             "RATE_LIMIT_REDIS_URL": os.getenv("RATE_LIMIT_REDIS_URL"),
             "ENABLE_IDEMPOTENCY_ENFORCEMENT": os.getenv("ENABLE_IDEMPOTENCY_ENFORCEMENT"),
             "PAYSTACK_WEBHOOK_QUEUE": os.getenv("PAYSTACK_WEBHOOK_QUEUE"),
+            "PAYSTACK_WEBHOOK_INBOX": os.getenv("PAYSTACK_WEBHOOK_INBOX"),
             "TRUST_PROXY_HEADERS": os.getenv("TRUST_PROXY_HEADERS"),
             "RATE_LIMIT_IN_TESTS": os.getenv("RATE_LIMIT_IN_TESTS"),
             "FLIPTRYBE_ENV": os.getenv("FLIPTRYBE_ENV"),
@@ -34,6 +35,8 @@ class ScaleRuntimeHardeningTestCase(unittest.TestCase):
         os.environ["RATE_LIMIT_REDIS_URL"] = ""
         os.environ["ENABLE_IDEMPOTENCY_ENFORCEMENT"] = "true"
         os.environ["PAYSTACK_WEBHOOK_QUEUE"] = "true"
+        # Covers the per-event queue path; the inbox has its own tests.
+        os.environ["PAYSTACK_WEBHOOK_INBOX"] = "false"
         os.environ["TRUST_PROXY_HEADERS"] = "true"
         os.environ["RATE_LIMIT_IN_TESTS"] = "true"
         os.environ["FLIPTRYBE_ENV"] = "dev"
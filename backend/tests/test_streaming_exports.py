@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import time
+import unittest
+from datetime import datetime
+
+from app import create_app
+from app.extensions import db
+from app.models import AuditLog, Order, User, WalletTxn
+from app.utils.jwt_utils import create_token
+from app.utils.wallets import post_txn
+
+
+class StreamingExportsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            "SQLALCHEMY_DATABASE_URI": os.getenv("SQLALCHEMY_DATABASE_URI"),
+            "DATABASE_URL": os.getenv("DATABASE_URL"),
+            "EXPORT_STREAM_CHUNK_ROWS": os.getenv("EXPORT_STREAM_CHUNK_ROWS"),
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        # Small partitions so the tests cross several server-side fetches.
+        os.environ["EXPORT_STREAM_CHUNK_ROWS"] = "2"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+        cls.client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            admin = User(name="Admin", email=f"export-admin-{time.time_ns()}@fliptrybe.test", role="admin")
+            admin.set_password("Passw0rd!")
+            buyer = User(name="Buyer", email=f"export-buyer-{time.time_ns()}@fliptrybe.test", role="buyer")
+            buyer.set_password("Passw0rd!")
+            db.session.add_all([admin, buyer])
+            db.session.commit()
+            self.admin_id = int(admin.id)
+            self.buyer_id = int(buyer.id)
+
+    def _auth(self, user_id: int) -> dict:
+        with self.app.app_context():
+            return {"Authorization": f"Bearer {create_token(user_id)}"}
+
+    def _seed_ledger(self):
+        with self.app.app_context():
+            for i in range(5):
+                post_txn(user_id=self.buyer_id, direction="credit", amount=100.0 + i, kind="topup", reference=f"top-{i}", note="Top up")
+            post_txn(user_id=self.buyer_id, direction="debit", amount=50.0, kind="payout", reference="po-1", note="Payout")
+            post_txn(user_id=self.admin_id, direction="credit", amount=9.0, kind="topup", reference="admin-top", note="Top up")
+            old = WalletTxn.query.filter_by(reference="top-0").first()
+            old.created_at = datetime(2024, 1, 15, 12, 0, 0)
+            db.session.commit()
+
+    def test_user_ledger_csv_streams_all_rows_with_filters(self):
+        self._seed_ledger()
+        res = self.client.get("/api/wallet/ledger/export?format=csv", headers=self._auth(self.buyer_id))
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.is_streamed)
+        self.assertTrue(res.mimetype.startswith("text/csv"))
+        rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual({r["user_id"] for r in rows}, {str(self.buyer_id)})
+        self.assertNotIn("idempotency_key", rows[0])
+
+        res = self.client.get(
+            "/api/wallet/ledger/export?format=csv&kind=topup&from=2024-02-01",
+            headers=self._auth(self.buyer_id),
+        )
+        rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+        self.assertEqual(sorted(r["reference"] for r in rows), ["top-1", "top-2", "top-3", "top-4"])
+
+        res = self.client.get(
+            "/api/wallet/ledger/export?format=csv&to=2024-01-15",
+            headers=self._auth(self.buyer_id),
+        )
+        rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+        self.assertEqual([r["reference"] for r in rows], ["top-0"])
+
+    def test_admin_ledger_ndjson_and_validation(self):
+        self._seed_ledger()
+        res = self.client.get("/api/wallet/admin/ledger/export?format=ndjson", headers=self._auth(self.buyer_id))
+        self.assertEqual(res.status_code, 403)
+
+        res = self.client.get(
+            f"/api/wallet/admin/ledger/export?format=ndjson&user_id={self.buyer_id}&direction=debit",
+            headers=self._auth(self.admin_id),
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.mimetype, "application/x-ndjson")
+        lines = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["kind"], "payout")
+        self.assertEqual(lines[0]["amount"], 50.0)
+
+        bad = self.client.get("/api/wallet/admin/ledger/export?format=xml", headers=self._auth(self.admin_id))
+        self.assertEqual(bad.status_code, 400)
+        bad = self.client.get("/api/wallet/admin/ledger/export?from=yesterday", headers=self._auth(self.admin_id))
+        self.assertEqual(bad.status_code, 400)
+
+    def test_admin_orders_and_audit_exports(self):
+        with self.app.app_context():
+            for status in ("paid", "paid", "cancelled"):
+                db.session.add(Order(buyer_id=self.buyer_id, merchant_id=self.admin_id, amount=10.0, status=status))
+            db.session.add(AuditLog(actor_user_id=self.admin_id, action="payout_approved", target_type="payout", target_id=1))
+            db.session.add(AuditLog(actor_user_id=self.admin_id, action="user_suspended", target_type="user", target_id=2))
+            db.session.commit()
+
+        res = self.client.get("/api/admin/exports/orders?status=paid", headers=self._auth(self.buyer_id))
+        self.assertEqual(res.status_code, 403)
+
+        res = self.client.get("/api/admin/exports/orders?status=paid", headers=self._auth(self.admin_id))
+        self.assertEqual(res.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({r["status"] for r in rows}, {"paid"})
+
+        res = self.client.get(
+            "/api/admin/exports/audit-logs?format=ndjson&action=user_suspended",
+            headers=self._auth(self.admin_id),
+        )
+        self.assertEqual(res.status_code, 200)
+        lines = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+        self.assertEqual([line["action"] for line in lines], ["user_suspended"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from datetime import date, datetime, timedelta
+
+from app import create_app
+from app.extensions import db
+from app.jobs.partition_maintenance import run_partition_maintenance
+from app.models import JobRun, PlatformEvent, User
+from app.utils.jwt_utils import create_token
+from app.utils.partitions import (
+    PARTITIONED_TABLES,
+    _reset_partition_cache_for_tests,
+    add_months,
+    month_start,
+    partition_name,
+    table_is_partitioned,
+)
+from app.utils.wallets import post_txn
+
+
+class TablePartitionsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            "SQLALCHEMY_DATABASE_URI": os.getenv("SQLALCHEMY_DATABASE_URI"),
+            "DATABASE_URL": os.getenv("DATABASE_URL"),
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+        cls.client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            _reset_partition_cache_for_tests()
+            admin = User(name="Admin", email=f"partition-admin-{time.time_ns()}@fliptrybe.test", role="admin")
+            admin.set_password("Passw0rd!")
+            db.session.add(admin)
+            db.session.commit()
+            self.admin_id = int(admin.id)
+
+    def test_month_helpers(self):
+        self.assertEqual(month_start(datetime(2026, 10, 19, 8, 30)), date(2026, 10, 1))
+        self.assertEqual(add_months(date(2026, 11, 1), 2), date(2027, 1, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(partition_name("wallet_txns", date(2027, 1, 1)), "wallet_txns_p202701")
+        self.assertEqual(PARTITIONED_TABLES["listing_views"], "view_date")
+
+    def test_sqlite_keeps_single_tables(self):
+        with self.app.app_context():
+            for table in PARTITIONED_TABLES:
+                self.assertFalse(table_is_partitioned(table))
+            result = run_partition_maintenance()
+            self.assertTrue(result["ok"])
+            self.assertFalse(result["supported"])
+            self.assertEqual(result["created"], [])
+            self.assertEqual(JobRun.query.filter_by(job_name="partition_maintenance").count(), 0)
+
+            first = post_txn(user_id=self.admin_id, direction="credit", amount=10.0, kind="topup", reference="t-1", note="Top up", idempotency_key="k-1")
+            again = post_txn(user_id=self.admin_id, direction="credit", amount=10.0, kind="topup", reference="t-1", note="Top up", idempotency_key="k-1")
+            self.assertIsNotNone(first)
+            self.assertEqual(int(first.id), int(again.id))
+
+    def test_events_summary_counts_windows_in_one_pass(self):
+        with self.app.app_context():
+            now = datetime.utcnow()
+            db.session.add_all(
+                [
+                    PlatformEvent(event_type="order_created", created_at=now - timedelta(hours=1)),
+                    PlatformEvent(event_type="order_created", created_at=now - timedelta(days=3)),
+                    PlatformEvent(event_type="payout_released", created_at=now - timedelta(days=2)),
+                    PlatformEvent(event_type="order_created", created_at=now - timedelta(days=10)),
+                ]
+            )
+            db.session.commit()
+            token = create_token(self.admin_id)
+        res = self.client.get("/api/admin/events/summary", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(res.status_code, 200)
+        body = res.get_json()
+        self.assertEqual(body["last_24h"], {"order_created": 1})
+        self.assertEqual(body["last_7d"], {"order_created": 2, "payout_released": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import os
+import time
+import unittest
+from unittest import mock
+
+from app import create_app
+from app.extensions import db
+from app.models import MoneyBoxAccount, MoneyBoxLedger, User, Wallet, WalletTxn
+from app.utils.wallets import post_txn, post_txns
+
+
+class WalletPostTxnsTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            "SQLALCHEMY_DATABASE_URI": os.getenv("SQLALCHEMY_DATABASE_URI"),
+            "DATABASE_URL": os.getenv("DATABASE_URL"),
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            stamp = str(time.time_ns())
+            ids = []
+            for role in ("admin", "merchant", "driver", "buyer"):
+                u = User(name=role.title(), email=f"post-{role}-{stamp}@fliptrybe.test", role=role)
+                u.set_password("Passw0rd!")
+                db.session.add(u)
+                db.session.flush()
+                ids.append(int(u.id))
+            db.session.commit()
+            self.platform_id, self.merchant_id, self.driver_id, self.buyer_id = ids
+
+    def _balance(self, user_id: int) -> float:
+        row = Wallet.query.filter_by(user_id=int(user_id)).first()
+        return float(row.balance or 0.0) if row else 0.0
+
+    def _settlement_legs(self, ref: str) -> list[dict]:
+        return [
+            dict(user_id=self.merchant_id, direction="credit", amount=900.0, kind="order_sale", reference=ref, note="sale"),
+            dict(user_id=self.driver_id, direction="credit", amount=200.0, kind="delivery_fee", reference=ref, note="delivery"),
+            dict(user_id=self.platform_id, direction="credit", amount=100.0, kind="platform_fee", reference=ref, note="fee"),
+            dict(user_id=self.platform_id, direction="credit", amount=50.0, kind="delivery_commission", reference=ref, note="share"),
+        ]
+
+    def test_multi_leg_settlement_creates_wallets_and_is_idempotent(self):
+        with self.app.app_context():
+            first = post_txns(self._settlement_legs("order:1"))
+            self.assertTrue(all(t is not None for t in first))
+            self.assertEqual([t.kind for t in first], ["order_sale", "delivery_fee", "platform_fee", "delivery_commission"])
+            self.assertAlmostEqual(self._balance(self.platform_id), 150.0)
+
+            replay = post_txns(self._settlement_legs("order:1"))
+            self.assertEqual([t.id for t in replay], [t.id for t in first])
+            self.assertEqual(WalletTxn.query.count(), 4)
+            self.assertAlmostEqual(self._balance(self.merchant_id), 900.0)
+            self.assertAlmostEqual(self._balance(self.platform_id), 150.0)
+
+    def test_relative_updates_do_not_lose_concurrent_credits(self):
+        with self.app.app_context():
+            post_txns(self._settlement_legs("order:1"))
+            stale = Wallet.query.filter_by(user_id=self.platform_id).first()
+            self.assertAlmostEqual(float(stale.balance), 150.0)
+            post_txns(self._settlement_legs("order:2"), commit=False)
+            post_txns(self._settlement_legs("order:3"))
+            self.assertAlmostEqual(self._balance(self.platform_id), 450.0)
+
+    def test_debit_respects_available_balance(self):
+        with self.app.app_context():
+            post_txn(user_id=self.buyer_id, direction="credit", amount=100.0, kind="topup", reference="pay:1", note="")
+            wallet = Wallet.query.filter_by(user_id=self.buyer_id).first()
+            wallet.reserved_balance = 30.0
+            db.session.commit()
+
+            self.assertIsNone(
+                post_txn(user_id=self.buyer_id, direction="debit", amount=80.0, kind="purchase", reference="p:1", note="")
+            )
+            self.assertEqual(WalletTxn.query.filter_by(kind="purchase").count(), 0)
+            ok = post_txn(user_id=self.buyer_id, direction="debit", amount=70.0, kind="purchase", reference="p:2", note="")
+            self.assertIsNotNone(ok)
+            self.assertAlmostEqual(self._balance(self.buyer_id), 30.0)
+
+    def test_all_or_nothing_rolls_back_every_leg(self):
+        with self.app.app_context():
+            legs = [
+                dict(user_id=self.platform_id, direction="credit", amount=25.0, kind="platform_fee", reference="b:1", note=""),
+                dict(user_id=self.buyer_id, direction="debit", amount=500.0, kind="shortlet_booking", reference="b:1", note=""),
+            ]
+            self.assertEqual(post_txns(legs, all_or_nothing=True), [None, None])
+            self.assertEqual(WalletTxn.query.count(), 0)
+            partial = post_txns(legs)
+            self.assertIsNotNone(partial[0])
+            self.assertIsNone(partial[1])
+            self.assertAlmostEqual(self._balance(self.platform_id), 25.0)
+
+    def test_all_or_nothing_keeps_the_callers_pending_changes(self):
+        with self.app.app_context():
+            driver = db.session.get(User, self.driver_id)
+            driver.name = "Renamed"
+            legs = [
+                dict(user_id=self.platform_id, direction="credit", amount=25.0, kind="platform_fee", reference="b:2", note=""),
+                dict(user_id=self.buyer_id, direction="debit", amount=500.0, kind="shortlet_booking", reference="b:2", note=""),
+            ]
+            self.assertEqual(post_txns(legs, all_or_nothing=True, commit=False), [None, None])
+            db.session.commit()
+            db.session.expire_all()
+            self.assertEqual(db.session.get(User, self.driver_id).name, "Renamed")
+            self.assertEqual(WalletTxn.query.count(), 0)
+            self.assertAlmostEqual(self._balance(self.platform_id), 0.0)
+
+    def test_autosave_sweeps_after_insert_and_never_fails_the_posting(self):
+        with self.app.app_context():
+            db.session.add(
+                MoneyBoxAccount(user_id=self.driver_id, status="ACTIVE", autosave_enabled=True, autosave_percent=10.0)
+            )
+            db.session.commit()
+            legs = self._settlement_legs("order:7")
+            with mock.patch("app.utils.moneybox.autosave_from_commission", side_effect=RuntimeError("moneybox down")):
+                first = post_txns(legs)
+            self.assertTrue(all(t is not None for t in first))
+            self.assertAlmostEqual(self._balance(self.driver_id), 200.0)
+            self.assertEqual(MoneyBoxLedger.query.count(), 0)
+
+            swept = post_txns(self._settlement_legs("order:8"))
+            self.assertAlmostEqual(float(swept[1].amount), 180.0)
+            self.assertAlmostEqual(self._balance(self.driver_id), 380.0)
+            self.assertEqual(MoneyBoxLedger.query.filter_by(reference="order:8").count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import time
+import unittest
+from unittest import mock
+
+from app import create_app
+from app.extensions import db
+from app.jobs.wallet_reconciler import reconcile_wallet_range, reconcile_wallets, scan_wallet_range, wallet_id_ranges
+from app.models import AuditLog, User, Wallet, WalletTxn
+from app.services.reconciliation_service import iter_wallet_drift, recompute_wallet_balances
+from app.utils.jwt_utils import create_token
+
+
+class WalletReconciliationEngineTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            "SQLALCHEMY_DATABASE_URI": os.getenv("SQLALCHEMY_DATABASE_URI"),
+            "DATABASE_URL": os.getenv("DATABASE_URL"),
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+        cls.client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            self._seed()
+
+    def _seed(self):
+        stamp = str(time.time_ns())
+        admin = User(name="Admin", email=f"recon-admin-{stamp}@fliptrybe.test", role="admin", is_verified=True)
+        admin.set_password("Passw0rd!")
+        db.session.add(admin)
+        db.session.flush()
+        self.admin_id = int(admin.id)
+        self.bad_wallet_ids = []
+        for idx in range(12):
+            user = User(name=f"U{idx}", email=f"recon-{idx}-{stamp}@fliptrybe.test", role="buyer")
+            user.set_password("Passw0rd!")
+            db.session.add(user)
+            db.session.flush()
+            balance = 100.0
+            if idx in (3, 9):
+                balance = 175.0
+            wallet = Wallet(user_id=int(user.id), balance=balance, reserved_balance=0.0)
+            if idx == 5:
+                wallet.reserved_balance = 500.0
+            db.session.add(wallet)
+            db.session.flush()
+            db.session.add_all(
+                [
+                    WalletTxn(wallet_id=wallet.id, user_id=user.id, direction="credit", amount=150.0, kind="topup", reference=f"t:{idx}"),
+                    WalletTxn(wallet_id=wallet.id, user_id=user.id, direction="debit", amount=50.0, kind="payout", reference=f"p:{idx}"),
+                ]
+            )
+            if idx in (3, 9):
+                self.bad_wallet_ids.append(int(wallet.id))
+        db.session.commit()
+
+    def test_range_scan_finds_only_mismatched_wallets(self):
+        with self.app.app_context():
+            ranges = wallet_id_ranges(chunk_size=50)
+            self.assertEqual(len(ranges), 1)
+            scan = scan_wallet_range(ranges[0][0], ranges[0][1])
+            self.assertEqual(scan["checked"], 12)
+            by_wallet = {item["wallet_id"]: item for item in scan["items"]}
+            for wallet_id in self.bad_wallet_ids:
+                self.assertIn("ledger_mismatch", by_wallet[wallet_id]["issues"])
+                self.assertAlmostEqual(by_wallet[wallet_id]["drift"], 75.0)
+            self.assertEqual(len(by_wallet), 3)
+
+    def test_reconcile_wallets_bulk_inserts_anomalies_across_chunks(self):
+        with self.app.app_context():
+            res = reconcile_wallets(limit=None, chunk_size=50)
+            self.assertEqual(res, {"checked": 12, "anomalies": 3})
+            logged = AuditLog.query.filter_by(action="wallet_anomaly").all()
+            self.assertEqual(len(logged), 3)
+            meta = json.loads(logged[0].meta)
+            self.assertIn("issues", meta)
+
+            limited = reconcile_wallets(limit=4, chunk_size=50)
+            self.assertEqual(limited["checked"], 4)
+            self.assertEqual(limited["anomalies"], 1)
+
+    def test_range_insert_failure_raises_for_retry(self):
+        with self.app.app_context():
+            id_start, id_end = wallet_id_ranges(chunk_size=50)[0]
+            with mock.patch("app.jobs.wallet_reconciler.insert", side_effect=RuntimeError("db down")):
+                with self.assertRaises(RuntimeError):
+                    reconcile_wallet_range(id_start, id_end)
+            self.assertEqual(AuditLog.query.filter_by(action="wallet_anomaly").count(), 0)
+
+    def test_drift_iterator_matches_summary(self):
+        with self.app.app_context():
+            streamed = [item["wallet_id"] for item in iter_wallet_drift(chunk_size=50)]
+            self.assertEqual(sorted(streamed), sorted(self.bad_wallet_ids))
+            summary = recompute_wallet_balances(workers=4, chunk_size=50)
+            self.assertEqual(summary["wallet_count"], 12)
+            self.assertEqual(summary["drift_count"], 2)
+
+    def test_stream_endpoint_emits_ndjson_and_csv(self):
+        headers = {"Authorization": f"Bearer {create_token(self.admin_id)}"}
+        res = self.client.get("/api/admin/reconcile/wallet-ledger/stream?format=ndjson&chunk_size=50&persist=1", headers=headers)
+        self.assertEqual(res.status_code, 200)
+        lines = [json.loads(line) for line in res.get_data(as_text=True).splitlines() if line.strip()]
+        self.assertEqual([line["type"] for line in lines], ["drift", "drift", "summary"])
+        self.assertEqual(lines[-1]["drift_count"], 2)
+        self.assertTrue(lines[-1]["report_id"])
+
+        res = self.client.get("/api/admin/reconcile/wallet-ledger/stream?format=csv", headers=headers)
+        self.assertEqual(res.status_code, 200)
+        rows = list(csv.reader(io.StringIO(res.get_data(as_text=True))))
+        self.assertEqual(rows[0][0], "wallet_id")
+        self.assertEqual(len(rows), 3)
+
+        res = self.client.get("/api/admin/reconcile/wallet-ledger/stream?format=xml", headers=headers)
+        self.assertEqual(res.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from app import create_app
+from app.extensions import db
+from app.jobs.webhook_inbox import append_webhook, drain_webhook_inbox
+from app.models import PaymentIntent, User, Wallet, WalletTxn, WebhookInbox
+from app.utils.autopilot import get_settings
+from app.utils.jwt_utils import create_token
+from app.utils.transactions import batch_transaction
+
+
+class WebhookInboxTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._saved_env = {
+            "SQLALCHEMY_DATABASE_URI": os.getenv("SQLALCHEMY_DATABASE_URI"),
+            "DATABASE_URL": os.getenv("DATABASE_URL"),
+            "CELERY_BROKER_URL": os.getenv("CELERY_BROKER_URL"),
+            "REDIS_URL": os.getenv("REDIS_URL"),
+            "PAYSTACK_WEBHOOK_INBOX": os.getenv("PAYSTACK_WEBHOOK_INBOX"),
+        }
+        os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+        os.environ["CELERY_BROKER_URL"] = ""
+        os.environ["REDIS_URL"] = ""
+        os.environ["PAYSTACK_WEBHOOK_INBOX"] = "true"
+        cls.app = create_app()
+        cls.app.config.update(TESTING=True)
+        cls.client = cls.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        for key, value in cls._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def setUp(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            admin = User(name="Admin", email=f"inbox-admin-{time.time_ns()}@fliptrybe.test", role="admin")
+            admin.set_password("Passw0rd!")
+            buyer = User(name="Buyer", email=f"inbox-buyer-{time.time_ns()}@fliptrybe.test", role="buyer")
+            buyer.set_password("Passw0rd!")
+            db.session.add_all([admin, buyer])
+            db.session.commit()
+            self.admin_id = int(admin.id)
+            self.buyer_id = int(buyer.id)
+
+    def _intent(self, reference: str, amount: float = 500.0) -> None:
+        db.session.add(PaymentIntent(user_id=self.buyer_id, reference=reference, purpose="topup", amount=amount))
+        db.session.commit()
+
+    def _event(self, event_id: str, reference: str, amount_kobo: int = 50000) -> dict:
+        return {"id": event_id, "event": "charge.success", "data": {"reference": reference, "amount": amount_kobo}}
+
+    def _balance(self) -> float:
+        row = Wallet.query.filter_by(user_id=self.buyer_id).first()
+        return float(row.balance or 0.0) if row else 0.0
+
+    def _append(self, payload: dict) -> int | None:
+        return append_webhook(
+            provider="paystack",
+            event_id=payload["id"],
+            event_type=payload["event"],
+            reference=payload["data"]["reference"],
+            source="test:inbox",
+            signature=None,
+            raw_text=json.dumps(payload),
+        )
+
+    def test_route_appends_once_and_drains_inline(self):
+        with self.app.app_context():
+            self._intent("TOPUP-1")
+        payload = self._event("evt-1", "TOPUP-1")
+        first = self.client.post("/api/payments/webhook/paystack", json=payload)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.get_json()["queued"])
+        dup = self.client.post("/api/payments/webhook/paystack", json=payload)
+        self.assertTrue(dup.get_json()["replayed"])
+        bad = self.client.post("/api/payments/webhook/paystack", json={"data": {}})
+        self.assertEqual(bad.status_code, 400)
+
+        with self.app.app_context():
+            rows = WebhookInbox.query.all()
+            self.assertEqual([(r.event_id, r.status) for r in rows], [("evt-1", "processed")])
+            self.assertAlmostEqual(self._balance(), 500.0)
+            self.assertEqual(WalletTxn.query.filter_by(kind="topup").count(), 1)
+
+    def test_route_applies_only_its_own_event_inline(self):
+        with self.app.app_context():
+            self._intent("TOPUP-OLD")
+            self._intent("TOPUP-NEW")
+            backlog = self._append(self._event("evt-old", "TOPUP-OLD"))
+            # Keep the throttled autopilot tick, which drains the backlog, out of this request.
+            settings = get_settings()
+            settings.last_run_at = datetime.utcnow()
+            db.session.commit()
+        res = self.client.post("/api/payments/webhook/paystack", json=self._event("evt-new", "TOPUP-NEW"))
+        self.assertTrue(res.get_json()["queued"])
+        with self.app.app_context():
+            status = {r.event_id: r.status for r in WebhookInbox.query.all()}
+            self.assertEqual(status, {"evt-old": "pending", "evt-new": "processed"})
+            self.assertEqual(drain_webhook_inbox(only_ids=[backlog])["processed"], 1)
+
+    def test_failed_event_holds_back_later_events_for_same_reference(self):
+        from app.segments import segment_payments
+
+        real = segment_payments.process_paystack_webhook
+        seen = []
+
+        def flaky(**kwargs):
+            seen.append(kwargs["payload"]["id"])
+            if kwargs["payload"]["id"] == "a-1":
+                return {"ok": False, "error": "WEBHOOK_PROCESSING_FAILED", "message": "boom"}, 200
+            return real(**kwargs)
+
+        with self.app.app_context():
+            self._intent("REF-A")
+            self._intent("REF-B")
+            self._append(self._event("a-1", "REF-A"))
+            self._append(self._event("b-1", "REF-B"))
+            self._append(self._event("a-2", "REF-A"))
+            with patch.object(segment_payments, "process_paystack_webhook", side_effect=flaky):
+                result = drain_webhook_inbox(batch_size=10)
+            self.assertEqual((result["processed"], result["failed"], result["deferred"]), (1, 1, 1))
+            self.assertEqual(seen, ["a-1", "b-1"])
+            status = {r.event_id: r.status for r in WebhookInbox.query.all()}
+            self.assertEqual(status, {"a-1": "pending", "b-1": "processed", "a-2": "pending"})
+
+            # a-2 stays parked behind a-1 until a-1 has been retried.
+            WebhookInbox.query.filter_by(event_id="a-2").update({"available_at": db.func.datetime("now", "-1 minute")})
+            db.session.commit()
+            again = drain_webhook_inbox(batch_size=10)
+            self.assertEqual(again["batches"], 0)
+
+    def test_replay_endpoint_requeues_dead_lettered_events(self):
+        with self.app.app_context():
+            self._intent("REF-R")
+            inbox_id = self._append(self._event("r-1", "REF-R"))
+            row = db.session.get(WebhookInbox, inbox_id)
+            row.status = "failed"
+            row.attempts = 5
+            db.session.commit()
+        headers = {"Authorization": f"Bearer {create_token(self.admin_id)}"}
+        res = self.client.post("/api/admin/payments/webhook-inbox/replay", json={"status": "failed"}, headers=headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.get_json()["replayed"], 1)
+        listing = self.client.get("/api/admin/payments/webhook-inbox", headers=headers).get_json()
+        self.assertEqual(listing["stats"], {"processed": 1})
+        with self.app.app_context():
+            self.assertAlmostEqual(self._balance(), 500.0)
+
+    def test_batch_transaction_commits_once(self):
+        with self.app.app_context():
+            with self.assertRaises(RuntimeError):
+                with batch_transaction():
+                    db.session.add(PaymentIntent(user_id=self.buyer_id, reference="TX-1", purpose="topup", amount=1.0))
+                    db.session.commit()
+                    raise RuntimeError("abort batch")
+            self.assertEqual(PaymentIntent.query.filter_by(reference="TX-1").count(), 0)
+            with batch_transaction():
+                db.session.add(PaymentIntent(user_id=self.buyer_id, reference="TX-2", purpose="topup", amount=1.0))
+                db.session.commit()
+            self.assertEqual(PaymentIntent.query.filter_by(reference="TX-2").count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()